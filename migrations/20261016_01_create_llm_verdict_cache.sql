@@ -0,0 +1,24 @@
+-- Migração: Cache persistente de vereditos LLM para validação de matches
+-- Descrição: Guarda a resposta bruta do LLM por fingerprint de
+-- (validador/modelo, versão do prompt, perfil da empresa, objeto e itens da licitação).
+-- Reavaliações reutilizam o veredito em vez de chamar o LLM de novo.
+
+CREATE TABLE IF NOT EXISTS llm_verdict_cache (
+    fingerprint CHAR(64) PRIMARY KEY,
+    validator VARCHAR(100) NOT NULL,
+    model_used VARCHAR(100),
+    prompt_version VARCHAR(32) NOT NULL,
+    verdict JSONB NOT NULL,
+    hit_count INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_hit_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Limpeza de entradas de prompts antigos
+CREATE INDEX IF NOT EXISTS idx_llm_verdict_cache_validator_prompt ON llm_verdict_cache(validator, prompt_version);
+CREATE INDEX IF NOT EXISTS idx_llm_verdict_cache_created_at ON llm_verdict_cache(created_at);
+
+COMMENT ON TABLE llm_verdict_cache IS 'Vereditos LLM de validação de matches, reutilizados entre reavaliações';
+COMMENT ON COLUMN llm_verdict_cache.fingerprint IS 'SHA-256 de validador + versão do prompt + perfil da empresa + objeto + itens';
+COMMENT ON COLUMN llm_verdict_cache.prompt_version IS 'Hash do código que monta o prompt; muda quando o prompt é editado';
+COMMENT ON COLUMN llm_verdict_cache.verdict IS 'Resposta bruta do LLM (reprocessada com o score atual a cada hit)';
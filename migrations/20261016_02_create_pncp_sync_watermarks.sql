@@ -0,0 +1,20 @@
+-- Migração: Watermarks da sincronização incremental com o PNCP
+-- Descrição: Guarda, por fonte e modalidade, a maior data de atualização já
+-- processada. A busca diária pede ao PNCP só as contratações atualizadas desde
+-- o watermark (/contratacoes/atualizacao) em vez de varrer a semana inteira.
+-- Apagar a linha (ou PNCP_SYNC_MODE=full) força um resync completo.
+
+CREATE TABLE IF NOT EXISTS pncp_sync_watermarks (
+    source VARCHAR(100) NOT NULL,
+    modalidade INTEGER NOT NULL,
+    watermark TIMESTAMP NOT NULL,
+    records_synced INTEGER NOT NULL DEFAULT 0,
+    last_sync_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_full_sync_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (source, modalidade)
+);
+
+COMMENT ON TABLE pncp_sync_watermarks IS 'Ponto de retomada da sincronização incremental com o PNCP por fonte e modalidade';
+COMMENT ON COLUMN pncp_sync_watermarks.watermark IS 'Maior dataAtualizacao (horário do PNCP, sem fuso) já gravada em licitacoes';
+COMMENT ON COLUMN pncp_sync_watermarks.records_synced IS 'Licitações recebidas na última sincronização';
+COMMENT ON COLUMN pncp_sync_watermarks.last_full_sync_at IS 'Último resync completo (janela inteira, sem watermark)';
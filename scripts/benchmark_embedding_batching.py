@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lotes por tamanho x lotes fixos na ordem de chegada (embeddings locais)
+
+Corpus misto como o do matching: títulos curtos de licitação intercalados com
+descrições longas de itens. Compara, no mesmo modelo e número de threads:
+- antes: lotes de --batch-size textos na ordem de chegada
+- agora: SentenceTransformerService.generate_embeddings (ordenado por tokens,
+  lotes pelo orçamento ST_BATCH_TOKEN_BUDGET, ordem restaurada)
+e mostra textos/s, tokens de padding e a diferença máxima entre os embeddings.
+
+Uso:
+    python scripts/benchmark_embedding_batching.py --model neuralmind/bert-base-portuguese-cased --texts 600
+    ST_MAX_SEQ_LENGTH=256 ST_BATCH_TOKEN_BUDGET=4096 python scripts/benchmark_embedding_batching.py
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.inference_backends import ACCURACY_CORPUS
+from services.sentence_transformer_service import (
+    SentenceTransformerService, ST_BATCH_TOKEN_BUDGET, ST_MAX_BATCH_SIZE, cpu_quota,
+)
+
+
+def mixed_corpus(count, seed=42):
+    """70% títulos curtos, 30% descrições longas (3 a 12 objetos concatenados)"""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for n in range(count):
+        if rng.random() < 0.7:
+            texts.append(f"{ACCURACY_CORPUS[n % len(ACCURACY_CORPUS)]} - lote {n}")
+        else:
+            parts = rng.choice(len(ACCURACY_CORPUS), size=rng.integers(3, 13))
+            texts.append(f"Item {n}: " + "; ".join(ACCURACY_CORPUS[p] for p in parts))
+    return texts
+
+
+def padding_tokens(lengths, batches):
+    return sum(len(batch) * max(lengths[i] for i in batch) - sum(lengths[i] for i in batch) for batch in batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='neuralmind/bert-base-portuguese-cased')
+    parser.add_argument('--texts', type=int, default=600)
+    parser.add_argument('--batch-size', type=int, default=32, help='tamanho fixo dos lotes do modo antigo')
+    parser.add_argument('--repeat', type=int, default=2)
+    args = parser.parse_args()
+
+    service = SentenceTransformerService(args.model)
+    texts = mixed_corpus(args.texts)
+    processed = [service._preprocess_text(text) for text in texts]
+    lengths = service._token_lengths(processed)
+
+    def fixed_batches():
+        embeddings = []
+        for i in range(0, len(processed), args.batch_size):
+            batch = processed[i:i + args.batch_size]
+            embeddings.extend(service.encoder.encode(batch, batch_size=len(batch), show_progress_bar=False,
+                                                     convert_to_numpy=True, normalize_embeddings=True))
+        return np.asarray(embeddings)
+
+    def bucketed():
+        return np.asarray(service.generate_embeddings(texts))
+
+    results = {}
+    for name, fn in (('lotes fixos', fixed_batches), ('por tamanho', bucketed)):
+        fn()  # aquecimento
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            embeddings = fn()
+            timings.append(time.perf_counter() - start)
+        results[name] = (min(timings), embeddings)
+
+    fixed = [list(range(i, min(i + args.batch_size, len(texts)))) for i in range(0, len(texts), args.batch_size)]
+    buckets = service._length_buckets(processed, ST_MAX_BATCH_SIZE)
+    info = service.get_model_info()
+
+    print(f"🔬 {args.model}: {args.texts} textos ({min(lengths)}-{max(lengths)} tokens, "
+          f"média {np.mean(lengths):.0f}), {info['num_threads']} threads, cota de CPU {cpu_quota():.2f}")
+    print(f"  {'modo':<12} {'lotes':>6} {'padding':>9} {'textos/s':>10}")
+    for name, batches in (('lotes fixos', fixed), ('por tamanho', buckets)):
+        elapsed = results[name][0]
+        print(f"  {name:<12} {len(batches):>6} {padding_tokens(lengths, batches):>9} {args.texts / elapsed:>10.1f}")
+    speedup = results['lotes fixos'][0] / results['por tamanho'][0]
+    max_diff = float(np.max(np.abs(results['lotes fixos'][1] - results['por tamanho'][1])))
+    print(f"  ganho: {speedup:.2f}x | orçamento {ST_BATCH_TOKEN_BUDGET} tokens | diferença máx. {max_diff:.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: formato das entradas do cache de embeddings (pickle antigo vs binário)
+
+Mede, para embeddings de --dim dimensões:
+- memória no Redis por 100k embeddings (MEMORY USAGE de --sample chaves de
+  cada formato, extrapolado)
+- throughput de encode/decode (embeddings/s), incluindo a conversão para
+  list que o EmbeddingCacheService devolve
+
+Uso (Redis local em localhost:6379):
+    python scripts/benchmark_embedding_format.py --dim 384 --sample 2000
+"""
+
+import os
+import sys
+import time
+import pickle
+import hashlib
+import argparse
+from datetime import datetime
+
+import numpy as np
+import redis
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.embedding_cache_service import encode_embedding, decode_embedding
+
+MODEL_NAME = 'sentence-transformers'
+KEY_PREFIX = f"bench:embedding-format:{os.getpid()}"
+
+
+def legacy_encode(embedding, text, text_hash):
+    """Entrada como era gravada antes (dict com list de floats, pickle)"""
+    return pickle.dumps({
+        'embedding': embedding,
+        'text_hash': text_hash,
+        'text_preview': text[:100] + "..." if len(text) > 100 else text,
+        'model_name': MODEL_NAME,
+        'cached_at': datetime.now().isoformat(),
+        'dimensions': len(embedding)
+    })
+
+
+def legacy_decode(raw, text_hash):
+    data = pickle.loads(raw)
+    return data['embedding'] if data.get('text_hash') == text_hash else None
+
+
+def throughput(fn, items, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(*item)
+    return len(items) * repeat / (time.perf_counter() - start)
+
+
+def memory_per_100k(client, name, entries):
+    pipe = client.pipeline(transaction=False)
+    keys = [f"{KEY_PREFIX}:{name}:{i}" for i in range(len(entries))]
+    for key, raw in zip(keys, entries):
+        pipe.set(key, raw, ex=600)
+    pipe.execute()
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.memory_usage(key, samples=0)
+    usage = pipe.execute()
+    client.delete(*keys)
+    return sum(usage) / len(usage) * 100_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dim', type=int, default=384)
+    parser.add_argument('--sample', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    texts = [f"Aquisição de material de consumo - item {i}" for i in range(args.sample)]
+    hashes = [hashlib.sha256(text.encode('utf-8')).hexdigest() for text in texts]
+    # Embeddings como os modelos devolvem (float32 convertido em list)
+    embeddings = [rng.normal(0, 0.05, args.dim).astype(np.float32).tolist() for _ in texts]
+
+    formats = {
+        'pickle (antigo)': (
+            lambda emb, text, h: legacy_encode(emb, text, h),
+            lambda raw, h: legacy_decode(raw, h),
+        ),
+        'binário float32': (
+            lambda emb, text, h: encode_embedding(emb, MODEL_NAME, h, 'float32'),
+            lambda raw, h: decode_embedding(raw, MODEL_NAME, h).tolist(),
+        ),
+        'binário float16': (
+            lambda emb, text, h: encode_embedding(emb, MODEL_NAME, h, 'float16'),
+            lambda raw, h: decode_embedding(raw, MODEL_NAME, h).tolist(),
+        ),
+    }
+
+    client = redis.Redis(host='localhost', port=6379)
+    try:
+        client.ping()
+    except redis.ConnectionError:
+        client = None
+        print("⚠️ Redis local indisponível - medindo só encode/decode")
+
+    print(f"🔬 {args.sample} embeddings de {args.dim} dimensões")
+    print(f"  {'formato':<18} {'bytes/entrada':>13} {'Redis/100k':>12} {'encode/s':>11} {'decode/s':>11} {'erro máx':>9}")
+    for n, (name, (encode, decode)) in enumerate(formats.items()):
+        entries = [encode(emb, text, h) for emb, text, h in zip(embeddings, texts, hashes)]
+        decoded = [decode(raw, h) for raw, h in zip(entries, hashes)]
+        max_error = max(float(np.max(np.abs(np.asarray(d) - np.asarray(e)))) for d, e in zip(decoded, embeddings))
+
+        encode_rate = throughput(encode, list(zip(embeddings, texts, hashes)), args.repeat)
+        decode_rate = throughput(decode, list(zip(entries, hashes)), args.repeat)
+        avg_size = sum(map(len, entries)) / len(entries)
+        memory = f"{memory_per_100k(client, f'format{n}', entries) / 2**20:9.1f} MB" if client else '        n/d'
+
+        print(f"  {name:<18} {avg_size:>13.0f} {memory:>12} {encode_rate:>11,.0f} {decode_rate:>11,.0f} {max_error:>9.1e}")
+
+
+if __name__ == '__main__':
+    main()
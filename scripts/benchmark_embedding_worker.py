@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker de embeddings compartilhado x modelo carregado em cada worker web
+
+Simula o gunicorn com --web-workers processos (padrão 2), cada um com
+--threads threads mandando pedidos de --texts-per-request textos ao mesmo tempo:
+- processo: cada processo carrega o próprio SentenceTransformerService
+- worker: um processo services.embedding_worker carrega o modelo e os
+  processos web usam WorkerBackedSentenceTransformer pelo socket Unix
+Mostra latência p50/p95 por pedido, textos/s e a memória residente (RSS)
+somada de todos os processos, mais os lotes agrupados pelo worker.
+
+--synthetic troca o modelo por um falso que ocupa --synthetic-mb de memória e
+gasta CPU por chamada + por texto (para rodar sem torch/modelo baixado).
+
+Uso:
+    python scripts/benchmark_embedding_worker.py --model neuralmind/bert-base-portuguese-cased
+    python scripts/benchmark_embedding_worker.py --synthetic --threads 8 --requests 20
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import multiprocessing
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.inference_backends import ACCURACY_CORPUS
+from services.embedding_worker import (
+    EmbeddingWorkerServer, EmbeddingWorkerClient, WorkerBackedSentenceTransformer, _default_service_factory,
+)
+
+
+def _loops_per_ms():
+    """Calibra quantas voltas de laço cabem em 1ms de CPU (trabalho fixo, não tempo de relógio)"""
+    start = time.process_time()
+    for _ in range(2_000_000):
+        pass
+    return 2_000_000 / ((time.process_time() - start) * 1000)
+
+
+class SyntheticService:
+    """Modelo falso: memória fixa e custo de CPU fixo por chamada + por texto"""
+
+    loops_per_ms = None
+
+    def __init__(self, model_name, megabytes, call_ms, text_ms):
+        self.model_name = model_name
+        self.weights = np.ones(int(megabytes * 1024 * 1024 / 4), dtype=np.float32)
+        self.call_ms, self.text_ms = call_ms, text_ms
+
+    def generate_embeddings(self, texts, batch_size=None):
+        for _ in range(int((self.call_ms + self.text_ms * len(texts)) * SyntheticService.loops_per_ms)):
+            pass
+        return [[float(len(text))] * 768 for text in texts if text.strip()]
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def service_factory(args):
+    if args.synthetic:
+        return lambda model_name: SyntheticService(model_name, args.synthetic_mb, args.call_ms, args.text_ms)
+    return _default_service_factory
+
+
+def run_worker(args, socket_path, ready):
+    server = EmbeddingWorkerServer(socket_path, service_factory=service_factory(args))
+    server.preload([args.model])
+    server.bind()
+    ready.set()
+    server.serve_forever()
+
+
+def run_web_worker(args, mode, socket_path, number, start, results):
+    """Um 'worker do gunicorn': carrega o serviço e dispara os pedidos em threads"""
+    import threading
+
+    if mode == 'worker':
+        service = WorkerBackedSentenceTransformer(args.model, client=EmbeddingWorkerClient(socket_path),
+                                                  local_factory=service_factory(args))
+    else:
+        service = service_factory(args)(args.model)
+        service.generate_embeddings(["aquecimento"])
+    latencies = []
+    lock = threading.Lock()
+
+    def client(thread_number):
+        for r in range(args.requests):
+            texts = [f"{ACCURACY_CORPUS[(thread_number + r + i) % len(ACCURACY_CORPUS)]} - {number}.{thread_number}.{r}.{i}"
+                     for i in range(args.texts_per_request)]
+            begin = time.perf_counter()
+            service.generate_embeddings(texts)
+            with lock:
+                latencies.append(time.perf_counter() - begin)
+
+    start.wait()
+    threads = [threading.Thread(target=client, args=(t,)) for t in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, rss_mb(os.getpid())))
+
+
+def run_mode(args, mode):
+    context = multiprocessing.get_context('fork')
+    socket_path = os.path.join(tempfile.mkdtemp(), 'embedding-worker.sock')
+    worker = None
+    if mode == 'worker':
+        ready = context.Event()
+        worker = context.Process(target=run_worker, args=(args, socket_path, ready), daemon=True)
+        worker.start()
+        ready.wait(timeout=600)
+
+    start, results = context.Event(), context.Queue()
+    web_workers = [context.Process(target=run_web_worker, args=(args, mode, socket_path, n, start, results))
+                   for n in range(args.web_workers)]
+    for process in web_workers:
+        process.start()
+    time.sleep(args.settle)  # processos carregam o serviço antes da largada
+    begin = time.perf_counter()
+    start.set()
+    collected = [results.get() for _ in web_workers]
+    elapsed = time.perf_counter() - begin
+    for process in web_workers:
+        process.join()
+
+    latencies = np.array([latency for chunk, _ in collected for latency in chunk]) * 1000
+    rss = sum(memory for _, memory in collected)
+    stats = None
+    if worker is not None:
+        rss += rss_mb(worker.pid)
+        stats = EmbeddingWorkerClient(socket_path).stats()
+        worker.terminate()
+        worker.join()
+    total_texts = len(latencies) * args.texts_per_request
+    return {'p50': np.percentile(latencies, 50), 'p95': np.percentile(latencies, 95),
+            'throughput': total_texts / elapsed, 'rss': rss, 'stats': stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='neuralmind/bert-base-portuguese-cased')
+    parser.add_argument('--web-workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help='pedidos concorrentes por worker web')
+    parser.add_argument('--requests', type=int, default=10, help='pedidos por thread')
+    parser.add_argument('--texts-per-request', type=int, default=8)
+    parser.add_argument('--settle', type=float, default=2.0, help='segundos para os processos carregarem o modelo')
+    parser.add_argument('--synthetic', action='store_true', help='modelo falso (sem torch)')
+    parser.add_argument('--synthetic-mb', type=float, default=450)
+    parser.add_argument('--call-ms', type=float, default=15, help='custo fixo por chamada do modelo falso')
+    parser.add_argument('--text-ms', type=float, default=2, help='custo por texto do modelo falso')
+    args = parser.parse_args()
+    if args.synthetic:
+        SyntheticService.loops_per_ms = _loops_per_ms()  # antes do fork: herdado pelos processos
+
+    print(f"🔬 {'modelo sintético' if args.synthetic else args.model}: {args.web_workers} workers web x "
+          f"{args.threads} threads x {args.requests} pedidos de {args.texts_per_request} textos")
+    print(f"  {'modo':<10} {'p50 ms':>9} {'p95 ms':>9} {'textos/s':>10} {'RSS total MB':>13}")
+    for mode in ('processo', 'worker'):
+        result = run_mode(args, mode)
+        print(f"  {mode:<10} {result['p50']:>9.1f} {result['p95']:>9.1f} {result['throughput']:>10.1f} {result['rss']:>13.0f}")
+        if result['stats']:
+            stats = result['stats']
+            print(f"  {'':<10} worker: {stats['requests']} pedidos em {stats['batches']} lotes "
+                  f"(média {stats['avg_batch']} textos, maior {stats['largest_batch']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: backends de inferência dos modelos locais (textos/s e memória)
+
+Cada backend roda num subprocesso próprio (memória residente sem
+interferência dos outros): carrega o modelo, aquece, gera embeddings de
+--texts textos e mede textos/s e RSS máximo do processo. Para comparar
+precisão, use scripts/check_inference_backend.py.
+
+Uso:
+    python scripts/benchmark_inference_backend.py --model neuralmind/bert-base-portuguese-cased \\
+        --backends torch torch-int8 onnx onnx-int8 --texts 512
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.inference_backends import ACCURACY_CORPUS, INFERENCE_BACKENDS
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(model_name, backend, texts_count, batch_size):
+    """Executado no subprocesso: imprime uma linha JSON com o resultado"""
+    from services.sentence_transformer_service import SentenceTransformerService
+
+    base_rss = rss_mb()
+    start = time.perf_counter()
+    service = SentenceTransformerService(model_name, backend=backend)
+    load_s = time.perf_counter() - start
+
+    texts = [f"{ACCURACY_CORPUS[n % len(ACCURACY_CORPUS)]} - lote {n // len(ACCURACY_CORPUS)}"
+             for n in range(texts_count)]
+    service.generate_embeddings(texts[:batch_size], batch_size=batch_size)
+
+    start = time.perf_counter()
+    service.generate_embeddings(texts, batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        'backend': service.backend,
+        'load_s': load_s,
+        'texts_per_s': texts_count / elapsed,
+        'rss_mb': rss_mb(),
+        'model_rss_mb': rss_mb() - base_rss,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='neuralmind/bert-base-portuguese-cased')
+    parser.add_argument('--backends', nargs='+', default=list(INFERENCE_BACKENDS), choices=INFERENCE_BACKENDS)
+    parser.add_argument('--texts', type=int, default=512)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--worker', choices=INFERENCE_BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_backend(args.model, args.worker, args.texts, args.batch_size)
+        return
+
+    print(f"🔬 {args.model}: {args.texts} textos, batch {args.batch_size}")
+    print(f"  {'backend':<11} {'carga (s)':>10} {'textos/s':>10} {'RSS (MB)':>10} {'modelo (MB)':>12}")
+    baseline = None
+    for backend in args.backends:
+        completed = subprocess.run(
+            [sys.executable, __file__, '--model', args.model, '--worker', backend,
+             '--texts', str(args.texts), '--batch-size', str(args.batch_size)],
+            capture_output=True, text=True,
+        )
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('{')]
+        if completed.returncode != 0 or not lines:
+            print(f"  {backend:<11} ❌ falhou: {completed.stderr.strip().splitlines()[-1:] or completed.returncode}")
+            continue
+
+        result = json.loads(lines[-1])
+        if result['backend'] != backend:
+            print(f"  {backend:<11} ⚠️ indisponível, carregou {result['backend']}")
+            continue
+        baseline = baseline or result
+        speedup = result['texts_per_s'] / baseline['texts_per_s']
+        print(f"  {backend:<11} {result['load_s']:>10.1f} {result['texts_per_s']:>10.1f} "
+              f"{result['rss_mb']:>10.0f} {result['model_rss_mb']:>12.0f}  ({speedup:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vetorização de empresas em execução quente (tier em memória x Redis)
+
+Simula o _vectorize_companies_with_cache de cada execução do matching para
+--companies empresas: uma execução fria (gera e grava os embeddings) e depois
+--runs execuções quentes servidas
+- só pelo Redis (tier em memória limpo antes de cada execução), como antes
+- pelo tier em memória do processo (EMBEDDING_LOCAL_CACHE_MB)
+
+Uso (Redis local em localhost:6379):
+    python scripts/benchmark_local_embedding_tier.py --companies 5000 --runs 5
+"""
+
+import os
+import io
+import sys
+import time
+import argparse
+import contextlib
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.embedding_cache_service import EmbeddingCacheService
+from matching.matching_engine import _vectorize_companies_with_cache
+
+DIM = 384
+
+
+class SyntheticVectorizer:
+    """Gera embeddings aleatórios (float32, como os modelos) sem carregar modelo"""
+
+    def __init__(self):
+        self.rng = np.random.default_rng(42)
+
+    def batch_vectorize(self, texts):
+        return self.rng.normal(0, 0.05, (len(texts), DIM)).astype(np.float32).tolist()
+
+
+def run(companies, cache_service, vectorizer):
+    for company in companies:
+        company.pop('embedding', None)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        _vectorize_companies_with_cache(companies, cache_service, vectorizer)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    cache_service = EmbeddingCacheService()
+    if not cache_service.redis_available:
+        print("⚠️ Redis local indisponível - inicie um redis-server para comparar os tiers")
+        return
+
+    tag = f"bench-tier-{os.getpid()}"
+    companies = [
+        {'id': n, 'descricao_servicos_produtos': f"{tag} empresa {n}: manutenção predial, limpeza e conservação"}
+        for n in range(args.companies)
+    ]
+    vectorizer = SyntheticVectorizer()
+    keys = [cache_service._redis_key('sentence-transformers', cache_service._hash_text(c['descricao_servicos_produtos']))
+            for c in companies]
+
+    try:
+        cold = run(companies, cache_service, vectorizer)
+
+        redis_times = []
+        for _ in range(args.runs):
+            cache_service.local_tier.discard(keys)
+            redis_times.append(run(companies, cache_service, vectorizer))
+
+        local_times = [run(companies, cache_service, vectorizer) for _ in range(args.runs)]
+        assert all(company.get('embedding') for company in companies)
+
+        tier = cache_service.local_tier.stats()
+        redis_ms = np.median(redis_times) * 1000
+        local_ms = np.median(local_times) * 1000
+        print(f"🔬 {args.companies} empresas, embeddings de {DIM} dimensões, {args.runs} execuções quentes (mediana)")
+        print(f"  fria (gera + grava):       {cold * 1000:9.1f} ms")
+        print(f"  quente, só Redis:          {redis_ms:9.1f} ms")
+        print(f"  quente, tier em memória:   {local_ms:9.1f} ms  ({redis_ms / local_ms:.1f}x)")
+        print(f"  tier local: {tier['entries']} entradas, {tier['memory_mb']:.1f}/{tier['budget_mb']:.0f} MB")
+    finally:
+        cache_service.local_tier.discard(keys)
+        cache_service.redis_client.delete(*keys)
+
+
+if __name__ == '__main__':
+    main()
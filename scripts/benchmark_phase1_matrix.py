@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Fase 1 do matching - loop por empresa vs matriz de empresas
+
+Compara o caminho antigo (calculate_enhanced_similarity para cada par
+licitação x empresa) com CompanyEmbeddingMatrix (uma multiplicação de
+matrizes por bloco de licitações) usando MockTextVectorizer, e verifica
+que os scores batem dentro da tolerância.
+
+Uso:
+    python scripts/benchmark_phase1_matrix.py --companies 10000 --bids 1000
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from matching.vectorizers import MockTextVectorizer, calculate_enhanced_similarity
+from matching.similarity_matrix import CompanyEmbeddingMatrix
+
+VOCABULARIO = [
+    'aquisição', 'contratação', 'serviços', 'manutenção', 'equipamento', 'software',
+    'sistema', 'informática', 'impressora', 'material', 'escritório', 'limpeza',
+    'medicamentos', 'hospitalar', 'obras', 'engenharia', 'consultoria', 'suporte',
+    'veículos', 'combustível', 'alimentação', 'merenda', 'escolar', 'tecnologia',
+    'dados', 'hardware', 'infraestrutura', 'desenvolvimento', 'papel', 'toner',
+]
+
+
+def gerar_textos(n, rng):
+    return [' '.join(rng.choices(VOCABULARIO, k=rng.randint(4, 12))) + f' lote {i}' for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=10000)
+    parser.add_argument('--bids', type=int, default=1000)
+    parser.add_argument('--block-size', type=int, default=128)
+    parser.add_argument('--legacy-bids', type=int, default=20,
+                        help='Licitações medidas no caminho antigo (extrapolado para --bids)')
+    parser.add_argument('--threshold', type=float, default=0.65)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vectorizer = MockTextVectorizer()
+
+    company_texts = gerar_textos(args.companies, rng)
+    bid_texts = gerar_textos(args.bids, rng)
+    companies = [
+        {'id': i, 'nome': f'Empresa {i}', 'descricao_servicos_produtos': text, 'embedding': emb}
+        for i, (text, emb) in enumerate(zip(company_texts, vectorizer.batch_vectorize(company_texts)))
+    ]
+    bid_embeddings = vectorizer.batch_vectorize(bid_texts)
+
+    print(f"🔬 {args.companies} empresas x {args.bids} licitações (dim={vectorizer.dimension})")
+
+    # Caminho antigo (amostra)
+    legacy_n = min(args.legacy_bids, args.bids)
+    legacy_scores = np.zeros((legacy_n, args.companies))
+    start = time.perf_counter()
+    for row in range(legacy_n):
+        for col, company in enumerate(companies):
+            legacy_scores[row, col], _ = calculate_enhanced_similarity(
+                bid_embeddings[row], company['embedding'], bid_texts[row], company['descricao_servicos_produtos']
+            )
+    legacy_per_bid = (time.perf_counter() - start) / legacy_n
+
+    # Caminho vetorizado
+    start = time.perf_counter()
+    matrix = CompanyEmbeddingMatrix(companies)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    total_candidates = 0
+    for offset in range(0, args.bids, args.block_size):
+        block = slice(offset, offset + args.block_size)
+        results = matrix.top_candidates_block(bid_embeddings[block], bid_texts[block], args.threshold)
+        total_candidates += sum(len(r) for r in results)
+    matrix_time = time.perf_counter() - start
+
+    scores, _, _ = matrix.score_block(bid_embeddings[:legacy_n], bid_texts[:legacy_n])
+    max_diff = float(np.max(np.abs(scores - legacy_scores))) if legacy_n else 0.0
+    same_candidates = all(
+        set(np.flatnonzero(legacy_scores[r] >= args.threshold + 1e-5))
+        <= set(np.flatnonzero(scores[r] >= args.threshold))
+        for r in range(legacy_n)
+    )
+
+    legacy_total = legacy_per_bid * args.bids
+    print(f"  loop por empresa:  {legacy_per_bid * 1000:9.1f} ms/licitação  (~{legacy_total:.1f}s extrapolado)")
+    print(f"  matriz:            {matrix_time / args.bids * 1000:9.3f} ms/licitação  ({matrix_time:.2f}s total, "
+          f"montagem {build_time:.2f}s)")
+    print(f"  speedup:           {legacy_total / matrix_time:.0f}x")
+    print(f"  candidatas >= {args.threshold}: {total_candidates}")
+    print(f"  diferença máxima de score: {max_diff:.2e}  | candidatas equivalentes: {same_candidates}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Fase 2 do matching - loops item x empresa vs matriz
+
+Compara o caminho antigo (calculate_enhanced_similarity / calculate_improved_similarity
+para cada par item x empresa candidata) com o caminho em matriz
+(CompanyEmbeddingMatrix.score_items + aggregate_item_scores) em licitações com
+muitos itens, e verifica que nº de itens aceitos e score final batem.
+
+Embeddings sintéticos agrupados por tema (para os scores cruzarem os thresholds).
+
+Uso:
+    python scripts/benchmark_phase2_matrix.py --items 250 --bids 20 --candidates 10
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from matching.vectorizers import calculate_enhanced_similarity
+from matching.similarity_matrix import CompanyEmbeddingMatrix, aggregate_item_scores
+from matching.improved_vectorizers import calculate_improved_similarity, improved_similarity_matrix
+from matching.improved_matching_config import get_quality_config, GENERIC_TERMS_BLACKLIST
+
+TEMAS = {
+    'informática': ['software', 'sistema', 'desenvolvimento', 'licença', 'computador', 'tecnologia', 'servidor'],
+    'limpeza': ['limpeza', 'higienização', 'detergente', 'desinfetante', 'papel', 'toalha'],
+    'saúde': ['medicamento', 'hospitalar', 'seringa', 'luva', 'cirúrgico', 'certificado'],
+    'obras': ['engenharia', 'construção', 'cimento', 'reforma', 'ABNT', 'NBR 9050'],
+}
+EXTRAS = GENERIC_TERMS_BLACKLIST[:6] + ['especializado', 'técnico', '12 meses', 'requisito obrigatório']
+DIM = 384
+
+
+def gerar_texto(tema, rng):
+    palavras = rng.choices(TEMAS[tema], k=rng.randint(3, 8)) + rng.choices(EXTRAS, k=rng.randint(0, 3))
+    rng.shuffle(palavras)
+    return ' '.join(palavras)
+
+
+def gerar_embedding(tema, centroids, rng_np, noise):
+    return (centroids[tema] + rng_np.normal(0, noise, DIM)).tolist()
+
+
+def legacy_enhanced(items, embeddings, candidates, threshold):
+    results = []
+    for company, score_fase1 in candidates:
+        item_matches, total = 0, 0.0
+        for desc in items:
+            score, _ = calculate_enhanced_similarity(
+                embeddings[desc], company['embedding'], desc, company['descricao_servicos_produtos']
+            )
+            if score >= threshold:
+                item_matches += 1
+                total += score
+        results.append((item_matches, (score_fase1 + total / item_matches) / 2 if item_matches else None))
+    return results
+
+
+def legacy_improved(items, embeddings, candidates, config, quality_level):
+    results = []
+    for company, score_fase1 in candidates:
+        item_matches, total = 0, 0.0
+        for desc in items:
+            score, _, analysis = calculate_improved_similarity(
+                embeddings[desc], company['embedding'], desc, company['descricao_servicos_produtos'],
+                quality_level=quality_level, return_analysis=True
+            )
+            if score >= config['threshold_phase2'] and analysis.get('should_accept', True):
+                item_matches += 1
+                total += score
+        results.append((item_matches, (score_fase1 + total / item_matches) / 2 if item_matches else None))
+    return results
+
+
+def matrix_path(matrix, items, embeddings, candidates, threshold=None, config=None, quality_level=None):
+    companies = [company for company, _ in candidates]
+    scores = matrix.score_items([embeddings[d] for d in items], items, [matrix.index_of(c) for c in companies])
+    if config is None:
+        accepted = scores >= threshold
+    else:
+        scores, should_accept = improved_similarity_matrix(
+            scores, items, [c['descricao_servicos_produtos'] for c in companies], quality_level
+        )
+        accepted = (scores >= config['threshold_phase2']) & should_accept
+    counts, aggregated = aggregate_item_scores(scores, accepted)
+    return [
+        (int(counts[col]), (score_fase1 + float(aggregated[col])) / 2 if counts[col] else None)
+        for col, (_, score_fase1) in enumerate(candidates)
+    ]
+
+
+def compare(legacy, vectorized):
+    count_mismatch, max_diff = 0, 0.0
+    for bid_legacy, bid_vec in zip(legacy, vectorized):
+        for (c1, f1), (c2, f2) in zip(bid_legacy, bid_vec):
+            if c1 != c2:
+                count_mismatch += 1
+            elif f1 is not None:
+                max_diff = max(max_diff, abs(f1 - f2))
+    return count_mismatch, max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=500)
+    parser.add_argument('--candidates', type=int, default=10, help='empresas aprovadas na Fase 1 por licitação')
+    parser.add_argument('--bids', type=int, default=20)
+    parser.add_argument('--items', type=int, default=250)
+    parser.add_argument('--threshold', type=float, default=0.70)
+    parser.add_argument('--quality-level', default='high')
+    parser.add_argument('--noise', type=float, default=0.035)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rng_np = np.random.default_rng(42)
+    centroids = {tema: rng_np.normal(0, 1 / np.sqrt(DIM), DIM) for tema in TEMAS}
+
+    companies = []
+    for i in range(args.companies):
+        tema = rng.choice(list(TEMAS))
+        companies.append({
+            'id': i, 'nome': f'Empresa {i}',
+            'descricao_servicos_produtos': gerar_texto(tema, rng) + f' empresa {i}',
+            'embedding': gerar_embedding(tema, centroids, rng_np, args.noise),
+        })
+    matrix = CompanyEmbeddingMatrix(companies)
+    config = get_quality_config(args.quality_level)
+
+    bids = []
+    for b in range(args.bids):
+        items, embeddings = [], {}
+        for n in range(args.items):
+            tema = rng.choice(list(TEMAS))
+            desc = gerar_texto(tema, rng) + f' item {n}'
+            items.append(desc)
+            embeddings[desc] = gerar_embedding(tema, centroids, rng_np, args.noise)
+        candidates = [(company, rng.uniform(0.7, 0.95)) for company in rng.sample(companies, args.candidates)]
+        bids.append((items, embeddings, candidates))
+
+    print(f"🔬 {args.bids} licitações x {args.items} itens x {args.candidates} empresas candidatas "
+          f"({args.companies} empresas na matriz)")
+
+    for name, legacy_fn, matrix_kwargs in (
+        ('enhanced (matching_engine)', lambda i, e, c: legacy_enhanced(i, e, c, args.threshold),
+         {'threshold': args.threshold}),
+        (f'improved/{args.quality_level} (improved_matching_engine)',
+         lambda i, e, c: legacy_improved(i, e, c, config, args.quality_level),
+         {'config': config, 'quality_level': args.quality_level}),
+    ):
+        start = time.perf_counter()
+        legacy = [legacy_fn(items, embeddings, candidates) for items, embeddings, candidates in bids]
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = [matrix_path(matrix, items, embeddings, candidates, **matrix_kwargs)
+                      for items, embeddings, candidates in bids]
+        matrix_time = time.perf_counter() - start
+
+        mismatches, max_diff = compare(legacy, vectorized)
+        accepted = sum(count for bid in vectorized for count, _ in bid)
+        print(f"\n  {name}")
+        print(f"    loops:   {legacy_time / args.bids * 1000:9.1f} ms/licitação")
+        print(f"    matriz:  {matrix_time / args.bids * 1000:9.2f} ms/licitação  "
+              f"(speedup {legacy_time / matrix_time:.0f}x)")
+        print(f"    pares item x empresa aceitos: {accepted} | contagens divergentes: {mismatches} | "
+              f"diferença máxima no score final: {max_diff:.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark: leitura do dataset nacional do PNCP em cache por tipo de consulta
+
+Mede, num worker sem índice da versão atual (acabou de subir ou o dataset
+acabou de mudar), bytes lidos do Redis e latência da busca completa
+(leitura + índice + filtros) para:
+- sem filtro de UF: dataset nacional inteiro (blob comprimido)
+- 1 UF: só o shard da UF (pncp:dataset:proposta:8:uf:<UF>)
+- 1 UF sem shards (PNCP_DATASET_SHARDS_ENABLED=false): blob inteiro, como antes
+e, com o índice já montado, o custo de uma busca repetida (só a versão).
+Mede também quantos bytes uma atualização incremental regrava com shards.
+
+Uso:
+    python scripts/benchmark_pncp_dataset_shards.py --records 20000,100000 --repeat 5
+    python scripts/benchmark_pncp_dataset_shards.py --redis-url redis://localhost:6379/15
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from benchmark_pncp_local_filters import DictRedis, build_dataset, percentiles
+from adapters import pncp_adapter, pncp_search_corpus
+from adapters.pncp_adapter import PNCPAdapter, PNCP_DATASET_CACHE_KEY
+from interfaces.procurement_data_source import SearchFilters
+
+QUERIES = [
+    ('nacional', {'keywords': 'material de limpeza'}),
+    ('1 UF', {'keywords': 'medicamentos', 'region_code': 'SP'}),
+    ('1 UF', {'keywords': 'saúde', 'region_code': 'MG', 'max_value': 500000.0}),
+    ('1 UF', {'region_code': 'RJ', 'municipality': 'Município 12'}),
+]
+
+
+class MeteredRedis:
+    """Repassa ao cliente real contando os bytes lidos pelo adapter"""
+
+    def __init__(self, client):
+        self.client, self.bytes_read, self.bytes_written, self.shards_written = client, 0, 0, 0
+
+    def get(self, key):
+        value = self.client.get(key)
+        self.bytes_read += len(value or b'')
+        return value
+
+    def mget(self, *keys):
+        values = self.client.mget(*keys)
+        self.bytes_read += sum(len(value) for value in values if value)
+        return values
+
+    def setex(self, key, ttl, value):
+        self.bytes_written += len(value)
+        return self.client.setex(key, ttl, value)
+
+    def pipeline(self, transaction=True):
+        metered, pipe = self, self.client.pipeline(transaction=transaction)
+
+        class Pipeline:
+            def setex(self, key, ttl, value):
+                metered.bytes_written += len(value)
+                metered.shards_written += ':uf:' in key
+                return pipe.setex(key, ttl, value)
+
+            def __getattr__(self, name):
+                return getattr(pipe, name)
+
+        return Pipeline()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+def search(adapter, filters):
+    asyncio.run(adapter.search_opportunities(SearchFilters(**filters)))
+
+
+def measure(adapter, filters, repeat: int, cold: bool):
+    """Latências (ms) e bytes lidos por busca, com ou sem índice já montado"""
+    samples, read = [], []
+    for _ in range(repeat):
+        if cold:
+            pncp_search_corpus._corpora.clear()
+        before = adapter.redis_client.bytes_read
+        start = time.perf_counter()
+        search(adapter, filters)
+        samples.append((time.perf_counter() - start) * 1000)
+        read.append(adapter.redis_client.bytes_read - before)
+    return samples, int(np.median(read))
+
+
+def run(adapter, client, records: int, repeat: int):
+    dataset = build_dataset(records, random.Random(42))
+    adapter.redis_client = MeteredRedis(client)
+    pncp_adapter.PNCP_DATASET_SHARDS_ENABLED = True
+    adapter._write_dataset_cache(dataset)
+    blob = len(client.get(f"{PNCP_DATASET_CACHE_KEY}:gz") or client.get(PNCP_DATASET_CACHE_KEY) or b'')
+    print(f"\n🔬 {records} registros ({blob / 1e6:.2f} MB no blob nacional)")
+
+    rows = []
+    for kind, filters in QUERIES:
+        pncp_adapter.PNCP_DATASET_SHARDS_ENABLED = kind != 'nacional'
+        rows.append((f"{kind:<8} sem índice, shards", filters, *measure(adapter, filters, repeat, cold=True)))
+        if kind == '1 UF':
+            pncp_adapter.PNCP_DATASET_SHARDS_ENABLED = False
+            rows.append((f"{kind:<8} sem índice, blob", filters, *measure(adapter, filters, repeat, cold=True)))
+    pncp_adapter.PNCP_DATASET_SHARDS_ENABLED = True
+    search(adapter, QUERIES[0][1])  # índice nacional montado
+    for kind, filters in QUERIES[:2]:
+        rows.append((f"{kind:<8} com índice", filters, *measure(adapter, filters, repeat * 4, cold=False)))
+
+    for label, filters, samples, read in rows:
+        uf = filters.get('region_code', '--')
+        print(f"  {label:<28} {uf:>3}  {read / 1e3:9.1f} KB lidos   {percentiles(samples)}")
+
+    # Atualizações incrementais: delta concentrado em uma UF e espalhado pelo país
+    rng = random.Random(7)
+    sp = [record for record in dataset['data'] if record['unidadeOrgao']['ufSigla'] == 'SP']
+    for label, changed in (('50 registros de SP', rng.sample(sp, min(50, len(sp)))),
+                           ('1% dos registros, todas as UFs', rng.sample(dataset['data'], max(1, records // 100)))):
+        for record in changed:
+            record['objetoCompra'] += ' (retificado)'
+        dataset['synced_at'] = datetime.now().isoformat(timespec='microseconds')
+        metered = adapter.redis_client
+        bytes_before, shards_before = metered.bytes_written, metered.shards_written
+        adapter._write_dataset_cache(dataset)
+        written = metered.bytes_written - bytes_before - blob
+        print(f"  atualização ({label}): {metered.shards_written - shards_before} shards regravados, "
+              f"{written / 1e3:.1f} KB além do blob")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', default='20000,100000', help='tamanhos do dataset, separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--redis-url', default=None, help='Redis real (padrão: em memória, sem rede)')
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    client = DictRedis()
+    if args.redis_url:
+        import redis
+        client = redis.Redis.from_url(args.redis_url, decode_responses=False)
+
+    adapter = PNCPAdapter({'api_base_url': 'http://127.0.0.1:9/v1'})
+    adapter.openai_service = None  # sem sinônimos: só leitura + filtros
+    adapter.cache_ttl = 3600
+    for records in (int(value) for value in args.records.split(',')):
+        run(adapter, client, records, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Benchmark: filtros locais do PNCPAdapter sobre o dataset nacional em cache
+
+Compara a implementação antiga de _apply_local_filters (lê e descomprime o
+dataset do Redis, normaliza o texto de cada registro e renormaliza cada termo,
+em toda busca) com o índice em memória (adapters/pncp_search_corpus.py):
+montado uma vez por versão do dataset; cada busca só confere a versão no Redis
+e cruza posting lists/máscaras. Confere antes que os dois devolvem exatamente
+os mesmos registros, na mesma ordem. Latências p50/p99 por busca.
+
+Uso:
+    python scripts/benchmark_pncp_local_filters.py --records 20000,100000 --repeat 5
+"""
+
+import os
+import sys
+import time
+import random
+import logging
+import argparse
+from datetime import datetime, timedelta
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import numpy as np
+
+from fake_pncp_server import make_records
+from adapters import pncp_search_corpus
+from adapters.pncp_adapter import PNCPAdapter, PNCP_DATASET_CACHE_KEY
+from adapters.pncp_search_corpus import get_search_corpus
+
+DETALHES = [
+    "Aquisição de computadores e notebooks para as escolas municipais",
+    "Contratação de empresa para manutenção de ar-condicionado (split)",
+    "Fornecimento de medicamentos e insumos hospitalares - Farmácia Básica",
+    "Serviços de limpeza, conservação e higienização de prédios públicos",
+    "Locação de veículos tipo pick-up 4x4, com motorista",
+    "Reforma e ampliação da Unidade Básica de Saúde São José",
+    "Gêneros alimentícios perecíveis para merenda escolar",
+    "", None,
+]
+COMPLEMENTOS = ["Lote único", "Exclusivo ME/EPP", "Cota reservada de 25%", "Sessão pública às 09h", "", None]
+
+QUERIES = [
+    {'keywords': 'material de limpeza'},
+    {'keywords': 'medicamentos', 'region_code': 'SP'},
+    {'keywords': 'aquisição de computadores'},
+    {'keywords': 'Veículos', 'min_value': 100000.0},
+    {'keywords': '"merenda escolar" OR "gêneros alimentícios"'},
+    {'keywords': 'saúde', 'region_code': 'MG', 'max_value': 500000.0},
+    {'region_code': 'RJ', 'municipality': 'Município 12'},
+    {'keywords': 'ar-condicionado', 'min_value': 5000.0, 'max_value': 900000.0},
+]
+
+
+def legacy_apply_local_filters(adapter, data, filters):
+    """Cópia do _apply_local_filters anterior (sem sinônimos), sem os logs"""
+    filtered_data = data[:]
+    keywords = filters.get('keywords')
+    if keywords and keywords.strip():
+        all_search_terms = [keywords.strip()]
+        if ' OR ' in keywords:
+            import re
+            keyword_terms = re.findall(r'"([^"]*)"', keywords)
+            if not keyword_terms:
+                keyword_terms = [term.strip().strip('"') for term in keywords.split(' OR ') if term.strip()]
+            all_search_terms = list(set(keyword_terms))
+        else:
+            clean_keywords = adapter._legacy_normalizar(keywords)
+            all_search_terms.extend(term.strip() for term in clean_keywords.split() if term.strip())
+            all_search_terms = list(set(all_search_terms))
+        keyword_filtered = []
+        for item in filtered_data:
+            objeto_compra = (item.get('objetoCompra') or '').lower()
+            objeto_detalhado = (item.get('objetoDetalhado') or '').lower()
+            info_complementar = (item.get('informacaoComplementar') or '').lower()
+            texto_completo = f"{objeto_compra} {objeto_detalhado} {info_complementar}".strip()
+            if not texto_completo:
+                continue
+            texto_normalizado = adapter._legacy_normalizar(texto_completo)
+            for term in all_search_terms:
+                if not term:
+                    continue
+                term_normalizado = adapter._legacy_normalizar(term)
+                if term_normalizado and term_normalizado in texto_normalizado:
+                    keyword_filtered.append(item)
+                    break
+        filtered_data = keyword_filtered
+
+    region_code = filters.get('region_code')
+    if region_code:
+        filtered_data = [item for item in filtered_data
+                         if item.get('unidadeOrgao', {}).get('ufSigla', '').upper() == region_code.upper()]
+
+    municipality = filters.get('municipality')
+    if municipality:
+        municipality_normalized = adapter._legacy_normalizar(municipality)
+        filtered_data = [item for item in filtered_data
+                         if municipality_normalized in adapter._legacy_normalizar(
+                             item.get('unidadeOrgao', {}).get('municipioNome', ''))]
+
+    for key, keep in (('min_value', lambda value, limit: value >= limit),
+                      ('max_value', lambda value, limit: value <= limit)):
+        limit = filters.get(key)
+        if limit is None:
+            continue
+        value_filtered = []
+        for item in filtered_data:
+            item_value = item.get('valorTotalEstimado')
+            if item_value is not None:
+                try:
+                    if keep(float(item_value), float(limit)):
+                        value_filtered.append(item)
+                except (ValueError, TypeError):
+                    continue
+        filtered_data = value_filtered
+    return filtered_data
+
+
+def legacy_normalizar(texto):
+    """Cópia do _normalizar_simples anterior (imports e regex a cada chamada)"""
+    import unicodedata
+    import re
+    if not texto:
+        return ""
+    texto = texto.lower()
+    texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
+    texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
+    return ' '.join(texto.split())
+
+
+def build_dataset(count: int, rng: random.Random) -> dict:
+    records = make_records(count, start=datetime.now() - timedelta(days=14), days=14, seed=rng.randrange(1000))
+    for record in records:
+        record['objetoDetalhado'] = rng.choice(DETALHES)
+        record['informacaoComplementar'] = rng.choice(COMPLEMENTOS)
+    return {'data': records, 'total': len(records), 'watermark': max(r['dataAtualizacao'] for r in records),
+            'synced_at': datetime.now().isoformat(timespec='seconds')}
+
+
+class DictRedis:
+    """Redis em memória (só o que o PNCPAdapter usa): mede o custo de CPU de ler o dataset"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        return int(key in self.data)
+
+    def pipeline(self, transaction=True):
+        redis_client, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis_client, name)(*args) for name, args in calls]
+
+        return Pipeline()
+
+
+def latencies_ms(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        for filters in QUERIES:
+            start = time.perf_counter()
+            fn(filters)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentiles(samples: list) -> str:
+    p50, p99 = np.percentile(samples, [50, 99])
+    return f"p50 {p50:8.2f} ms   p99 {p99:8.2f} ms"
+
+
+def run(adapter, records: int, repeat: int):
+    dataset = build_dataset(records, random.Random(42))
+    data = dataset['data']
+    adapter.redis_client = DictRedis()
+    adapter._write_dataset_cache(dataset)
+    pncp_search_corpus._corpora.clear()
+
+    start = time.perf_counter()
+    corpus = get_search_corpus(adapter._read_dataset_cache())
+    build_ms = (time.perf_counter() - start) * 1000
+
+    for filters in QUERIES:
+        expected = legacy_apply_local_filters(adapter, data, filters)
+        got = adapter._apply_local_filters(corpus.records, filters, corpus=corpus)
+        assert [r['numeroControlePNCP'] for r in got] == [r['numeroControlePNCP'] for r in expected], filters
+
+    def legacy_search(filters):
+        # Antes: dataset lido (descomprimido e parseado) e varrido a cada busca
+        legacy_apply_local_filters(adapter, adapter._read_dataset_cache()['data'], filters)
+
+    def indexed_search(filters):
+        indexed = get_search_corpus(adapter._read_indexed_dataset())
+        adapter._apply_local_filters(indexed.records, filters, corpus=indexed)
+
+    legacy_filter = latencies_ms(lambda filters: legacy_apply_local_filters(adapter, data, filters), repeat)
+    index_filter = latencies_ms(lambda filters: adapter._apply_local_filters(corpus.records, filters, corpus=corpus),
+                                repeat * 4)
+    legacy_total = latencies_ms(legacy_search, repeat)
+    index_total = latencies_ms(indexed_search, repeat * 4)
+
+    payload = len(adapter.redis_client.mget(f"{PNCP_DATASET_CACHE_KEY}:gz", PNCP_DATASET_CACHE_KEY)[0] or b'')
+    print(f"\n🔬 {records} registros ({payload / 1e6:.1f} MB comprimido), {len(QUERIES)} consultas, "
+          f"mesmos resultados nos dois caminhos")
+    print(f"  filtros   antigo (varredura):  {percentiles(legacy_filter)}")
+    print(f"  filtros   índice invertido:    {percentiles(index_filter)}   "
+          f"({np.median(legacy_filter) / np.median(index_filter):.0f}x no p50)")
+    print(f"  busca     antigo (lê + varre): {percentiles(legacy_total)}")
+    print(f"  busca     índice (versão):     {percentiles(index_total)}   "
+          f"({np.median(legacy_total) / np.median(index_total):.0f}x no p50)")
+    print(f"  montagem do índice (uma vez por versão): {build_ms:.0f} ms, {len(corpus._vocab)} tokens")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', default='20000,100000', help='tamanhos do dataset, separados por vírgula')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    adapter = PNCPAdapter({'api_base_url': 'http://127.0.0.1:9/v1'})
+    adapter.openai_service = None  # sem sinônimos: mesmo conjunto de termos nos dois caminhos
+    adapter.cache_ttl = 3600
+    adapter._legacy_normalizar = legacy_normalizar
+    for records in (int(value) for value in args.records.split(',')):
+        run(adapter, records, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark: paginação nacional do PNCP - lotes de 20 threads x fetcher adaptativo
+
+Sobe um PNCP falso local que limita a taxa (429 + Retry-After), fica mais
+lento com requisições simultâneas e devolve 503 numa fração das chamadas, e
+compara contra ele:
+- antes: lotes de 20 páginas num ThreadPoolExecutor novo por lote,
+  requests.get sem sessão, pausa fixa de 0.5s; página com erro é perdida
+- agora: PNCPPageFetcher (sessão aiohttp de vida longa, AIMD, retry por página)
+Mostra tempo total, requisições/s, registros obtidos e páginas perdidas.
+
+Uso:
+    python scripts/benchmark_pncp_pagination.py --records 10000 --rate 40
+    python scripts/benchmark_pncp_pagination.py --records 10000 --rate 0 --error-rate 0
+"""
+
+import os
+import sys
+import time
+import argparse
+import concurrent.futures
+
+import requests
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from adapters.pncp_page_fetcher import PNCPPageFetcher
+from fake_pncp_server import FakePNCPServer, make_records
+
+PARAMS = {'dataInicial': '20240101', 'dataFinal': '20991231', 'codigoModalidadeContratacao': 8}
+
+
+def batched_threads(url, max_pages=200, batch_size=20):
+    """Estratégia antiga (_fetch_with_sequential_national_pagination)"""
+    def fetch(page):
+        try:
+            response = requests.get(url, params={**PARAMS, 'pagina': page, 'tamanhoPagina': 50}, timeout=30)
+            response.raise_for_status()
+            bids = response.json().get('data', []) if response.status_code == 200 else []
+            return bids, len(bids) >= 50
+        except (requests.RequestException, ValueError):
+            return [], False
+
+    records, lost, last = {}, 0, max_pages
+    for batch_start in range(1, max_pages + 1, batch_size):
+        batch_end = min(batch_start + batch_size - 1, last)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
+            results = list(executor.map(fetch, range(batch_start, batch_end + 1)))
+        stop = False
+        for page, (bids, has_more) in zip(range(batch_start, batch_end + 1), results):
+            if not bids:
+                lost += 1
+            for bid in bids:
+                records[bid['numeroControlePNCP']] = bid
+            if not has_more:
+                stop = True
+                break
+        if stop or batch_end >= last:
+            break
+        time.sleep(0.5)
+    return len(records), lost
+
+
+def adaptive(url, max_pages=200):
+    fetcher = PNCPPageFetcher()
+    try:
+        result = fetcher.fetch_pages(url, PARAMS, max_pages=max_pages)
+    finally:
+        fetcher.close()
+    return result['total'], len(result['failed_pages'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--rate', type=float, default=40, help='requisições/s aceitas pelo PNCP falso (0 = sem limite)')
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.15, help='latência base (s)')
+    parser.add_argument('--load-latency', type=float, default=0.02, help='latência extra por requisição simultânea (s)')
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    expected_pages = (args.records + 49) // 50
+    print(f"🔬 PNCP falso: {args.records} registros ({expected_pages} páginas), {args.rate or '∞'} req/s, "
+          f"latência {args.latency * 1000:.0f}ms + {args.load_latency * 1000:.0f}ms/simultânea, "
+          f"{args.error_rate:.0%} de 503")
+    print(f"  {'estratégia':<22} {'tempo s':>8} {'req/s':>7} {'requisições':>12} {'429':>5} {'registros':>10} {'perdidas':>9}")
+    for name, strategy in (('lotes de 20 threads', batched_threads), ('fetcher adaptativo', adaptive)):
+        server = FakePNCPServer(records, rate=args.rate, burst=args.burst, latency=args.latency,
+                                load_latency=args.load_latency, error_rate=args.error_rate, seed=1).start()
+        try:
+            start = time.perf_counter()
+            total, lost = strategy(f"{server.url}/contratacoes/proposta")
+            elapsed = time.perf_counter() - start
+        finally:
+            server.stop()
+        stats = server.stats
+        print(f"  {name:<22} {elapsed:>8.1f} {stats['requests'] / elapsed:>7.1f} {stats['requests']:>12} "
+              f"{stats['throttled']:>5} {total:>10} {lost:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: pares/segundo em calculate_improved_similarity
+
+- antes: um ImprovedBrazilianTextVectorizer('balanced') construído por par
+  (o que calculate_improved_similarity fazia), medido em poucos pares
+- depois (frio): analisador compartilhado, memo de textos vazio
+- depois (quente): memo já populado, como numa execução com milhares de pares
+
+Uso:
+    python scripts/benchmark_quality_similarity.py --bids 200 --companies 50 --legacy-pairs 5
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from matching.improved_vectorizers import (
+    ImprovedBrazilianTextVectorizer,
+    calculate_improved_similarity,
+    _cached_text_quality,
+)
+
+PALAVRAS = (
+    'contratação de empresa especializada em desenvolvimento de sistema software tecnologia '
+    'manutenção preventiva corretiva equipamentos certificado NBR 14725 Lei 14133 3 anos '
+    'experiência comprovada fornecimento material limpeza diversos conforme necessidade obra'
+).split()
+
+
+def gerar_textos(n, rng):
+    return [' '.join(rng.choices(PALAVRAS, k=rng.randint(8, 40))) for _ in range(n)]
+
+
+def medir(pares, quality_level, legacy=False):
+    start = time.perf_counter()
+    for bid_text, company_text, bid_emb, company_emb in pares:
+        if legacy:
+            ImprovedBrazilianTextVectorizer('balanced')
+        calculate_improved_similarity(bid_emb, company_emb, bid_text, company_text, quality_level)
+    return len(pares) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bids', type=int, default=200)
+    parser.add_argument('--companies', type=int, default=50)
+    parser.add_argument('--legacy-pairs', type=int, default=5,
+                        help='Pares medidos no modo antigo (0 para pular - exige modelos locais)')
+    parser.add_argument('--quality-level', default='high')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    bid_texts = gerar_textos(args.bids, rng)
+    company_texts = gerar_textos(args.companies, rng)
+    embedding = lambda: [rng.random() for _ in range(384)]
+    bid_embs = [embedding() for _ in bid_texts]
+    company_embs = [embedding() for _ in company_texts]
+    pares = [
+        (bt, ct, be, ce)
+        for bt, be in zip(bid_texts, bid_embs)
+        for ct, ce in zip(company_texts, company_embs)
+    ]
+
+    print(f"🔬 {len(pares)} pares ({args.bids} licitações x {args.companies} empresas), nível {args.quality_level}")
+
+    if args.legacy_pairs:
+        legacy = medir(pares[:args.legacy_pairs], args.quality_level, legacy=True)
+        print(f"  antes (vetorizador por par): {legacy:10.1f} pares/s")
+
+    _cached_text_quality.cache_clear()
+    cold = medir(pares, args.quality_level)
+    warm = medir(pares, args.quality_level)
+    print(f"  depois (memo frio):          {cold:10.1f} pares/s")
+    print(f"  depois (memo quente):        {warm:10.1f} pares/s")
+    print(f"  memo: {_cached_text_quality.cache_info()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: preprocessamento de textos brasileiros (BrazilianTextVectorizer)
+
+Compara a implementação antiga (dict de regex reconstruído e 10 re.sub por
+chamada) com preprocess_brazilian_text (alternação pré-compilada + memo LRU)
+num corpus de objetos de licitação sintéticos, e confere que a saída é
+idêntica caractere a caractere - inclusive em textos aleatórios com siglas
+coladas em pontuação, caixa mista e null bytes.
+
+Uso:
+    python scripts/benchmark_text_preprocess.py --texts 20000 --repeat 3
+"""
+
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from matching.vectorizers import preprocess_brazilian_text, BRAZILIAN_EXPANSIONS
+
+OBJETOS = [
+    "Contratação de empresa especializada em serviços de TI para suporte técnico",
+    "Registro de preços (SRP) para aquisição de material de limpeza e higienização",
+    "Aquisição de câmeras de CFTV e instalação de sistema de monitoramento",
+    "Serviço de rastreamento veicular via GPS para frota municipal",
+    "Licitação exclusiva para ME/EPP - fornecimento de gêneros alimentícios",
+    "Contratação de consultoria em RH e gestão de pessoas",
+    "Aquisição de medicamentos conforme orientações do TCU e da CGU",
+    "Manutenção preventiva e corretiva de aparelhos de ar condicionado",
+    "Publicação no PNCP: obra de reforma da escola municipal conforme ABNT NBR 9050",
+    "Fornecimento de licenças de software e serviços de desenvolvimento de sistemas",
+]
+COMPLEMENTOS = ["lote 1", "item 3", "conforme termo de referência", "pelo período de 12 meses",
+                "para a Secretaria de Saúde", "ti", "Me", "srp;", "(TI)", "GPS/CFTV", "TIME", "RHEMA"]
+
+
+def legacy_preprocess(text: str) -> str:
+    """Cópia do _preprocess_brazilian_text anterior (preprocess_text + re.sub por sigla)"""
+    if not text:
+        return ""
+    clean_text = text.strip()
+    clean_text = clean_text.replace('\x00', '')
+    brazilian_expansions = {r'\b' + sigla + r'\b': expansao for sigla, expansao in BRAZILIAN_EXPANSIONS}
+    for sigla_pattern, expansao in brazilian_expansions.items():
+        clean_text = re.sub(sigla_pattern, expansao, clean_text, flags=re.IGNORECASE)
+    return clean_text
+
+
+def build_corpus(count: int, unique_ratio: float, rng: random.Random) -> list:
+    """Objetos de licitação com complementos; unique_ratio controla a repetição (republicações)"""
+    unique = [
+        f"{rng.choice(OBJETOS)} - {' '.join(rng.sample(COMPLEMENTOS, rng.randint(1, 3)))} nº {n}"
+        for n in range(max(1, int(count * unique_ratio)))
+    ]
+    return [rng.choice(unique) for _ in range(count)]
+
+
+def random_text(rng: random.Random) -> str:
+    """Textos aleatórios para a checagem de equivalência"""
+    siglas = [sigla for sigla, _ in BRAZILIAN_EXPANSIONS]
+    pieces = siglas + [s.lower() for s in siglas] + ['ção', 'ÇÃO', 'x', '1', '_', '-', '/', ' ', '\x00', '\n', 'é']
+    return ''.join(rng.choice(pieces) + rng.choice(['', ' ', '.', '']) for _ in range(rng.randint(0, 20)))
+
+
+def timed(fn, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=int, default=20000)
+    parser.add_argument('--unique-ratio', type=float, default=0.3, help='fração de textos distintos no corpus')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--fuzz', type=int, default=50000, help='textos aleatórios na checagem de equivalência')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    corpus = build_corpus(args.texts, args.unique_ratio, rng)
+
+    # Equivalência: corpus + textos aleatórios
+    mismatches = [t for t in corpus + [random_text(rng) for _ in range(args.fuzz)]
+                  if preprocess_brazilian_text(t) != legacy_preprocess(t)]
+    assert not mismatches, f"{len(mismatches)} saídas diferentes, ex.: {mismatches[0]!r}"
+    print(f"✅ Saída idêntica em {len(corpus) + args.fuzz} textos ({args.fuzz} aleatórios)")
+
+    total = len(corpus) * args.repeat
+    legacy_time = timed(legacy_preprocess, corpus, args.repeat)
+    no_memo_time = timed(preprocess_brazilian_text.__wrapped__, corpus, args.repeat)
+    preprocess_brazilian_text.cache_clear()
+    memo_time = timed(preprocess_brazilian_text, corpus, args.repeat)
+    info = preprocess_brazilian_text.cache_info()
+
+    print(f"🔬 {len(corpus)} objetos ({len(set(corpus))} distintos) x {args.repeat} passadas")
+    print(f"  antigo (re.sub por sigla):  {total / legacy_time:12,.0f} textos/s")
+    print(f"  pré-compilado sem memo:     {total / no_memo_time:12,.0f} textos/s  "
+          f"({legacy_time / no_memo_time:.1f}x)")
+    print(f"  pré-compilado + LRU:        {total / memo_time:12,.0f} textos/s  "
+          f"({legacy_time / memo_time:.1f}x, hits {info.hits}, misses {info.misses})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: custo de construir um BrazilianTextVectorizer (startup) x warm_up
+
+Mede, num processo novo:
+- import de matching.vectorizers
+- construção de --instances vetorizadores (o que cada requisição web/job paga),
+  com as conexões de rede abertas durante a construção
+- warm_up() opcional (--warm-up): carrega os modelos, conecta o Redis e testa
+  a API do HuggingFace - o que antes acontecia em toda construção
+
+Uso:
+    python scripts/benchmark_vectorizer_startup.py --instances 20
+    python scripts/benchmark_vectorizer_startup.py --instances 1 --warm-up
+"""
+
+import os
+import sys
+import time
+import socket
+import argparse
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+
+def count_connections():
+    """Conta socket.connect/create_connection (sem bloquear)"""
+    counter = {'connections': 0}
+    original_connect = socket.socket.connect
+    original_create = socket.create_connection
+
+    def connect(sock, *args, **kwargs):
+        counter['connections'] += 1
+        return original_connect(sock, *args, **kwargs)
+
+    def create_connection(*args, **kwargs):
+        counter['connections'] += 1
+        return original_create(*args, **kwargs)
+
+    socket.socket.connect = connect
+    socket.create_connection = create_connection
+    return counter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--instances', type=int, default=20)
+    parser.add_argument('--warm-up', action='store_true', help='mede também o warm_up() (carrega modelos)')
+    args = parser.parse_args()
+
+    counter = count_connections()
+
+    start = time.perf_counter()
+    from matching.vectorizers import BrazilianTextVectorizer
+    import_ms = (time.perf_counter() - start) * 1000
+
+    timings = []
+    for _ in range(args.instances):
+        start = time.perf_counter()
+        vectorizer = BrazilianTextVectorizer()
+        timings.append((time.perf_counter() - start) * 1000)
+    construction_connections = counter['connections']
+
+    print(f"🔬 BrazilianTextVectorizer: {args.instances} construções")
+    print(f"  import matching.vectorizers: {import_ms:9.1f} ms")
+    print(f"  construção (mediana):        {sorted(timings)[len(timings) // 2]:9.3f} ms")
+    print(f"  construção (máx):            {max(timings):9.3f} ms")
+    print(f"  conexões na construção:      {construction_connections:9d}")
+    print(f"  torch importado:             {'sim' if 'torch' in sys.modules else 'não':>9}")
+
+    if args.warm_up:
+        start = time.perf_counter()
+        vectorizer.warm_up()
+        warm_up_s = time.perf_counter() - start
+        print(f"  warm_up (antigo custo do construtor): {warm_up_s:.1f} s, "
+              f"{counter['connections'] - construction_connections} conexões")
+
+
+if __name__ == '__main__':
+    main()
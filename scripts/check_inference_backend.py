@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Checagem de precisão de um backend de inferência contra o fp32
+
+Gera os embeddings do corpus fixo (ACCURACY_CORPUS) com o backend padrão
+(PyTorch fp32) e com o backend candidato, compara (cosseno médio/mínimo e
+vizinho mais próximo) e grava o resultado em ST_BACKEND_CHECKS_FILE. O
+SentenceTransformerService só usa o backend configurado em
+ST_INFERENCE_BACKEND(S) depois que ele passar aqui.
+
+Uso:
+    python scripts/check_inference_backend.py --model neuralmind/bert-base-portuguese-cased --backend onnx-int8
+    python scripts/check_inference_backend.py --model sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2 --backend torch-int8
+"""
+
+import os
+import sys
+import argparse
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.inference_backends import (
+    ACCURACY_CORPUS, DEFAULT_BACKEND, INFERENCE_BACKENDS, ST_BACKEND_CHECKS_FILE,
+    cosine_agreement, record_check,
+)
+from services.sentence_transformer_service import SentenceTransformerService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--model', default='neuralmind/bert-base-portuguese-cased')
+    parser.add_argument('--backend', required=True, choices=[b for b in INFERENCE_BACKENDS if b != DEFAULT_BACKEND])
+    args = parser.parse_args()
+
+    texts = list(ACCURACY_CORPUS)
+    reference = SentenceTransformerService(args.model, backend=DEFAULT_BACKEND).generate_embeddings(texts)
+    service = SentenceTransformerService(args.model, backend=args.backend)
+    if service.backend != args.backend:
+        print(f"❌ Backend {args.backend} não carregou para {args.model} (ver log)")
+        sys.exit(1)
+    candidate = service.generate_embeddings(texts)
+
+    result = cosine_agreement(reference, candidate)
+    record_check(args.model, args.backend, result)
+
+    print(f"🔬 {args.model}: {args.backend} x {DEFAULT_BACKEND} em {result['texts']} textos")
+    print(f"  cosseno médio:       {result['mean_cosine']:.6f}")
+    print(f"  cosseno mínimo:      {result['min_cosine']:.6f}")
+    print(f"  mesmo vizinho:       {result['neighbor_agreement']:.1%}")
+    print(f"  {'✅ APROVADO' if result['passed'] else '❌ REPROVADO'} (registrado em {ST_BACKEND_CHECKS_FILE})")
+    sys.exit(0 if result['passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Aquecimento do dataset nacional do PNCP no Redis (cron ou processo dedicado)
+
+Faz o que o aquecedor dos workers do gunicorn faz (services/pncp_cache_warmer.py),
+para rodar fora da aplicação (PNCP_CACHE_WARMER_AUTOSTART=false nos workers):
+atualiza pncp:dataset:proposta:8 com o delta desde o watermark (ou resync
+completo quando necessário) sob o mesmo lock no Redis, então pode conviver
+com os workers sem buscar duas vezes.
+
+Uso:
+    python scripts/daily_fetch_all_bids.py              # uma passada agora
+    python scripts/daily_fetch_all_bids.py --full       # resync completo
+    python scripts/daily_fetch_all_bids.py --if-stale   # só se passou de PNCP_CACHE_WARMER_INTERVAL
+    python scripts/daily_fetch_all_bids.py --loop       # agendador em primeiro plano
+    python scripts/daily_fetch_all_bids.py --status
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+
+# Adicionar src ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services.pncp_cache_warmer import get_pncp_cache_warmer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--full', action='store_true', help='resync completo em vez do delta')
+    parser.add_argument('--if-stale', action='store_true', help='não buscar se o dataset ainda está novo')
+    parser.add_argument('--loop', action='store_true', help='conferir e aquecer periodicamente (Ctrl+C para sair)')
+    parser.add_argument('--status', action='store_true', help='só mostrar o estado do cache')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    warmer = get_pncp_cache_warmer()
+    if args.status:
+        print(json.dumps(warmer.status(), indent=2, ensure_ascii=False))
+        return
+
+    if args.loop:
+        if not warmer.start():
+            print("❌ Aquecedor desativado (PNCP_CACHE_WARMER_ENABLED=false)")
+            sys.exit(1)
+        print(f"🔥 Aquecedor rodando (confere a cada {warmer.check_seconds:.0f}s, intervalo {warmer.interval}s)")
+        try:
+            warmer._thread.join()
+        except KeyboardInterrupt:
+            warmer.stop()
+        return
+
+    summary = warmer.warm(full=args.full, force=not args.if_stale)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if summary['status'] == 'fresh':
+        print(f"✅ Dataset ainda novo ({summary['cache_age_s']:.0f}s), nada a fazer")
+    elif summary['status'] == 'locked':
+        print("⏳ Outro processo está aquecendo o dataset agora")
+    elif summary['status'] == 'warmed':
+        print(f"✅ {summary['records']} licitações em cache ({summary['last_warm_mode']}, "
+              f"{summary['last_warm_duration_s']:.1f}s)")
+    else:
+        print(f"❌ Aquecimento falhou: {summary.get('last_warm_error') or summary.get('error') or summary['status']}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Servidor PNCP falso (local) para benchmarks e testes de paginação/sincronização
+
+Atende os endpoints de consulta usados pelo sistema, no formato da API real
+({"data", "totalRegistros", "totalPaginas", "numeroPagina", "paginasRestantes",
+"empty"}; 204 quando não há registros):
+- /v1/contratacoes/proposta     dataFinal = encerramento máximo da proposta
+                                (com now definido, só propostas ainda abertas)
+- /v1/contratacoes/publicacao   dataInicial/dataFinal = data de publicação
+- /v1/contratacoes/atualizacao  dataInicial/dataFinal = data de atualização
+com filtros codigoModalidadeContratacao e uf, e paginação pagina/tamanhoPagina
+(ou quantidade). Também /orgaos/{cnpj}/compras/{ano}/{sequencial}/itens
+(items_per_bid itens por contratação).
+
+Simula um servidor sob carga:
+- limite de taxa token bucket (--rate req/s, --burst): excedeu -> 429 com Retry-After
+- latência base + acréscimo por requisição simultânea em andamento
+- fração de respostas 503 (--error-rate)
+
+Uso:
+    python scripts/fake_pncp_server.py --port 8765 --records 10000 --rate 40
+    PNCP_API_BASE_URL=http://127.0.0.1:8765 ...
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+UFS = ["AC", "AL", "AP", "AM", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+       "PB", "PR", "PE", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SP", "SE", "TO"]
+OBJETOS = [
+    "Aquisição de material de limpeza", "Contratação de serviços de vigilância",
+    "Aquisição de gêneros alimentícios para merenda escolar", "Locação de veículos",
+    "Serviços de manutenção predial", "Aquisição de equipamentos de informática",
+    "Fornecimento de combustível", "Aquisição de medicamentos", "Serviços de limpeza urbana",
+    "Reforma de unidade básica de saúde",
+]
+
+
+def make_record(number: int, published: datetime, uf: str = None, modalidade: int = 8, rng=None) -> dict:
+    """Contratação no formato da API de consulta do PNCP"""
+    rng = rng or random.Random(number)
+    uf = uf or UFS[number % len(UFS)]
+    cnpj = f"{10000000 + number % 5000:08d}0001{number % 100:02d}"
+    return {
+        'numeroControlePNCP': f"{cnpj}-1-{number:06d}/{published.year}",
+        'anoCompra': published.year,
+        'sequencialCompra': number,
+        'objetoCompra': f"{OBJETOS[number % len(OBJETOS)]} - processo {number}",
+        'valorTotalEstimado': round(rng.uniform(1000, 2_000_000), 2),
+        'modalidadeId': modalidade,
+        'modalidadeNome': 'Pregão - Eletrônico' if modalidade in (6, 8) else 'Dispensa',
+        'situacaoCompraNome': 'Divulgada no PNCP',
+        'dataPublicacaoPncp': published.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataAtualizacao': published.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataAberturaProposta': published.strftime('%Y-%m-%dT%H:%M:%S'),
+        'dataEncerramentoProposta': (published + timedelta(days=10 + number % 30)).strftime('%Y-%m-%dT%H:%M:%S'),
+        'orgaoEntidade': {'cnpj': cnpj, 'razaoSocial': f"Prefeitura {number % 5000}", 'ufSigla': uf},
+        'unidadeOrgao': {'ufSigla': uf, 'municipioNome': f"Município {number % 800}",
+                         'codigoIbge': f"{1100000 + number % 800}", 'nomeUnidade': 'Secretaria de Administração'},
+        'linkSistemaOrigem': f"https://compras.exemplo.gov.br/{number}",
+    }
+
+
+def make_records(count: int, start: datetime = None, days: int = 14, seed: int = 42) -> list:
+    """count contratações publicadas ao longo de 'days' dias a partir de start"""
+    rng = random.Random(seed)
+    start = start or datetime.now() - timedelta(days=days)
+    return [make_record(n, start + timedelta(seconds=rng.randrange(days * 86400)), rng=rng) for n in range(count)]
+
+
+def _date(value: str, end_of_day: bool = False) -> str:
+    """YYYYMMDD -> prefixo ISO comparável com os campos de data"""
+    iso = f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+    return iso + ('T23:59:59' if end_of_day else 'T00:00:00')
+
+
+class FakePNCPServer:
+    """PNCP falso numa thread (ThreadingHTTPServer); records pode ser alterado entre chamadas"""
+
+    def __init__(self, records=None, rate: float = 0, burst: int = 10, latency: float = 0.02,
+                 load_latency: float = 0.005, error_rate: float = 0.0, retry_after: float = 1.0,
+                 port: int = 0, seed: int = 0, items_per_bid: int = 2):
+        self.records = list(records or [])
+        # Instante (datetime) da simulação: propostas encerradas antes dele saem de /proposta
+        self.now = None
+        self.items_per_bid = items_per_bid
+        self.rate, self.burst = rate, burst
+        self.latency, self.load_latency = latency, load_latency
+        self.error_rate, self.retry_after = error_rate, retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._in_flight = 0
+        self.stats = {'requests': 0, 'ok': 0, 'throttled': 0, 'errors': 0, 'no_content': 0, 'max_in_flight': 0,
+                      'records_served': 0}
+        self.requests_log = []
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            for key in self.stats:
+                self.stats[key] = 0
+            self.requests_log = []
+
+    # ---------- simulação ----------
+
+    def _take_token(self) -> bool:
+        if not self.rate:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def _select(self, endpoint: str, query: dict) -> list:
+        get = lambda name, default=None: query.get(name, [default])[0]
+        modalidade = get('codigoModalidadeContratacao')
+        uf = get('uf')
+        data_inicial, data_final = get('dataInicial'), get('dataFinal')
+        field = {'proposta': 'dataEncerramentoProposta', 'publicacao': 'dataPublicacaoPncp',
+                 'atualizacao': 'dataAtualizacao'}[endpoint]
+        selected = []
+        for record in self.records:
+            if modalidade and str(record['modalidadeId']) != str(modalidade):
+                continue
+            if uf and record['unidadeOrgao']['ufSigla'] != uf:
+                continue
+            if endpoint != 'proposta' and data_inicial and record[field] < _date(data_inicial):
+                continue
+            if endpoint == 'proposta' and self.now and record[field] < self.now.strftime('%Y-%m-%dT%H:%M:%S'):
+                continue
+            if data_final and record[field] > _date(data_final, end_of_day=True):
+                continue
+            selected.append(record)
+        selected.sort(key=lambda record: (record[field], record['numeroControlePNCP']))
+        return selected
+
+    def _admit(self, endpoint: str, query: dict):
+        """Na chegada: 429 se passou da taxa (resposta imediata), 503 numa fração das chamadas"""
+        with self._lock:
+            self.stats['requests'] += 1
+            self.requests_log.append((endpoint, {key: values[0] for key, values in query.items()}))
+            if not self._take_token():
+                self.stats['throttled'] += 1
+                return 429, {'message': 'Too Many Requests'}, {'Retry-After': str(self.retry_after)}
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.stats['errors'] += 1
+                return 503, {'message': 'Service Unavailable'}, {}
+        return None
+
+    def _respond(self, endpoint: str, query: dict):
+        """(status, corpo, cabeçalhos) de uma requisição admitida"""
+        with self._lock:
+            selected = self._select(endpoint, query)
+
+        page = int(query.get('pagina', ['1'])[0])
+        size = int(query.get('tamanhoPagina', query.get('quantidade', ['50']))[0])
+        total_pages = (len(selected) + size - 1) // size
+        chunk = selected[(page - 1) * size: page * size]
+        if not chunk:
+            with self._lock:
+                self.stats['no_content'] += 1
+            return 204, None, {}
+        with self._lock:
+            self.stats['ok'] += 1
+            self.stats['records_served'] += len(chunk)
+        return 200, {
+            'data': chunk,
+            'totalRegistros': len(selected),
+            'totalPaginas': total_pages,
+            'numeroPagina': page,
+            'paginasRestantes': max(0, total_pages - page),
+            'empty': False,
+        }, {}
+
+    def _items(self, path: str) -> list:
+        sequencial = int(path.rstrip('/').split('/')[-2])
+        return [{'numeroItem': n, 'descricao': f"Item {n} da compra {sequencial}", 'quantidade': 10,
+                 'unidadeMedida': 'UN', 'valorUnitarioEstimado': 12.5, 'materialOuServico': 'M'}
+                for n in range(1, self.items_per_bid + 1)]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                endpoint, query = parsed.path.rstrip('/').rsplit('/', 1)[-1], parse_qs(parsed.query)
+                if endpoint == 'itens':
+                    status, body, headers = 200, server._items(parsed.path), {}
+                elif endpoint not in ('proposta', 'publicacao', 'atualizacao'):
+                    status, body, headers = 404, {'message': 'not found'}, {}
+                else:
+                    status, body, headers = server._admit(endpoint, query) or (None, None, {})
+                if status is None:
+                    with server._lock:
+                        server._in_flight += 1
+                        in_flight = server._in_flight
+                        server.stats['max_in_flight'] = max(server.stats['max_in_flight'], in_flight)
+                    try:
+                        time.sleep(server.latency + server.load_latency * (in_flight - 1))
+                        status, body, headers = server._respond(endpoint, query)
+                    finally:
+                        with server._lock:
+                            server._in_flight -= 1
+                payload = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--records', type=int, default=10000)
+    parser.add_argument('--rate', type=float, default=40, help='requisições/s permitidas (0 = sem limite)')
+    parser.add_argument('--burst', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    server = FakePNCPServer(make_records(args.records), rate=args.rate, burst=args.burst,
+                            latency=args.latency, error_rate=args.error_rate, port=args.port).start()
+    print(f"🧪 PNCP falso em {server.url} ({args.records} contratações, {args.rate} req/s)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
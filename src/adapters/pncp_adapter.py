@@ -2,15 +2,23 @@ from typing import Dict, List, Any, Optional, Tuple
 import logging
 from datetime import datetime, timedelta
 import json
+import gzip
 import hashlib
 import aiohttp
 import asyncio
 import os
 import redis
+import numpy as np
 
 from interfaces.procurement_data_source import ProcurementDataSource, SearchFilters, OpportunityData
 from repositories.licitacao_pncp_repository import LicitacaoPNCPRepository
 from matching.pncp_api import fetch_bids_from_pncp, fetch_bid_items_from_pncp
+from services.pncp_sync_service import (
+    delta_window, is_newer, is_proposal_open, max_timestamp, merge_records, needs_full_resync
+)
+from adapters.pncp_search_corpus import (
+    SearchCorpus, cached_search_corpus, dataset_version, get_search_corpus, normalize_terms, normalize_text
+)
 
 # 🆕 NOVO: Import do OpenAI Service para sinônimos
 try:
@@ -28,6 +36,27 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 🔄 National dataset cache: stable key per source/modality, refreshed with deltas
+PNCP_DATASET_CACHE_KEY = 'pncp:dataset:proposta:8'
+PNCP_DATASET_CACHE_TTL = int(os.getenv('PNCP_DATASET_CACHE_TTL', str(7 * 86400)))
+# Older than this -> fetch the updates since the dataset watermark before searching
+PNCP_DATASET_REFRESH_SECONDS = int(os.getenv('PNCP_DATASET_REFRESH_SECONDS', '3600'))
+PNCP_DATASET_COMPRESS_THRESHOLD = 512 * 1024  # 512KB
+# Dataset metadata (synced_at/watermark) + shard manifest, written with it: a worker
+# whose search index already has this version skips downloading and parsing the dataset
+PNCP_DATASET_VERSION_KEY = f"{PNCP_DATASET_CACHE_KEY}:version"
+# 🗺️ Per-UF shards of the same dataset: region-filtered searches load only their UF
+PNCP_DATASET_SHARDS_ENABLED = os.getenv('PNCP_DATASET_SHARDS_ENABLED', 'true').lower() == 'true'
+PNCP_DATASET_SHARD_KEY = f"{PNCP_DATASET_CACHE_KEY}:uf:{{uf}}"
+
+
+def _dataset_shard_key(uf: str) -> str:
+    return PNCP_DATASET_SHARD_KEY.format(uf=uf or '_')
+
+
+def _record_uf(record: Dict[str, Any]) -> str:
+    return ((record.get('unidadeOrgao') or {}).get('ufSigla') or '').upper()
+
 
 class PNCPAdapter(ProcurementDataSource):
     """PNCP implementation of ProcurementDataSource interface
@@ -181,94 +210,21 @@ class PNCPAdapter(ProcurementDataSource):
         # Convert filters to internal format
         internal_filters = self._convert_filters(filters)
         
-        # Check cache first - usar chave genérica apenas com data para reutilizar entre buscas
-        cache_key = None
+        # ✅ Cached national dataset (shared by every filter), kept current with deltas
         if self.redis_client and self.cache_ttl > 0:
-            # ✅ Cache genérico por data para reutilizar entre diferentes filtros
-            cache_params = {
-                'data_inicial': self.data_inicial,
-                'data_final': self.data_final,
-                'modalidade': 8  # Pregão Eletrônico
-            }
-            cache_key = self._generate_cache_key("pncp_data_v4", cache_params)
             logger.info(f"🔗 Using API URL: {self.api_base_url}")  # Debug log for URL verification
-            try:
-                # Try to get from cache first
-                if self.redis_client and cache_key:
-                    try:
-                        # Try compressed version first
-                        compressed_key = f"{cache_key}:gz"
-                        cached_data = self.redis_client.get(compressed_key)
-                        
-                        if cached_data:
-                            import gzip
-                            import json
-                            # Decompress and parse
-                            decompressed_data = gzip.decompress(cached_data).decode('utf-8')
-                            cached_result = json.loads(decompressed_data)
-                            logger.info(f"🎯 Using compressed cached PNCP results ({len(cached_result.get('data', []))} records)")
-                            
-                            # ✅ APLICAR FILTROS LOCAIS NOS DADOS DO CACHE
-                            filtered_data = self._apply_local_filters(cached_result['data'], internal_filters)
-                            logger.info(f"🔍 Applied local filters: {len(filtered_data)} matches from {len(cached_result.get('data', []))} cached records")
-                            return [self._convert_to_opportunity_data(item) for item in filtered_data]
-                        
-                        # Fallback to uncompressed version
-                        cached_data = self.redis_client.get(cache_key)
-                        if cached_data:
-                            import json
-                            if isinstance(cached_data, bytes):
-                                cached_data = cached_data.decode('utf-8')
-                            cached_result = json.loads(cached_data)
-                            logger.info(f"🎯 Using cached PNCP results ({len(cached_result.get('data', []))} records)")
-                            
-                            # ✅ APLICAR FILTROS LOCAIS NOS DADOS DO CACHE
-                            filtered_data = self._apply_local_filters(cached_result['data'], internal_filters)
-                            logger.info(f"🔍 Applied local filters: {len(filtered_data)} matches from {len(cached_result.get('data', []))} cached records")
-                            return [self._convert_to_opportunity_data(item) for item in filtered_data]
-                            
-                    except Exception as e:
-                        logger.warning(f"Cache read error: {e}")
-            except Exception as e:
-                logger.warning(f"Cache read error: {e}")
- 
-        # If no cache hit, fetch fresh data
-        logger.info("🔍 Cache miss - fetching fresh PNCP data")
-        search_result = await self._fetch_with_efficient_pagination(internal_filters)
-        
-        # ✅ CACHE OPTIMIZATION: Cache raw data immediately after fetch for reuse
-        if self.redis_client and self.cache_ttl > 0 and cache_key:
-            try:
-                # Use compression for large datasets (3K+ records)
-                import gzip
-                import json
-                
-                # Convert to compact JSON
-                cache_data = json.dumps(search_result, separators=(',', ':'), default=str)
-                
-                # Compress if data is large (>500KB)
-                if len(cache_data) > 512 * 1024:  # 512KB threshold
-                    cache_data = gzip.compress(cache_data.encode('utf-8'))
-                    cache_key = f"{cache_key}:gz"  # Mark as compressed
-                    logger.info(f"💾 Compressing dataset for Redis cache")
-                
-                # TTL in seconds (24 hours)
-                ttl_seconds = 24 * 60 * 60  # 24 horas em segundos
-                self.redis_client.setex(
-                    cache_key, 
-                    ttl_seconds,  # TTL em segundos (86400)
-                    cache_data
-                )
-                logger.info(f"💾 Cached PNCP raw data ({len(search_result.get('data', []))} records) for 24 hours")
-            except Exception as e:
-                logger.warning(f"Cache write error: {e}")
+            search_result = await self._get_cached_dataset(internal_filters)
+        else:
+            logger.info("🔍 Cache disabled - fetching fresh PNCP data")
+            search_result = await self._fetch_with_efficient_pagination(internal_filters)
         
         # ✅ CRITICAL FIX: Apply local filters BEFORE converting to OpportunityData
         raw_data = search_result.get('data', [])
         logger.info(f"🔍 Before filters: {len(raw_data)} raw results")
         
-        # Apply local filters (same as working repository)
-        filtered_data = self._apply_local_filters(raw_data, internal_filters)
+        # Apply local filters (same as working repository) through the in-memory search index
+        corpus = get_search_corpus(search_result)
+        filtered_data = self._apply_local_filters(corpus.records, internal_filters, corpus=corpus)
         logger.info(f"✅ After local filters: {len(filtered_data)} filtered results")
         
         # Convert to OpportunityData objects
@@ -285,6 +241,266 @@ class PNCPAdapter(ProcurementDataSource):
         logger.info(f"✅ PNCP search completed: {len(opportunities)} opportunities")
         return opportunities
 
+    async def _get_cached_dataset(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Cached dataset; never waits for a refresh while a copy exists
+        
+        A stale copy is served as is and the background warmer
+        (services/pncp_cache_warmer.py) refreshes it under a Redis lock. Only a
+        cold cache waits: for this worker's own warm-up or the one holding the lock.
+        A failed warm-up raises instead of answering with an empty dataset.
+        """
+        from services.pncp_cache_warmer import get_pncp_cache_warmer
+        
+        warmer = get_pncp_cache_warmer()
+        ufs = self._dataset_shard_ufs(filtros)
+        # Index already current > only the UF shards the filter needs > the national blob
+        dataset = (self._read_indexed_dataset(ufs)
+                   or (ufs and self._read_dataset_shards(ufs))
+                   or self._read_dataset_cache())
+        if dataset:
+            age = self._dataset_age(dataset)
+            if age >= PNCP_DATASET_REFRESH_SECONDS:
+                logger.info(f"⏳ Cached PNCP dataset is {age / 60:.0f} min old - serving it, refreshing in background")
+                warmer.trigger(adapter=self)
+            logger.info(f"🎯 Using cached PNCP dataset ({len(dataset.get('data', []))} records, "
+                        f"watermark {dataset.get('watermark')})")
+            return dataset
+        
+        logger.info("🔍 Cold PNCP cache - warming it up")
+        status, dataset = await asyncio.to_thread(warmer.ensure, self)
+        if dataset:
+            return dataset
+        if status == 'error':
+            # The warm-up itself just failed: a second national fetch inside the request would
+            # only repeat it, and an empty result would read as "no bids"
+            raise RuntimeError("PNCP dataset unavailable: cold cache warm-up failed")
+        # Other worker still warming past the cold wait, or lock/Redis unavailable:
+        # fetch inside the request as before
+        logger.warning(f"⚠️ Cold PNCP cache not warmed ({status}) - fetching inside the request")
+        return await self._refresh_dataset(None, filtros=filtros)
+    
+    async def refresh_dataset(self, full: bool = False, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        🔄 Bring the cached national dataset up to date and store it
+        
+        Incremental by default: only contratações updated since the dataset
+        watermark (/contratacoes/atualizacao) are fetched and merged by
+        numeroControlePNCP; closed proposals are dropped. full=True (or no
+        dataset / PNCP_SYNC_MODE=full / PNCP_FULL_RESYNC_DAYS elapsed) refetches
+        the whole /contratacoes/proposta window.
+        """
+        cached = None if full else self._read_dataset_cache()
+        return await self._refresh_dataset(cached, full=full, now=now)
+    
+    async def _refresh_dataset(self, cached: Optional[Dict[str, Any]], full: bool = False,
+                               now: Optional[datetime] = None, filtros: Dict[str, Any] = None) -> Dict[str, Any]:
+        now = now or datetime.now()
+        now_iso = now.strftime('%Y-%m-%dT%H:%M:%S')
+        
+        if full or needs_full_resync(cached, now):
+            logger.info("🔍 Full PNCP dataset sync" + (" (requested)" if full else ""))
+            result = await self._fetch_with_efficient_pagination(filtros or {})
+            dataset = dict(result)
+            dataset.update({
+                'watermark': max_timestamp(result.get('data', [])) or now_iso,
+                'synced_at': now_iso,
+                # Incomplete full sync: the next refresh is a full one again
+                'last_full_sync_at': None if result.get('failed_pages') else now_iso,
+                'last_sync': {'mode': 'full', 'requests': result.get('requests'),
+                              'records': result.get('total', 0), 'failed_pages': len(result.get('failed_pages') or [])},
+            })
+        else:
+            delta = await self._fetch_dataset_delta(cached['watermark'], now)
+            changed = [record for record in delta['data'] if is_newer(record, cached['watermark'])]
+            merged, merge_stats = merge_records(
+                cached.get('data', []), changed,
+                keep=lambda record: is_proposal_open(record, now, until=self.data_final)
+            )
+            dataset = dict(cached)
+            dataset.update({
+                'data': merged,
+                'total': len(merged),
+                # Failed pages: keep the old watermark so the next delta covers them again
+                'watermark': cached['watermark'] if delta['failed_pages'] else max_timestamp(changed, cached['watermark']),
+                'synced_at': now_iso,
+                'last_sync': {'mode': 'incremental', 'requests': delta['requests'], 'records': delta['total'],
+                              'failed_pages': len(delta['failed_pages']), **merge_stats},
+            })
+            logger.info(f"🔄 PNCP delta merged: +{merge_stats['added']} new, {merge_stats['updated']} updated, "
+                        f"-{merge_stats['removed']} closed ({delta['requests']} requests, "
+                        f"{len(merged)} records, watermark {dataset['watermark']})")
+        
+        if self.redis_client and self.cache_ttl > 0:
+            self._write_dataset_cache(dataset)
+        # Build the search index now, not on this worker's next search
+        get_search_corpus(dataset)
+        return dataset
+    
+    async def _fetch_dataset_delta(self, watermark: str, now: datetime) -> Dict[str, Any]:
+        """Contratações (pregão eletrônico) updated since the watermark, national"""
+        from adapters.pncp_page_fetcher import get_pncp_page_fetcher
+        
+        data_inicial, data_final = delta_window(watermark, now.date())
+        params = {
+            'dataInicial': data_inicial,
+            'dataFinal': data_final,
+            'codigoModalidadeContratacao': 8  # Pregão Eletrônico
+        }
+        logger.info(f"🔄 Fetching PNCP updates since {watermark} ({data_inicial} - {data_final})")
+        result = await get_pncp_page_fetcher().fetch_pages_async(
+            f"{self.api_base_url}/contratacoes/atualizacao", params, max_pages=200
+        )
+        if result['failed_pages']:
+            logger.warning(f"⚠️ {len(result['failed_pages'])} delta pages failed after retries: {result['failed_pages'][:10]}")
+        return result
+    
+    def _dataset_age(self, dataset: Dict[str, Any]) -> float:
+        try:
+            return (datetime.now() - datetime.fromisoformat(dataset['synced_at'])).total_seconds()
+        except (KeyError, TypeError, ValueError):
+            return float('inf')  # Old cache format: refresh
+    
+    def _dataset_shard_ufs(self, filtros: Dict[str, Any]) -> Optional[List[str]]:
+        """UFs whose shards answer this search on their own (None = needs the national dataset)"""
+        region_code = (filtros or {}).get('region_code')
+        if not PNCP_DATASET_SHARDS_ENABLED or not region_code:
+            return None
+        return [region_code.upper()]
+    
+    def _read_indexed_dataset(self, ufs: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """Dataset from this worker's search index (national, or just these UFs) when Redis still holds the same version"""
+        if not self.redis_client:
+            return None
+        try:
+            raw = self.redis_client.get(PNCP_DATASET_VERSION_KEY)
+            if not raw:
+                return None
+            manifest = json.loads(raw)
+            corpus = cached_search_corpus(dataset_version(manifest))
+            if corpus is None and ufs:
+                corpus = cached_search_corpus(dataset_version(manifest, ufs))
+            return corpus.dataset if corpus is not None else None
+        except Exception as e:
+            logger.warning(f"Cache version read error: {e}")
+            return None
+    
+    def _read_dataset_shards(self, ufs: List[str]) -> Optional[Dict[str, Any]]:
+        """
+        Dataset restricted to these UFs, from their shards (None -> read the national blob)
+        
+        Manifest and shards come in one MGET, so they belong to the same write;
+        a shard missing (evicted) or not matching the manifest falls back to the blob.
+        """
+        if not self.redis_client:
+            return None
+        try:
+            raw_manifest, *raw_shards = self.redis_client.mget(
+                PNCP_DATASET_VERSION_KEY, *[_dataset_shard_key(uf) for uf in ufs])
+            manifest = json.loads(raw_manifest) if raw_manifest else {}
+            shards = manifest.pop('shards', None)
+            if shards is None:
+                return None  # Dataset written before sharding
+            data = []
+            for uf, raw in zip(ufs, raw_shards):
+                entry = shards.get(uf or '_')
+                if entry is None:
+                    continue  # No open contratação in this UF
+                if raw is None:
+                    return None
+                shard = json.loads(gzip.decompress(raw).decode('utf-8'))
+                if shard.get('hash') != entry['hash']:
+                    return None
+                data.extend(shard['data'])
+        except Exception as e:
+            logger.warning(f"Cache shard read error: {e}")
+            return None
+        dataset = dict(manifest, data=data, total=len(data), ufs=sorted(ufs))
+        logger.info(f"🗺️ Loaded PNCP dataset shards {', '.join(ufs)} ({len(data)} records, "
+                    f"{sum(len(raw) for raw in raw_shards if raw)} bytes)")
+        return dataset
+    
+    def _read_dataset_cache(self) -> Optional[Dict[str, Any]]:
+        if not self.redis_client:
+            return None
+        try:
+            # One MGET: a swap between the compressed and plain variants can't fall in between reads
+            compressed, cached = self.redis_client.mget(f"{PNCP_DATASET_CACHE_KEY}:gz", PNCP_DATASET_CACHE_KEY)
+            if compressed:
+                return json.loads(gzip.decompress(compressed).decode('utf-8'))
+            if cached:
+                return json.loads(cached.decode('utf-8') if isinstance(cached, bytes) else cached)
+        except Exception as e:
+            logger.warning(f"Cache read error: {e}")
+        return None
+    
+    def _write_dataset_cache(self, dataset: Dict[str, Any]) -> None:
+        try:
+            payload = json.dumps(dataset, separators=(',', ':'), default=str)
+            key, stale_key = PNCP_DATASET_CACHE_KEY, f"{PNCP_DATASET_CACHE_KEY}:gz"
+            if len(payload) > PNCP_DATASET_COMPRESS_THRESHOLD:
+                payload = gzip.compress(payload.encode('utf-8'))
+                key, stale_key = stale_key, key
+            manifest = {name: value for name, value in dataset.items() if name != 'data'}
+            
+            # Atomic swap (MULTI/EXEC): readers see the old dataset or the new one, never neither
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.setex(key, PNCP_DATASET_CACHE_TTL, payload)
+            pipe.delete(stale_key)
+            kept, shard_stats = [], None
+            if PNCP_DATASET_SHARDS_ENABLED:
+                manifest['shards'], kept, shard_stats = self._queue_dataset_shards(pipe, dataset)
+            pipe.setex(PNCP_DATASET_VERSION_KEY, PNCP_DATASET_CACHE_TTL, json.dumps(manifest, default=str))
+            results = pipe.execute()
+            logger.info(f"💾 Cached PNCP dataset ({len(dataset.get('data', []))} records, "
+                        f"watermark {dataset.get('watermark')})"
+                        + (f" - shards: {shard_stats['written']} written, {shard_stats['kept']} unchanged"
+                           if shard_stats else ""))
+            # Unchanged shard that was evicted meanwhile (EXPIRE -> 0): write it again
+            missing = [(uf, shard_payload) for (position, uf, shard_payload) in kept if not results[position]]
+            for uf, shard_payload in missing:
+                self.redis_client.setex(_dataset_shard_key(uf), PNCP_DATASET_CACHE_TTL, shard_payload())
+        except Exception as e:
+            logger.warning(f"Cache write error: {e}")
+    
+    def _queue_dataset_shards(self, pipe, dataset: Dict[str, Any]) -> Tuple[Dict[str, Any], list, Dict[str, int]]:
+        """
+        Queue the per-UF shards on the write transaction; only shards whose content
+        changed since the previous manifest are rewritten (the others just get a new TTL)
+        """
+        previous = {}
+        try:
+            raw = self.redis_client.get(PNCP_DATASET_VERSION_KEY)
+            previous = (json.loads(raw) if raw else {}).get('shards') or {}
+        except Exception as e:
+            logger.warning(f"Cache manifest read error: {e}")
+        
+        by_uf: Dict[str, List[Dict[str, Any]]] = {}
+        for record in dataset.get('data', []):
+            by_uf.setdefault(_record_uf(record) or '_', []).append(record)
+        
+        shards, kept, stats = {}, [], {'written': 0, 'kept': 0}
+        position = 2  # setex + delete of the national blob come first
+        for uf, records in sorted(by_uf.items()):
+            data = json.dumps(records, separators=(',', ':'), default=str)
+            digest = hashlib.blake2b(data.encode('utf-8'), digest_size=12).hexdigest()
+            build = lambda uf=uf, data=data, digest=digest: gzip.compress(
+                f'{{"uf":{json.dumps(uf)},"hash":"{digest}","data":{data}}}'.encode('utf-8'))
+            if (previous.get(uf) or {}).get('hash') == digest:
+                pipe.expire(_dataset_shard_key(uf), PNCP_DATASET_CACHE_TTL)
+                kept.append((position, uf, build))
+                shards[uf] = previous[uf]
+                stats['kept'] += 1
+            else:
+                shard_payload = build()
+                pipe.setex(_dataset_shard_key(uf), PNCP_DATASET_CACHE_TTL, shard_payload)
+                shards[uf] = {'records': len(records), 'bytes': len(shard_payload), 'hash': digest}
+                stats['written'] += 1
+            position += 1
+        for uf in set(previous) - set(shards):
+            pipe.delete(_dataset_shard_key(uf))
+        return shards, kept, stats
+    
     async def _fetch_with_efficient_pagination(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
         """
         🚀 HYBRID SEARCH STRATEGY: Try parallel first, fallback to sequential
@@ -317,152 +533,45 @@ class PNCPAdapter(ProcurementDataSource):
             except Exception as e:
                 logger.warning(f"⚠️ Parallel search failed: {e}, falling back to sequential...")
         
-        # 🛡️ FALLBACK: Sequential search (original efficient method)
-        logger.info("🔄 USING SEQUENTIAL NATIONAL SEARCH (proven strategy)")
-        return self._fetch_with_sequential_national_pagination(filtros)
+        # 🛡️ FALLBACK: National search with adaptive concurrency (shared async fetcher)
+        logger.info("🔄 USING ADAPTIVE NATIONAL SEARCH (proven strategy)")
+        return await self._fetch_with_adaptive_national_pagination(filtros)
     
-    def _fetch_with_sequential_national_pagination(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
+    async def _fetch_with_adaptive_national_pagination(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
         """
-        🎯 SEQUENTIAL NATIONAL SEARCH - OPTIMIZED with parallel requests
-        
-        This method replicates the EXACT strategy that works in licitacao_repository.py:
-        - National search (no UF filtering in API)
-        - 200 pages maximum 
-        - 50 items per page
-        - PARALLEL requests like working repository
-        - Local filtering after data collection
+        🎯 NATIONAL SEARCH - shared async fetcher with adaptive concurrency
+        
+        Same query as the working repository (national, no UF filtering in the
+        API, 50 items per page, up to 200 pages, local filtering afterwards),
+        fetched by the process-wide PNCPPageFetcher (adapters/pncp_page_fetcher.py):
+        - one long-lived aiohttp session / connection pool for every search
+        - AIMD concurrency: grows while the API answers fast, halves on 429/5xx
+        - failed pages retried individually with backoff
+        - stops as soon as totalPaginas / a short page says the result is over
         """
-        import concurrent.futures
-        import time
+        from adapters.pncp_page_fetcher import get_pncp_page_fetcher
         
-        logger.info("🎯 STARTING OPTIMIZED SEQUENTIAL NATIONAL SEARCH")
-        logger.info("📊 Strategy: 200 pages × 50 = 10,000 national records maximum")
-        logger.info("🚀 Using parallel requests for 3x performance boost")
-        
-        all_licitacoes = []
-        seen_pncp_ids = set()
-        total_pages_searched = 0
         max_pages = 200  # Same as working repository
-        batch_size = 20  # Process 20 pages in parallel (same as working repo)
-        
-        # 🔄 PARALLEL BATCH PROCESSING (like working repository)
-        logger.info(f"🚀 Executing {max_pages} API calls in parallel batches...")
-        
-        start_time = time.time()
-        empty_batches_count = 0
-        max_empty_batches = 5
-        
-        for batch_start in range(1, max_pages + 1, batch_size):
-            batch_end = min(batch_start + batch_size - 1, max_pages)
-            batch_pages = list(range(batch_start, batch_end + 1))
-            
-            logger.info(f"📦 Processing batch: pages {batch_start}-{batch_end}")
-            
-            # ✅ PARALLEL EXECUTION with ThreadPoolExecutor (same as working repo)
-            batch_results = []
-            with concurrent.futures.ThreadPoolExecutor(max_workers=batch_size) as executor:
-                # Submit all pages in batch simultaneously
-                future_to_page = {
-                    executor.submit(self._fetch_national_pncp_data, page): page 
-                    for page in batch_pages
-                }
-                
-                # Collect results as they complete
-                for future in concurrent.futures.as_completed(future_to_page):
-                    page_num = future_to_page[future]
-                    try:
-                        page_results, has_more_pages = future.result()
-                        batch_results.append((page_num, page_results, has_more_pages))
-                        total_pages_searched += 1
-                    except Exception as e:
-                        logger.error(f"❌ Error on page {page_num}: {e}")
-                        batch_results.append((page_num, [], False))
-                        total_pages_searched += 1
-            
-            # Process batch results
-            batch_new_results = 0
-            all_pages_empty = True
-            
-            for page_num, page_results, has_more_pages in sorted(batch_results):
-                if page_results:
-                    all_pages_empty = False
-                    # Process and add new results
-                    for licitacao in page_results:
-                        pncp_id = licitacao.get('numeroControlePNCP')
-                        if pncp_id and pncp_id not in seen_pncp_ids:
-                            seen_pncp_ids.add(pncp_id)
-                            all_licitacoes.append(licitacao)
-                            batch_new_results += 1
-                
-                # Check if API says no more pages
-                if not has_more_pages:
-                    logger.info(f"📄 API indicated no more pages at page {page_num}")
-                    # Continue processing this batch but don't start new ones
-                    max_pages = batch_end
-                    break
-            
-            logger.info(f"✅ Batch complete: +{batch_new_results} new results (Total: {len(all_licitacoes)})")
-            
-            # Stop if too many empty batches
-            if all_pages_empty:
-                empty_batches_count += 1
-                if empty_batches_count >= max_empty_batches:
-                    logger.info(f"🛑 Stopping after {max_empty_batches} empty batches")
-                    break
-            else:
-                empty_batches_count = 0
-                
-            # Educational pause between batches (API rate limiting)
-            if batch_end < max_pages:
-                time.sleep(0.5)
-        
-        elapsed_time = time.time() - start_time
-        logger.info(f"🎉 OPTIMIZED SEARCH COMPLETED: {len(all_licitacoes)} unique licitações from {total_pages_searched} pages in {elapsed_time:.2f}s")
-        
-        return {
-            'data': all_licitacoes,
-            'total': len(all_licitacoes),
-            'pages_searched': total_pages_searched,
-            'search_time': elapsed_time,
-            'strategy': 'optimized_sequential_national_pagination'
-        }
-    
-    def _fetch_national_pncp_data(self, page: int) -> Tuple[List[Dict], bool]:
-        """
-        NATIONAL search - same parameters as working repository
-        No UF filtering in API call
-        """
-        import requests
-        from typing import Tuple, List, Dict
+        logger.info(f"🎯 STARTING ADAPTIVE NATIONAL SEARCH (up to {max_pages} pages × 50)")
         
-        url = f"{self.api_base_url}/contratacoes/proposta"
-        
-        # ✅ SAME PARAMETERS as working repository (NATIONAL search)
         params = {
             'dataInicial': self.data_inicial,
             'dataFinal': self.data_final,
-            'pagina': page,
-            'tamanhoPagina': 50,
             'codigoModalidadeContratacao': 8  # Pregão Eletrônico
             # NO UF parameter - national search
         }
+        result = await get_pncp_page_fetcher().fetch_pages_async(
+            f"{self.api_base_url}/contratacoes/proposta", params, max_pages=max_pages
+        )
         
-        try:
-            response = requests.get(url, params=params, timeout=self.timeout)
-            response.raise_for_status()
-            
-            data = response.json()
-            all_bids = data.get("data", []) if isinstance(data, dict) else data
-            
-            # SIMPLE LOGIC: If we get less than full page, we're done
-            has_more_pages = len(all_bids) >= 50
-            
-            logger.debug(f"   ✅ Success: {len(all_bids)} results on page {page}")
-            return all_bids, has_more_pages
-            
-        except requests.RequestException as e:
-            logger.error(f"❌ API error on page {page}: {e}")
-            return [], False
+        if result['failed_pages']:
+            logger.warning(f"⚠️ {len(result['failed_pages'])} pages failed after retries: {result['failed_pages'][:10]}")
+        logger.info(
+            f"🎉 ADAPTIVE SEARCH COMPLETED: {result['total']} unique licitações from {result['pages_searched']} pages "
+            f"in {result['search_time']:.2f}s ({result['requests']} requests, {result['retries']} retries, "
+            f"{result['throttled']} throttled, final concurrency {result['final_concurrency']})"
+        )
+        return result
     
     async def _fetch_with_parallel_pagination(self, filtros: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -856,12 +965,19 @@ class PNCPAdapter(ProcurementDataSource):
         
         return internal_filters
     
-    def _apply_local_filters(self, data: List[Dict[str, Any]], filters: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _apply_local_filters(self, data: List[Dict[str, Any]], filters: Dict[str, Any],
+                             corpus: Optional[SearchCorpus] = None) -> List[Dict[str, Any]]:
         """
         🔄 ATUALIZADO: Aplica filtros locais incluindo sinônimos SEMPRE
+        
+        Respondidos pelo índice em memória (adapters/pncp_search_corpus.py), montado
+        uma vez por versão do dataset; sem índice, é montado aqui para data. Cada
+        filtro é uma máscara sobre os registros; os termos são normalizados uma vez.
         """
-        filtered_data = data[:]  # Start with all data
-        initial_count = len(filtered_data)
+        if corpus is None or len(corpus) != len(data):
+            corpus = SearchCorpus(data)
+        mask = corpus.all()
+        initial_count = len(corpus)
         
         logger.info(f"🔍 APLICANDO FILTROS LOCAIS COM SINÔNIMOS: {initial_count} registros iniciais")
         logger.info(f"   📋 Filtros recebidos: {filters}")
@@ -909,114 +1025,53 @@ class PNCPAdapter(ProcurementDataSource):
             
             logger.info(f"   🎯 Termos finais de busca (incluindo sinônimos): {all_search_terms}")
             
-            if all_search_terms:
-                keyword_filtered = []
-                matches_found = 0
+            # Normalizados uma vez por consulta, não por registro
+            normalized_terms = normalize_terms(all_search_terms)
+            if normalized_terms:
+                # 🔄 CORREÇÃO: QUALQUER termo da busca (incluindo sinônimos) nos MESMOS 3 campos do sistema antigo
+                mask &= corpus.match_any(normalized_terms)
                 
-                for item in filtered_data:
-                    # Buscar nos MESMOS 3 campos do sistema antigo
-                    objeto_compra = (item.get('objetoCompra') or '').lower()
-                    objeto_detalhado = (item.get('objetoDetalhado') or '').lower()
-                    info_complementar = (item.get('informacaoComplementar') or '').lower()
-                    
-                    # Combinar todos os textos
-                    texto_completo = f"{objeto_compra} {objeto_detalhado} {info_complementar}".strip()
-                    
-                    if not texto_completo:
-                        continue
-                    
-                    # Aplicar mesma normalização
-                    texto_normalizado = self._normalizar_simples(texto_completo)
-                    
-                    # 🔄 CORREÇÃO: Verificar se QUALQUER termo da busca (incluindo sinônimos) está presente
-                    match_found = False
-                    matched_term = None
-                    for term in all_search_terms:
-                        if not term:
-                            continue
-                        term_normalizado = self._normalizar_simples(term)
-                        if term_normalizado and term_normalizado in texto_normalizado:
-                            match_found = True
-                            matched_term = term
-                            break
-                    
-                    if match_found:
-                        keyword_filtered.append(item)
-                        matches_found += 1
-                        
-                        # Log dos primeiros 3 matches para debug
-                        if matches_found <= 3:
-                            logger.info(f"      ✅ Match #{matches_found} (termo: '{matched_term}'): {objeto_compra[:100]}...")
+                # Log dos primeiros 3 matches para debug
+                for number, record_id in enumerate(np.flatnonzero(mask)[:3], 1):
+                    objeto_compra = (corpus.records[record_id].get('objetoCompra') or '').lower()
+                    logger.info(f"      ✅ Match #{number} (termo: '{corpus.matched_term(record_id, normalized_terms)}'): "
+                                f"{objeto_compra[:100]}...")
                 
-                filtered_data = keyword_filtered
-                logger.info(f"   🔤 Filtro keywords COM sinônimos: {len(filtered_data)} matches de {initial_count}")
+                logger.info(f"   🔤 Filtro keywords COM sinônimos: {int(mask.sum())} matches de {initial_count}")
             else:
+                # Keywords informadas sem nenhum termo válido não casam com nada (como antes do índice)
+                mask &= False
                 logger.warning("   ⚠️ Nenhum termo válido para busca")
 
         # 🔍 FILTRO DE REGIÃO
         region_code = filters.get('region_code')
         if region_code:
             logger.info(f"   🗺️ Aplicando filtro de região: {region_code}")
-            region_filtered = []
-            for item in filtered_data:
-                item_uf = item.get('unidadeOrgao', {}).get('ufSigla', '').upper()
-                if item_uf == region_code.upper():
-                    region_filtered.append(item)
-            
-            filtered_data = region_filtered
-            logger.info(f"   🗺️ Filtro região: {len(filtered_data)} restantes")
+            mask &= corpus.mask_uf(region_code)
+            logger.info(f"   🗺️ Filtro região: {int(mask.sum())} restantes")
 
         # 🔍 FILTRO DE MUNICÍPIO
         municipality = filters.get('municipality')
         if municipality:
             logger.info(f"   🏙️ Aplicando filtro de município: {municipality}")
-            municipality_filtered = []
-            municipality_normalized = self._normalizar_simples(municipality)
-            
-            for item in filtered_data:
-                item_municipio = item.get('unidadeOrgao', {}).get('municipioNome', '')
-                item_municipio_normalized = self._normalizar_simples(item_municipio)
-                
-                if municipality_normalized in item_municipio_normalized:
-                    municipality_filtered.append(item)
-            
-            filtered_data = municipality_filtered
-            logger.info(f"   🏙️ Filtro município: {len(filtered_data)} restantes")
+            mask &= corpus.mask_municipio(municipality)
+            logger.info(f"   🏙️ Filtro município: {int(mask.sum())} restantes")
 
         # 🔍 FILTRO DE VALOR MÍNIMO
         min_value = filters.get('min_value')
         if min_value is not None:
             logger.info(f"   💰 Aplicando filtro valor mínimo: R$ {min_value:,.2f}")
-            value_filtered = []
-            for item in filtered_data:
-                item_value = item.get('valorTotalEstimado')
-                if item_value is not None:
-                    try:
-                        if float(item_value) >= float(min_value):
-                            value_filtered.append(item)
-                    except (ValueError, TypeError):
-                        continue
-            
-            filtered_data = value_filtered
-            logger.info(f"   💰 Filtro valor mínimo: {len(filtered_data)} restantes")
+            mask &= corpus.mask_value(minimum=float(min_value))
+            logger.info(f"   💰 Filtro valor mínimo: {int(mask.sum())} restantes")
 
         # 🔍 FILTRO DE VALOR MÁXIMO
         max_value = filters.get('max_value')
         if max_value is not None:
             logger.info(f"   💰 Aplicando filtro valor máximo: R$ {max_value:,.2f}")
-            value_filtered = []
-            for item in filtered_data:
-                item_value = item.get('valorTotalEstimado')
-                if item_value is not None:
-                    try:
-                        if float(item_value) <= float(max_value):
-                            value_filtered.append(item)
-                    except (ValueError, TypeError):
-                        continue
-            
-            filtered_data = value_filtered
-            logger.info(f"   💰 Filtro valor máximo: {len(filtered_data)} restantes")
+            mask &= corpus.mask_value(maximum=float(max_value))
+            logger.info(f"   💰 Filtro valor máximo: {int(mask.sum())} restantes")
 
+        filtered_data = corpus.select(mask)
         logger.info(f"🎯 FILTROS LOCAIS CONCLUÍDOS: {len(filtered_data)} registros finais de {initial_count} iniciais")
         
         return filtered_data
@@ -1029,25 +1084,7 @@ class PNCPAdapter(ProcurementDataSource):
         - Remove pontuação
         - NÃO aplica stemmer agressivo
         """
-        import unicodedata
-        import re
-        
-        if not texto:
-            return ""
-        
-        # Lowercase
-        texto = texto.lower()
-        
-        # Remove acentos
-        texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
-        
-        # Remove pontuação mas mantém espaços
-        texto = re.sub(r'[^a-z0-9\s]', ' ', texto)
-        
-        # Remove espaços múltiplos
-        texto = ' '.join(texto.split())
-        
-        return texto
+        return normalize_text(texto)
 
     def _extract_search_terms(self, keywords: Optional[str]) -> List[str]:
         """Extract search terms from keywords string"""
@@ -0,0 +1,320 @@
+"""
+🌐 PAGINAÇÃO NACIONAL DO PNCP COM CONCORRÊNCIA ADAPTATIVA
+Um único fetcher assíncrono por processo: um event loop próprio numa thread
+daemon e uma aiohttp.ClientSession de vida longa (pool de conexões keep-alive
+compartilhado entre todas as buscas), em vez de um ThreadPoolExecutor novo por
+lote de 20 páginas com requests.get sem sessão e pausa fixa de 0.5s.
+
+- Concorrência AIMD: começa em slow start (+1 por resposta rápida, dobra a
+  cada rodada) até o primeiro sinal de sobrecarga; depois +1 requisição
+  simultânea a cada rodada de respostas rápidas; metade em 429/5xx/timeout ou latência acima de
+  PNCP_FETCH_LATENCY_TARGET (no máximo uma redução por janela de latência);
+  Retry-After do servidor pausa novos envios
+- Retry por página (backoff exponencial), sem refazer o lote inteiro; páginas
+  que esgotam as tentativas ficam em failed_pages
+- Parada antecipada: totalPaginas da primeira resposta limita o intervalo, e
+  uma página incompleta/vazia (ou 204) encerra o agendamento das seguintes
+- Seguro para fork (gunicorn --preload): o filho cria o próprio loop e sessão
+
+Uso:
+    fetcher = get_pncp_page_fetcher()
+    result = fetcher.fetch_pages(url, params, max_pages=200)          # código síncrono
+    result = await fetcher.fetch_pages_async(url, params, max_pages=200)  # dentro de um loop
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Limites de requisições simultâneas (AIMD começa em INITIAL)
+PNCP_FETCH_MIN_CONCURRENCY = int(os.getenv('PNCP_FETCH_MIN_CONCURRENCY', '1'))
+PNCP_FETCH_INITIAL_CONCURRENCY = int(os.getenv('PNCP_FETCH_INITIAL_CONCURRENCY', '4'))
+PNCP_FETCH_MAX_CONCURRENCY = int(os.getenv('PNCP_FETCH_MAX_CONCURRENCY', '16'))
+# Latência (s) acima da qual a resposta conta como sinal de sobrecarga
+PNCP_FETCH_LATENCY_TARGET = float(os.getenv('PNCP_FETCH_LATENCY_TARGET', '3.0'))
+# Tentativas extras por página e backoff base (s) entre elas
+PNCP_FETCH_MAX_RETRIES = int(os.getenv('PNCP_FETCH_MAX_RETRIES', '4'))
+PNCP_FETCH_BACKOFF = float(os.getenv('PNCP_FETCH_BACKOFF', '0.5'))
+PNCP_FETCH_TIMEOUT = float(os.getenv('PNCP_FETCH_TIMEOUT', '30'))
+
+PAGE_SIZE = 50
+_RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class AIMDConcurrency:
+    """Limite de concorrência additive-increase / multiplicative-decrease"""
+
+    def __init__(self, initial: int = None, minimum: int = None, maximum: int = None,
+                 latency_target: float = None, decrease_factor: float = 0.5):
+        self.minimum = max(1, PNCP_FETCH_MIN_CONCURRENCY if minimum is None else minimum)
+        self.maximum = max(self.minimum, PNCP_FETCH_MAX_CONCURRENCY if maximum is None else maximum)
+        initial = PNCP_FETCH_INITIAL_CONCURRENCY if initial is None else initial
+        self._limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = PNCP_FETCH_LATENCY_TARGET if latency_target is None else latency_target
+        self.decrease_factor = decrease_factor
+        self._successes = 0
+        self._slow_start = True
+        self._last_decrease = 0.0
+        self._recent_latency = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def on_success(self, latency: float):
+        self._recent_latency = latency
+        if latency > self.latency_target:
+            self.on_overload()
+            return
+        # Slow start: +1 por resposta; depois +1 a cada 'limit' respostas (uma unidade por rodada)
+        self._successes += 1
+        if self._slow_start or self._successes >= self.limit:
+            self._successes = 0
+            if self._limit < self.maximum:
+                self._limit = min(self.maximum, self._limit + 1)
+                self.increases += 1
+
+    def on_overload(self):
+        # Respostas da mesma rajada chegam juntas: reduz só uma vez por janela de latência
+        now = time.monotonic()
+        if now - self._last_decrease < max(self._recent_latency, 0.2):
+            return
+        self._last_decrease = now
+        self._successes = 0
+        self._slow_start = False
+        new_limit = max(self.minimum, self._limit * self.decrease_factor)
+        if new_limit < self._limit:
+            self._limit = new_limit
+            self.decreases += 1
+
+
+def _retry_after_seconds(value: Optional[str]) -> float:
+    try:
+        return max(0.0, float(value)) if value else 0.0
+    except ValueError:
+        return 0.0
+
+
+class PNCPPageFetcher:
+    """Fetcher de páginas do PNCP: event loop e sessão HTTP de vida longa numa thread própria"""
+
+    def __init__(self, timeout: Optional[float] = None, max_connections: Optional[int] = None):
+        self.timeout = PNCP_FETCH_TIMEOUT if timeout is None else timeout
+        self.max_connections = max_connections or PNCP_FETCH_MAX_CONCURRENCY
+        self._lock = threading.Lock()
+        self._pid = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    # ---------- loop e sessão ----------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None and self._pid == os.getpid():
+            return self._loop
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                # Após fork o loop/thread do pai não existem no filho: começa do zero
+                self._pid = os.getpid()
+                self._session = None
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name='pncp-page-fetcher', daemon=True).start()
+        return self._loop
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60,
+                                             ttl_dns_cache=300, enable_cleanup_closed=True)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept': 'application/json', 'User-Agent': 'Alicit/1.0 (PNCP)'},
+            )
+        return self._session
+
+    def close(self):
+        """Fecha a sessão e para o loop (testes/encerramento)"""
+        loop = self._loop
+        if loop is None or self._pid != os.getpid():
+            return
+
+        async def _close():
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+
+        asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout=10)
+        loop.call_soon_threadsafe(loop.stop)
+        self._loop, self._session = None, None
+
+    # ---------- API ----------
+
+    def fetch_pages(self, url: str, params: Dict[str, Any], max_pages: int,
+                    page_size: int = PAGE_SIZE, controller: Optional[AIMDConcurrency] = None) -> Dict[str, Any]:
+        """Busca as páginas 1..max_pages (para antes se o resultado acabar); bloqueia até terminar"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._paginate(url, params, max_pages, page_size, controller), self._ensure_loop())
+        return future.result()
+
+    async def fetch_pages_async(self, url: str, params: Dict[str, Any], max_pages: int,
+                                page_size: int = PAGE_SIZE, controller: Optional[AIMDConcurrency] = None) -> Dict[str, Any]:
+        """Mesmo que fetch_pages, aguardável de qualquer event loop (roda no loop do fetcher)"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._paginate(url, params, max_pages, page_size, controller), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    # ---------- paginação ----------
+
+    async def _fetch_page(self, session: aiohttp.ClientSession, url: str, params: Dict[str, Any],
+                          page: int, page_size: int) -> Tuple[int, Optional[int], Any, float, float]:
+        """(página, status HTTP ou None em erro de rede, corpo JSON, latência, Retry-After)"""
+        start = time.monotonic()
+        try:
+            async with session.get(url, params={**params, 'pagina': page, 'tamanhoPagina': page_size}) as response:
+                retry_after = _retry_after_seconds(response.headers.get('Retry-After'))
+                body = None
+                if response.status == 200:
+                    body = await response.json(content_type=None)
+                else:
+                    await response.read()
+                return page, response.status, body, time.monotonic() - start, retry_after
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug(f"❌ PNCP página {page}: {e.__class__.__name__}: {e}")
+            return page, None, None, time.monotonic() - start, 0.0
+
+    async def _paginate(self, url: str, params: Dict[str, Any], max_pages: int, page_size: int,
+                        controller: Optional[AIMDConcurrency]) -> Dict[str, Any]:
+        controller = controller or AIMDConcurrency()
+        session = await self._get_session()
+        start_time = time.monotonic()
+
+        pages: Dict[int, List[Dict[str, Any]]] = {}
+        attempts: Dict[int, int] = {}
+        failed_pages: List[int] = []
+        last_page = max_pages          # reduzido por totalPaginas / página incompleta
+        next_page = 1
+        retry_heap: List[Tuple[float, int]] = []   # (liberada_em, página)
+        paused_until = 0.0             # Retry-After global
+        pending = set()
+        stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'server_errors': 0, 'network_errors': 0}
+
+        while True:
+            now = time.monotonic()
+            # A página 1 vai sozinha: o totalPaginas dela define até onde ir
+            first_page_done = 1 in pages
+            # Agenda até o limite atual: primeiro retries liberados, depois páginas novas
+            while len(pending) < controller.limit and now >= paused_until:
+                if retry_heap and retry_heap[0][0] <= now:
+                    _, page = heapq.heappop(retry_heap)
+                    if page > last_page:
+                        continue
+                elif next_page <= last_page and (next_page == 1 or first_page_done):
+                    page = next_page
+                    next_page += 1
+                else:
+                    break
+                stats['requests'] += 1
+                pending.add(asyncio.ensure_future(self._fetch_page(session, url, params, page, page_size)))
+
+            wakes = [when for when, page in retry_heap if page <= last_page]
+            if paused_until > now:
+                wakes.append(paused_until)
+            if not pending:
+                if not wakes and not (next_page <= last_page and first_page_done):
+                    break
+                await asyncio.sleep(max(0.01, max(min(wakes or [now]), paused_until) - now))
+                continue
+
+            timeout = max(0.01, min(wakes) - now) if wakes else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                page, status, body, latency, retry_after = task.result()
+                if status == 200:
+                    controller.on_success(latency)
+                    items = body.get('data', []) if isinstance(body, dict) else (body or [])
+                    pages[page] = items
+                    if isinstance(body, dict) and body.get('totalPaginas'):
+                        last_page = min(last_page, int(body['totalPaginas']))
+                    if len(items) < page_size:
+                        last_page = min(last_page, page)   # resultado acabou
+                    continue
+                if status == 204 or status == 404:
+                    pages[page] = []
+                    last_page = min(last_page, page - 1 if page > 1 else 1)
+                    continue
+
+                # Falha: sobrecarga reduz a concorrência; a página volta sozinha para a fila
+                if status == 429:
+                    stats['throttled'] += 1
+                elif status is None:
+                    stats['network_errors'] += 1
+                else:
+                    stats['server_errors'] += 1
+                if status is None or status in _RETRYABLE_STATUS:
+                    controller.on_overload()
+                if retry_after:
+                    paused_until = max(paused_until, time.monotonic() + retry_after)
+
+                attempts[page] = attempts.get(page, 0) + 1
+                if (status is None or status in _RETRYABLE_STATUS) and attempts[page] <= PNCP_FETCH_MAX_RETRIES:
+                    stats['retries'] += 1
+                    delay = max(retry_after, PNCP_FETCH_BACKOFF * (2 ** (attempts[page] - 1)))
+                    heapq.heappush(retry_heap, (time.monotonic() + delay, page))
+                else:
+                    failed_pages.append(page)
+                    logger.warning(f"⚠️ PNCP página {page} desistida após {attempts[page]} tentativas (status {status})")
+
+            if 1 in failed_pages:
+                # Sem a primeira página não há como saber o tamanho do resultado
+                for task in pending:
+                    task.cancel()
+                break
+
+        # Junta na ordem das páginas, sem repetidos (a listagem muda enquanto é paginada)
+        data, seen = [], set()
+        for page in sorted(p for p in pages if p <= last_page):
+            for item in pages[page]:
+                key = item.get('numeroControlePNCP') if isinstance(item, dict) else None
+                if key is None or key not in seen:
+                    if key is not None:
+                        seen.add(key)
+                    data.append(item)
+
+        elapsed = time.monotonic() - start_time
+        return {
+            'data': data,
+            'total': len(data),
+            'pages_searched': len(pages),
+            'failed_pages': sorted(failed_pages),
+            'search_time': elapsed,
+            'requests': stats['requests'],
+            'retries': stats['retries'],
+            'throttled': stats['throttled'],
+            'server_errors': stats['server_errors'],
+            'network_errors': stats['network_errors'],
+            'final_concurrency': controller.limit,
+            'strategy': 'adaptive_national_pagination',
+        }
+
+
+_PAGE_FETCHER: Optional[PNCPPageFetcher] = None
+_PAGE_FETCHER_LOCK = threading.Lock()
+
+
+def get_pncp_page_fetcher() -> PNCPPageFetcher:
+    """Fetcher compartilhado do processo (um pool de conexões para todas as buscas)"""
+    global _PAGE_FETCHER
+    if _PAGE_FETCHER is None:
+        with _PAGE_FETCHER_LOCK:
+            if _PAGE_FETCHER is None:
+                _PAGE_FETCHER = PNCPPageFetcher()
+    return _PAGE_FETCHER
@@ -0,0 +1,281 @@
+"""
+🔎 ÍNDICE DE BUSCA EM MEMÓRIA DO DATASET NACIONAL DO PNCP
+Os filtros locais do PNCPAdapter (_apply_local_filters) respondem a partir de
+um índice montado uma vez por versão do dataset em cada worker, em vez de
+descomprimir o dataset do Redis, reler todos os registros e varrer o texto de
+cada um em toda busca:
+
+- índice invertido: token normalizado -> posting list (ids dos registros,
+  int32) sobre objetoCompra + objetoDetalhado + informacaoComplementar
+- mesma semântica de antes ("termo normalizado contido no texto normalizado"):
+    termo de 1 token    -> união das postings dos tokens do vocabulário que o contêm
+    frase (2+ tokens)   -> 1º token como sufixo, meio exato, último como prefixo
+                           (bisect no vocabulário ordenado); candidatos conferidos no texto
+- UF, município e valor estimado em arrays por registro: cada
+  filtro vira uma máscara booleana (numpy) combinada com as demais
+- um índice por versão do dataset (synced_at + watermark) por processo,
+  montado quando o dataset é atualizado ou na primeira busca de uma versão nova;
+  buscas por UF sem o índice nacional indexam só os shards lidos (escopo 'ufs')
+
+Uso:
+    corpus = get_search_corpus(dataset)              # memo por versão
+    mask = corpus.match_any(normalize_terms(['computador', 'notebook']))
+    mask &= corpus.mask_uf('SP')
+    records = corpus.select(mask)
+"""
+
+import re
+import bisect
+import logging
+import threading
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+# Separador entre registros/tokens nos blocos de texto: a normalização nunca produz '\n'
+_SEPARATOR = '\n'
+
+
+def normalize_text(texto: Optional[str]) -> str:
+    """
+    Normalização das buscas locais (idêntica ao sistema antigo, licitacao_repository.py)
+    - Lowercase, sem acentos, pontuação vira espaço, espaços múltiplos colapsados
+    - NÃO aplica stemmer
+    """
+    if not texto:
+        return ""
+    texto = texto.lower()
+    if not texto.isascii():
+        texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
+    return ' '.join(_NON_ALNUM.sub(' ', texto).split())
+
+
+def normalize_terms(terms: Iterable[str]) -> List[str]:
+    """Termos da consulta normalizados uma vez (sem vazios e sem repetidos, na ordem)"""
+    return [term for term in dict.fromkeys(normalize_text(term) for term in terms if term) if term]
+
+
+def record_search_text(record: Dict[str, Any]) -> str:
+    """Texto normalizado dos mesmos 3 campos que a busca sempre usou"""
+    texto = ' '.join((record.get(field) or '').lower()
+                     for field in ('objetoCompra', 'objetoDetalhado', 'informacaoComplementar')).strip()
+    return normalize_text(texto)
+
+
+def _as_float(value: Any) -> float:
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def dataset_version(dataset: Dict[str, Any], ufs: Optional[Iterable[str]] = None) -> Optional[Tuple[Any, ...]]:
+    """
+    Identifica uma versão do dataset em cache (None = resultado avulso, sem memo)
+    
+    O escopo faz parte da versão: dataset nacional (None) ou só os shards de
+    algumas UFs (dataset['ufs']), para um índice parcial nunca responder por todos.
+    """
+    if not dataset.get('synced_at'):
+        return None
+    scope = ufs if ufs is not None else dataset.get('ufs')
+    return dataset.get('synced_at'), dataset.get('watermark'), tuple(sorted(scope)) if scope else None
+
+
+class _Codes:
+    """Valores repetidos (UF, município) como código por registro + valores distintos"""
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.codes: List[int] = []
+
+    def add(self, value: str, normalize=None) -> None:
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(normalize(value) if normalize else value)
+        self.codes.append(code)
+
+    def mask(self, keep, codes: np.ndarray) -> np.ndarray:
+        selected = [code for code, value in enumerate(self.values) if keep(value)]
+        return np.isin(codes, np.array(selected, dtype=np.int32))
+
+
+class SearchCorpus:
+    """Registros do dataset com índice invertido e colunas dos filtros, por posição"""
+
+    def __init__(self, records: Sequence[Dict[str, Any]], version: Optional[Tuple[Any, ...]] = None,
+                 meta: Optional[Dict[str, Any]] = None):
+        self.records = list(records)
+        self.version = version
+        # Metadados do dataset (watermark, synced_at, ...), sem os registros
+        self.meta = {key: value for key, value in (meta or {}).items() if key != 'data'}
+
+        texts, postings = [], {}
+        ufs, municipios, valores = _Codes(), _Codes(), []
+        for record_id, record in enumerate(self.records):
+            text = record_search_text(record)
+            texts.append(text)
+            for token in set(text.split()):
+                postings.setdefault(token, []).append(record_id)
+            unidade = record.get('unidadeOrgao') or {}
+            ufs.add((unidade.get('ufSigla') or '').upper())
+            municipios.add(unidade.get('municipioNome') or '', normalize_text)
+            valores.append(_as_float(record.get('valorTotalEstimado')))
+
+        # Vocabulário ordenado (prefixos por bisect) e em bloco (substrings/sufixos com str.find)
+        self._vocab = sorted(postings)
+        self._postings = [np.array(postings[token], dtype=np.int32) for token in self._vocab]
+        self._vocab_blob, self._vocab_starts = self._join(self._vocab)
+        # Texto de cada registro, para conferir frases nos candidatos
+        self._text_blob, self._text_starts = self._join(texts)
+
+        self._ufs, self._uf_codes = ufs, np.array(ufs.codes, dtype=np.int32)
+        self._municipios, self._municipio_codes = municipios, np.array(municipios.codes, dtype=np.int32)
+        self._valores = np.array(valores, dtype=np.float64)
+
+    @staticmethod
+    def _join(values: List[str]) -> Tuple[str, List[int]]:
+        starts, offset = [], 0
+        for value in values:
+            starts.append(offset)
+            offset += len(value) + 1
+        starts.append(offset)
+        return _SEPARATOR.join(values) + _SEPARATOR, starts
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def dataset(self) -> Dict[str, Any]:
+        return {**self.meta, 'data': self.records}
+
+    def text(self, record_id: int) -> str:
+        return self._text_blob[self._text_starts[record_id]:self._text_starts[record_id + 1] - 1]
+
+    def all(self) -> np.ndarray:
+        return np.ones(len(self.records), dtype=bool)
+
+    # ---------- vocabulário ----------
+
+    def _tokens_containing(self, fragment: str, suffix: bool = False) -> List[int]:
+        """Ids (no vocabulário) dos tokens que contêm o fragmento (ou terminam nele)"""
+        blob, starts = self._vocab_blob, self._vocab_starts
+        needle = fragment + _SEPARATOR if suffix else fragment
+        found, position = [], blob.find(needle)
+        while position != -1:
+            token_id = bisect.bisect_right(starts, position) - 1
+            found.append(token_id)
+            position = blob.find(needle, starts[token_id + 1])
+        return found
+
+    def _tokens_starting(self, prefix: str) -> range:
+        start = bisect.bisect_left(self._vocab, prefix)
+        end = bisect.bisect_left(self._vocab, prefix + '\x7f', start)
+        return range(start, end)
+
+    def _token_exact(self, token: str) -> List[int]:
+        position = bisect.bisect_left(self._vocab, token)
+        return [position] if position < len(self._vocab) and self._vocab[position] == token else []
+
+    def _union(self, token_ids: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(len(self.records), dtype=bool)
+        for token_id in token_ids:
+            mask[self._postings[token_id]] = True
+        return mask
+
+    # ---------- filtros ----------
+
+    def match_term(self, term: str) -> np.ndarray:
+        """Registros cujo texto normalizado contém o termo (já normalizado)"""
+        tokens = term.split()
+        if len(tokens) == 1:
+            return self._union(self._tokens_containing(tokens[0]))
+        mask = self._union(self._tokens_containing(tokens[0], suffix=True))
+        for token in tokens[1:-1]:
+            if not mask.any():
+                return mask
+            mask &= self._union(self._token_exact(token))
+        mask &= self._union(self._tokens_starting(tokens[-1]))
+        # Tokens certos nem sempre estão adjacentes e na ordem: confere a frase
+        for record_id in np.flatnonzero(mask):
+            if term not in self.text(record_id):
+                mask[record_id] = False
+        return mask
+
+    def match_any(self, terms: Sequence[str]) -> np.ndarray:
+        """Registros que contêm algum dos termos já normalizados"""
+        mask = np.zeros(len(self.records), dtype=bool)
+        for term in terms:
+            mask |= self.match_term(term)
+        return mask
+
+    def matched_term(self, record_id: int, terms: Sequence[str]) -> Optional[str]:
+        text = self.text(record_id)
+        return next((term for term in terms if term in text), None)
+
+    def mask_uf(self, uf: str) -> np.ndarray:
+        uf = uf.upper()
+        return self._ufs.mask(lambda value: value == uf, self._uf_codes)
+
+    def mask_municipio(self, municipio: str) -> np.ndarray:
+        municipio = normalize_text(municipio)
+        return self._municipios.mask(lambda value: municipio in value, self._municipio_codes)
+
+    def mask_value(self, minimum: float = None, maximum: float = None) -> np.ndarray:
+        """Valor estimado na faixa (sem valor = fora, como antes)"""
+        mask = ~np.isnan(self._valores)
+        if minimum is not None:
+            mask &= self._valores >= minimum
+        if maximum is not None:
+            mask &= self._valores <= maximum
+        return mask
+
+    def select(self, mask: np.ndarray) -> List[Dict[str, Any]]:
+        records = self.records
+        return [records[record_id] for record_id in np.flatnonzero(mask)]
+
+
+# Índices montados neste processo, só da versão mais recente do dataset:
+# o nacional e os parciais por UF (no máximo SEARCH_CORPUS_MAX_SCOPES)
+SEARCH_CORPUS_MAX_SCOPES = 32
+_corpora: Dict[Tuple[Any, ...], SearchCorpus] = {}
+_corpus_lock = threading.Lock()
+
+
+def cached_search_corpus(version: Optional[Tuple[Any, ...]]) -> Optional[SearchCorpus]:
+    """Índice já montado para esta versão (e escopo), se houver (sem ler o dataset)"""
+    if version is None:
+        return None
+    return _corpora.get(version)
+
+
+def get_search_corpus(dataset: Dict[str, Any]) -> SearchCorpus:
+    """Índice do dataset, reaproveitado enquanto a versão (synced_at/watermark/escopo) for a mesma"""
+    version = dataset_version(dataset)
+    if version is None:
+        return SearchCorpus(dataset.get('data') or [], meta=dataset)
+    corpus = cached_search_corpus(version)
+    if corpus is not None:
+        return corpus
+    with _corpus_lock:
+        corpus = _corpora.get(version)
+        if corpus is None:
+            corpus = SearchCorpus(dataset.get('data') or [], version, meta=dataset)
+            # Versão nova do dataset: descarta os índices das anteriores
+            for stale in [key for key in _corpora if key[:2] != version[:2]]:
+                del _corpora[stale]
+            if len(_corpora) >= SEARCH_CORPUS_MAX_SCOPES:
+                _corpora.pop(next(key for key in _corpora if key[2] is not None), None)
+            _corpora[version] = corpus
+            scope = f"UFs {', '.join(version[2])}" if version[2] else "national"
+            logger.info(f"🔎 Search index built for PNCP dataset {version[0]} ({scope}, "
+                        f"{len(corpus)} records, {len(corpus._vocab)} tokens)")
+        return corpus
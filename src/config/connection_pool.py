@@ -0,0 +1,360 @@
+"""
+Pool de conexões PostgreSQL por processo
+Usado pelo DatabaseManager para evitar handshake TLS + auth a cada chamada
+
+- Tamanho máximo limitado e timeout de aquisição
+- min_size conexões abertas na primeira aquisição de cada processo (no worker, depois do fork)
+- Health check no checkout (SELECT 1 após período ocioso) e reciclagem por idade
+- Seguro para fork (gunicorn --preload): o processo filho descarta as conexões herdadas
+- Estatísticas (espera, em uso, criadas, recicladas) para os endpoints de status
+"""
+
+import os
+import time
+import logging
+import threading
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+import psycopg2
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+from psycopg2.extras import DictCursor
+
+logger = logging.getLogger(__name__)
+
+# Conexões herdadas do processo pai após fork. Mantidas referenciadas para que o
+# coletor de lixo não chame PQfinish no filho, o que encerraria a sessão do pai.
+_INHERITED_CONNECTIONS = []
+
+_LIVE_POOLS = weakref.WeakSet()
+
+
+class PoolError(Exception):
+    """Erro genérico do pool de conexões"""
+
+
+class PoolTimeoutError(PoolError):
+    """Nenhuma conexão disponível dentro do timeout de aquisição"""
+
+
+class PostgresConnectionPool:
+    """
+    Pool de conexões psycopg2 thread-safe e limitado
+
+    Na primeira aquisição do processo abre min_size conexões de uma vez; as
+    demais são criadas sob demanda até max_size. Quando o pool está cheio,
+    acquire() espera até acquire_timeout segundos antes de levantar PoolTimeoutError.
+    """
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10,
+                 acquire_timeout: float = 10.0, health_check_after: float = 30.0,
+                 max_lifetime: float = 1800.0, connect_kwargs: Optional[Dict[str, Any]] = None):
+        if max_size < 1:
+            raise ValueError("max_size deve ser >= 1")
+
+        self.dsn = dsn
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_after = health_check_after
+        self.max_lifetime = max_lifetime
+        self.connect_kwargs = dict(connect_kwargs or {})
+        self.connect_kwargs.setdefault('cursor_factory', DictCursor)
+
+        self._init_state()
+        _LIVE_POOLS.add(self)
+
+    def _init_state(self):
+        """(Re)inicializar estado interno - usado também no filho após fork"""
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._pid = os.getpid()
+        self._closed = False
+        # Entradas ociosas: (conn, created_at, last_used)
+        self._idle = deque()
+        # id(conn) -> (conn, created_at)
+        self._in_use = {}
+        # Conexões existentes + reservadas em criação
+        self._size = 0
+        self._waiting = 0
+        # min_size conexões já abertas neste processo?
+        self._prefilled = False
+        self._stats = {
+            'created': 0,
+            'recycled': 0,
+            'closed': 0,
+            'checkouts': 0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    # ====== CICLO DE VIDA DAS CONEXÕES ======
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, **self.connect_kwargs)
+        conn.autocommit = False
+        with self._lock:
+            self._stats['created'] += 1
+        return conn
+
+    def _close_quietly(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats['closed'] += 1
+
+    def _is_healthy(self, conn) -> bool:
+        """Executar SELECT 1 na conexão ociosa"""
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Conexão do pool falhou no health check: {e}")
+            return False
+
+    def _checkout_entry(self, entry):
+        """Validar uma entrada ociosa; recicla a conexão se expirada ou quebrada"""
+        conn, created_at, last_used = entry
+        now = time.monotonic()
+
+        expired = now - created_at > self.max_lifetime
+        broken = bool(conn.closed)
+        if not expired and not broken and now - last_used > self.health_check_after:
+            broken = not self._is_healthy(conn)
+            if broken:
+                with self._lock:
+                    self._stats['health_check_failures'] += 1
+
+        if not expired and not broken:
+            return conn, created_at
+
+        self._close_quietly(conn)
+        new_conn = self._connect()
+        with self._lock:
+            self._stats['recycled'] += 1
+        return new_conn, time.monotonic()
+
+    def _prefill(self):
+        """Abrir as min_size conexões iniciais (uma vez por processo, fora do lock)"""
+        with self._cond:
+            if self._prefilled:
+                return
+            self._prefilled = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+
+        opened = 0
+        try:
+            for _ in range(missing):
+                conn = self._connect()
+                now = time.monotonic()
+                with self._cond:
+                    self._idle.appendleft((conn, now, now))
+                    self._cond.notify()
+                opened += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Pool abriu {opened}/{missing} conexões iniciais: {e}")
+            with self._cond:
+                self._size -= missing - opened
+                self._cond.notify_all()
+
+    # ====== API PÚBLICA ======
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Obter uma conexão do pool
+
+        Args:
+            timeout: Segundos máximos de espera (default: acquire_timeout)
+
+        Raises:
+            PoolTimeoutError: Pool cheio durante todo o timeout
+        """
+        self._check_pid()
+        if not self._prefilled:
+            self._prefill()
+        timeout = self.acquire_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        entry = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolError("Pool de conexões fechado")
+                if self._idle:
+                    # LIFO: reaproveita a conexão mais quente
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"Timeout de {timeout:.1f}s aguardando conexão "
+                        f"(max_size={self.max_size}, em uso={len(self._in_use)})"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+            waited = time.monotonic() - start
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+
+        try:
+            if entry is None:
+                conn, created_at = self._connect(), time.monotonic()
+            else:
+                conn, created_at = self._checkout_entry(entry)
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        with self._lock:
+            self._in_use[id(conn)] = (conn, created_at)
+        return conn
+
+    def release(self, conn, discard: bool = False):
+        """
+        Devolver conexão ao pool
+
+        Transações abertas são desfeitas. Conexões quebradas, marcadas com
+        discard=True ou devolvidas após close() são fechadas.
+        """
+        with self._lock:
+            info = self._in_use.pop(id(conn), None)
+            foreign = info is None or self._pid != os.getpid()
+
+        if foreign:
+            # Conexão não pertence a este pool/processo
+            if self._pid == os.getpid():
+                self._close_quietly(conn)
+            return
+
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except Exception:
+                discard = True
+
+        if discard or conn.closed or self._closed:
+            self._close_quietly(conn)
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append((conn, info[1], time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager simples: acquire/release sem commit automático"""
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self):
+        """Fechar todas as conexões ociosas e impedir novas aquisições"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+        logger.info(f"🔒 Pool de conexões fechado ({len(idle)} conexões ociosas encerradas)")
+
+    def stats(self) -> Dict[str, Any]:
+        """Estatísticas do pool para endpoints de status"""
+        with self._lock:
+            checkouts = self._stats['checkouts']
+            return {
+                'pid': self._pid,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'created': self._stats['created'],
+                'recycled': self._stats['recycled'],
+                'closed': self._stats['closed'],
+                'checkouts': checkouts,
+                'timeouts': self._stats['timeouts'],
+                'health_check_failures': self._stats['health_check_failures'],
+                'wait_time_total_ms': round(self._stats['wait_time_total'] * 1000, 3),
+                'wait_time_avg_ms': round(self._stats['wait_time_total'] * 1000 / checkouts, 3) if checkouts else 0.0,
+                'wait_time_max_ms': round(self._stats['wait_time_max'] * 1000, 3),
+                'closed_pool': self._closed,
+            }
+
+    # ====== SEGURANÇA EM FORK ======
+
+    def _check_pid(self):
+        """Fallback caso o fork não tenha passado pelos hooks de os.register_at_fork"""
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+    def _close_idle_before_fork(self):
+        """No pai, antes do fork: encerrar conexões ociosas para não herdá-las"""
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+    def _reset_after_fork(self):
+        """No filho: abandonar conexões herdadas sem fechar o socket do pai"""
+        inherited = [entry[0] for entry in self._idle] + [conn for conn, _ in self._in_use.values()]
+        _INHERITED_CONNECTIONS.extend(inherited)
+        was_closed = self._closed
+        self._init_state()
+        self._closed = was_closed
+
+
+def _before_fork():
+    for pool in list(_LIVE_POOLS):
+        try:
+            pool._close_idle_before_fork()
+        except Exception:
+            pass
+
+
+def _after_fork_in_child():
+    for pool in list(_LIVE_POOLS):
+        pool._reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
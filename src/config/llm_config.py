@@ -50,6 +50,27 @@ class LLMConfig:
             'max_tokens': int(os.getenv('OPENAI_MAX_TOKENS', '300')),
         }
     
+    @staticmethod
+    def get_validation_pool_config(provider: str) -> Dict[str, Any]:
+        """
+        Limites do pool de validação concorrente por provider ('openai' ou 'ollama')
+
+        tokens_per_minute = 0 desativa o rate limit de tokens
+        """
+        prefix = f"LLM_{provider.upper()}"
+        defaults = {
+            'openai': {'concurrency': '4', 'tokens_per_minute': '150000'},
+            'ollama': {'concurrency': '1', 'tokens_per_minute': '0'},
+        }.get(provider, {'concurrency': '2', 'tokens_per_minute': '0'})
+
+        return {
+            'concurrency': int(os.getenv(f'{prefix}_CONCURRENCY', defaults['concurrency'])),
+            'tokens_per_minute': int(os.getenv(f'{prefix}_TOKENS_PER_MINUTE', defaults['tokens_per_minute'])),
+            'max_retries': int(os.getenv('LLM_VALIDATION_MAX_RETRIES', '3')),
+            'backoff_base': float(os.getenv('LLM_VALIDATION_BACKOFF_BASE', '1.0')),
+            'backoff_max': float(os.getenv('LLM_VALIDATION_BACKOFF_MAX', '30.0')),
+        }
+
     @staticmethod
     def is_ollama_available() -> bool:
         """Verifica se o Ollama está disponível"""
@@ -0,0 +1,52 @@
+# src/gunicorn.conf.py
+"""
+Hooks do gunicorn (carregado automaticamente do WORKDIR /app/src)
+
+Sobe o worker de embeddings (services/embedding_worker.py) junto com o master:
+os workers web e os jobs em background mandam os textos para ele pelo socket
+Unix, em vez de cada processo carregar a própria cópia dos modelos.
+EMBEDDING_WORKER_AUTOSTART=false desliga (ex.: worker rodando em outro serviço).
+
+Cada worker web também sobe o aquecedor do dataset nacional do PNCP
+(services/pncp_cache_warmer.py); o lock no Redis garante um aquecimento por vez.
+PNCP_CACHE_WARMER_AUTOSTART=false desliga (ex.: scripts/daily_fetch_all_bids.py no cron).
+"""
+
+import os
+import sys
+import subprocess
+
+EMBEDDING_WORKER_AUTOSTART = os.getenv('EMBEDDING_WORKER_AUTOSTART', 'true').lower() == 'true'
+EMBEDDING_WORKER_PRELOAD = os.getenv('EMBEDDING_WORKER_PRELOAD', 'neuralmind/bert-base-portuguese-cased').split()
+PNCP_CACHE_WARMER_AUTOSTART = os.getenv('PNCP_CACHE_WARMER_AUTOSTART', 'true').lower() == 'true'
+
+_embedding_worker = None
+
+
+def on_starting(server):
+    global _embedding_worker
+    if not EMBEDDING_WORKER_AUTOSTART or os.getenv('EMBEDDING_WORKER_MODE', 'auto').lower() == 'off':
+        return
+    _embedding_worker = subprocess.Popen(
+        [sys.executable, '-m', 'services.embedding_worker', '--exit-with-parent', '--preload-models', *EMBEDDING_WORKER_PRELOAD],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    server.log.info(f"🧠 Worker de embeddings iniciado (pid {_embedding_worker.pid})")
+
+
+def post_fork(server, worker):
+    # Threads não sobrevivem ao fork: o aquecedor sobe em cada worker, depois do --preload
+    if not PNCP_CACHE_WARMER_AUTOSTART:
+        return
+    from services.pncp_cache_warmer import get_pncp_cache_warmer
+    if get_pncp_cache_warmer().start():
+        server.log.info(f"🔥 Aquecedor do dataset do PNCP ativo no worker {worker.pid}")
+
+
+def on_exit(server):
+    if _embedding_worker is not None and _embedding_worker.poll() is None:
+        _embedding_worker.terminate()
+        try:
+            _embedding_worker.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _embedding_worker.kill()
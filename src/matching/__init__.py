@@ -18,6 +18,7 @@ from .pncp_api import (
     get_all_companies_from_db,
     get_processed_bid_ids,
     fetch_bids_from_pncp,
+    fetch_updated_bids_from_pncp,
     fetch_bid_items_from_pncp,
     save_bid_to_db,
     save_bid_items_to_db,
@@ -29,6 +30,8 @@ from .pncp_api import (
     ESTADOS_BRASIL
 )
 
+from .bulk_writer import BulkWriter
+
 from .matching_engine import (
     process_daily_bids,
     reevaluate_existing_bids
@@ -50,6 +53,7 @@ __all__ = [
     'get_all_companies_from_db',
     'get_processed_bid_ids',
     'fetch_bids_from_pncp',
+    'fetch_updated_bids_from_pncp',
     'fetch_bid_items_from_pncp',
     'save_bid_to_db',
     'save_bid_items_to_db',
@@ -60,6 +64,9 @@ __all__ = [
     'clear_existing_matches',
     'ESTADOS_BRASIL',
     
+    # Persistência em lote
+    'BulkWriter',
+    
     # Main functions
     'process_daily_bids',
     'reevaluate_existing_bids'
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+🧮 VETORIZAÇÃO EM LOTE COM DEDUPLICAÇÃO
+Junta os textos de várias licitações (objeto + itens) numa única consulta ao
+cache e numa única chamada batch_vectorize, em vez de um forward do modelo
+e um round trip ao Redis por texto.
+
+- Textos com o mesmo texto normalizado (preprocess_text do vetorizador) são
+  vetorizados uma vez só - comum em editais republicados e itens repetidos
+- Métricas por lote: textos, únicos, hits de cache, gerados e textos/s
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchEmbedder:
+    """Vetoriza listas de textos usando o cache de embeddings e batch_vectorize"""
+
+    def __init__(self, vectorizer, cache_service=None):
+        self.vectorizer = vectorizer
+        self.cache_service = cache_service
+        self._lock = threading.Lock()
+        self._totals = {
+            'batches': 0,
+            'texts': 0,
+            'unique': 0,
+            'cache_hits': 0,
+            'generated': 0,
+            'failed': 0,
+            'elapsed_s': 0.0,
+        }
+
+    def embed(self, texts: List[str]) -> Tuple[Dict[str, List[float]], Dict[str, Any]]:
+        """
+        Embeddings de texts, indexados pelo texto original, e as métricas do lote
+
+        Textos vazios ou que falharam na vetorização ficam fora do resultado.
+        """
+        start = time.perf_counter()
+
+        # Deduplicar pelo texto normalizado (o embedding só depende dele)
+        normalized_by_text: Dict[str, str] = {}
+        unique: List[str] = []
+        seen = set()
+        for text in texts:
+            if not text or text in normalized_by_text:
+                continue
+            normalized = self.vectorizer.preprocess_text(text)
+            if not normalized:
+                continue
+            normalized_by_text[text] = normalized
+            if normalized not in seen:
+                seen.add(normalized)
+                unique.append(normalized)
+
+        embeddings: Dict[str, List[float]] = {}
+        if unique and self.cache_service is not None:
+            embeddings.update(self.cache_service.batch_get_embeddings_from_cache(unique))
+        cache_hits = len(embeddings)
+
+        missing = [text for text in unique if text not in embeddings]
+        generated = self._generate(missing) if missing else {}
+        embeddings.update(generated)
+
+        if generated and self.cache_service is not None:
+            self.cache_service.batch_save_embeddings_to_cache(list(generated.items()))
+
+        result = {
+            text: embeddings[normalized]
+            for text, normalized in normalized_by_text.items()
+            if embeddings.get(normalized)
+        }
+
+        elapsed = time.perf_counter() - start
+        batch = {
+            'texts': len(texts),
+            'unique': len(unique),
+            'cache_hits': cache_hits,
+            'generated': len(generated),
+            'failed': len(missing) - len(generated),
+            'elapsed_s': elapsed,
+        }
+        batch['cache_hit_rate'] = round(cache_hits / len(unique), 4) if unique else 0.0
+        batch['texts_per_s'] = round(len(texts) / elapsed, 1) if elapsed > 0 else 0.0
+
+        with self._lock:
+            self._totals['batches'] += 1
+            for key in ('texts', 'unique', 'cache_hits', 'generated', 'failed', 'elapsed_s'):
+                self._totals[key] += batch[key]
+        return result, batch
+
+    def _generate(self, texts: List[str]) -> Dict[str, List[float]]:
+        """Uma chamada batch_vectorize; se o lote vier incompleto, texto a texto"""
+        try:
+            vectors = self.vectorizer.batch_vectorize(texts)
+        except Exception as e:
+            logger.warning(f"⚠️ batch_vectorize falhou ({len(texts)} textos): {e}")
+            vectors = None
+
+        if not vectors or len(vectors) != len(texts):
+            # Alguns vetorizadores descartam textos inválidos e desalinham o lote
+            vectors = [self.vectorizer.vectorize(text) for text in texts]
+
+        return {text: vector for text, vector in zip(texts, vectors) if vector}
+
+    def stats(self) -> Dict[str, Any]:
+        """Totais do processo: textos, únicos, hit rate do cache e textos/s"""
+        with self._lock:
+            stats = dict(self._totals)
+        stats['cache_hit_rate'] = round(stats['cache_hits'] / stats['unique'], 4) if stats['unique'] else 0.0
+        stats['dedup_saved'] = stats['texts'] - stats['unique']
+        stats['texts_per_s'] = round(stats['texts'] / stats['elapsed_s'], 1) if stats['elapsed_s'] > 0 else 0.0
+        stats['elapsed_s'] = round(stats['elapsed_s'], 3)
+        return stats
+
+
+def format_batch_stats(batch: Dict[str, Any]) -> str:
+    """Linha de log de um lote de embeddings"""
+    return (
+        f"🧮 Lote de embeddings: {batch['texts']} textos ({batch['unique']} únicos) | "
+        f"cache {batch['cache_hits']}/{batch['unique']} ({batch['cache_hit_rate']:.0%}) | "
+        f"gerados {batch['generated']} | {batch['texts_per_s']:.0f} textos/s"
+    )
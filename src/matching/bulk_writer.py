@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+📦 ESCRITA EM LOTE DE LICITAÇÕES, ITENS E MATCHES
+Substitui os saves linha a linha (uma conexão + um INSERT por registro) por
+buffers descarregados com INSERTs multi-linha (execute_values) numa única
+transação por flush.
+
+- licitacao_id é resolvido por JOIN em pncp_id no próprio INSERT
+  (sem subselect por linha e sem esperar o id da licitação)
+- Flush por tamanho (BULK_WRITER_BATCH_SIZE linhas) e por intervalo
+  (BULK_WRITER_FLUSH_INTERVAL segundos, thread em segundo plano)
+- Ordem dentro do flush: licitações → itens → matches → status, então itens e
+  matches sempre encontram a licitação enfileirada antes deles
+- Lote com linha inválida: regravado por etapa, em metades, até isolar as
+  linhas com erro (só elas são descartadas)
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from .pncp_api import (
+    BID_UPSERT_SQL, ITEM_COLUMNS, ITEM_VALUE_CASTS, ITEM_UPSERT_CONFLICT_SQL,
+    _bid_values, _unique_item_rows
+)
+
+logger = logging.getLogger(__name__)
+
+BULK_WRITER_BATCH_SIZE = int(os.getenv('BULK_WRITER_BATCH_SIZE', '1000'))
+BULK_WRITER_FLUSH_INTERVAL = float(os.getenv('BULK_WRITER_FLUSH_INTERVAL', '2.0'))
+# Linhas por comando execute_values
+BULK_WRITER_PAGE_SIZE = int(os.getenv('BULK_WRITER_PAGE_SIZE', '1000'))
+
+ITEM_BULK_SQL = f"""
+    INSERT INTO licitacao_itens (licitacao_id, {', '.join(ITEM_COLUMNS)})
+    SELECT l.id, {', '.join('v.' + column for column in ITEM_COLUMNS)}
+    FROM (VALUES %s) AS v (pncp_id, {', '.join(ITEM_COLUMNS)})
+    JOIN licitacoes l ON l.pncp_id = v.pncp_id
+""" + ITEM_UPSERT_CONFLICT_SQL
+ITEM_BULK_TEMPLATE = "(%s, " + ", ".join(f"%s::{cast}" for cast in ITEM_VALUE_CASTS) + ")"
+
+MATCH_BULK_SQL = """
+    INSERT INTO matches (licitacao_id, empresa_id, score_similaridade, match_type, justificativa_match)
+    SELECT l.id, v.empresa_id, v.score, v.match_type, v.justificativa
+    FROM (VALUES %s) AS v (pncp_id, empresa_id, score, match_type, justificativa)
+    JOIN licitacoes l ON l.pncp_id = v.pncp_id
+"""
+MATCH_BULK_TEMPLATE = "(%s, %s::uuid, %s::numeric, %s, %s)"
+
+STATUS_BULK_SQL = """
+    UPDATE licitacoes l SET status = v.status, updated_at = NOW()
+    FROM (VALUES %s) AS v (pncp_id, status)
+    WHERE l.pncp_id = v.pncp_id
+"""
+
+# Etapas do flush, na ordem: (nome, SQL, template do execute_values)
+FLUSH_STAGES = (
+    ('bids', BID_UPSERT_SQL, None),
+    ('items', ITEM_BULK_SQL, ITEM_BULK_TEMPLATE),
+    ('matches', MATCH_BULK_SQL, MATCH_BULK_TEMPLATE),
+    ('statuses', STATUS_BULK_SQL, None),
+)
+
+
+def _is_row_error(error: Exception) -> bool:
+    """Erro causado pelos dados (vale isolar a linha), não pela conexão"""
+    return (isinstance(error, psycopg2.DatabaseError)
+            and not isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)))
+
+
+class BulkWriter:
+    """
+    Buffer thread-safe de licitações, itens, matches e mudanças de status
+
+    Uso:
+        with BulkWriter() as writer:
+            writer.add_bid(bid)
+            writer.add_items(pncp_id, items)
+            writer.add_match(pncp_id, empresa_id, score, "llm_approved", justificativa)
+            writer.set_bid_status(pncp_id, "processada")
+
+    Um flush com erro de dados faz rollback e regrava o lote etapa por etapa,
+    em metades, até isolar as linhas inválidas: só elas são descartadas
+    (contadas em failed_rows). Com erro de conexão o lote inteiro é descartado.
+    flush() não levanta exceção, para um lote ruim não abortar quem enfileira.
+    """
+
+    def __init__(self, db_manager=None, batch_size: int = BULK_WRITER_BATCH_SIZE,
+                 flush_interval: float = BULK_WRITER_FLUSH_INTERVAL):
+        if db_manager is None:
+            from config.database import db_manager
+        self.db_manager = db_manager
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()         # Protege os buffers
+        self._flush_lock = threading.Lock()   # Serializa os flushes (ordem entre lotes)
+        self._bids: Dict[str, tuple] = {}
+        self._items: Dict[Tuple[str, Any], tuple] = {}
+        self._matches: List[tuple] = []
+        self._statuses: Dict[str, str] = {}
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = {
+            'flushes': 0,
+            'failed_flushes': 0,
+            'bids': 0,
+            'items': 0,
+            'matches': 0,
+            'statuses': 0,
+            'failed_rows': 0,
+            'flush_time_s': 0.0,
+        }
+
+    # ------------------------------------------------------------------ enfileirar
+
+    def add_bid(self, bid: Dict[str, Any]) -> str:
+        """Enfileira o upsert de uma licitação do PNCP e devolve seu pncp_id"""
+        values = _bid_values(bid)
+        with self._lock:
+            self._bids[values['pncp_id']] = tuple(values.values())
+        self._after_add()
+        return values['pncp_id']
+
+    def add_items(self, pncp_id: str, items: List[Dict[str, Any]]):
+        """Enfileira os itens de uma licitação (licitacao_id resolvido por pncp_id no flush)"""
+        if not items:
+            return
+        rows = _unique_item_rows(items)
+        with self._lock:
+            for values in rows:
+                self._items[(pncp_id, values['numero_item'])] = (pncp_id, *values.values())
+        self._after_add()
+
+    def add_match(self, pncp_id: str, empresa_id: str, score: float, match_type: str, justificativa: str = ""):
+        """Mesma assinatura de save_match_to_db, mas enfileirado"""
+        # Converter score para float Python nativo se for numpy
+        score = float(score.item()) if hasattr(score, 'item') else float(score)
+        with self._lock:
+            self._matches.append((pncp_id, str(empresa_id), score, match_type, justificativa))
+        self._after_add()
+
+    def set_bid_status(self, pncp_id: str, status: str):
+        """Enfileira a mudança de status (aplicada depois dos upserts do mesmo flush)"""
+        with self._lock:
+            self._statuses[pncp_id] = status
+        self._after_add()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._bids) + len(self._items) + len(self._matches) + len(self._statuses)
+
+    def _after_add(self):
+        if self._closed:
+            raise RuntimeError("BulkWriter já foi fechado")
+        if self.flush_interval > 0 and self._timer is None:
+            self._start_timer()
+        if self.pending() >= self.batch_size:
+            self.flush()
+
+    # ------------------------------------------------------------------ flush
+
+    def flush(self) -> Dict[str, int]:
+        """Grava tudo que está no buffer numa transação; devolve as linhas gravadas por tabela"""
+        with self._flush_lock:
+            with self._lock:
+                batches = {
+                    'bids': list(self._bids.values()),
+                    'items': list(self._items.values()),
+                    'matches': self._matches,
+                    'statuses': list(self._statuses.items()),
+                }
+                self._bids, self._items, self._matches, self._statuses = {}, {}, [], {}
+
+            total = sum(len(rows) for rows in batches.values())
+            if total == 0:
+                return {'bids': 0, 'items': 0, 'matches': 0, 'statuses': 0}
+
+            start = time.perf_counter()
+            failed = 0
+            try:
+                written = self._execute(batches)
+            except Exception as e:
+                if _is_row_error(e):
+                    logger.warning(f"⚠️ Flush do BulkWriter com erro ({e}); regravando em partes para isolar as linhas")
+                    written = {}
+                    for stage, rows in batches.items():
+                        written[stage], stage_failed = self._write_isolating(stage, rows)
+                        failed += stage_failed
+                else:
+                    written = {stage: 0 for stage in batches}
+                    failed = total
+                    logger.error(f"❌ Falha no flush do BulkWriter ({total} linhas descartadas): {e}")
+
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['flush_time_s'] += elapsed
+                for key, count in written.items():
+                    self._stats[key] += count
+                if failed:
+                    self._stats['failed_flushes'] += 1
+                    self._stats['failed_rows'] += failed
+            logger.debug(f"📦 Flush: {written} em {elapsed * 1000:.0f}ms")
+            return written
+
+    def _execute(self, batches: Dict[str, list]) -> Dict[str, int]:
+        """Grava as etapas presentes em batches numa única transação; devolve as linhas afetadas por etapa
+
+        Conta pelo rowcount de cada página: matches e itens de licitação ausente
+        caem no JOIN e status de licitação ausente não encontram linha no UPDATE.
+        """
+        written = {stage: 0 for stage in batches}
+        with self.db_manager.get_connection() as conn:
+            with conn.cursor() as cursor:
+                for stage, sql, template in FLUSH_STAGES:
+                    rows = batches.get(stage) or []
+                    for start in range(0, len(rows), BULK_WRITER_PAGE_SIZE):
+                        page = rows[start:start + BULK_WRITER_PAGE_SIZE]
+                        execute_values(cursor, sql, page, template=template, page_size=len(page))
+                        written[stage] += max(cursor.rowcount, 0)
+        return written
+
+    def _write_isolating(self, stage: str, rows: list) -> Tuple[int, int]:
+        """Grava as linhas de uma etapa dividindo em metades as partes com erro; devolve (gravadas, descartadas)"""
+        if not rows:
+            return 0, 0
+        try:
+            return self._execute({stage: rows})[stage], 0
+        except Exception as e:
+            if len(rows) == 1 or not _is_row_error(e):
+                logger.error(f"❌ BulkWriter: {len(rows)} linha(s) de {stage} descartada(s) "
+                             f"(primeira: {rows[0][0]}): {e}")
+                return 0, len(rows)
+        middle = len(rows) // 2
+        left = self._write_isolating(stage, rows[:middle])
+        right = self._write_isolating(stage, rows[middle:])
+        return left[0] + right[0], left[1] + right[1]
+
+    def _start_timer(self):
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Thread(target=self._flush_loop, name='bulk-writer-flush', daemon=True)
+            self._timer.start()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Para o flush periódico e grava o que restou no buffer"""
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.flush()
+        self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------ métricas
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        rows = stats['bids'] + stats['items'] + stats['matches'] + stats['statuses']
+        stats['rows'] = rows
+        stats['rows_per_s'] = round(rows / stats['flush_time_s'], 1) if stats['flush_time_s'] > 0 else 0.0
+        stats['flush_time_s'] = round(stats['flush_time_s'], 3)
+        stats['pending'] = self.pending()
+        return stats
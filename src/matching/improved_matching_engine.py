@@ -16,18 +16,25 @@ from config.database import db_manager
 
 from .improved_vectorizers import (
     get_vectorizer_for_quality_level,
-    calculate_improved_similarity
+    calculate_improved_similarity,
+    improved_similarity_matrix
 )
+from .similarity_matrix import CompanyEmbeddingMatrix, aggregate_item_scores
 from .improved_matching_config import get_quality_config
 from .llm_match_validator import LLMMatchValidator
+from .llm_validation_pool import LLMValidationPool, OrderedBidValidationQueue
+from .bulk_writer import BulkWriter
 from .pncp_api import (
     get_db_connection, get_all_companies_from_db, get_processed_bid_ids,
     fetch_bids_from_pncp, fetch_bid_items_from_pncp, save_bid_to_db,
-    save_bid_items_to_db, save_match_to_db, update_bid_status,
+    save_bid_items_to_db, update_bid_status,
     get_existing_bids_from_db, get_bid_items_from_db, clear_existing_matches,
     ESTADOS_BRASIL, PNCP_MAX_PAGES
 )
 
+# Licitações aguardando validação LLM ao mesmo tempo (limita memória do pipeline)
+LLM_VALIDATION_MAX_PENDING_BIDS = int(os.getenv('LLM_VALIDATION_MAX_PENDING_BIDS', '32'))
+
 def run_quality_matching(quality_level: str = "high", clear_existing: bool = True, 
                         vectorizer_type: str = "brazilian", enable_llm_validation: bool = True) -> Dict[str, Any]:
     """
@@ -91,6 +98,8 @@ def run_quality_matching(quality_level: str = "high", clear_existing: bool = Tru
     # 2. Vetorizar empresas com cache Redis
     print("🔢 Vetorizando descrições das empresas...")
     _vectorize_companies_with_quality_cache(companies, cache_service, vectorizer)
+    # 📐 Matriz das empresas para a Fase 2 vetorizada (itens x empresas)
+    company_matrix = CompanyEmbeddingMatrix(companies)
     
     # 3. Carregar licitações existentes
     print(f"\n📄 Carregando licitações do banco...")
@@ -137,137 +146,114 @@ def run_quality_matching(quality_level: str = "high", clear_existing: bool = Tru
     
     total_scores = []
     
-    for i, bid in enumerate(existing_bids, 1):
-        objeto_compra = bid['objeto_compra']
-        pncp_id = bid['pncp_id']
+    validation_pool = LLMValidationPool(llm_validator) if llm_validator else None
+    validation_queue = OrderedBidValidationQueue(validation_pool, LLM_VALIDATION_MAX_PENDING_BIDS)
+    writer = BulkWriter()
+    
+    try:
+        for i, bid in enumerate(existing_bids, 1):
+            objeto_compra = bid['objeto_compra']
+            pncp_id = bid['pncp_id']
         
-        print(f"\n[{i}/{len(existing_bids)}] 🔍 Processando: {pncp_id}")
-        print(f"   📝 Objeto: {objeto_compra[:100]}...")
+            print(f"\n[{i}/{len(existing_bids)}] 🔍 Processando: {pncp_id}")
+            print(f"   📝 Objeto: {objeto_compra[:100]}...")
         
-        if not objeto_compra:
-            print("   ⚠️ Objeto da compra vazio, pulando...")
-            continue
+            if not objeto_compra:
+                print("   ⚠️ Objeto da compra vazio, pulando...")
+                continue
         
-        # Obter embedding (cache ou gerar novo)
-        if objeto_compra in cached_bid_embeddings:
-            bid_embedding = cached_bid_embeddings[objeto_compra]
-            print(f"   ⚡ Embedding do cache Redis")
-        else:
-            bid_embedding = vectorizer.vectorize(objeto_compra)
-            if bid_embedding:
-                cache_service.save_embedding_to_cache(objeto_compra, bid_embedding)
-                print(f"   🆕 Novo embedding gerado")
+            # Obter embedding (cache ou gerar novo)
+            if objeto_compra in cached_bid_embeddings:
+                bid_embedding = cached_bid_embeddings[objeto_compra]
+                print(f"   ⚡ Embedding do cache Redis")
+            else:
+                bid_embedding = vectorizer.vectorize(objeto_compra)
+                if bid_embedding:
+                    cache_service.save_embedding_to_cache(objeto_compra, bid_embedding)
+                    print(f"   🆕 Novo embedding gerado")
         
-        if not bid_embedding:
-            print("   ❌ Erro ao vetorizar objeto da compra")
-            stats['vectorization_failed'] += 1
-            continue
+            if not bid_embedding:
+                print("   ❌ Erro ao vetorizar objeto da compra")
+                stats['vectorization_failed'] += 1
+                continue
         
-        stats['total_bids_processed'] += 1
+            stats['total_bids_processed'] += 1
         
-        # FASE 1: Matching com análise de qualidade
-        potential_matches = []
-        print("   🔍 FASE 1 - Análise semântica de ALTA QUALIDADE:")
+            # FASE 1: Matching com análise de qualidade
+            quality_candidates = []
+            print("   🔍 FASE 1 - Análise semântica de ALTA QUALIDADE:")
         
-        for company in companies:
-            if not company.get("embedding"):
-                continue
+            for company in companies:
+                if not company.get("embedding"):
+                    continue
             
-            # Usar análise de qualidade melhorada
-            score, justificativa, analysis = calculate_improved_similarity(
-                bid_embedding, 
-                company["embedding"], 
-                objeto_compra, 
-                company["descricao_servicos_produtos"],
-                quality_level=quality_level,
-                return_analysis=True
-            )
+                # Usar análise de qualidade melhorada
+                score, justificativa, analysis = calculate_improved_similarity(
+                    bid_embedding, 
+                    company["embedding"], 
+                    objeto_compra, 
+                    company["descricao_servicos_produtos"],
+                    quality_level=quality_level,
+                    return_analysis=True
+                )
             
-            print(f"      🏢 {company['nome']}: Score = {score:.3f} | Qualidade = {analysis.get('quality_category', 'N/A')}")
+                print(f"      🏢 {company['nome']}: Score = {score:.3f} | Qualidade = {analysis.get('quality_category', 'N/A')}")
             
-            # Usar threshold da configuração de qualidade
-            if score >= config['threshold_phase1']:
-                if analysis.get('should_accept', True):
-                    # 🔥 NOVA POLÍTICA: TODOS OS MATCHES PASSAM PELO LLM
-                    should_accept_match = False  # Por padrão, rejeitar até LLM aprovar
-                    final_score = score
-                    final_justificativa = justificativa
-                    
-                    if llm_validator:
-                        print(f"         🤖 VALIDAÇÃO LLM OBRIGATÓRIA (score {score:.1%})")
-                        
-                        validation = llm_validator.validate_match(
-                            empresa_nome=company['nome'],
-                            empresa_descricao=company['descricao_servicos_produtos'],
-                            licitacao_objeto=objeto_compra,
-                            pncp_id=pncp_id,
-                            similarity_score=score
-                        )
-                        
-                        stats['llm_validations_count'] += 1
-                        
-                        if validation['is_valid']:
-                            print(f"         🎯 LLM APROVOU! Confiança: {validation['confidence']:.1%}")
-                            final_score = validation['confidence']
-                            final_justificativa += f" | LLM: {validation['reasoning'][:100]}..."
-                            stats['llm_approved'] += 1
-                            should_accept_match = True  # ✅ APROVADO PELO LLM
-                        else:
-                            print(f"         🚫 LLM REJEITOU: {validation['reasoning'][:80]}...")
-                            stats['llm_rejected'] += 1
-                            should_accept_match = False  # ❌ REJEITADO PELO LLM
-                    else:
-                        # 🚨 FALLBACK: Se LLM indisponível, aplicar threshold mais rigoroso
-                        if score >= 0.85:  # Apenas scores muito altos sem LLM
-                            should_accept_match = True
-                            print(f"         ⚠️  LLM indisponível - aprovado por score alto ({score:.1%})")
-                        else:
-                            should_accept_match = False
-                            print(f"         ❌ LLM indisponível - rejeitado por score insuficiente ({score:.1%})")
-                    
-                    if should_accept_match:
-                        potential_matches.append((company, final_score, final_justificativa, analysis))
-                        stats['quality_accepted'] += 1
-                        print(f"         ✅ MATCH DE QUALIDADE ACEITO!")
+                # Usar threshold da configuração de qualidade
+                if score >= config['threshold_phase1']:
+                    if analysis.get('should_accept', True):
+                        quality_candidates.append((company, score, justificativa, analysis))
                     else:
                         stats['quality_rejected'] += 1
-                        print(f"         ❌ Match rejeitado - NÃO será salvo no banco")
+                        print(f"         ❌ Rejeitado por baixa qualidade")
                 else:
-                    stats['quality_rejected'] += 1
-                    print(f"         ❌ Rejeitado por baixa qualidade")
-            else:
-                print(f"         📊 Score abaixo do threshold ({config['threshold_phase1']:.3f})")
+                    print(f"         📊 Score abaixo do threshold ({config['threshold_phase1']:.3f})")
         
-        if potential_matches:
-            print(f"   🎯 {len(potential_matches)} matches de qualidade encontrados!")
-            stats['bids_with_matches'] += 1
-            
-            # Buscar itens da licitação
-            items = get_bid_items_from_db(bid['id'])
-            
-            # FASE 2: Refinamento com itens (se disponível)
-            if items:
-                _process_quality_phase2_matching(
-                    items, potential_matches, pncp_id, cache_service, 
-                    vectorizer, stats, config, quality_level
+            # 🤖 Candidatas vão para o pool LLM; o scoring das próximas licitações continua
+            context = {
+                'bid': bid,
+                'pncp_id': pncp_id,
+                'objeto_compra': objeto_compra,
+                'candidates': quality_candidates,
+            }
+            validation_requests = [
+                {
+                    'empresa_nome': company['nome'],
+                    'empresa_descricao': company['descricao_servicos_produtos'],
+                    'licitacao_objeto': objeto_compra,
+                    'pncp_id': pncp_id,
+                    'similarity_score': score
+                }
+                for company, score, _, _ in quality_candidates
+            ]
+            for ready_context, validations in validation_queue.submit(context, validation_requests):
+                _finalize_quality_bid(
+                    ready_context, validations, stats, total_scores,
+                    cache_service, vectorizer, config, quality_level, writer, company_matrix
                 )
-            else:
-                _process_quality_phase1_only_matching(potential_matches, pncp_id, stats)
-                
-            # Coletar scores para estatísticas
-            for _, score, _, _ in potential_matches:
-                total_scores.append(score)
-                
-            stats['total_matches_found'] += len(potential_matches)
-        else:
-            print("   ❌ Nenhum match de qualidade encontrado")
-            stats['bids_without_matches'] += 1
         
-        # Mostrar progresso a cada 50 licitações
-        if i % 50 == 0:
-            print(f"\n📊 PROGRESSO [{i}/{len(existing_bids)}]:")
-            print(f"   🎯 Matches encontrados: {stats['total_matches_found']}")
-            print(f"   ✅ Taxa de sucesso: {(stats['bids_with_matches']/stats['total_bids_processed']*100):.1f}%")
+            # Mostrar progresso a cada 50 licitações
+            if i % 50 == 0:
+                print(f"\n📊 PROGRESSO [{i}/{len(existing_bids)}]:")
+                print(f"   🎯 Matches encontrados: {stats['total_matches_found']}")
+                print(f"   ✅ Taxa de sucesso: {(stats['bids_with_matches']/stats['total_bids_processed']*100):.1f}%")
+    
+        # ⏳ Aguardar validações LLM ainda em andamento
+        for ready_context, validations in validation_queue.drain():
+            _finalize_quality_bid(
+                ready_context, validations, stats, total_scores,
+                cache_service, vectorizer, config, quality_level, writer, company_matrix
+            )
+    finally:
+        writer.close()
+    stats['bulk_writer'] = writer.stats()
+    if validation_pool:
+        validation_pool.shutdown()
+        stats['llm_pool'] = validation_pool.stats()
+        if llm_validator.verdict_cache:
+            stats['llm_verdict_cache'] = llm_validator.verdict_cache.stats()
+        print(f"\n🤖 Pool LLM: {stats['llm_pool']['completed']} validações, "
+              f"{stats['llm_pool']['retries']} retentativas")
     
     # Calcular estatísticas finais
     if total_scores:
@@ -286,6 +272,80 @@ def run_quality_matching(quality_level: str = "high", clear_existing: bool = Tru
     }
 
 
+def _finalize_quality_bid(context: Dict[str, Any], validations: list, stats: Dict[str, Any],
+                          total_scores: List[float], cache_service, vectorizer,
+                          config: Dict[str, Any], quality_level: str, writer: BulkWriter,
+                          company_matrix: CompanyEmbeddingMatrix):
+    """
+    Aplica o veredito LLM às candidatas de qualidade de uma licitação e executa a Fase 2
+    
+    validations vem na ordem das candidatas (None = LLM desativado)
+    """
+    pncp_id = context['pncp_id']
+    potential_matches = []
+    
+    if context['candidates']:
+        print(f"\n   🤖 Validação concluída: {pncp_id}")
+    
+    for (company, score, justificativa, analysis), validation in zip(context['candidates'], validations):
+        # 🔥 NOVA POLÍTICA: TODOS OS MATCHES PASSAM PELO LLM
+        should_accept_match = False  # Por padrão, rejeitar até LLM aprovar
+        final_score = score
+        final_justificativa = justificativa
+        
+        if validation is not None:
+            stats['llm_validations_count'] += 1
+            
+            if validation['is_valid']:
+                print(f"         🎯 LLM APROVOU {company['nome']}! Confiança: {validation['confidence']:.1%}")
+                final_score = validation['confidence']
+                final_justificativa += f" | LLM: {validation['reasoning'][:100]}..."
+                stats['llm_approved'] += 1
+                should_accept_match = True  # ✅ APROVADO PELO LLM
+            else:
+                print(f"         🚫 LLM REJEITOU {company['nome']}: {validation['reasoning'][:80]}...")
+                stats['llm_rejected'] += 1
+                should_accept_match = False  # ❌ REJEITADO PELO LLM
+        else:
+            # 🚨 FALLBACK: Se LLM indisponível, aplicar threshold mais rigoroso
+            if score >= 0.85:  # Apenas scores muito altos sem LLM
+                should_accept_match = True
+                print(f"         ⚠️  LLM indisponível - {company['nome']} aprovado por score alto ({score:.1%})")
+            else:
+                should_accept_match = False
+                print(f"         ❌ LLM indisponível - {company['nome']} rejeitado por score insuficiente ({score:.1%})")
+        
+        if should_accept_match:
+            potential_matches.append((company, final_score, final_justificativa, analysis))
+            stats['quality_accepted'] += 1
+        else:
+            stats['quality_rejected'] += 1
+    
+    if potential_matches:
+        print(f"   🎯 {len(potential_matches)} matches de qualidade encontrados!")
+        stats['bids_with_matches'] += 1
+        
+        # Buscar itens da licitação
+        items = get_bid_items_from_db(context['bid']['id'])
+        
+        # FASE 2: Refinamento com itens (se disponível)
+        if items:
+            _process_quality_phase2_matching(
+                items, potential_matches, pncp_id, cache_service, 
+                vectorizer, stats, config, quality_level, writer, company_matrix
+            )
+        else:
+            _process_quality_phase1_only_matching(potential_matches, pncp_id, stats, writer)
+            
+        # Coletar scores para estatísticas
+        for _, score, _, _ in potential_matches:
+            total_scores.append(score)
+            
+        stats['total_matches_found'] += len(potential_matches)
+    else:
+        stats['bids_without_matches'] += 1
+
+
 def _vectorize_companies_with_quality_cache(companies, cache_service, vectorizer):
     """Vetorizar empresas usando cache otimizado para qualidade"""
     company_texts = [company["descricao_servicos_produtos"] for company in companies]
@@ -332,7 +392,7 @@ def _vectorize_companies_with_quality_cache(companies, cache_service, vectorizer
 
 
 def _process_quality_phase2_matching(items, potential_matches, pncp_id, cache_service, 
-                                    vectorizer, stats, config, quality_level):
+                                    vectorizer, stats, config, quality_level, writer, company_matrix):
     """Processa Fase 2 com análise de qualidade"""
     item_descriptions = [item.get("descricao", "") for item in items]
     
@@ -351,45 +411,39 @@ def _process_quality_phase2_matching(items, potential_matches, pncp_id, cache_se
             for text, emb in zip(texts_to_generate, new_embeddings):
                 cached_item_embeddings[text] = emb
     
-    # Processar matches com análise de qualidade
-    for company, score_fase1, justificativa_fase1, analysis_fase1 in potential_matches:
-        item_matches = 0
-        total_item_score = 0.0
-        
-        for desc in item_descriptions:
-            if desc not in cached_item_embeddings:
-                continue
-                
-            item_embedding = cached_item_embeddings[desc]
-            
-            # Usar análise de qualidade melhorada para itens
-            item_score, item_justificativa, item_analysis = calculate_improved_similarity(
-                item_embedding, 
-                company["embedding"],
-                desc,
-                company["descricao_servicos_produtos"],
-                quality_level=quality_level,
-                return_analysis=True
-            )
-            
-            if item_score >= config['threshold_phase2'] and item_analysis.get('should_accept', True):
-                item_matches += 1
-                total_item_score += item_score
+    # 📐 Análise de qualidade em matriz: itens x empresas candidatas (equivale a calculate_improved_similarity por par)
+    described = [desc for desc in item_descriptions if desc in cached_item_embeddings]
+    if not described:
+        return
+    candidates = [company for company, _, _, _ in potential_matches]
+    base_scores = company_matrix.score_items(
+        [cached_item_embeddings[desc] for desc in described], described,
+        [company_matrix.index_of(company) for company in candidates]
+    )
+    item_scores, should_accept = improved_similarity_matrix(
+        base_scores, described, [company["descricao_servicos_produtos"] for company in candidates], quality_level
+    )
+    match_counts, item_aggregates = aggregate_item_scores(
+        item_scores, (item_scores >= config['threshold_phase2']) & should_accept
+    )
+    
+    for column, (company, score_fase1, justificativa_fase1, analysis_fase1) in enumerate(potential_matches):
+        item_matches = int(match_counts[column])
         
         if item_matches > 0:
-            final_score = (score_fase1 + (total_item_score / item_matches)) / 2
+            final_score = (score_fase1 + float(item_aggregates[column])) / 2
             combined_justificativa = f"Fase 1: {justificativa_fase1} | Fase 2: {item_matches} itens de qualidade"
             
-            save_match_to_db(pncp_id, company["id"], final_score, "objeto_e_itens", combined_justificativa)
+            writer.add_match(pncp_id, company["id"], final_score, "objeto_e_itens", combined_justificativa)
             stats['matches_phase2'] += 1
             
             print(f"      🎯 MATCH FINAL DE QUALIDADE! {company['nome']} - Score: {final_score:.3f}")
 
 
-def _process_quality_phase1_only_matching(potential_matches, pncp_id, stats):
+def _process_quality_phase1_only_matching(potential_matches, pncp_id, stats, writer):
     """Processa matches apenas da Fase 1 com qualidade"""
     for company, score, justificativa, analysis in potential_matches:
-        save_match_to_db(pncp_id, company["id"], score, "objeto_completo", 
+        writer.add_match(pncp_id, company["id"], score, "objeto_completo", 
                         f"Qualidade {analysis.get('quality_category', 'N/A')}: {justificativa}")
         stats['matches_phase1_only'] += 1
         print(f"      🎯 MATCH DE QUALIDADE! {company['nome']} - Score: {score:.3f}")
@@ -435,6 +489,10 @@ def _print_quality_final_report(stats: Dict[str, Any], quality_level: str, cache
     if cache_stats.get('status') == 'active':
         print(f"   📈 Total embeddings: {cache_stats['cache_stats']['match_keys']}")
         print(f"   🎯 Performance: {cache_stats['performance']['cache_efficiency']}")
+        counters = cache_stats['cache_stats']
+        print(f"   🧠 Hits por tier: memória {counters['local_hits']} | disco {counters['disk_hits']} | "
+              f"Redis {counters['redis_hits']} | "
+              f"tier local {cache_stats['local_tier']['memory_mb']:.1f} MB")
     
     print(f"\n🎯 CONFIGURAÇÃO UTILIZADA:")
     config = stats['config_used']
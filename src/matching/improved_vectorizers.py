@@ -4,8 +4,11 @@
 Sistema brasileiro aprimorado com análise semântica mais rigorosa
 """
 
+import os
 import logging
+import threading
 import numpy as np
+from functools import lru_cache
 from typing import List, Optional, Dict, Any, Tuple
 import re
 
@@ -14,11 +17,137 @@ from .improved_matching_config import (
     QualityMatchingConfig, 
     GENERIC_TERMS_BLACKLIST,
     SPECIFIC_TERMS_WHITELIST,
-    CATEGORY_THRESHOLDS
+    CATEGORY_THRESHOLDS,
+    get_quality_config
 )
 
 logger = logging.getLogger(__name__)
 
+# Tamanho do memo de análise de qualidade por texto (empresas + objetos + itens de uma execução)
+QUALITY_ANALYSIS_CACHE_SIZE = int(os.getenv('QUALITY_ANALYSIS_CACHE_SIZE', '20000'))
+
+# Palavras-chave do boost técnico final de calculate_improved_similarity
+QUALITY_TECH_KEYWORDS = ['desenvolvimento', 'sistema', 'software', 'tecnologia', 'especializado']
+
+_COMPLEXITY_PATTERNS = {
+    'technical_terms': (re.compile(r'\b(técnic[oa]|especializ[oa]|certificad[oa]|qualificad[oa])\b'), True),
+    'requirements': (re.compile(r'\b(requisito|exigência|obrigatório|necessário)\b'), True),
+    'numbers': (re.compile(r'\d+'), False),
+    'regulations': (re.compile(r'\b(NBR|ISO|ABNT|Lei|Decreto|Portaria)\s*\d*'), False),
+    'experience_mentions': (re.compile(r'\b\d+\s*(anos?|meses?)\b'), True),
+}
+
+
+def _detect_business_category(text: str) -> str:
+    """Detecta categoria de negócio do texto"""
+    text_lower = text.lower()
+    
+    for category, config in CATEGORY_THRESHOLDS.items():
+        keyword_matches = sum(1 for keyword in config['keywords'] if keyword in text_lower)
+        if keyword_matches >= 1:  # Pelo menos 1 keyword da categoria
+            return category
+    
+    return 'geral'
+
+
+def _count_complexity_indicators(text: str) -> Dict[str, int]:
+    """Conta indicadores de complexidade/especificidade"""
+    text_lower = text.lower()
+    
+    return {
+        name: len(pattern.findall(text_lower if use_lower else text))
+        for name, (pattern, use_lower) in _COMPLEXITY_PATTERNS.items()
+    }
+
+
+@lru_cache(maxsize=QUALITY_ANALYSIS_CACHE_SIZE)
+def _cached_text_quality(text: str) -> Tuple[Dict[str, Any], int, int]:
+    """
+    Análise de qualidade memoizada por texto
+    
+    Returns:
+        (análise, nº de QUALITY_TECH_KEYWORDS presentes, soma dos indicadores de complexidade)
+    """
+    text_lower = text.lower()
+    complexity = _count_complexity_indicators(text)
+    analysis = {
+        'specificity_score': QualityMatchingConfig.calculate_specificity_score(text),
+        'category': _detect_business_category(text),
+        'has_generic_terms': any(term in text_lower for term in GENERIC_TERMS_BLACKLIST),
+        'has_specific_terms': any(term in text_lower for term in SPECIFIC_TERMS_WHITELIST),
+        'text_length': len(text),
+        'complexity_indicators': complexity
+    }
+    tech_count = sum(1 for keyword in QUALITY_TECH_KEYWORDS if keyword in text_lower)
+    return analysis, tech_count, sum(complexity.values())
+
+
+def analyze_text_quality(text: str) -> Dict[str, Any]:
+    """Análise de qualidade de um texto (cópia do resultado memoizado)"""
+    analysis = _cached_text_quality(text)[0]
+    return dict(analysis, complexity_indicators=dict(analysis['complexity_indicators']))
+
+
+class QualityAnalyzer:
+    """
+    Analisador de qualidade de um nível ('maximum', 'high', 'medium', 'permissive')
+    
+    Não carrega modelos: guarda a configuração do nível e memoiza, por texto,
+    quais termos da blacklist e do quality_boost aparecem.
+    Use get_quality_analyzer() para obter a instância compartilhada do processo.
+    """
+    
+    def __init__(self, quality_level: str):
+        self.quality_level = quality_level
+        self.config = get_quality_config(quality_level)
+        self.blacklist_terms = list(self.config['blacklist_terms'])
+        self.boost_terms = (
+            list(self.config['quality_boost'].items())
+            if quality_level == 'high' and 'quality_boost' in self.config else []
+        )
+        self._term_hits = lru_cache(maxsize=QUALITY_ANALYSIS_CACHE_SIZE)(self._compute_term_hits)
+    
+    def _compute_term_hits(self, text: str) -> Tuple[frozenset, frozenset]:
+        text_lower = text.lower()
+        blacklist = frozenset(i for i, term in enumerate(self.blacklist_terms) if term in text_lower)
+        boost = frozenset(i for i, (keyword, _) in enumerate(self.boost_terms) if keyword in text_lower)
+        return blacklist, boost
+    
+    def blacklist_hits(self, bid_text: str, company_text: str) -> int:
+        """Nº de termos da blacklist presentes na licitação OU na empresa"""
+        return len(self._term_hits(bid_text)[0] | self._term_hits(company_text)[0])
+    
+    def boost_values(self, bid_text: str, company_text: str) -> List[float]:
+        """Valores do quality_boost presentes na licitação OU na empresa, na ordem da configuração"""
+        hits = self._term_hits(bid_text)[1] | self._term_hits(company_text)[1]
+        return [self.boost_terms[i][1] for i in sorted(hits)]
+    
+    def term_masks(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Máscaras (textos x termos) da blacklist e do quality_boost, para o cálculo em matriz"""
+        blacklist = np.zeros((len(texts), len(self.blacklist_terms)), dtype=bool)
+        boost = np.zeros((len(texts), len(self.boost_terms)), dtype=bool)
+        for row, text in enumerate(texts):
+            blacklist_hits, boost_hits = self._term_hits(text)
+            blacklist[row, list(blacklist_hits)] = True
+            boost[row, list(boost_hits)] = True
+        return blacklist, boost
+
+
+_QUALITY_ANALYZERS: Dict[str, QualityAnalyzer] = {}
+_QUALITY_ANALYZERS_LOCK = threading.Lock()
+
+
+def get_quality_analyzer(quality_level: str) -> QualityAnalyzer:
+    """Registro de analisadores de qualidade do processo, por nível"""
+    analyzer = _QUALITY_ANALYZERS.get(quality_level)
+    if analyzer is None:
+        with _QUALITY_ANALYZERS_LOCK:
+            analyzer = _QUALITY_ANALYZERS.get(quality_level)
+            if analyzer is None:
+                analyzer = QualityAnalyzer(quality_level)
+                _QUALITY_ANALYZERS[quality_level] = analyzer
+    return analyzer
+
 class ImprovedBrazilianTextVectorizer(BrazilianTextVectorizer):
     """
     🇧🇷 Vetorizador brasileiro melhorado com análise de qualidade
@@ -47,15 +176,8 @@ class ImprovedBrazilianTextVectorizer(BrazilianTextVectorizer):
         # Preprocessamento padrão
         processed_text = self.preprocess_text(text)
         
-        # Análise de qualidade
-        quality_analysis = {
-            'specificity_score': self.quality_config.calculate_specificity_score(text),
-            'category': self._detect_business_category(text),
-            'has_generic_terms': any(term in text.lower() for term in GENERIC_TERMS_BLACKLIST),
-            'has_specific_terms': any(term in text.lower() for term in SPECIFIC_TERMS_WHITELIST),
-            'text_length': len(text),
-            'complexity_indicators': self._count_complexity_indicators(text)
-        }
+        # Análise de qualidade (memoizada por texto)
+        quality_analysis = analyze_text_quality(text)
         
         logger.debug(f"📊 Análise qualidade: {quality_analysis['specificity_score']:.2f} - {quality_analysis['category']}")
         
@@ -63,26 +185,11 @@ class ImprovedBrazilianTextVectorizer(BrazilianTextVectorizer):
     
     def _detect_business_category(self, text: str) -> str:
         """Detecta categoria de negócio do texto"""
-        text_lower = text.lower()
-        
-        for category, config in CATEGORY_THRESHOLDS.items():
-            keyword_matches = sum(1 for keyword in config['keywords'] if keyword in text_lower)
-            if keyword_matches >= 1:  # Pelo menos 1 keyword da categoria
-                return category
-        
-        return 'geral'
+        return _detect_business_category(text)
     
     def _count_complexity_indicators(self, text: str) -> Dict[str, int]:
         """Conta indicadores de complexidade/especificidade"""
-        text_lower = text.lower()
-        
-        return {
-            'technical_terms': len(re.findall(r'\b(técnic[oa]|especializ[oa]|certificad[oa]|qualificad[oa])\b', text_lower)),
-            'requirements': len(re.findall(r'\b(requisito|exigência|obrigatório|necessário)\b', text_lower)),
-            'numbers': len(re.findall(r'\d+', text)),
-            'regulations': len(re.findall(r'\b(NBR|ISO|ABNT|Lei|Decreto|Portaria)\s*\d*', text)),
-            'experience_mentions': len(re.findall(r'\b\d+\s*(anos?|meses?)\b', text_lower))
-        }
+        return _count_complexity_indicators(text)
 
 def calculate_improved_similarity(
     bid_embedding: List[float], 
@@ -105,18 +212,15 @@ def calculate_improved_similarity(
     Returns:
         Tuple[score, justificativa, análise_detalhada]
     """
-    from .improved_matching_config import get_quality_config, QualityMatchingConfig
-    
-    # Obter configuração específica do nível
-    config = get_quality_config(quality_level)
-    quality_config = QualityMatchingConfig()
-    
-    # Análise de qualidade dos textos
-    vectorizer = ImprovedBrazilianTextVectorizer('balanced')  # Usar preset balanceado
+    # Analisador compartilhado do nível (sem instanciar vetorizador/modelos por par)
+    analyzer = get_quality_analyzer(quality_level)
+    config = analyzer.config
     
-    # Preprocessar e analisar textos
-    _, bid_analysis = vectorizer.preprocess_text_with_quality_analysis(bid_text)
-    _, company_analysis = vectorizer.preprocess_text_with_quality_analysis(company_text)
+    # Análise de qualidade dos textos (memoizada por texto)
+    _, bid_tech_score, bid_complexity = _cached_text_quality(bid_text)
+    _, company_tech_score, company_complexity = _cached_text_quality(company_text)
+    bid_analysis = analyze_text_quality(bid_text)
+    company_analysis = analyze_text_quality(company_text)
     
     # Calcular similaridade base usando o método original
     base_score, base_justification = calculate_enhanced_similarity(
@@ -146,13 +250,7 @@ def calculate_improved_similarity(
         adjusted_score *= 0.9  # Penalizar categoria muito genérica
     
     # 3. FILTRO DE BLACKLIST RIGOROSO
-    bid_lower = bid_text.lower()
-    company_lower = company_text.lower()
-    
-    blacklist_hits = 0
-    for term in config['blacklist_terms']:
-        if term in bid_lower or term in company_lower:
-            blacklist_hits += 1
+    blacklist_hits = analyzer.blacklist_hits(bid_text, company_text)
     
     if blacklist_hits > 2:  # Muitos termos genéricos
         adjusted_score *= 0.75  # Penalização severa
@@ -161,20 +259,14 @@ def calculate_improved_similarity(
         adjusted_score *= 1.05  # Bonificar ausência de termos genéricos
     
     # 4. BOOST PARA TERMOS TÉCNICOS (NÍVEL HIGH)
-    if quality_level == 'high' and 'quality_boost' in config:
-        boost_applied = False
-        for keyword, boost_value in config['quality_boost'].items():
-            if keyword in bid_lower or keyword in company_lower:
-                adjusted_score += boost_value
-                boost_applied = True
-        
-        if boost_applied:
-            quality_adjustments.append("✅ Termos específicos presentes")
+    boost_values = analyzer.boost_values(bid_text, company_text)
+    for boost_value in boost_values:
+        adjusted_score += boost_value
     
-    # 5. VERIFICAÇÃO DE COMPLEXIDADE TÉCNICA
-    bid_complexity = sum(bid_analysis['complexity_indicators'].values())
-    company_complexity = sum(company_analysis['complexity_indicators'].values())
+    if boost_values:
+        quality_adjustments.append("✅ Termos específicos presentes")
     
+    # 5. VERIFICAÇÃO DE COMPLEXIDADE TÉCNICA
     if bid_complexity >= 3 and company_complexity >= 2:
         adjusted_score *= 1.08  # Bonificar alta complexidade
         quality_adjustments.append("✅ Alta complexidade técnica")
@@ -183,10 +275,7 @@ def calculate_improved_similarity(
         quality_adjustments.append("⚠️ Baixa complexidade técnica")
     
     # 6. VERIFICAÇÃO ESPECIAL PARA PALAVRAS-CHAVE TÉCNICAS
-    tech_keywords = ['desenvolvimento', 'sistema', 'software', 'tecnologia', 'especializado']
-    bid_tech_score = sum(1 for keyword in tech_keywords if keyword in bid_lower)
-    company_tech_score = sum(1 for keyword in tech_keywords if keyword in company_lower)
-    
+    tech_keywords = QUALITY_TECH_KEYWORDS
     if bid_tech_score >= 2 and company_tech_score >= 2:
         # Ambos têm perfil técnico forte
         original_similarity = base_score
@@ -249,6 +338,94 @@ def calculate_improved_similarity(
     else:
         return adjusted_score, improved_justification
 
+def improved_similarity_matrix(
+    base_scores: np.ndarray,
+    bid_texts: List[str],
+    company_texts: List[str],
+    quality_level: str = 'high'
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Versão em matriz de calculate_improved_similarity (licitações/itens x empresas)
+    
+    base_scores é o score de calculate_enhanced_similarity para cada par
+    (CompanyEmbeddingMatrix.score_items). Aplica os mesmos ajustes, na mesma
+    ordem, com as análises de texto memoizadas.
+    
+    Returns:
+        (adjusted_scores, should_accept)
+    """
+    analyzer = get_quality_analyzer(quality_level)
+    config = analyzer.config
+    min_specificity = config.get('min_specificity', 0.5)
+    
+    bid_quality = [_cached_text_quality(text) for text in bid_texts]
+    company_quality = [_cached_text_quality(text) for text in company_texts]
+    
+    def column(values):
+        return np.asarray(values)[:, None]
+    
+    def row(values):
+        return np.asarray(values)[None, :]
+    
+    adjusted = base_scores.astype(np.float64)
+    
+    # 1. Especificidade mínima
+    avg_specificity = (
+        column([q[0]['specificity_score'] for q in bid_quality]) +
+        row([q[0]['specificity_score'] for q in company_quality])
+    ) / 2
+    adjusted = np.where(
+        avg_specificity < min_specificity, adjusted * config.get('penalty_multiplier', 0.8),
+        np.where(avg_specificity > 0.7, adjusted * 1.1, adjusted)
+    )
+    
+    # 2. Categoria de negócio
+    bid_category = column([q[0]['category'] for q in bid_quality])
+    company_category = row([q[0]['category'] for q in company_quality])
+    same_category = (bid_category == company_category) & (bid_category != 'geral')
+    generic_category = (bid_category == 'geral') | (company_category == 'geral')
+    adjusted = np.where(same_category, adjusted * 1.15, np.where(generic_category, adjusted * 0.9, adjusted))
+    
+    # 3. Blacklist: termos presentes na licitação OU na empresa (|A ∪ B|)
+    bid_blacklist, bid_boost = analyzer.term_masks(bid_texts)
+    company_blacklist, company_boost = analyzer.term_masks(company_texts)
+    common_blacklist = bid_blacklist.astype(np.int32) @ company_blacklist.T.astype(np.int32)
+    blacklist_hits = (
+        column(bid_blacklist.sum(axis=1)) + row(company_blacklist.sum(axis=1)) - common_blacklist
+    )
+    adjusted = np.where(blacklist_hits > 2, adjusted * 0.75, np.where(blacklist_hits == 0, adjusted * 1.05, adjusted))
+    
+    # 4. quality_boost: soma dos valores dos termos na licitação OU na empresa
+    if analyzer.boost_terms:
+        values = np.asarray([value for _, value in analyzer.boost_terms], dtype=np.float64)
+        bid_boost_f = bid_boost.astype(np.float64)
+        company_boost_f = company_boost.astype(np.float64)
+        adjusted = adjusted + (
+            column(bid_boost_f @ values) + row(company_boost_f @ values)
+            - (bid_boost_f * values) @ company_boost_f.T
+        )
+    
+    # 5. Complexidade técnica
+    bid_complexity = column([q[2] for q in bid_quality])
+    company_complexity = row([q[2] for q in company_quality])
+    adjusted = np.where(
+        (bid_complexity >= 3) & (company_complexity >= 2), adjusted * 1.08,
+        np.where((bid_complexity == 0) & (company_complexity == 0), adjusted * 0.85, adjusted)
+    )
+    
+    # 6. Perfil técnico forte nos dois textos
+    both_technical = (column([q[1] for q in bid_quality]) >= 2) & (row([q[1] for q in company_quality]) >= 2)
+    adjusted = np.where(both_technical, np.minimum(adjusted * 1.1, 1.0), adjusted)
+    
+    adjusted = np.minimum(adjusted, 1.0)
+    should_accept = (
+        (adjusted >= config['threshold_phase1']) &
+        (avg_specificity >= min_specificity) &
+        (blacklist_hits <= 2)
+    )
+    return adjusted, should_accept
+
+
 class QualityFilteredBrazilianVectorizer(ImprovedBrazilianTextVectorizer):
     """
     🎯 Vetorizador com filtro automático de qualidade
@@ -286,14 +463,29 @@ class QualityFilteredBrazilianVectorizer(ImprovedBrazilianTextVectorizer):
             logger.debug(f"❌ Match rejeitado: {score:.3f} - Baixa qualidade")
             return None
 
+_QUALITY_VECTORIZERS: Dict[str, ImprovedBrazilianTextVectorizer] = {}
+_QUALITY_VECTORIZERS_LOCK = threading.Lock()
+
 def get_vectorizer_for_quality_level(quality_level: str, vectorizer_type: str = "brazilian") -> ImprovedBrazilianTextVectorizer:
     """
-    Factory function para criar vetorizador baseado no nível de qualidade desejado
+    Factory function para obter vetorizador baseado no nível de qualidade desejado
+    
+    A instância é criada uma vez por processo e reutilizada nas chamadas seguintes.
     
     Args:
         quality_level: 'maximum', 'high', 'medium', 'permissive'
         vectorizer_type: 'brazilian', 'hybrid', etc. (sempre retorna brasileiro otimizado)
     """
+    vectorizer = _QUALITY_VECTORIZERS.get(quality_level)
+    if vectorizer is None:
+        with _QUALITY_VECTORIZERS_LOCK:
+            vectorizer = _QUALITY_VECTORIZERS.get(quality_level)
+            if vectorizer is None:
+                vectorizer = _create_vectorizer_for_quality_level(quality_level)
+                _QUALITY_VECTORIZERS[quality_level] = vectorizer
+    return vectorizer
+
+def _create_vectorizer_for_quality_level(quality_level: str) -> ImprovedBrazilianTextVectorizer:
     preset_mapping = {
         'maximum': 'ultra_selective',
         'high': 'conservative', 
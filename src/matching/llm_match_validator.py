@@ -8,10 +8,21 @@ import os
 import json
 from typing import Dict, Any, List, Tuple, Optional
 import logging
+import openai
 from openai import OpenAI
 
+from services.llm_verdict_cache_service import get_llm_verdict_cache, compute_prompt_version
+from .llm_validation_pool import TransientLLMError
+
 logger = logging.getLogger(__name__)
 
+
+def _is_transient_openai_error(error: Exception) -> bool:
+    """Rate limit, timeout, falha de conexão ou erro 5xx da OpenAI"""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
 class LLMMatchValidator:
     """
     🎯 Validador inteligente para matches de alta qualidade
@@ -29,6 +40,15 @@ class LLMMatchValidator:
         self.HIGH_SCORE_THRESHOLD = 0.50  # Diminuído de 0.80 para 0.50 - valida mais matches
         self.LLM_CONFIDENCE_THRESHOLD = 0.65  # Diminuído de 0.75 para 0.65 - mais inclusivo
         
+        # 🗃️ Cache persistente de vereditos (chaveado pelo modelo primário da cadeia de fallback)
+        self.validator_id = "openai:gpt-4o-mini"
+        self.prompt_version = compute_prompt_version(
+            LLMMatchValidator._get_system_prompt,
+            LLMMatchValidator._build_validation_prompt,
+            LLMMatchValidator._make_openai_validation_request
+        )
+        self.verdict_cache = get_llm_verdict_cache()
+        
     def _setup_llm(self):
         """Configurar cliente OpenAI"""
         try:
@@ -65,11 +85,19 @@ class LLMMatchValidator:
         pncp_id: str,
         similarity_score: float,
         licitacao_itens: Optional[list] = None,
-        empresa_produtos: Optional[list] = None  # 🔀 NOVO: Produtos da empresa
+        empresa_produtos: Optional[list] = None,  # 🔀 NOVO: Produtos da empresa
+        raise_on_transient: bool = False,
+        use_cached_verdict: bool = True
     ) -> Dict[str, Any]:
         """
         🤖 Validação inteligente de match usando LLM
         
+        Args:
+            raise_on_transient: Levantar TransientLLMError em rate limit/timeout/5xx
+                em vez de aprovar por fallback (usado pelo LLMValidationPool para retry)
+            use_cached_verdict: Consultar o cache de vereditos antes do LLM (o
+                LLMValidationPool consulta antes, via lookup_cached_verdict, e passa False)
+        
         Returns:
             Dict com resultado da validação:
             {
@@ -105,6 +133,11 @@ class LLMMatchValidator:
             prompt = self._build_validation_prompt(
                 empresa_nome, empresa_descricao, licitacao_objeto, pncp_id, similarity_score, licitacao_itens, empresa_produtos
             )
+            cache_key = self._verdict_cache_key(prompt)
+            if cache_key and use_cached_verdict:
+                cached = self._cached_verdict(cache_key, empresa_nome, pncp_id, similarity_score)
+                if cached:
+                    return cached
             
             # 🎯 Sistema de fallback: gpt-4o-mini -> gpt-4o -> gpt-3.5-turbo
             model_used = "gpt-4o-mini"
@@ -137,11 +170,17 @@ class LLMMatchValidator:
             validation_result = self._parse_llm_response(result, similarity_score)
             validation_result['model_used'] = model_used  # Adicionar modelo usado
             
+            if cache_key:
+                self.verdict_cache.put(cache_key, self.validator_id, self.prompt_version, result, model_used)
+            
             logger.info(f"🤖 LLM validação ({model_used}): {empresa_nome} vs {pncp_id} = {validation_result['is_valid']} (conf: {validation_result['confidence']:.1%})")
             
             return validation_result
             
         except Exception as e:
+            if raise_on_transient and _is_transient_openai_error(e):
+                raise TransientLLMError(str(e)) from e
+            
             logger.error(f"❌ Erro na validação LLM: {e}")
             
             # Fallback: aprovar automaticamente em caso de erro
@@ -154,6 +193,45 @@ class LLMMatchValidator:
                 'model_used': 'fallback'
             }
     
+    def lookup_cached_verdict(
+        self,
+        empresa_nome: str,
+        empresa_descricao: str,
+        licitacao_objeto: str,
+        pncp_id: str,
+        similarity_score: float,
+        licitacao_itens: Optional[list] = None,
+        empresa_produtos: Optional[list] = None,
+        **_
+    ) -> Optional[Dict[str, Any]]:
+        """Resultado de validate_match vindo do cache de vereditos, sem chamar o LLM; None se não houver"""
+        if not self.verdict_cache or not self.should_validate_with_llm(similarity_score):
+            return None
+        try:
+            prompt = self._build_validation_prompt(
+                empresa_nome, empresa_descricao, licitacao_objeto, pncp_id, similarity_score, licitacao_itens, empresa_produtos
+            )
+        except Exception:
+            return None  # validate_match trata o erro (fallback)
+        return self._cached_verdict(self._verdict_cache_key(prompt), empresa_nome, pncp_id, similarity_score)
+    
+    def _verdict_cache_key(self, prompt: str) -> Optional[str]:
+        """Fingerprint do prompt renderizado (None sem cache de vereditos)"""
+        if not self.verdict_cache:
+            return None
+        return self.verdict_cache.fingerprint(self.validator_id, self.prompt_version, prompt)
+    
+    def _cached_verdict(self, cache_key: str, empresa_nome: str, pncp_id: str,
+                        similarity_score: float) -> Optional[Dict[str, Any]]:
+        cached = self.verdict_cache.get(cache_key)
+        if not cached:
+            return None
+        validation_result = self._parse_llm_response(cached['raw'], similarity_score)
+        validation_result['model_used'] = cached.get('model_used')
+        validation_result['cache_hit'] = True
+        logger.info(f"🗃️ Veredito LLM do cache: {empresa_nome} vs {pncp_id} = {validation_result['is_valid']}")
+        return validation_result
+    
     def _get_system_prompt(self) -> str:
         """Prompt do sistema para o LLM"""
         return """Você é um especialista em análise de licitações públicas brasileiras e competências empresariais.
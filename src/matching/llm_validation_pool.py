@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+🤖 POOL CONCORRENTE DE VALIDAÇÃO LLM
+Valida candidatas de várias licitações em paralelo enquanto o scoring continua
+
+- Limite de concorrência por provider (compartilhado por todos os pools do processo)
+- Rate limit de tokens por minuto (token bucket)
+- Retry com backoff exponencial e jitter para erros transitórios (429/5xx/timeout)
+- Coleta ordenada: resultados saem na ordem em que as licitações foram submetidas
+"""
+
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Dict, Any, List, Optional, Tuple
+
+from config.llm_config import LLMConfig
+
+logger = logging.getLogger(__name__)
+
+# Tokens reservados para prompt do sistema + resposta (max_tokens) em cada chamada
+_TOKENS_OVERHEAD_PER_CALL = 800
+
+
+class TransientLLMError(Exception):
+    """Falha transitória do provider (rate limit, 5xx, timeout) - pode ser repetida"""
+
+
+class TokenBucketRateLimiter:
+    """Rate limiter de tokens por minuto (token bucket thread-safe)"""
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """Bloqueia até haver tokens disponíveis. Retorna o tempo esperado em segundos."""
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _ProviderLimits:
+    """Semáforo de concorrência + rate limiter de um provider"""
+
+    def __init__(self, provider: str):
+        config = LLMConfig.get_validation_pool_config(provider)
+        self.provider = provider
+        self.config = config
+        self.semaphore = threading.BoundedSemaphore(max(1, config['concurrency']))
+        self.rate_limiter = (
+            TokenBucketRateLimiter(config['tokens_per_minute'])
+            if config['tokens_per_minute'] > 0 else None
+        )
+
+
+_PROVIDER_LIMITS: Dict[str, _ProviderLimits] = {}
+_PROVIDER_LIMITS_LOCK = threading.Lock()
+
+
+def get_provider_limits(provider: str) -> _ProviderLimits:
+    """Limites do provider compartilhados por todos os pools do processo"""
+    with _PROVIDER_LIMITS_LOCK:
+        if provider not in _PROVIDER_LIMITS:
+            _PROVIDER_LIMITS[provider] = _ProviderLimits(provider)
+        return _PROVIDER_LIMITS[provider]
+
+
+def detect_provider(validator) -> str:
+    """Identifica o provider de um validador (OllamaMatchValidator ou LLMMatchValidator)"""
+    return 'ollama' if type(validator).__name__.startswith('Ollama') else 'openai'
+
+
+def estimate_tokens(request: Dict[str, Any]) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token) de uma validação"""
+    chars = len(request.get('empresa_descricao') or '') + len(request.get('licitacao_objeto') or '')
+    for item in request.get('licitacao_itens') or []:
+        chars += len(item.get('descricao', '') if isinstance(item, dict) else str(item))
+    for produto in request.get('empresa_produtos') or []:
+        chars += len(str(produto))
+    return chars // 4 + _TOKENS_OVERHEAD_PER_CALL
+
+
+class LLMValidationPool:
+    """
+    Pool limitado de validações LLM concorrentes
+
+    Cada submit() devolve um Future com o mesmo dict de validate_match().
+    Erros transitórios são repetidos com backoff; na última tentativa o
+    validador segue o fallback normal (aprovação/reprovação conservadora).
+    Vereditos em cache (lookup_cached_verdict do validador) voltam antes do
+    rate limiter e do semáforo do provider.
+    """
+
+    def __init__(self, validator, provider: Optional[str] = None, max_workers: Optional[int] = None):
+        self.validator = validator
+        self.provider = provider or detect_provider(validator)
+        self.limits = get_provider_limits(self.provider)
+        self.max_retries = self.limits.config['max_retries']
+        self.backoff_base = self.limits.config['backoff_base']
+        self.backoff_max = self.limits.config['backoff_max']
+
+        workers = max_workers or max(1, self.limits.config['concurrency'])
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"llm-{self.provider}")
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'completed': 0,
+            'cache_hits': 0,
+            'retries': 0,
+            'failed_after_retries': 0,
+            'rate_limit_wait_s': 0.0,
+            'llm_time_s': 0.0,
+        }
+
+        logger.info(f"🤖 Pool de validação LLM ({self.provider}): {workers} workers, "
+                    f"concorrência {self.limits.config['concurrency']}, "
+                    f"TPM {self.limits.config['tokens_per_minute'] or 'ilimitado'}")
+
+    def submit(self, **request) -> Future:
+        """Agendar uma validação (mesmos argumentos de validate_match)"""
+        with self._stats_lock:
+            self._stats['submitted'] += 1
+        return self._executor.submit(self._validate_with_retry, request)
+
+    def map_ordered(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validar uma lista de requisições em paralelo e devolver os resultados na mesma ordem"""
+        futures = [self.submit(**request) for request in requests]
+        return [future.result() for future in futures]
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Backoff exponencial com full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _validate_with_retry(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        # Veredito em cache não passa pelo rate limiter nem ocupa vaga do provider
+        lookup = getattr(self.validator, 'lookup_cached_verdict', None)
+        if lookup is not None:
+            cached = lookup(**request)
+            if cached is not None:
+                with self._stats_lock:
+                    self._stats['completed'] += 1
+                    self._stats['cache_hits'] += 1
+                return cached
+            request = dict(request, use_cached_verdict=False)
+
+        tokens = estimate_tokens(request)
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+
+            if self.limits.rate_limiter:
+                waited = self.limits.rate_limiter.acquire(tokens)
+                if waited:
+                    with self._stats_lock:
+                        self._stats['rate_limit_wait_s'] += waited
+
+            start = time.monotonic()
+            try:
+                with self.limits.semaphore:
+                    result = self.validator.validate_match(raise_on_transient=not last_attempt, **request)
+            except TransientLLMError as e:
+                delay = self._backoff_delay(attempt)
+                logger.warning(f"⚠️ LLM {self.provider} transitório ({e}) - tentativa {attempt + 1}/"
+                               f"{self.max_retries + 1}, nova tentativa em {delay:.1f}s")
+                with self._stats_lock:
+                    self._stats['retries'] += 1
+                time.sleep(delay)
+                continue
+            finally:
+                with self._stats_lock:
+                    self._stats['llm_time_s'] += time.monotonic() - start
+
+            with self._stats_lock:
+                self._stats['completed'] += 1
+                if last_attempt and attempt > 0:
+                    # Todas as tentativas anteriores falharam: resultado veio do fallback do validador
+                    self._stats['failed_after_retries'] += 1
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['provider'] = self.provider
+        stats['pending'] = stats['submitted'] - stats['completed']
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+class OrderedBidValidationQueue:
+    """
+    Fila de licitações aguardando validação LLM das suas candidatas
+
+    submit() agenda as validações de uma licitação e devolve as licitações já
+    concluídas, sempre na ordem de submissão. Com max_pending licitações em
+    voo, submit() espera a mais antiga terminar (memória limitada).
+    Sem pool (LLM desativado), as licitações saem imediatamente com validações None.
+    """
+
+    def __init__(self, pool: Optional[LLMValidationPool], max_pending: int = 32):
+        self.pool = pool
+        self.max_pending = max(1, max_pending)
+        self._pending: deque = deque()
+
+    def submit(self, context: Any, requests: List[Dict[str, Any]]) -> List[Tuple[Any, List[Optional[Dict[str, Any]]]]]:
+        if self.pool is None:
+            self._pending.append((context, [None] * len(requests)))
+        else:
+            self._pending.append((context, [self.pool.submit(**request) for request in requests]))
+
+        ready = self._collect(block=False)
+        while len(self._pending) >= self.max_pending:
+            ready.extend(self._collect(block=True, limit=1))
+        return ready
+
+    def drain(self) -> List[Tuple[Any, List[Optional[Dict[str, Any]]]]]:
+        """Esperar e devolver todas as licitações pendentes, em ordem"""
+        return self._collect(block=True)
+
+    def _collect(self, block: bool, limit: Optional[int] = None):
+        ready = []
+        while self._pending and (limit is None or len(ready) < limit):
+            context, futures = self._pending[0]
+            if not block and not all(f is None or f.done() for f in futures):
+                break
+            self._pending.popleft()
+            ready.append((context, [f.result() if f is not None else None for f in futures]))
+        return ready
+
+    def __len__(self) -> int:
+        return len(self._pending)
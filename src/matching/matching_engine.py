@@ -7,35 +7,74 @@ VERSÃO OTIMIZADA: Cache apenas Redis LOCAL para máxima performance
 
 import os
 import datetime
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Optional
 import time
 from psycopg2.extras import DictCursor
 
 from services.embedding_cache_service import EmbeddingCacheService
 from services.deduplication_service import DeduplicationService
+from services.pncp_sync_service import (
+    get_sync_watermark_store, needs_full_resync, delta_window, record_timestamp, is_proposal_open
+)
 from config.database import db_manager
 
 from .vectorizers import (
     BaseTextVectorizer, BrazilianTextVectorizer, OpenAITextVectorizer, VoyageAITextVectorizer,
-    HybridTextVectorizer, MockTextVectorizer, calculate_enhanced_similarity
+    HybridTextVectorizer, MockTextVectorizer
 )
+from .similarity_matrix import CompanyEmbeddingMatrix, aggregate_item_scores
 from .llm_match_validator import LLMMatchValidator
+from .llm_validation_pool import LLMValidationPool, OrderedBidValidationQueue
+from .stage_pipeline import Stage, StagePipeline
+from .bulk_writer import BulkWriter
+from .batch_embedder import BatchEmbedder, format_batch_stats
+from . import pncp_api
 from .pncp_api import (
     get_db_connection, get_all_companies_from_db, get_processed_bid_ids,
-    fetch_bids_from_pncp, fetch_bid_items_from_pncp, save_bid_to_db,
-    save_bid_items_to_db, save_match_to_db, update_bid_status,
+    fetch_bids_from_pncp, fetch_updated_bids_from_pncp, fetch_bid_items_from_pncp,
     get_existing_bids_from_db, get_bid_items_from_db, clear_existing_matches,
-    ESTADOS_BRASIL, PNCP_MAX_PAGES
+    ESTADOS_BRASIL
 )
 
 # --- Configurações do Matching ---
 SIMILARITY_THRESHOLD_PHASE1 = float(os.getenv('SIMILARITY_THRESHOLD_PHASE1', '0.65'))
 SIMILARITY_THRESHOLD_PHASE2 = float(os.getenv('SIMILARITY_THRESHOLD_PHASE2', '0.70'))
+# Limite de candidatas por licitação na Fase 1 (0 = sem limite)
+PHASE1_TOP_K = int(os.getenv('PHASE1_TOP_K', '0')) or None
+# Licitações aguardando validação LLM ao mesmo tempo (limita memória do pipeline)
+LLM_VALIDATION_MAX_PENDING_BIDS = int(os.getenv('LLM_VALIDATION_MAX_PENDING_BIDS', '32'))
+
+# --- Pipeline da busca diária (workers por estágio e tamanho das filas entre estágios) ---
+PIPELINE_FETCH_WORKERS = int(os.getenv('PIPELINE_FETCH_WORKERS', '2'))
+PIPELINE_PERSIST_WORKERS = int(os.getenv('PIPELINE_PERSIST_WORKERS', '2'))
+PIPELINE_ITEMS_WORKERS = int(os.getenv('PIPELINE_ITEMS_WORKERS', '4'))
+PIPELINE_EMBED_WORKERS = int(os.getenv('PIPELINE_EMBED_WORKERS', '1'))
+# Licitações por lote de embedding (objeto + itens numa chamada só) e espera máxima para completar o lote
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '32'))
+PIPELINE_EMBED_BATCH_TIMEOUT = float(os.getenv('PIPELINE_EMBED_BATCH_TIMEOUT', '0.5'))
+PIPELINE_SCORE_WORKERS = int(os.getenv('PIPELINE_SCORE_WORKERS', '1'))
+PIPELINE_VALIDATE_WORKERS = int(os.getenv('PIPELINE_VALIDATE_WORKERS', '8'))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '16'))
+PIPELINE_REPORT_INTERVAL = float(os.getenv('PIPELINE_REPORT_INTERVAL', '30'))
+# Pausa entre páginas do PNCP por worker de busca
+PNCP_PAGE_PAUSE = float(os.getenv('PNCP_PAGE_PAUSE', '0.5'))
+
+# --- Sincronização incremental (watermark em pncp_sync_watermarks) ---
+PNCP_SYNC_SOURCE = 'licitacoes'
+PNCP_SYNC_MODALIDADE = 6  # Mesma modalidade de fetch_bids_from_pncp
 
 
-def process_daily_bids(vectorizer: BaseTextVectorizer, enable_llm_validation: bool = True):
+def process_daily_bids(vectorizer: BaseTextVectorizer, enable_llm_validation: bool = True,
+                       full_resync: bool = False):
     """
     VERSÃO REDIS LOCAL: Cache otimizado apenas com Redis local + Validação LLM
+    
+    Executa como pipeline em estágios (busca → persistência → itens → embedding →
+    scoring → validação LLM → matches), cada um com seus workers e fila limitada.
+    
+    Com watermark salvo, busca só as contratações atualizadas desde ele
+    (sincronização incremental); full_resync=True refaz a janela da última semana.
     """
     print("🚀 Iniciando busca de licitações com CACHE REDIS LOCAL + VALIDAÇÃO LLM...")
     print(f"🔧 Vectorizador: {type(vectorizer).__name__}")
@@ -53,14 +92,26 @@ def process_daily_bids(vectorizer: BaseTextVectorizer, enable_llm_validation: bo
         llm_validator = LLMConfig.create_validator()
         print(f"🤖 Validador LLM configurado (threshold: {llm_validator.HIGH_SCORE_THRESHOLD:.1%})")
     
-    # 🔥 NOVA CONFIGURAÇÃO: Buscar licitações da última semana
+    # 🔄 Sincronização incremental: só o delta desde o último watermark
     today = datetime.date.today()
-    one_week_ago = today - datetime.timedelta(days=7)
-    
-    start_date_str = one_week_ago.strftime("%Y%m%d")
-    end_date_str = today.strftime("%Y%m%d")
+    sync_store = get_sync_watermark_store()
+    sync_state = None if full_resync else sync_store.get(PNCP_SYNC_SOURCE, PNCP_SYNC_MODALIDADE)
+    watermark = None if needs_full_resync(sync_state) else sync_state['watermark']
+    run_started = datetime.datetime.now()
     
-    print(f"📅 Buscando licitações da última semana: {one_week_ago.strftime('%d/%m/%Y')} até {today.strftime('%d/%m/%Y')}")
+    if watermark:
+        start_date_str, end_date_str = delta_window(watermark, today)
+        print(f"🔄 Sincronização incremental: atualizações desde {watermark} "
+              f"(janela {start_date_str} - {end_date_str})")
+    else:
+        # 🔥 NOVA CONFIGURAÇÃO: Buscar licitações da última semana
+        one_week_ago = today - datetime.timedelta(days=7)
+        
+        start_date_str = one_week_ago.strftime("%Y%m%d")
+        end_date_str = today.strftime("%Y%m%d")
+        
+        print(f"📅 Buscando licitações da última semana: {one_week_ago.strftime('%d/%m/%Y')} até {today.strftime('%d/%m/%Y')}"
+              f"{' (resync completo)' if sync_state or full_resync else ''}")
     
     # 1. Carregar empresas 
     print("\n🏢 Carregando empresas do banco...")
@@ -73,234 +124,313 @@ def process_daily_bids(vectorizer: BaseTextVectorizer, enable_llm_validation: bo
     # 🔥 OTIMIZAÇÃO: Vetorizar empresas com cache em lote
     print("🔢 Vetorizando descrições das empresas com CACHE REDIS LOCAL...")
     _vectorize_companies_with_cache(companies, cache_service, vectorizer)
+    
+    # 📐 Matriz float32 das empresas montada uma vez por execução (Fase 1 vetorizada)
+    company_matrix = CompanyEmbeddingMatrix(companies)
+    
+    # 2. Pipeline: licitações fluem da API do PNCP até os matches sem esperar a busca terminar
+    print(f"\n🏭 Iniciando pipeline de licitações do PNCP para todos os estados...")
+    validation_pool = LLMValidationPool(llm_validator) if llm_validator else None
+    # 📦 Licitações, itens e matches gravados em lote (flush por tamanho/intervalo)
+    with BulkWriter() as writer:
+        pipeline = _DailyBidsPipeline(
+            vectorizer, cache_service, dedup_service, company_matrix, validation_pool, writer,
+            start_date_str, end_date_str, get_processed_bid_ids(), watermark=watermark
+        )
+        pipeline_stats = pipeline.run()
+    _shutdown_validation_pool(validation_pool)
+    _print_writer_stats(writer)
+    sync = _advance_sync_watermark(sync_store, pipeline, writer, watermark, run_started)
+    
+    estatisticas = pipeline.estatisticas
+    print(f"\n🎯 Total de novas licitações encontradas: {estatisticas['novas_encontradas']}")
+    print(f"📊 Licitações filtradas: {estatisticas['novas_encontradas'] - estatisticas['duplicadas']} novas, "
+          f"{estatisticas['duplicadas']} já processadas")
+    if estatisticas['atualizadas']:
+        print(f"🔄 Licitações já salvas atualizadas pelo PNCP: {estatisticas['atualizadas']}")
+    
+    # Relatório final
+    print(f"\n📊 ESTATÍSTICAS REDIS CACHE:")
+    embed_stats = pipeline.embedder.stats()
+    print(f"   ⚡ Cache hits Redis: {embed_stats['cache_hits']}/{embed_stats['unique']} textos únicos "
+          f"({embed_stats['cache_hit_rate']:.1%}) | {embed_stats['dedup_saved']} repetidos no lote")
+    print(f"   🧮 Embeddings: {embed_stats['texts']} textos em {embed_stats['batches']} lotes "
+          f"({embed_stats['texts_per_s']:.0f} textos/s)")
+    
+    # Exibir stats do cache
+    cache_stats = cache_service.get_cache_stats()
+    if cache_stats.get('status') == 'active':
+        print(f"   📈 Total embeddings em cache: {cache_stats['cache_stats']['match_keys']}")
+        print(f"   🎯 Eficiência do cache: {cache_stats['performance']['cache_efficiency']}")
+        _print_cache_tiers(cache_stats)
+    
+    print(f"\n{pipeline.pipeline.format_stats()}")
+    _print_final_report(pipeline.matches_encontrados, estatisticas)
+    
+    return {
+        'matches_encontrados': pipeline.matches_encontrados,
+        'estatisticas': estatisticas,
+        'pipeline': pipeline_stats,
+        'sync': sync
+    }
+
+
+def _advance_sync_watermark(sync_store, pipeline, writer, watermark: Optional[str],
+                            run_started: datetime.datetime) -> Dict[str, Any]:
+    """Grava o novo watermark só se todas as páginas vieram e todos os flushes gravaram"""
+    sync = {
+        'mode': 'incremental' if watermark else 'full',
+        'previous_watermark': watermark,
+        'watermark': watermark,
+        'window': (pipeline.start_date, pipeline.end_date),
+        'records': pipeline.sync['records'],
+        'fetch_errors': pipeline.sync['fetch_errors'],
+        'truncated_ufs': sorted(pipeline.sync['truncated_ufs']),
+        'advanced': False,
+    }
+    if sync['fetch_errors'] or sync['truncated_ufs'] or writer.stats()['failed_flushes']:
+        print(f"⚠️ Watermark mantido em {watermark or '(nenhum)'}: {sync['fetch_errors']} páginas com erro, "
+              f"UFs truncadas {sync['truncated_ufs']}, {writer.stats()['failed_flushes']} flushes com falha")
+        return sync
+    
+    # Resync sem nenhum registro: o início da execução vira o ponto de partida
+    new_watermark = pipeline.sync['max_seen'] or watermark or run_started.strftime('%Y-%m-%dT%H:%M:%S')
+    if watermark and new_watermark < watermark:
+        new_watermark = watermark
+    sync['advanced'] = sync_store.advance(
+        PNCP_SYNC_SOURCE, PNCP_SYNC_MODALIDADE, new_watermark, full=not watermark, records=sync['records']
+    )
+    if sync['advanced']:
+        sync['watermark'] = new_watermark
+        print(f"🔖 Watermark da sincronização: {new_watermark}")
+    return sync
+
+
+class _DailyBidsPipeline:
+    """
+    Estágios da busca diária de licitações
+    
+    fetch (UF → licitações novas) → persist_bid → items → embed → score →
+    validate (LLM) → persist_matches. Workers e tamanho das filas configuráveis
+    por PIPELINE_*; persist_matches é serial porque consolida as estatísticas.
+    As gravações vão para o BulkWriter, que resolve licitacao_id por pncp_id.
+    
+    Com watermark, fetch lê /contratacoes/atualizacao e licitações já salvas só
+    são regravadas se atualizadas depois dele; sem watermark (resync completo)
+    todas as já salvas da janela são regravadas. Nos dois casos sem novo matching.
+    """
+    
+    def __init__(self, vectorizer, cache_service, dedup_service, company_matrix, validation_pool, writer,
+                 start_date: str, end_date: str, processed_bid_ids: set, watermark: Optional[str] = None):
+        self.vectorizer = vectorizer
+        self.cache_service = cache_service
+        self.dedup_service = dedup_service
+        self.company_matrix = company_matrix
+        self.validation_pool = validation_pool
+        self.writer = writer
+        self.start_date = start_date
+        self.end_date = end_date
+        self.processed_bid_ids = processed_bid_ids
+        self.watermark = watermark
+        
+        self._lock = threading.Lock()
+        self._seen_ids = set()
+        self.matches_encontrados = 0
+        self.embedder = BatchEmbedder(vectorizer, cache_service)
+        self.estatisticas = {
+            'total_processadas': 0,
+            'com_matches': 0,
+            'sem_matches': 0,
+            'matches_fase1_apenas': 0,
+            'matches_fase2': 0,
+            'llm_validations_count': 0,
+            'llm_approved': 0,
+            'llm_rejected': 0,
+            'rejected_matches_logged': 0,  # 🆕 Para tracking de matches rejeitados
+            'novas_encontradas': 0,
+            'duplicadas': 0,
+            'atualizadas': 0,
+            'vetorizacao_falhou': 0,
+        }
+        # Progresso da sincronização (decide se o watermark pode avançar)
+        self.sync = {'records': 0, 'max_seen': None, 'fetch_errors': 0, 'truncated_ufs': set()}
         
-    # 2. Buscar licitações do PNCP
-    print(f"\n🌐 Buscando licitações do PNCP para todos os estados...")
-    processed_bid_ids = get_processed_bid_ids()
-    new_bids = []
-    total_found = 0
+        self.pipeline = StagePipeline([
+            Stage('fetch', self._fetch_uf, PIPELINE_FETCH_WORKERS, PIPELINE_QUEUE_SIZE, fan_out=True),
+            Stage('persist_bid', self._persist_bid, PIPELINE_PERSIST_WORKERS, PIPELINE_QUEUE_SIZE),
+            Stage('items', self._fetch_items, PIPELINE_ITEMS_WORKERS, PIPELINE_QUEUE_SIZE),
+            Stage('embed', self._embed_batch, PIPELINE_EMBED_WORKERS, PIPELINE_QUEUE_SIZE,
+                  batch_size=EMBED_BATCH_SIZE, batch_timeout=PIPELINE_EMBED_BATCH_TIMEOUT),
+            Stage('score', self._score, PIPELINE_SCORE_WORKERS, PIPELINE_QUEUE_SIZE),
+            Stage('validate', self._validate, PIPELINE_VALIDATE_WORKERS, PIPELINE_QUEUE_SIZE),
+            Stage('persist_matches', self._persist_matches, 1, PIPELINE_QUEUE_SIZE),
+        ], name='busca-diaria', report_interval=PIPELINE_REPORT_INTERVAL)
+    
+    def run(self) -> Dict[str, Any]:
+        return self.pipeline.run(ESTADOS_BRASIL)
+    
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self.estatisticas[key] += amount
+    
+    # --- Estágios ---
     
-    for uf in ESTADOS_BRASIL:
+    def _fetch_uf(self, uf: str):
+        """Pagina a API do PNCP para um UF e emite só licitações ainda não processadas"""
         page = 1
         uf_bids = 0
+        max_pages = pncp_api.PNCP_SYNC_MAX_PAGES if self.watermark else pncp_api.PNCP_MAX_PAGES
+        has_more_pages = False
+        now = datetime.datetime.now()
         
-        while page <= PNCP_MAX_PAGES:
-            bids, has_more_pages = fetch_bids_from_pncp(start_date_str, end_date_str, uf, page)
+        while page <= max_pages:
+            try:
+                if self.watermark:
+                    bids, has_more_pages = fetch_updated_bids_from_pncp(self.start_date, self.end_date, uf, page)
+                else:
+                    bids, has_more_pages = fetch_bids_from_pncp(self.start_date, self.end_date, uf, page,
+                                                                raise_errors=True)
+            except Exception as e:
+                print(f"❌ Busca de {uf} interrompida na página {page}: {e}")
+                with self._lock:
+                    self.sync['fetch_errors'] += 1
+                return
             
             if not bids:
                 break
             
             for bid in bids:
                 pncp_id = bid["numeroControlePNCP"]
-                if pncp_id not in processed_bid_ids:
-                    new_bids.append(bid)
-                    uf_bids += 1
-                    total_found += 1
+                updated_at = record_timestamp(bid)
+                with self._lock:
+                    self.sync['records'] += 1
+                    if updated_at and (self.sync['max_seen'] is None or updated_at > self.sync['max_seen']):
+                        self.sync['max_seen'] = updated_at
+                    if pncp_id in self._seen_ids:
+                        continue
+                    known = pncp_id in self.processed_bid_ids
+                    # Já salva: no delta, só regravar se mudou depois do watermark (resync regrava todas)
+                    if known and self.watermark and not (updated_at and updated_at > self.watermark):
+                        continue
+                    # Delta traz também contratações encerradas: novas só com proposta aberta
+                    if not known and self.watermark and not is_proposal_open(bid, now):
+                        continue
+                    self._seen_ids.add(pncp_id)
+                    self.estatisticas['atualizadas' if known else 'novas_encontradas'] += 1
+                
+                if known:
+                    # Mesclar na linha existente (status e matches preservados pelo upsert)
+                    self.writer.add_bid(bid)
+                    continue
+                
+                licitacao_data = {
+                    'objeto_compra': bid.get("objetoCompra", ""),
+                    'pncp_id': pncp_id,
+                    'data_publicacao': bid.get("dataPublicacaoPncp", "")
+                }
+                if not self.dedup_service.should_process_licitacao(pncp_id, licitacao_data):
+                    self._count('duplicadas')
+                    continue
+                
+                uf_bids += 1
+                yield bid
             
             if not has_more_pages:
                 break
             
             page += 1
-            time.sleep(0.5)  # Pausa para não sobrecarregar a API
+            if PNCP_PAGE_PAUSE > 0:
+                time.sleep(PNCP_PAGE_PAUSE)  # Pausa para não sobrecarregar a API
         
+        if self.watermark and has_more_pages and page > max_pages:
+            print(f"   ⚠️ {uf}: delta passou de {max_pages} páginas")
+            with self._lock:
+                self.sync['truncated_ufs'].add(uf)
         if uf_bids > 0:
             print(f"   📍 {uf}: {uf_bids} novas licitações")
     
-    print(f"\n🎯 Total de novas licitações encontradas: {total_found}")
-    
-    # 3. Filtrar licitações já processadas
-    print(f"\n🔍 Verificando duplicatas...")
-    truly_new_bids = []
-    skipped_count = 0
-    
-    for bid in new_bids:
-        licitacao_data = {
-            'objeto_compra': bid.get("objetoCompra", ""),
-            'pncp_id': bid["numeroControlePNCP"],
-            'data_publicacao': bid.get("dataPublicacaoPncp", "")
-        }
-        
-        if dedup_service.should_process_licitacao(bid["numeroControlePNCP"], licitacao_data):
-            truly_new_bids.append(bid)
-        else:
-            skipped_count += 1
-    
-    print(f"📊 Licitações filtradas: {len(truly_new_bids)} novas, {skipped_count} já processadas")
-    
-    if not truly_new_bids:
-        print("✅ Nenhuma licitação nova para processar hoje.")
-        return
-    
-    # 4. 🔥 OTIMIZAÇÃO: Processar licitações com cache em lote Redis
-    print(f"\n⚡ Processando {len(truly_new_bids)} licitações com CACHE REDIS LOCAL...")
-    matches_encontrados = 0
-    redis_cache_hits = 0
-    estatisticas = {
-        'total_processadas': 0,
-        'com_matches': 0,
-        'sem_matches': 0,
-        'matches_fase1_apenas': 0,
-        'matches_fase2': 0,
-        'llm_validations_count': 0,
-        'llm_approved': 0,
-        'llm_rejected': 0,
-        'rejected_matches_logged': 0  # 🆕 Para tracking de matches rejeitados
-    }
-    
-    # 🔥 PRÉ-CACHE: Buscar embeddings de todas as licitações em lote
-    bid_texts = [bid.get("objetoCompra", "") for bid in truly_new_bids if bid.get("objetoCompra")]
-    cached_bid_embeddings = cache_service.batch_get_embeddings_from_cache(bid_texts)
-    redis_cache_hits = len(cached_bid_embeddings)
-    
-    print(f"   ⚡ Cache Redis: {redis_cache_hits}/{len(bid_texts)} embeddings encontrados")
-    
-    for i, bid in enumerate(truly_new_bids, 1):
+    def _persist_bid(self, bid: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         pncp_id = bid["numeroControlePNCP"]
         objeto_compra = bid.get("objetoCompra", "")
         
-        print(f"\n[{i}/{len(truly_new_bids)}] 🔍 Processando: {pncp_id}")
+        print(f"\n🔍 Processando: {pncp_id}")
         print(f"   📝 Objeto: {objeto_compra[:100]}...")
         
         if not objeto_compra:
             print("   ⚠️  Objeto da compra vazio, pulando...")
-            continue
-        
-        # Salvar licitação no banco
-        licitacao_id = save_bid_to_db(bid)
+            return None
         
+        # Enfileirar licitação para o próximo flush do BulkWriter
+        self.writer.add_bid(bid)
+        return {
+            'bid': bid,
+            'pncp_id': pncp_id,
+            'objeto_compra': objeto_compra,
+        }
+    
+    def _fetch_items(self, context: Dict[str, Any]) -> Dict[str, Any]:
         # Buscar itens da licitação
-        items = fetch_bid_items_from_pncp(bid)
+        items = fetch_bid_items_from_pncp(context['bid'])
         if items:
-            save_bid_items_to_db(licitacao_id, items)
-        
-        # 🔥 CACHE: Usar embedding do cache ou gerar novo
-        if objeto_compra in cached_bid_embeddings:
-            bid_embedding = cached_bid_embeddings[objeto_compra]
-            print(f"   ⚡ Embedding do cache Redis")
-        else:
-            bid_embedding = vectorizer.vectorize(objeto_compra)
-            if bid_embedding:
-                cache_service.save_embedding_to_cache(objeto_compra, bid_embedding)
-                print(f"   🆕 Novo embedding gerado e cacheado")
-        
-        if not bid_embedding:
-            print("   ❌ Erro ao vetorizar objeto da compra")
-            continue
-        
-        estatisticas['total_processadas'] += 1
+            self.writer.add_items(context['pncp_id'], items)
+        context['items'] = items
+        return context
+    
+    def _embed_batch(self, contexts: list) -> list:
+        """Vetoriza objetos e itens de um lote de licitações numa chamada só"""
+        texts = []
+        for context in contexts:
+            texts.append(context['objeto_compra'])
+            texts.extend(item.get("descricao", "") for item in context['items'] or [])
         
-        # FASE 1: Matching do objeto completo
-        potential_matches = []
-        print("   🔍 FASE 1 - Análise semântica do objeto da compra:")
+        embeddings, batch = self.embedder.embed(texts)
+        print(f"   {format_batch_stats(batch)}")
         
-        for company in companies:
-            if not company.get("embedding"):
+        ready = []
+        for context in contexts:
+            bid_embedding = embeddings.get(context['objeto_compra'])
+            if not bid_embedding:
+                print(f"   ❌ Erro ao vetorizar objeto da compra ({context['pncp_id']})")
+                self._count('vetorizacao_falhou')
                 continue
             
-            score, justificativa = calculate_enhanced_similarity(
-                bid_embedding, 
-                company["embedding"], 
-                objeto_compra, 
-                company["descricao_servicos_produtos"]
-            )
-            
+            context['embedding'] = bid_embedding
+            # Embeddings dos itens já prontos para a Fase 2
+            context['item_embeddings'] = {
+                desc: embeddings[desc]
+                for desc in (item.get("descricao", "") for item in context['items'] or [])
+                if desc in embeddings
+            }
+            ready.append(context)
+        return ready
+    
+    def _score(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # FASE 1: Matching do objeto completo
+        candidates = self.company_matrix.top_candidates(
+            context.pop('embedding'), context['objeto_compra'], SIMILARITY_THRESHOLD_PHASE1, PHASE1_TOP_K
+        )
+        print(f"   🔍 FASE 1 ({context['pncp_id']}): {len(candidates)}/{self.company_matrix.size} empresas acima do threshold")
+        for company, score, justificativa in candidates:
             print(f"      🏢 {company['nome']}: Score = {score:.3f}")
-            
-            if score >= SIMILARITY_THRESHOLD_PHASE1:
-                # 🔥 NOVA POLÍTICA: TODOS OS MATCHES PASSAM PELO LLM
-                should_accept_match = False  # Por padrão, rejeitar até LLM aprovar
-                final_score = score
-                final_justificativa = justificativa
-                
-                if llm_validator:
-                    print(f"         🤖 VALIDAÇÃO LLM OBRIGATÓRIA (score {score:.1%})")
-                    
-                    validation = llm_validator.validate_match(
-                        empresa_nome=company['nome'],
-                        empresa_descricao=company['descricao_servicos_produtos'],
-                        empresa_produtos=company.get('produtos'),
-                        licitacao_objeto=objeto_compra,
-                        pncp_id=pncp_id,
-                        similarity_score=score,
-                        licitacao_itens=items
-                    )
-                    
-                    estatisticas['llm_validations_count'] += 1
-                    
-                    if validation['is_valid']:
-                        print(f"         🎯 LLM APROVOU! Confiança: {validation['confidence']:.1%}")
-                        final_score = validation['confidence']
-                        final_justificativa += f" | LLM: {validation['reasoning'][:100]}..."
-                        estatisticas['llm_approved'] += 1
-                        should_accept_match = True  # ✅ APROVADO PELO LLM
-                    else:
-                        print(f"         🚫 LLM REJEITOU: {validation['reasoning'][:80]}...")
-                        estatisticas['llm_rejected'] += 1
-                        should_accept_match = False  # ❌ REJEITADO PELO LLM
-                        
-                        # 📊 LOG de match rejeitado para análise
-                        _log_rejected_match(company, objeto_compra, pncp_id, score, validation['reasoning'])
-                        estatisticas['rejected_matches_logged'] += 1
-                else:
-                    # 🚨 FALLBACK: Se LLM indisponível, aplicar threshold mais rigoroso
-                    if score >= 0.85:  # Apenas scores muito altos sem LLM
-                        should_accept_match = True
-                        print(f"         ⚠️  LLM indisponível - aprovado por score alto ({score:.1%})")
-                    else:
-                        should_accept_match = False
-                        print(f"         ❌ LLM indisponível - rejeitado por score insuficiente ({score:.1%})")
-                
-                if should_accept_match:
-                    potential_matches.append((company, final_score, final_justificativa))
-                    print(f"         ✅ MATCH APROVADO PARA SALVAMENTO!")
-                    
-                    # 🔥 FIX CRÍTICO: Salvar match aprovado pelo LLM imediatamente
-                    save_match_to_db(pncp_id, company["id"], final_score, "llm_approved", final_justificativa)
-                    estatisticas.setdefault('matches_saved_immediately', 0)
-                    estatisticas['matches_saved_immediately'] += 1
-                    print(f"         💾 Match salvo no banco imediatamente!")
-                else:
-                    print(f"         ❌ Match rejeitado - NÃO será salvo no banco")
         
-        if potential_matches:
-            print(f"   🎯 {len(potential_matches)} potenciais matches encontrados!")
-            estatisticas['com_matches'] += 1
-            
-            # FASE 2: Refinamento com itens (se disponível)
-            if items:
-                print(f"   📋 {len(items)} itens encontrados. Iniciando FASE 2...")
-                _process_phase2_matching(items, potential_matches, pncp_id, cache_service, vectorizer, estatisticas)
-            else:
-                print("   📋 Sem itens - usando apenas Fase 1")
-                _process_phase1_only_matching(potential_matches, pncp_id, estatisticas)
-                
-            matches_encontrados += len(potential_matches)
-        else:
-            print("   ❌ Nenhum potencial match na Fase 1")
-            estatisticas['sem_matches'] += 1
-        
-        # Marcar como processada
-        licitacao_data = {
-            'objeto_compra': objeto_compra,
-            'pncp_id': pncp_id,
-            'data_publicacao': bid.get("dataPublicacaoPncp", "")
-        }
-        dedup_service.mark_licitacao_processed(pncp_id, licitacao_data)
-        update_bid_status(pncp_id, "processada")
-        
-        time.sleep(0.1)  # Pausa menor devido ao cache otimizado
+        context['candidates'] = candidates
+        self._count('total_processadas')
+        return context
     
-    # Relatório final
-    print(f"\n📊 ESTATÍSTICAS REDIS CACHE:")
-    print(f"   ⚡ Cache hits Redis: {redis_cache_hits}/{len(bid_texts)}")
-    
-    # Exibir stats do cache
-    cache_stats = cache_service.get_cache_stats()
-    if cache_stats.get('status') == 'active':
-        print(f"   📈 Total embeddings em cache: {cache_stats['cache_stats']['match_keys']}")
-        print(f"   🎯 Eficiência do cache: {cache_stats['performance']['cache_efficiency']}")
+    def _validate(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        # 🤖 Espera só as validações desta licitação; o pool limita a concorrência real no LLM
+        requests = _build_validation_requests(context)
+        if self.validation_pool is not None:
+            context['validations'] = self.validation_pool.map_ordered(requests)
+        else:
+            context['validations'] = [None] * len(requests)
+        return context
     
-    _print_final_report(matches_encontrados, estatisticas)
+    def _persist_matches(self, context: Dict[str, Any]) -> None:
+        self.matches_encontrados += _finalize_daily_bid(
+            context, context.pop('validations'), self.estatisticas,
+            self.cache_service, self.vectorizer, self.dedup_service, self.writer, self.company_matrix
+        )
 
 
 def _vectorize_companies_with_cache(companies, cache_service, vectorizer):
@@ -350,15 +480,159 @@ def _vectorize_companies_with_cache(companies, cache_service, vectorizer):
     print(f"   ✅ {companies_with_embeddings}/{len(companies)} empresas vetorizadas")
 
 
-def _process_phase2_matching(items, potential_matches, pncp_id, cache_service, vectorizer, estatisticas):
-    """Processa Fase 2 com otimização de cache"""
-    item_descriptions = [item.get("descricao", "") for item in items]
+
+def _build_validation_requests(context: Dict[str, Any]) -> list:
+    """Monta os argumentos de validate_match para cada candidata da Fase 1"""
+    return [
+        {
+            'empresa_nome': company['nome'],
+            'empresa_descricao': company['descricao_servicos_produtos'],
+            'empresa_produtos': company.get('produtos'),
+            'licitacao_objeto': context['objeto_compra'],
+            'pncp_id': context['pncp_id'],
+            'similarity_score': score,
+            'licitacao_itens': context['items'],
+        }
+        for company, score, _ in context['candidates']
+    ]
+
+
+def _finalize_bid(context: Dict[str, Any], validations: list, estatisticas: Dict[str, int],
+                  cache_service, vectorizer, writer: BulkWriter, company_matrix: CompanyEmbeddingMatrix) -> int:
+    """
+    Aplica o veredito LLM às candidatas de uma licitação e executa a Fase 2
+    
+    validations vem na ordem das candidatas (None = LLM desativado).
+    Retorna o número de matches da licitação.
+    """
+    pncp_id = context['pncp_id']
+    objeto_compra = context['objeto_compra']
+    items = context['items']
+    potential_matches = []
+    
+    if context['candidates']:
+        print(f"\n   🤖 Validação concluída: {pncp_id}")
+    
+    for (company, score, justificativa), validation in zip(context['candidates'], validations):
+        # 🔥 NOVA POLÍTICA: TODOS OS MATCHES PASSAM PELO LLM
+        should_accept_match = False  # Por padrão, rejeitar até LLM aprovar
+        final_score = score
+        final_justificativa = justificativa
+        
+        if validation is not None:
+            estatisticas['llm_validations_count'] += 1
+            
+            if validation['is_valid']:
+                print(f"         🎯 LLM APROVOU {company['nome']}! Confiança: {validation['confidence']:.1%}")
+                final_score = validation['confidence']
+                final_justificativa += f" | LLM: {validation['reasoning'][:100]}..."
+                estatisticas['llm_approved'] += 1
+                should_accept_match = True  # ✅ APROVADO PELO LLM
+            else:
+                print(f"         🚫 LLM REJEITOU {company['nome']}: {validation['reasoning'][:80]}...")
+                estatisticas['llm_rejected'] += 1
+                should_accept_match = False  # ❌ REJEITADO PELO LLM
+                
+                # 📊 LOG de match rejeitado para análise
+                _log_rejected_match(company, objeto_compra, pncp_id, score, validation['reasoning'])
+                estatisticas['rejected_matches_logged'] += 1
+        else:
+            # 🚨 FALLBACK: Se LLM indisponível, aplicar threshold mais rigoroso
+            if score >= 0.85:  # Apenas scores muito altos sem LLM
+                should_accept_match = True
+                print(f"         ⚠️  LLM indisponível - {company['nome']} aprovado por score alto ({score:.1%})")
+            else:
+                should_accept_match = False
+                print(f"         ❌ LLM indisponível - {company['nome']} rejeitado por score insuficiente ({score:.1%})")
+        
+        if should_accept_match:
+            potential_matches.append((company, final_score, final_justificativa))
+            
+            # 🔥 FIX CRÍTICO: Enfileirar match aprovado pelo LLM imediatamente (gravado no próximo flush)
+            writer.add_match(pncp_id, company["id"], final_score, "llm_approved", final_justificativa)
+            estatisticas.setdefault('matches_saved_immediately', 0)
+            estatisticas['matches_saved_immediately'] += 1
+            print(f"         💾 Match enfileirado para gravação!")
     
-    # 🔥 OTIMIZAÇÃO: Buscar embeddings dos itens em lote do cache
-    cached_item_embeddings = cache_service.batch_get_embeddings_from_cache(item_descriptions)
+    if potential_matches:
+        print(f"   🎯 {len(potential_matches)} potenciais matches encontrados!")
+        estatisticas['com_matches'] += 1
+        
+        # FASE 2: Refinamento com itens (se disponível)
+        if items:
+            print(f"   📋 {len(items)} itens encontrados. Iniciando FASE 2...")
+            _process_phase2_matching(
+                items, potential_matches, pncp_id, cache_service, vectorizer, estatisticas, writer,
+                company_matrix, context.get('item_embeddings')
+            )
+        else:
+            print("   📋 Sem itens - usando apenas Fase 1")
+            _process_phase1_only_matching(potential_matches, pncp_id, estatisticas, writer)
+    else:
+        estatisticas['sem_matches'] += 1
     
-    # Gerar embeddings faltantes
-    texts_to_generate = [desc for desc in item_descriptions if desc not in cached_item_embeddings]
+    return len(potential_matches)
+
+
+def _finalize_daily_bid(context: Dict[str, Any], validations: list, estatisticas: Dict[str, int],
+                        cache_service, vectorizer, dedup_service, writer: BulkWriter,
+                        company_matrix: CompanyEmbeddingMatrix) -> int:
+    """_finalize_bid + marcação da licitação como processada (busca diária)"""
+    matches = _finalize_bid(context, validations, estatisticas, cache_service, vectorizer, writer, company_matrix)
+    
+    # Marcar como processada só depois das validações concluírem
+    licitacao_data = {
+        'objeto_compra': context['objeto_compra'],
+        'pncp_id': context['pncp_id'],
+        'data_publicacao': context['bid'].get("dataPublicacaoPncp", "")
+    }
+    dedup_service.mark_licitacao_processed(context['pncp_id'], licitacao_data)
+    writer.set_bid_status(context['pncp_id'], "processada")
+    return matches
+
+
+def _shutdown_validation_pool(validation_pool):
+    """Encerra o pool LLM e exibe suas estatísticas"""
+    if validation_pool is None:
+        return
+    validation_pool.shutdown()
+    stats = validation_pool.stats()
+    print(f"\n🤖 POOL DE VALIDAÇÃO LLM ({stats['provider']}):")
+    print(f"   📨 Validações: {stats['completed']}/{stats['submitted']}")
+    print(f"   🔁 Retentativas: {stats['retries']} | Fallback após retentativas: {stats['failed_after_retries']}")
+    print(f"   ⏱️  Tempo LLM acumulado: {stats['llm_time_s']:.1f}s | Espera rate limit: {stats['rate_limit_wait_s']:.1f}s")
+    
+    verdict_cache = getattr(validation_pool.validator, 'verdict_cache', None)
+    if verdict_cache:
+        cache_stats = verdict_cache.stats()
+        print(f"   🗃️  Cache de vereditos: {cache_stats['hits']}/{cache_stats['lookups']} hits "
+              f"({cache_stats['hit_rate']:.1%}) | Redis {cache_stats['redis_hits']} | Postgres {cache_stats['postgres_hits']}")
+
+
+def _print_writer_stats(writer: BulkWriter):
+    """Exibe o volume gravado pelo BulkWriter"""
+    stats = writer.stats()
+    print(f"\n📦 GRAVAÇÃO EM LOTE:")
+    print(f"   💾 {stats['bids']} licitações | {stats['items']} itens | {stats['matches']} matches | "
+          f"{stats['statuses']} status em {stats['flushes']} flushes ({stats['rows_per_s']:.0f} linhas/s)")
+    if stats['failed_rows']:
+        print(f"   ❌ {stats['failed_rows']} linhas descartadas em {stats['failed_flushes']} flushes com erro")
+
+
+def _process_phase2_matching(items, potential_matches, pncp_id, cache_service, vectorizer, estatisticas, writer,
+                             company_matrix, item_embeddings=None):
+    """Processa Fase 2 com otimização de cache (item_embeddings: já vetorizados no lote da busca diária)"""
+    item_descriptions = [item.get("descricao", "") for item in items]
+    
+    if item_embeddings is not None:
+        cached_item_embeddings = item_embeddings
+        texts_to_generate = []
+    else:
+        # 🔥 OTIMIZAÇÃO: Buscar embeddings dos itens em lote do cache
+        cached_item_embeddings = cache_service.batch_get_embeddings_from_cache(item_descriptions)
+        
+        # Gerar embeddings faltantes
+        texts_to_generate = [desc for desc in item_descriptions if desc not in cached_item_embeddings]
     
     if texts_to_generate:
         new_embeddings = vectorizer.batch_vectorize(texts_to_generate)
@@ -371,41 +645,33 @@ def _process_phase2_matching(items, potential_matches, pncp_id, cache_service, v
             for text, emb in zip(texts_to_generate, new_embeddings):
                 cached_item_embeddings[text] = emb
     
-    # Processar matches com embeddings otimizados
-    for company, score_fase1, justificativa_fase1 in potential_matches:
-        item_matches = 0
-        total_item_score = 0.0
-        
-        for desc in item_descriptions:
-            if desc not in cached_item_embeddings:
-                continue
-                
-            item_embedding = cached_item_embeddings[desc]
-            item_score, item_justificativa = calculate_enhanced_similarity(
-                item_embedding, 
-                company["embedding"],
-                desc,
-                company["descricao_servicos_produtos"]
-            )
-            
-            if item_score >= SIMILARITY_THRESHOLD_PHASE2:
-                item_matches += 1
-                total_item_score += item_score
+    # 📐 Itens x empresas candidatas numa multiplicação de matrizes (mesmo score de calculate_enhanced_similarity)
+    described = [desc for desc in item_descriptions if desc in cached_item_embeddings]
+    if not described:
+        return
+    item_scores = company_matrix.score_items(
+        [cached_item_embeddings[desc] for desc in described], described,
+        [company_matrix.index_of(company) for company, _, _ in potential_matches]
+    )
+    match_counts, item_aggregates = aggregate_item_scores(item_scores, item_scores >= SIMILARITY_THRESHOLD_PHASE2)
+    
+    for column, (company, score_fase1, justificativa_fase1) in enumerate(potential_matches):
+        item_matches = int(match_counts[column])
         
         if item_matches > 0:
-            final_score = (score_fase1 + (total_item_score / item_matches)) / 2
+            final_score = (score_fase1 + float(item_aggregates[column])) / 2
             combined_justificativa = f"Fase 1: {justificativa_fase1} | Fase 2: {item_matches} itens matched"
             
-            save_match_to_db(pncp_id, company["id"], final_score, "objeto_e_itens", combined_justificativa)
+            writer.add_match(pncp_id, company["id"], final_score, "objeto_e_itens", combined_justificativa)
             estatisticas['matches_fase2'] += 1
             
             print(f"      🎯 MATCH FINAL! {company['nome']} - Score: {final_score:.3f}")
 
 
-def _process_phase1_only_matching(potential_matches, pncp_id, estatisticas):
+def _process_phase1_only_matching(potential_matches, pncp_id, estatisticas, writer):
     """Processa matches apenas da Fase 1"""
     for company, score, justificativa in potential_matches:
-        save_match_to_db(pncp_id, company["id"], score, "objeto_completo", 
+        writer.add_match(pncp_id, company["id"], score, "objeto_completo", 
                         f"Apenas Fase 1: {justificativa}")
         estatisticas['matches_fase1_apenas'] += 1
         print(f"      🎯 MATCH! {company['nome']} - Score: {score:.3f}")
@@ -447,6 +713,7 @@ def reevaluate_existing_bids(vectorizer: BaseTextVectorizer, clear_matches: bool
     
     # 🔥 OTIMIZAÇÃO: Vetorizar empresas com cache em lote
     _vectorize_companies_with_cache(companies, cache_service, vectorizer)
+    company_matrix = CompanyEmbeddingMatrix(companies)
     
     # 2. Carregar licitações existentes
     print(f"\n📄 Carregando licitações do banco...")
@@ -460,12 +727,18 @@ def reevaluate_existing_bids(vectorizer: BaseTextVectorizer, clear_matches: bool
     # 3. 🔥 OTIMIZAÇÃO: Processar licitações com cache em lote Redis
     print(f"\n⚡ Iniciando reavaliação com CACHE REDIS LOCAL...")
     
-    # Pré-carregar embeddings de licitações em lote
+    # 🧮 Vetorizar objetos em lotes (cache + batch_vectorize, textos repetidos uma vez só)
     bid_texts = [bid['objeto_compra'] for bid in existing_bids if bid['objeto_compra']]
-    cached_bid_embeddings = cache_service.batch_get_embeddings_from_cache(bid_texts)
-    redis_cache_hits = len(cached_bid_embeddings)
+    embedder = BatchEmbedder(vectorizer, cache_service)
+    bid_embeddings = {}
+    for start in range(0, len(bid_texts), EMBED_BATCH_SIZE):
+        embeddings, batch = embedder.embed(bid_texts[start:start + EMBED_BATCH_SIZE])
+        bid_embeddings.update(embeddings)
+        print(f"   {format_batch_stats(batch)}")
+    embed_stats = embedder.stats()
     
-    print(f"   ⚡ Cache Redis: {redis_cache_hits}/{len(bid_texts)} embeddings de licitações encontrados")
+    print(f"   ⚡ Cache Redis: {embed_stats['cache_hits']}/{embed_stats['unique']} embeddings de licitações encontrados "
+          f"({embed_stats['dedup_saved']} objetos repetidos)")
     
     matches_encontrados = 0
     estatisticas = {
@@ -481,131 +754,73 @@ def reevaluate_existing_bids(vectorizer: BaseTextVectorizer, clear_matches: bool
         'rejected_matches_logged': 0  # 🆕 Para tracking de matches rejeitados
     }
     
-    for i, bid in enumerate(existing_bids, 1):
-        pncp_id = bid["pncp_id"]
-        objeto_compra = bid.get("objeto_compra", "")
-        licitacao_id = bid.get("id") # ID da licitação no nosso DB
+    validation_pool = LLMValidationPool(llm_validator) if llm_validator else None
+    validation_queue = OrderedBidValidationQueue(validation_pool, LLM_VALIDATION_MAX_PENDING_BIDS)
+    writer = BulkWriter()
+    
+    try:
+        for i, bid in enumerate(existing_bids, 1):
+            pncp_id = bid["pncp_id"]
+            objeto_compra = bid.get("objeto_compra", "")
+            licitacao_id = bid.get("id") # ID da licitação no nosso DB
 
-        print(f"\n[{i}/{len(existing_bids)}] 🔍 Reavaliando: {pncp_id}")
-        print(f"   📝 Objeto: {objeto_compra[:100]}...")
+            print(f"\n[{i}/{len(existing_bids)}] 🔍 Reavaliando: {pncp_id}")
+            print(f"   📝 Objeto: {objeto_compra[:100]}...")
 
-        if not objeto_compra or not licitacao_id:
-            print("   ⚠️  Objeto da compra ou ID da licitação ausente, pulando...")
-            continue
+            if not objeto_compra or not licitacao_id:
+                print("   ⚠️  Objeto da compra ou ID da licitação ausente, pulando...")
+                continue
         
-        # 🔀 CORREÇÃO: Buscar os itens da licitação do nosso banco de dados
-        items = get_bid_items_from_db(licitacao_id)
-        if items:
-            print(f"   📋 {len(items)} itens encontrados no banco de dados para esta licitação.")
+            # 🔀 CORREÇÃO: Buscar os itens da licitação do nosso banco de dados
+            items = get_bid_items_from_db(licitacao_id)
+            if items:
+                print(f"   📋 {len(items)} itens encontrados no banco de dados para esta licitação.")
 
-        # CACHE: Usar embedding do cache ou gerar novo
-        if objeto_compra in cached_bid_embeddings:
-            bid_embedding = cached_bid_embeddings[objeto_compra]
-            print(f"   ⚡ Embedding do cache Redis")
-        else:
-            bid_embedding = vectorizer.vectorize(objeto_compra)
-            if bid_embedding:
-                cache_service.save_embedding_to_cache(objeto_compra, bid_embedding)
-                print(f"   🆕 Novo embedding gerado")
-        
-        if not bid_embedding:
-            print("   ❌ Erro ao vetorizar objeto da compra")
-            estatisticas['vetorizacao_falhou'] += 1
-            continue
+            # Embedding já calculado no lote
+            bid_embedding = bid_embeddings.get(objeto_compra)
+            if not bid_embedding:
+                print("   ❌ Erro ao vetorizar objeto da compra")
+                estatisticas['vetorizacao_falhou'] += 1
+                continue
         
-        estatisticas['total_processadas'] += 1
+            estatisticas['total_processadas'] += 1
         
-        # FASE 1: Matching do objeto completo
-        potential_matches = []
-        for company in companies:
-            if not company.get("embedding"):
-                continue
-            
-            score, justificativa = calculate_enhanced_similarity(
-                bid_embedding, 
-                company["embedding"], 
-                objeto_compra, 
-                company["descricao_servicos_produtos"]
+            # FASE 1: Matching do objeto completo
+            candidates = company_matrix.top_candidates(
+                bid_embedding, objeto_compra, SIMILARITY_THRESHOLD_PHASE1, PHASE1_TOP_K
             )
-            
-            if score >= SIMILARITY_THRESHOLD_PHASE1:
-                # 🔥 NOVA POLÍTICA: TODOS OS MATCHES PASSAM PELO LLM
-                should_accept_match = False  # Por padrão, rejeitar até LLM aprovar
-                final_score = score
-                final_justificativa = justificativa
-                
-                if llm_validator:
-                    print(f"         🤖 VALIDAÇÃO LLM OBRIGATÓRIA (score {score:.1%})")
-                    
-                    validation = llm_validator.validate_match(
-                        empresa_nome=company['nome'],
-                        empresa_descricao=company['descricao_servicos_produtos'],
-                        empresa_produtos=company.get('produtos'),
-                        licitacao_objeto=objeto_compra,
-                        pncp_id=pncp_id,
-                        similarity_score=score,
-                        licitacao_itens=items
-                    )
-                    
-                    estatisticas['llm_validations_count'] += 1
-                    
-                    if validation['is_valid']:
-                        print(f"         🎯 LLM APROVOU! Confiança: {validation['confidence']:.1%}")
-                        final_score = validation['confidence']
-                        final_justificativa += f" | LLM: {validation['reasoning'][:100]}..."
-                        estatisticas['llm_approved'] += 1
-                        should_accept_match = True  # ✅ APROVADO PELO LLM
-                    else:
-                        print(f"         🚫 LLM REJEITOU: {validation['reasoning'][:80]}...")
-                        estatisticas['llm_rejected'] += 1
-                        should_accept_match = False  # ❌ REJEITADO PELO LLM
-                        
-                        # 📊 LOG de match rejeitado para análise
-                        _log_rejected_match(company, objeto_compra, pncp_id, score, validation['reasoning'])
-                        estatisticas['rejected_matches_logged'] += 1
-                else:
-                    # 🚨 FALLBACK: Se LLM indisponível, aplicar threshold mais rigoroso
-                    if score >= 0.85:  # Apenas scores muito altos sem LLM
-                        should_accept_match = True
-                        print(f"         ⚠️  LLM indisponível - aprovado por score alto ({score:.1%})")
-                    else:
-                        should_accept_match = False
-                        print(f"         ❌ LLM indisponível - rejeitado por score insuficiente ({score:.1%})")
-                
-                if should_accept_match:
-                    potential_matches.append((company, final_score, final_justificativa))
-                    print(f"         ✅ MATCH APROVADO PARA SALVAMENTO!")
-                    
-                    # 🔥 FIX CRÍTICO: Salvar match aprovado pelo LLM imediatamente na reavaliação também
-                    save_match_to_db(pncp_id, company["id"], final_score, "llm_approved", final_justificativa)
-                    print(f"         💾 Match salvo no banco imediatamente!")
-                else:
-                    print(f"         ❌ Match rejeitado - NÃO será salvo no banco")
         
-        if potential_matches:
-            estatisticas['com_matches'] += 1
-            
-            # FASE 2: Refinamento com itens (se disponível)
-            if items:
-                _process_phase2_matching(items, potential_matches, pncp_id, cache_service, vectorizer, estatisticas)
-            else:
-                _process_phase1_only_matching(potential_matches, pncp_id, estatisticas)
-                
-            matches_encontrados += len(potential_matches)
-        else:
-            estatisticas['sem_matches'] += 1
+            context = {
+                'pncp_id': pncp_id,
+                'objeto_compra': objeto_compra,
+                'items': items,
+                'candidates': candidates,
+            }
+            for ready_context, validations in validation_queue.submit(context, _build_validation_requests(context)):
+                matches_encontrados += _finalize_bid(ready_context, validations, estatisticas, cache_service, vectorizer, writer, company_matrix)
         
-        print("-" * 60)
+            print("-" * 60)
+    
+        # ⏳ Aguardar validações LLM ainda em andamento
+        for ready_context, validations in validation_queue.drain():
+            matches_encontrados += _finalize_bid(ready_context, validations, estatisticas, cache_service, vectorizer, writer, company_matrix)
+        _shutdown_validation_pool(validation_pool)
+    finally:
+        writer.close()
+    _print_writer_stats(writer)
     
     # Relatório final com estatísticas de cache Redis
     print(f"\n📊 ESTATÍSTICAS REDIS CACHE:")
-    print(f"   ⚡ Cache hits Redis: {redis_cache_hits}/{len(bid_texts)}")
+    print(f"   ⚡ Cache hits Redis: {embed_stats['cache_hits']}/{embed_stats['unique']} ({embed_stats['cache_hit_rate']:.1%})")
+    print(f"   🧮 Embeddings: {embed_stats['texts']} textos em {embed_stats['batches']} lotes "
+          f"({embed_stats['texts_per_s']:.0f} textos/s)")
     
     # Exibir stats do cache
     cache_stats = cache_service.get_cache_stats()
     if cache_stats.get('status') == 'active':
         print(f"   📈 Total embeddings em cache: {cache_stats['cache_stats']['match_keys']}")
         print(f"   🎯 Eficiência do cache: {cache_stats['performance']['cache_efficiency']}")
+        _print_cache_tiers(cache_stats)
         print(f"   💾 Memória Redis: {cache_stats['redis_info']['memory_used']}")
     
     result = _print_detailed_final_report(matches_encontrados, estatisticas)
@@ -614,6 +829,16 @@ def reevaluate_existing_bids(vectorizer: BaseTextVectorizer, clear_matches: bool
     return result
 
 
+def _print_cache_tiers(cache_stats: Dict[str, Any]):
+    """Hits por tier do cache de embeddings (memória do processo x disco x Redis)"""
+    counters = cache_stats['cache_stats']
+    local_tier = cache_stats['local_tier']
+    print(f"   🧠 Hits por tier: memória {counters['local_hits']} | disco {counters['disk_hits']} | "
+          f"Redis {counters['redis_hits']} | "
+          f"misses {counters['misses']} | tier local {local_tier['entries']} entradas, "
+          f"{local_tier['memory_mb']:.1f}/{local_tier['budget_mb']:.0f} MB")
+
+
 def _print_final_report(matches_encontrados: int, estatisticas: Dict[str, int]):
     """Imprime relatório final resumido"""
     print(f"\n" + "="*80)
@@ -752,6 +977,9 @@ if __name__ == "__main__":
                 print(f"❌ Erro crítico: {e3}")
                 exit(1)
     
+    if hasattr(vectorizer, 'warm_up'):
+        vectorizer.warm_up()
+    
     # Menu de operações
     print("\n📋 Operações disponíveis:")
     print("1. Buscar novas licitações do PNCP (process_daily_bids)")
@@ -12,11 +12,17 @@ from typing import Dict, Any, Optional
 from config.llm_config import LLMConfig
 from dotenv import load_dotenv
 
+from services.llm_verdict_cache_service import get_llm_verdict_cache, compute_prompt_version
+from .llm_validation_pool import TransientLLMError
+
 # Carregar variáveis de ambiente
 load_dotenv('config.env')
 
 logger = logging.getLogger(__name__)
 
+# Status HTTP do Ollama tratados como falha transitória
+TRANSIENT_HTTP_STATUS = {429, 500, 502, 503, 504}
+
 class OllamaMatchValidator:
     """
     🦙 Validador de matches usando Ollama local
@@ -34,6 +40,11 @@ class OllamaMatchValidator:
         self.HIGH_SCORE_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD_PHASE1', '0.70'))  # Threshold do config.env
         self.LLM_CONFIDENCE_THRESHOLD = 0.65  # Aprovação LLM
         
+        # 🗃️ Cache persistente de vereditos
+        self.validator_id = f"ollama:{self.config['model']}"
+        self.prompt_version = compute_prompt_version(OllamaMatchValidator._build_validation_prompt)
+        self.verdict_cache = get_llm_verdict_cache()
+        
     def _setup_ollama(self):
         """Configurar conexão com Ollama"""
         try:
@@ -73,15 +84,31 @@ class OllamaMatchValidator:
         pncp_id: str,
         similarity_score: float,
         licitacao_itens: Optional[list] = None,
-        empresa_produtos: Optional[list] = None  # 🔀 NOVO: Produtos da empresa
+        empresa_produtos: Optional[list] = None,  # 🔀 NOVO: Produtos da empresa
+        raise_on_transient: bool = False,
+        use_cached_verdict: bool = True
     ) -> Dict[str, Any]:
         """
         🦙 Validar match usando Ollama com fallback OpenAI
         
+        Args:
+            raise_on_transient: Levantar TransientLLMError em 429/5xx/timeout
+                em vez de cair no fallback OpenAI (usado pelo LLMValidationPool para retry)
+            use_cached_verdict: Consultar o cache de vereditos antes do Ollama (o
+                LLMValidationPool consulta antes, via lookup_cached_verdict, e passa False)
+        
         Returns:
             Dict com 'is_valid', 'confidence', 'reasoning'
         """
         
+        cache_key = self._verdict_cache_key(
+            empresa_nome, empresa_descricao, licitacao_objeto, similarity_score, licitacao_itens, empresa_produtos
+        )
+        if cache_key and use_cached_verdict:
+            cached = self._cached_verdict(cache_key, empresa_nome, similarity_score)
+            if cached:
+                return cached
+        
         if not self.ollama_available:
             logger.warning("🦙 Ollama indisponível, usando fallback OpenAI")
             return self._fallback_to_openai(
@@ -116,6 +143,8 @@ class OllamaMatchValidator:
             )
             
             if response.status_code != 200:
+                if raise_on_transient and response.status_code in TRANSIENT_HTTP_STATUS:
+                    raise TransientLLMError(f"Ollama HTTP {response.status_code}")
                 logger.error(f"❌ Ollama erro HTTP {response.status_code}")
                 return self._fallback_to_openai(
                     empresa_nome, empresa_descricao, licitacao_objeto, 
@@ -131,6 +160,10 @@ class OllamaMatchValidator:
             # Analisar resposta do LLM
             validation_result = self._parse_llm_response(llm_response, similarity_score)
             
+            if cache_key and llm_response:
+                self.verdict_cache.put(cache_key, self.validator_id, self.prompt_version,
+                                       llm_response, self.config['model'])
+            
             # Log detalhado
             logger.info(
                 f"🦙 OLLAMA VALIDATION - "
@@ -143,13 +176,57 @@ class OllamaMatchValidator:
             
             return validation_result
             
+        except TransientLLMError:
+            raise
         except Exception as e:
+            if raise_on_transient and isinstance(e, (requests.Timeout, requests.ConnectionError)):
+                raise TransientLLMError(str(e)) from e
             logger.error(f"❌ Erro na validação Ollama: {e}")
             return self._fallback_to_openai(
                 empresa_nome, empresa_descricao, licitacao_objeto, 
                 pncp_id, similarity_score, licitacao_itens, empresa_produtos
             )
 
+    def lookup_cached_verdict(
+        self,
+        empresa_nome: str,
+        empresa_descricao: str,
+        licitacao_objeto: str,
+        similarity_score: float,
+        licitacao_itens: Optional[list] = None,
+        empresa_produtos: Optional[list] = None,
+        **_
+    ) -> Optional[Dict[str, Any]]:
+        """Resultado de validate_match vindo do cache de vereditos, sem chamar o Ollama; None se não houver"""
+        cache_key = self._verdict_cache_key(
+            empresa_nome, empresa_descricao, licitacao_objeto, similarity_score, licitacao_itens, empresa_produtos
+        )
+        return self._cached_verdict(cache_key, empresa_nome, similarity_score) if cache_key else None
+
+    def _verdict_cache_key(self, empresa_nome: str, empresa_descricao: str, licitacao_objeto: str,
+                           similarity_score: float, licitacao_itens: Optional[list] = None,
+                           empresa_produtos: Optional[list] = None) -> Optional[str]:
+        """Fingerprint do prompt renderizado (None sem cache de vereditos)"""
+        if not self.verdict_cache:
+            return None
+        try:
+            prompt = self._build_validation_prompt(
+                empresa_nome, empresa_descricao, licitacao_objeto, similarity_score, licitacao_itens, empresa_produtos
+            )
+        except Exception:
+            return None  # validate_match trata o erro (fallback)
+        return self.verdict_cache.fingerprint(self.validator_id, self.prompt_version, prompt)
+
+    def _cached_verdict(self, cache_key: str, empresa_nome: str, similarity_score: float) -> Optional[Dict[str, Any]]:
+        cached = self.verdict_cache.get(cache_key)
+        if not cached:
+            return None
+        validation_result = self._parse_llm_response(cached['raw'], similarity_score)
+        validation_result['cache_hit'] = True
+        logger.info(f"🗃️ Veredito Ollama do cache: {empresa_nome[:30]}... | "
+                    f"{'✅ APROVADO' if validation_result['is_valid'] else '🚫 REJEITADO'}")
+        return validation_result
+
     def _build_validation_prompt(
         self, 
         empresa_nome: str, 
@@ -5,7 +5,7 @@ Módulo para integração com API do PNCP e operações de banco de dados
 
 import os
 import psycopg2
-from psycopg2.extras import DictCursor
+from psycopg2.extras import DictCursor, execute_values
 import datetime
 from typing import List, Dict, Any, Tuple
 import requests
@@ -17,10 +17,14 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # --- Configurações da API PNCP ---
-PNCP_BASE_URL_PUBLICACAO = "https://pncp.gov.br/api/consulta/v1/contratacoes/proposta"
-PNCP_BASE_URL_ITENS = "https://pncp.gov.br/api/pncp/v1/orgaos/{cnpj}/compras/{anoCompra}/{sequencialCompra}/itens"
+PNCP_API_BASE_URL = os.getenv('PNCP_API_BASE_URL', 'https://pncp.gov.br/api').rstrip('/')
+PNCP_BASE_URL_PUBLICACAO = f"{PNCP_API_BASE_URL}/consulta/v1/contratacoes/proposta"
+PNCP_BASE_URL_ATUALIZACAO = f"{PNCP_API_BASE_URL}/consulta/v1/contratacoes/atualizacao"
+PNCP_BASE_URL_ITENS = PNCP_API_BASE_URL + "/pncp/v1/orgaos/{cnpj}/compras/{anoCompra}/{sequencialCompra}/itens"
 PNCP_PAGE_SIZE = 50  # Quantidade de licitações por página
 PNCP_MAX_PAGES = 10  # 🔥 AUMENTADO: Mais páginas para busca semanal
+# Limite de páginas por UF na sincronização incremental (delta desde o watermark)
+PNCP_SYNC_MAX_PAGES = int(os.getenv('PNCP_SYNC_MAX_PAGES', '50'))
 
 # --- Estados brasileiros ---
 ESTADOS_BRASIL = [
@@ -92,10 +96,12 @@ def get_processed_bid_ids() -> set:
         conn.close()
 
 
-def fetch_bids_from_pncp(start_date: str, end_date: str, uf: str, page: int) -> Tuple[List[Dict], bool]:
+def fetch_bids_from_pncp(start_date: str, end_date: str, uf: str, page: int,
+                         raise_errors: bool = False) -> Tuple[List[Dict], bool]:
     """
     Busca licitações na API do PNCP para um UF e página específicos.
     Retorna a lista de licitações e um booleano indicando se há mais páginas.
+    Com raise_errors, falhas sobem em vez de virar página vazia.
     """
     params = {
         "dataInicial": start_date,
@@ -108,16 +114,44 @@ def fetch_bids_from_pncp(start_date: str, end_date: str, uf: str, page: int) ->
     
     try:
         print(f"🔍 Buscando licitações em {uf}, página {page}...")
-        response = requests.get(PNCP_BASE_URL_PUBLICACAO, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-        bids = data.get("data", [])
-        has_more_pages = len(bids) == PNCP_PAGE_SIZE
+        bids, has_more_pages = _get_bids_page(PNCP_BASE_URL_PUBLICACAO, params)
         print(f"   ✅ Encontradas {len(bids)} licitações em {uf}")
         return bids, has_more_pages
-    except requests.exceptions.RequestException as e:
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"❌ Erro ao buscar licitações do PNCP ({uf}, página {page}): {e}")
+        if raise_errors:
+            raise
+        return [], False
+
+
+def fetch_updated_bids_from_pncp(start_date: str, end_date: str, uf: str, page: int) -> Tuple[List[Dict], bool]:
+    """
+    Busca contratações atualizadas (ou publicadas) entre start_date e end_date
+    para um UF - o delta da sincronização incremental.
+    Falhas sobem: um erro não pode passar por "nenhuma atualização".
+    """
+    params = {
+        "dataInicial": start_date,
+        "dataFinal": end_date,
+        "uf": uf,
+        "pagina": page,
+        "tamanhoPagina": PNCP_PAGE_SIZE,
+        "codigoModalidadeContratacao": 6  # Pregão eletrônico
+    }
+    print(f"🔄 Buscando atualizações em {uf}, página {page}...")
+    bids, has_more_pages = _get_bids_page(PNCP_BASE_URL_ATUALIZACAO, params)
+    print(f"   ✅ {len(bids)} licitações atualizadas em {uf}")
+    return bids, has_more_pages
+
+
+def _get_bids_page(url: str, params: Dict[str, Any]) -> Tuple[List[Dict], bool]:
+    """Uma página da API de consulta (204 = sem registros)"""
+    response = requests.get(url, params=params, timeout=30)
+    response.raise_for_status()
+    if response.status_code == 204 or not response.content:
         return [], False
+    bids = response.json().get("data") or []
+    return bids, len(bids) == PNCP_PAGE_SIZE
 
 
 def fetch_bid_items_from_pncp(licitacao: Dict) -> List[Dict]:
@@ -146,6 +180,176 @@ def fetch_bid_items_from_pncp(licitacao: Dict) -> List[Dict]:
         return []
 
 
+# --- Colunas e upserts compartilhados pelos saves unitários e pelo BulkWriter ---
+DECIMAL_15_2_MAX = 999999999999.99  # Limite do DECIMAL(15,2)
+
+BID_COLUMNS = (
+    'pncp_id', 'orgao_cnpj', 'ano_compra', 'sequencial_compra',
+    'objeto_compra', 'link_sistema_origem', 'data_publicacao',
+    'valor_total_estimado', 'uf', 'status',
+    'numero_controle_pncp', 'numero_compra', 'processo',
+    'valor_total_homologado', 'data_abertura_proposta', 'data_encerramento_proposta',
+    'modo_disputa_id', 'modo_disputa_nome', 'srp',
+    'link_processo_eletronico', 'justificativa_presencial', 'razao_social',
+    'uf_nome', 'nome_unidade', 'municipio_nome', 'codigo_ibge', 'codigo_unidade'
+)
+
+# Multi-linha via execute_values (VALUES %s)
+BID_UPSERT_SQL = f"""
+    INSERT INTO licitacoes ({', '.join(BID_COLUMNS)}) VALUES %s
+    ON CONFLICT (pncp_id) DO UPDATE SET
+        updated_at = NOW(),
+        objeto_compra = EXCLUDED.objeto_compra,
+        link_sistema_origem = EXCLUDED.link_sistema_origem,
+        valor_total_estimado = EXCLUDED.valor_total_estimado,
+        numero_controle_pncp = EXCLUDED.numero_controle_pncp,
+        numero_compra = EXCLUDED.numero_compra,
+        processo = EXCLUDED.processo,
+        valor_total_homologado = EXCLUDED.valor_total_homologado,
+        data_abertura_proposta = EXCLUDED.data_abertura_proposta,
+        data_encerramento_proposta = EXCLUDED.data_encerramento_proposta,
+        modo_disputa_id = EXCLUDED.modo_disputa_id,
+        modo_disputa_nome = EXCLUDED.modo_disputa_nome,
+        srp = EXCLUDED.srp,
+        link_processo_eletronico = EXCLUDED.link_processo_eletronico,
+        justificativa_presencial = EXCLUDED.justificativa_presencial,
+        razao_social = EXCLUDED.razao_social,
+        uf_nome = EXCLUDED.uf_nome,
+        nome_unidade = EXCLUDED.nome_unidade,
+        municipio_nome = EXCLUDED.municipio_nome,
+        codigo_ibge = EXCLUDED.codigo_ibge,
+        codigo_unidade = EXCLUDED.codigo_unidade
+"""
+
+ITEM_COLUMNS = (
+    'numero_item', 'descricao', 'quantidade',
+    'unidade_medida', 'valor_unitario_estimado',
+    'material_ou_servico', 'ncm_nbs_codigo',
+    'criterio_julgamento_id', 'criterio_julgamento_nome',
+    'tipo_beneficio_id', 'tipo_beneficio_nome',
+    'situacao_item_id', 'situacao_item_nome',
+    'aplicabilidade_margem_preferencia', 'percentual_margem_preferencia',
+    'tem_resultado'
+)
+
+# Tipos explícitos: valores vindos de um VALUES dentro de SELECT não são convertidos na atribuição
+ITEM_VALUE_CASTS = (
+    'integer', 'text', 'numeric',
+    'text', 'numeric',
+    'text', 'text',
+    'integer', 'text',
+    'integer', 'text',
+    'integer', 'text',
+    'boolean', 'numeric',
+    'boolean'
+)
+
+ITEM_UPSERT_CONFLICT_SQL = """
+    ON CONFLICT (licitacao_id, numero_item) DO UPDATE SET
+        material_ou_servico = EXCLUDED.material_ou_servico,
+        ncm_nbs_codigo = EXCLUDED.ncm_nbs_codigo,
+        criterio_julgamento_id = EXCLUDED.criterio_julgamento_id,
+        criterio_julgamento_nome = EXCLUDED.criterio_julgamento_nome,
+        tipo_beneficio_id = EXCLUDED.tipo_beneficio_id,
+        tipo_beneficio_nome = EXCLUDED.tipo_beneficio_nome,
+        situacao_item_id = EXCLUDED.situacao_item_id,
+        situacao_item_nome = EXCLUDED.situacao_item_nome,
+        aplicabilidade_margem_preferencia = EXCLUDED.aplicabilidade_margem_preferencia,
+        percentual_margem_preferencia = EXCLUDED.percentual_margem_preferencia,
+        tem_resultado = EXCLUDED.tem_resultado,
+        updated_at = NOW()
+"""
+
+
+def _clamp_decimal(value, default=None):
+    """Converte para float limitado a [0, DECIMAL_15_2_MAX]; inválido -> default"""
+    if value is None:
+        return default
+    try:
+        value = float(value)
+    except (ValueError, TypeError):
+        return default
+    return min(max(value, 0), DECIMAL_15_2_MAX)
+
+
+def _bid_values(bid: Dict) -> Dict[str, Any]:
+    """Valores da linha de licitacoes (na ordem de BID_COLUMNS) a partir do JSON do PNCP"""
+    # Extrair campos aninhados corretamente
+    orgao = bid.get("orgaoEntidade") or {}
+    unidade_orgao = bid.get("unidadeOrgao") or {}
+    
+    return {
+        'pncp_id': bid["numeroControlePNCP"],
+        'orgao_cnpj': orgao.get("cnpj"),
+        'ano_compra': bid["anoCompra"],
+        'sequencial_compra': bid["sequencialCompra"],
+        'objeto_compra': bid["objetoCompra"],
+        'link_sistema_origem': bid.get("linkSistemaOrigem", ""),
+        'data_publicacao': bid.get("dataPublicacaoPncp"),
+        'valor_total_estimado': _clamp_decimal(bid.get("valorTotalEstimado")),
+        'uf': unidade_orgao.get("ufSigla"),
+        'status': "coletada",
+        'numero_controle_pncp': bid.get("numeroControlePNCP"),  # Mesmo que pncp_id, mas vamos manter separado
+        'numero_compra': bid.get("numeroCompra"),
+        'processo': bid.get("processo"),
+        'valor_total_homologado': _clamp_decimal(bid.get("valorTotalHomologado")),
+        'data_abertura_proposta': bid.get("dataAberturaProposta"),
+        'data_encerramento_proposta': bid.get("dataEncerramentoProposta"),
+        'modo_disputa_id': bid.get("modoDisputaId"),
+        'modo_disputa_nome': bid.get("modoDisputaNome"),
+        'srp': bid.get("srp"),  # Booleano - Sistema de Registro de Preços
+        'link_processo_eletronico': bid.get("linkProcessoEletronico"),
+        'justificativa_presencial': bid.get("justificativaPresencial"),
+        'razao_social': orgao.get("razaoSocial"),
+        'uf_nome': unidade_orgao.get("ufNome"),
+        'nome_unidade': unidade_orgao.get("nomeUnidade"),
+        'municipio_nome': unidade_orgao.get("municipioNome"),
+        'codigo_ibge': unidade_orgao.get("codigoIbge"),
+        'codigo_unidade': unidade_orgao.get("codigoUnidade"),
+    }
+
+
+def _item_values(item: Dict, index: int) -> Dict[str, Any]:
+    """Valores da linha de licitacao_itens (na ordem de ITEM_COLUMNS, sem licitacao_id)"""
+    # Validar percentual de margem preferencial
+    percentual_margem = item.get("percentualMargemPreferenciaNormal")
+    if percentual_margem is not None:
+        try:
+            percentual_margem = float(percentual_margem)
+            if percentual_margem < 0 or percentual_margem > 100:
+                percentual_margem = None
+        except (ValueError, TypeError):
+            percentual_margem = None
+    
+    return {
+        'numero_item': item.get("numeroItem", index),
+        'descricao': item.get("descricao", ""),
+        'quantidade': _clamp_decimal(item.get("quantidade", 0), default=0),
+        'unidade_medida': item.get("unidadeMedida", ""),
+        'valor_unitario_estimado': _clamp_decimal(item.get("valorUnitarioEstimado", 0), default=0),
+        'material_ou_servico': item.get("materialOuServico"),  # 'M' ou 'S'
+        'ncm_nbs_codigo': item.get("ncmNbsCodigo"),
+        'criterio_julgamento_id': item.get("criterioJulgamentoId"),
+        'criterio_julgamento_nome': item.get("criterioJulgamentoNome"),
+        'tipo_beneficio_id': item.get("tipoBeneficio"),
+        'tipo_beneficio_nome': item.get("tipoBeneficioNome"),
+        'situacao_item_id': item.get("situacaoCompraItem"),
+        'situacao_item_nome': item.get("situacaoCompraItemNome"),
+        'aplicabilidade_margem_preferencia': item.get("aplicabilidadeMargemPreferenciaNormal", False),
+        'percentual_margem_preferencia': percentual_margem,
+        'tem_resultado': item.get("temResultado", False),
+    }
+
+
+def _unique_item_rows(items: List[Dict]) -> List[Dict[str, Any]]:
+    """Linhas de itens sem numero_item repetido (o último vence, como no upsert linha a linha)"""
+    rows = {}
+    for i, item in enumerate(items, 1):
+        values = _item_values(item, i)
+        rows[values['numero_item']] = values
+    return list(rows.values())
+
+
 def save_bid_to_db(bid: Dict) -> str:
     """Salva uma licitação no banco de dados e retorna o ID"""
     
@@ -164,125 +368,29 @@ def save_bid_to_db(bid: Dict) -> str:
     print(f"📄 Processo: {bid.get('processo')}")
     print(f"🔢 Número Compra: {bid.get('numeroCompra')}")
     
-    # Validar e limitar valor total estimado
-    valor_total = bid.get("valorTotalEstimado")
-    if valor_total is not None:
-        try:
-            valor_total = float(valor_total)
-            # Limitar a 999 bilhões (limite do DECIMAL(15,2))
-            if valor_total > 999999999999.99:
-                valor_total = 999999999999.99
-            elif valor_total < 0:
-                valor_total = 0
-        except (ValueError, TypeError):
-            valor_total = None
-
-    # Validar e limitar valor total homologado
-    valor_homologado = bid.get("valorTotalHomologado")
-    if valor_homologado is not None:
-        try:
-            valor_homologado = float(valor_homologado)
-            if valor_homologado > 999999999999.99:
-                valor_homologado = 999999999999.99
-            elif valor_homologado < 0:
-                valor_homologado = 0
-        except (ValueError, TypeError):
-            valor_homologado = None
-    
-    # Extrair campos aninhados corretamente
-    orgao_cnpj = bid.get("orgaoEntidade", {}).get("cnpj") if bid.get("orgaoEntidade") else None
-    razao_social = bid.get("orgaoEntidade", {}).get("razaoSocial") if bid.get("orgaoEntidade") else None
-    
-    # Extrair dados da unidadeOrgao
-    unidade_orgao = bid.get("unidadeOrgao", {}) if bid.get("unidadeOrgao") else {}
-    uf_sigla = unidade_orgao.get("ufSigla")
-    uf_nome = unidade_orgao.get("ufNome")
-    nome_unidade = unidade_orgao.get("nomeUnidade")
-    municipio_nome = unidade_orgao.get("municipioNome")
-    codigo_ibge = unidade_orgao.get("codigoIbge")
-    codigo_unidade = unidade_orgao.get("codigoUnidade")
+    values = _bid_values(bid)
     
     print(f"✅ Valores processados:")
-    print(f"   💰 Valor Total (processado): {valor_total}")
-    print(f"   💸 Valor Homologado (processado): {valor_homologado}")
-    print(f"   🏢 CNPJ (extraído): {orgao_cnpj}")
-    print(f"   🏛️ Razão Social (extraído): {razao_social}")
-    print(f"   📍 UF Sigla (extraído): {uf_sigla}")
-    print(f"   🌎 UF Nome (extraído): {uf_nome}")
-    print(f"   🏢 Nome Unidade (extraído): {nome_unidade}")
-    print(f"   🏙️ Município (extraído): {municipio_nome}")
-    print(f"   🆔 Código IBGE (extraído): {codigo_ibge}")
+    print(f"   💰 Valor Total (processado): {values['valor_total_estimado']}")
+    print(f"   💸 Valor Homologado (processado): {values['valor_total_homologado']}")
+    print(f"   🏢 CNPJ (extraído): {values['orgao_cnpj']}")
+    print(f"   🏛️ Razão Social (extraído): {values['razao_social']}")
+    print(f"   📍 UF Sigla (extraído): {values['uf']}")
+    print(f"   🌎 UF Nome (extraído): {values['uf_nome']}")
+    print(f"   🏢 Nome Unidade (extraído): {values['nome_unidade']}")
+    print(f"   🏙️ Município (extraído): {values['municipio_nome']}")
+    print(f"   🆔 Código IBGE (extraído): {values['codigo_ibge']}")
     print(f"   📋 Objeto: {bid.get('objetoCompra', '')[:100]}...")
     print(f"===========================================\n")
     
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO licitacoes (
-                    pncp_id, orgao_cnpj, ano_compra, sequencial_compra,
-                    objeto_compra, link_sistema_origem, data_publicacao,
-                    valor_total_estimado, uf, status,
-                    numero_controle_pncp, numero_compra, processo,
-                    valor_total_homologado, data_abertura_proposta, data_encerramento_proposta,
-                    modo_disputa_id, modo_disputa_nome, srp, 
-                    link_processo_eletronico, justificativa_presencial, razao_social,
-                    uf_nome, nome_unidade, municipio_nome, codigo_ibge, codigo_unidade
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                ON CONFLICT (pncp_id) DO UPDATE SET
-                    updated_at = NOW(),
-                    numero_controle_pncp = EXCLUDED.numero_controle_pncp,
-                    numero_compra = EXCLUDED.numero_compra,
-                    processo = EXCLUDED.processo,
-                    valor_total_homologado = EXCLUDED.valor_total_homologado,
-                    data_abertura_proposta = EXCLUDED.data_abertura_proposta,
-                    data_encerramento_proposta = EXCLUDED.data_encerramento_proposta,
-                    modo_disputa_id = EXCLUDED.modo_disputa_id,
-                    modo_disputa_nome = EXCLUDED.modo_disputa_nome,
-                    srp = EXCLUDED.srp,
-                    link_processo_eletronico = EXCLUDED.link_processo_eletronico,
-                    justificativa_presencial = EXCLUDED.justificativa_presencial,
-                    razao_social = EXCLUDED.razao_social,
-                    uf_nome = EXCLUDED.uf_nome,
-                    nome_unidade = EXCLUDED.nome_unidade,
-                    municipio_nome = EXCLUDED.municipio_nome,
-                    codigo_ibge = EXCLUDED.codigo_ibge,
-                    codigo_unidade = EXCLUDED.codigo_unidade
-                RETURNING id
-            """, (
-                bid["numeroControlePNCP"],
-                orgao_cnpj,  # Usando variável extraída corretamente
-                bid["anoCompra"],
-                bid["sequencialCompra"],
-                bid["objetoCompra"],
-                bid.get("linkSistemaOrigem", ""),
-                bid.get("dataPublicacaoPncp"),  # Corrigido: era "dataPublicacao"
-                valor_total,
-                uf_sigla,  # Usando variável extraída corretamente
-                "coletada",
-                # Novos campos da API
-                bid.get("numeroControlePNCP"),  # Mesmo que pncp_id, mas vamos manter separado
-                bid.get("numeroCompra"),
-                bid.get("processo"),
-                valor_homologado,
-                bid.get("dataAberturaProposta"),
-                bid.get("dataEncerramentoProposta"),
-                bid.get("modoDisputaId"),
-                bid.get("modoDisputaNome"),
-                bid.get("srp"),  # Booleano - Sistema de Registro de Preços
-                bid.get("linkProcessoEletronico"),
-                bid.get("justificativaPresencial"),
-                razao_social,  # Nova razão social extraída
-                # Novos campos da unidadeOrgao
-                uf_nome,
-                nome_unidade,
-                municipio_nome,
-                codigo_ibge,
-                codigo_unidade
-            ))
-            result = cursor.fetchone()
+            result = execute_values(
+                cursor, BID_UPSERT_SQL + " RETURNING id", [tuple(values.values())], fetch=True
+            )
             conn.commit()
-            return str(result[0])
+            return str(result[0][0])
     finally:
         conn.close()
 
@@ -313,97 +421,28 @@ def save_bid_items_to_db(licitacao_id: str, items: List[Dict]):
         print(f"   📊 Situação Item: {primeiro_item.get('situacaoCompraItemNome')} (ID: {primeiro_item.get('situacaoCompraItem')})")
     print(f"==========================================\n")
     
+    rows = _unique_item_rows(items)
+    for values in rows:
+        # ===== LOG DEBUG PARA ITEM INDIVIDUAL =====
+        print(f"      📦 Item {values['numero_item']}:")
+        print(f"         📝 {values['descricao'][:40]}...")
+        print(f"         🏷️  {values['material_ou_servico']}")
+        print(f"         🔍 NCM: {values['ncm_nbs_codigo']}")
+        print(f"         ⚖️  Critério: {values['criterio_julgamento_nome']} (ID: {values['criterio_julgamento_id']})")
+        print(f"         🎯 Benefício: {values['tipo_beneficio_nome']} (ID: {values['tipo_beneficio_id']})")
+        print(f"         📊 Status: {values['situacao_item_nome']} (ID: {values['situacao_item_id']})")
+        print(f"         💰 Valor unitário: {values['valor_unitario_estimado']}")
+    
     conn = get_db_connection()
     try:
         with conn.cursor() as cursor:
-            for i, item in enumerate(items, 1):
-                # ===== VALIDAÇÕES DE VALORES =====
-                
-                # Validar e limitar valor unitário estimado
-                valor_unitario = item.get("valorUnitarioEstimado", 0)
-                try:
-                    valor_unitario = float(valor_unitario) if valor_unitario is not None else 0
-                    # Limitar a 999 bilhões (limite do DECIMAL(15,2))
-                    if valor_unitario > 999999999999.99:
-                        valor_unitario = 999999999999.99
-                    elif valor_unitario < 0:
-                        valor_unitario = 0
-                except (ValueError, TypeError):
-                    valor_unitario = 0
-                
-                # Validar quantidade
-                quantidade = item.get("quantidade", 0)
-                try:
-                    quantidade = float(quantidade) if quantidade is not None else 0
-                    if quantidade < 0:
-                        quantidade = 0
-                except (ValueError, TypeError):
-                    quantidade = 0
-
-                # Validar percentual de margem preferencial
-                percentual_margem = item.get("percentualMargemPreferenciaNormal")
-                if percentual_margem is not None:
-                    try:
-                        percentual_margem = float(percentual_margem)
-                        if percentual_margem < 0 or percentual_margem > 100:
-                            percentual_margem = None
-                    except (ValueError, TypeError):
-                        percentual_margem = None
-
-                # ===== LOG DEBUG PARA ITEM INDIVIDUAL =====
-                print(f"      📦 Item {item.get('numeroItem', i)}:")
-                print(f"         📝 {item.get('descricao', '')[:40]}...")
-                print(f"         🏷️  {item.get('materialOuServico')} - {item.get('materialOuServicoNome')}")
-                print(f"         🔍 NCM: {item.get('ncmNbsCodigo')}")
-                print(f"         ⚖️  Critério: {item.get('criterioJulgamentoNome')} (ID: {item.get('criterioJulgamentoId')})")
-                print(f"         🎯 Benefício: {item.get('tipoBeneficioNome')} (ID: {item.get('tipoBeneficio')})")
-                print(f"         📊 Status: {item.get('situacaoCompraItemNome')} (ID: {item.get('situacaoCompraItem')})")
-                print(f"         💰 Valor unitário: {valor_unitario}")
-                
-                cursor.execute("""
-                    INSERT INTO licitacao_itens (
-                        licitacao_id, numero_item, descricao, quantidade,
-                        unidade_medida, valor_unitario_estimado,
-                        material_ou_servico, ncm_nbs_codigo,
-                        criterio_julgamento_id, criterio_julgamento_nome,
-                        tipo_beneficio_id, tipo_beneficio_nome,
-                        situacao_item_id, situacao_item_nome,
-                        aplicabilidade_margem_preferencia, percentual_margem_preferencia,
-                        tem_resultado
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT (licitacao_id, numero_item) DO UPDATE SET
-                        material_ou_servico = EXCLUDED.material_ou_servico,
-                        ncm_nbs_codigo = EXCLUDED.ncm_nbs_codigo,
-                        criterio_julgamento_id = EXCLUDED.criterio_julgamento_id,
-                        criterio_julgamento_nome = EXCLUDED.criterio_julgamento_nome,
-                        tipo_beneficio_id = EXCLUDED.tipo_beneficio_id,
-                        tipo_beneficio_nome = EXCLUDED.tipo_beneficio_nome,
-                        situacao_item_id = EXCLUDED.situacao_item_id,
-                        situacao_item_nome = EXCLUDED.situacao_item_nome,
-                        aplicabilidade_margem_preferencia = EXCLUDED.aplicabilidade_margem_preferencia,
-                        percentual_margem_preferencia = EXCLUDED.percentual_margem_preferencia,
-                        tem_resultado = EXCLUDED.tem_resultado,
-                        updated_at = NOW()
-                """, (
-                    licitacao_id,
-                    item.get("numeroItem", i),
-                    item.get("descricao", ""),
-                    quantidade,
-                    item.get("unidadeMedida", ""),
-                    valor_unitario,
-                    # Novos campos da API 2
-                    item.get("materialOuServico"),  # 'M' ou 'S'
-                    item.get("ncmNbsCodigo"),  # Código NCM/NBS
-                    item.get("criterioJulgamentoId"),  # ID do critério
-                    item.get("criterioJulgamentoNome"),  # Nome do critério
-                    item.get("tipoBeneficio"),  # ID do tipo de benefício
-                    item.get("tipoBeneficioNome"),  # Nome do tipo de benefício
-                    item.get("situacaoCompraItem"),  # ID da situação
-                    item.get("situacaoCompraItemNome"),  # Nome da situação
-                    item.get("aplicabilidadeMargemPreferenciaNormal", False),  # Booleano
-                    percentual_margem,  # Percentual validado
-                    item.get("temResultado", False)  # Booleano
-                ))
+            # Todos os itens da licitação num único INSERT multi-linha
+            execute_values(
+                cursor,
+                f"INSERT INTO licitacao_itens (licitacao_id, {', '.join(ITEM_COLUMNS)}) VALUES %s"
+                + ITEM_UPSERT_CONFLICT_SQL,
+                [(licitacao_id, *values.values()) for values in rows]
+            )
             conn.commit()
     finally:
         conn.close()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Matriz de embeddings das empresas para scoring vetorizado (Fase 1)
+
+Substitui o loop Python empresa a empresa com calculate_enhanced_similarity por
+uma multiplicação de matrizes: a matriz float32 contígua das empresas e suas
+normas são montadas uma vez por execução, e cada licitação (ou bloco de
+licitações) é comparada com todas as empresas de uma vez.
+
+O boost de palavras-chave técnicas é aplicado como correção esparsa, apenas no
+suporte (licitações x empresas) que compartilha alguma palavra-chave.
+Os scores batem com calculate_enhanced_similarity dentro da tolerância de float32.
+
+A Fase 2 usa a mesma matriz: itens x empresas candidatas numa multiplicação,
+com threshold e agregação por empresa (aggregate_item_scores) vetorizados.
+"""
+
+import os
+import logging
+import numpy as np
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+
+from .vectorizers import TECH_KEYWORDS, TECH_KEYWORD_BOOST_MIN_SIMILARITY, apply_tech_keyword_boost
+
+logger = logging.getLogger(__name__)
+
+# Agregação dos itens aceitos por empresa na Fase 2: 'mean' (média, padrão), 'max' ou 'top_n'
+PHASE2_ITEM_AGGREGATION = os.getenv('PHASE2_ITEM_AGGREGATION', 'mean')
+# Nº de itens considerados com PHASE2_ITEM_AGGREGATION=top_n
+PHASE2_TOP_N_ITEMS = int(os.getenv('PHASE2_TOP_N_ITEMS', '3'))
+
+
+def build_keyword_mask(texts: Sequence[str]) -> np.ndarray:
+    """Matriz booleana (textos x TECH_KEYWORDS) com as palavras-chave presentes em cada texto"""
+    mask = np.zeros((len(texts), len(TECH_KEYWORDS)), dtype=bool)
+    for row, text in enumerate(texts):
+        text_lower = (text or "").lower()
+        for col, keyword in enumerate(TECH_KEYWORDS):
+            if keyword in text_lower:
+                mask[row, col] = True
+    return mask
+
+
+class CompanyEmbeddingMatrix:
+    """
+    Embeddings das empresas em matriz float32 contígua com normas pré-calculadas
+
+    Empresas sem embedding recebem score 0. Embeddings de dimensões diferentes
+    (fallbacks entre modelos) ficam em grupos separados por dimensão, e uma
+    licitação só é comparada com empresas da mesma dimensão - assim como
+    calculate_cosine_similarity retorna 0.0 para dimensões incompatíveis.
+    """
+
+    def __init__(self, companies: List[Dict[str, Any]],
+                 text_key: str = "descricao_servicos_produtos",
+                 embedding_key: str = "embedding"):
+        self.companies = companies
+        self.text_key = text_key
+
+        positions_by_dim: Dict[int, List[int]] = {}
+        for position, company in enumerate(companies):
+            embedding = company.get(embedding_key)
+            if embedding is None or len(embedding) == 0:
+                continue
+            positions_by_dim.setdefault(len(embedding), []).append(position)
+
+        # dim -> (posições das empresas, matriz (n, dim), normas (n,))
+        self._groups: Dict[int, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for dim, positions in positions_by_dim.items():
+            matrix = np.ascontiguousarray(
+                [companies[p][embedding_key] for p in positions], dtype=np.float32
+            )
+            norms = np.linalg.norm(matrix, axis=1)
+            self._groups[dim] = (np.asarray(positions, dtype=np.int64), matrix, norms)
+
+        self.size = sum(len(group[0]) for group in self._groups.values())
+        self._positions = {id(company): position for position, company in enumerate(companies)}
+        self.keyword_mask = build_keyword_mask([c.get(text_key, "") for c in companies])
+        self._keyword_companies = np.flatnonzero(self.keyword_mask.any(axis=1))
+
+        logger.info(f"📐 Matriz de empresas: {self.size}/{len(companies)} com embedding, "
+                    f"dimensões {sorted(self._groups)}")
+
+    def __len__(self) -> int:
+        return len(self.companies)
+
+    def index_of(self, company: Dict[str, Any]) -> int:
+        """Posição da empresa (o mesmo dict usado para montar a matriz)"""
+        return self._positions[id(company)]
+
+    def base_scores(self, bid_embeddings: Sequence[Sequence[float]],
+                    columns: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Similaridade cosseno (licitações x empresas) em float32
+
+        columns (posições únicas e ordenadas) restringe o cálculo a essas empresas;
+        a coluna j do resultado corresponde a columns[j].
+        """
+        n_columns = len(self.companies) if columns is None else len(columns)
+        scores = np.zeros((len(bid_embeddings), n_columns), dtype=np.float32)
+
+        rows_by_dim: Dict[int, List[int]] = {}
+        for row, embedding in enumerate(bid_embeddings):
+            if embedding is not None and len(embedding) > 0:
+                rows_by_dim.setdefault(len(embedding), []).append(row)
+
+        for dim, rows in rows_by_dim.items():
+            group = self._groups.get(dim)
+            if group is None:
+                continue
+            positions, matrix, norms = group
+            if columns is None:
+                out_columns = positions
+            else:
+                keep = np.isin(positions, columns)
+                if not keep.any():
+                    continue
+                positions, matrix, norms = positions[keep], matrix[keep], norms[keep]
+                out_columns = np.searchsorted(columns, positions)
+
+            bids = np.ascontiguousarray([bid_embeddings[r] for r in rows], dtype=np.float32)
+            bid_norms = np.linalg.norm(bids, axis=1)
+
+            denominator = np.outer(bid_norms, norms)
+            dots = bids @ matrix.T
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sims = np.where(denominator > 0, dots / denominator, 0.0).astype(np.float32)
+
+            scores[np.ix_(np.asarray(rows), out_columns)] = sims
+
+        return scores
+
+    def score_block(self, bid_embeddings: Sequence[Sequence[float]], bid_texts: Sequence[str],
+                    columns: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Scores aprimorados (cosseno + boost técnico) para um bloco de licitações
+
+        columns: como em base_scores (None = todas as empresas)
+
+        Returns:
+            (scores, base_scores, bid_keyword_mask)
+        """
+        base = self.base_scores(bid_embeddings, columns)
+        scores = base.copy()
+        bid_mask = build_keyword_mask(bid_texts)
+
+        # Correção esparsa: só licitações e empresas com alguma palavra-chave
+        bid_rows = np.flatnonzero(bid_mask.any(axis=1))
+        if columns is None:
+            company_cols = out_cols = self._keyword_companies
+        else:
+            out_cols = np.flatnonzero(self.keyword_mask[columns].any(axis=1))
+            company_cols = columns[out_cols]
+        if len(bid_rows) and len(company_cols):
+            common_counts = (
+                bid_mask[bid_rows].astype(np.int32) @ self.keyword_mask[company_cols].T.astype(np.int32)
+            )
+            block = base[np.ix_(bid_rows, out_cols)]
+            boost = np.minimum(0.1, common_counts * 0.02).astype(np.float32)
+            apply = (common_counts > 0) & (block >= TECH_KEYWORD_BOOST_MIN_SIMILARITY)
+            boosted = np.where(apply, np.minimum(1.0, block + boost), block)
+            scores[np.ix_(bid_rows, out_cols)] = boosted
+
+        return scores, base, bid_mask
+
+    def score_items(self, item_embeddings: Sequence[Sequence[float]], item_texts: Sequence[str],
+                    company_indices: Sequence[int]) -> np.ndarray:
+        """
+        Scores aprimorados (itens x empresas selecionadas) para a Fase 2
+
+        Equivale a calculate_enhanced_similarity(item, empresa) para cada par;
+        só as empresas pedidas entram na multiplicação.
+        """
+        columns, inverse = np.unique(np.asarray(company_indices, dtype=np.int64), return_inverse=True)
+        scores, _, _ = self.score_block(item_embeddings, item_texts, columns)
+        return scores[:, inverse]
+
+    def select(self, scores_row: np.ndarray, threshold: float,
+               top_k: Optional[int] = None) -> np.ndarray:
+        """Índices das empresas com score >= threshold, ordenados por score decrescente"""
+        candidates = np.flatnonzero(scores_row >= threshold)
+        if top_k and len(candidates) > top_k:
+            best = np.argpartition(scores_row[candidates], -top_k)[-top_k:]
+            candidates = candidates[best]
+        return candidates[np.argsort(-scores_row[candidates], kind="stable")]
+
+    def explain(self, base_score: float, bid_keywords: np.ndarray, company_index: int) -> Tuple[float, str]:
+        """Score final e justificativa no mesmo formato de calculate_enhanced_similarity"""
+        if base_score < TECH_KEYWORD_BOOST_MIN_SIMILARITY:
+            return base_score, "Similaridade baixa - contextos diferentes"
+        common = np.flatnonzero(bid_keywords & self.keyword_mask[company_index])
+        return apply_tech_keyword_boost(base_score, [TECH_KEYWORDS[k] for k in common])
+
+    def top_candidates(self, bid_embedding: Sequence[float], bid_text: str, threshold: float,
+                       top_k: Optional[int] = None) -> List[Tuple[Dict[str, Any], float, str]]:
+        """
+        Empresas candidatas para uma licitação
+
+        Returns:
+            Lista de (empresa, score, justificativa) com score >= threshold, maior score primeiro
+        """
+        return self.top_candidates_block([bid_embedding], [bid_text], threshold, top_k)[0]
+
+    def top_candidates_block(self, bid_embeddings: Sequence[Sequence[float]], bid_texts: Sequence[str],
+                             threshold: float, top_k: Optional[int] = None
+                             ) -> List[List[Tuple[Dict[str, Any], float, str]]]:
+        """Versão em bloco de top_candidates: uma multiplicação de matrizes para todas as licitações"""
+        scores, base, bid_mask = self.score_block(bid_embeddings, bid_texts)
+
+        results = []
+        for row in range(len(bid_embeddings)):
+            candidates = []
+            for index in self.select(scores[row], threshold, top_k):
+                score, justificativa = self.explain(float(base[row, index]), bid_mask[row], int(index))
+                candidates.append((self.companies[index], score, justificativa))
+            results.append(candidates)
+        return results
+
+
+def aggregate_item_scores(scores: np.ndarray, accepted: np.ndarray,
+                          mode: str = PHASE2_ITEM_AGGREGATION,
+                          top_n: int = PHASE2_TOP_N_ITEMS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Agrega por empresa (coluna) os scores dos itens aceitos
+
+    Args:
+        scores: matriz (itens x empresas)
+        accepted: máscara booleana (itens x empresas) dos pares que passaram nos filtros
+        mode: 'mean' (média dos aceitos), 'max' ou 'top_n' (média dos top_n aceitos)
+
+    Returns:
+        (nº de itens aceitos por empresa, score agregado por empresa - 0 sem itens aceitos)
+    """
+    counts = accepted.sum(axis=0)
+    if scores.size == 0:
+        return counts, np.zeros(scores.shape[1], dtype=np.float64)
+
+    values = scores.astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if mode == 'mean':
+            aggregated = np.where(accepted, values, 0.0).sum(axis=0) / counts
+        elif mode == 'max':
+            aggregated = np.where(accepted, values, -np.inf).max(axis=0)
+        elif mode == 'top_n':
+            # Ordenar decrescente por coluna e tirar a média dos n primeiros aceitos
+            ranked = -np.sort(-np.where(accepted, values, -np.inf), axis=0)[:max(1, top_n)]
+            used = np.minimum(counts, max(1, top_n))
+            aggregated = np.where(np.isfinite(ranked), ranked, 0.0).sum(axis=0) / used
+        else:
+            raise ValueError(f"Agregação de itens desconhecida: {mode}")
+
+    return counts, np.where(counts > 0, aggregated, 0.0)
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+🏭 PIPELINE PRODUTOR/CONSUMIDOR EM ESTÁGIOS
+Cada estágio tem seus próprios workers e uma fila limitada de entrada,
+então etapas de rede, banco e CPU avançam em paralelo com memória limitada.
+
+- Estágio = função item -> item (ou None para descartar); com fan_out=True
+  a função devolve um iterável e cada elemento segue para o próximo estágio
+- Com batch_size > 1 a função recebe uma lista de até batch_size itens
+  (espera no máximo batch_timeout após o primeiro) e devolve um iterável
+- Backpressure: fila cheia bloqueia o estágio anterior
+- Métricas por estágio: processados, emitidos, erros, backlog, vazão
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # Sentinela de fim de fluxo
+
+
+class Stage:
+    """Definição de um estágio do pipeline"""
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1,
+                 queue_size: int = 16, fan_out: bool = False,
+                 batch_size: int = 1, batch_timeout: float = 0.5):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.batch_timeout = batch_timeout
+        # A fila comporta ao menos um lote completo
+        self.queue_size = max(1, queue_size, self.batch_size)
+        # Estágios em lote sempre devolvem um iterável
+        self.fan_out = fan_out or self.batch_size > 1
+
+
+class _StageRuntime:
+    """Estado de execução de um estágio (fila, workers e métricas)"""
+
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.input: queue.Queue = queue.Queue(maxsize=stage.queue_size)
+        self.lock = threading.Lock()
+        self.alive_workers = stage.workers
+        self.processed = 0
+        self.batches = 0
+        self.emitted = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.max_backlog = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def record(self, busy: float, processed: int, emitted: int, error: bool):
+        with self.lock:
+            self.processed += processed
+            self.batches += 1
+            self.emitted += emitted
+            self.busy_time += busy
+            if error:
+                self.errors += 1
+
+    def observe_backlog(self):
+        backlog = self.input.qsize()
+        if backlog > self.max_backlog:
+            with self.lock:
+                self.max_backlog = max(self.max_backlog, backlog)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            end = self.finished_at or time.monotonic()
+            elapsed = (end - self.started_at) if self.started_at else 0.0
+            return {
+                'workers': self.stage.workers,
+                'processed': self.processed,
+                'batches': self.batches,
+                'emitted': self.emitted,
+                'errors': self.errors,
+                'backlog': self.input.qsize(),
+                'max_backlog': self.max_backlog,
+                'queue_size': self.stage.queue_size,
+                'busy_s': round(self.busy_time, 3),
+                'throughput_per_s': round(self.processed / elapsed, 2) if elapsed > 0 else 0.0,
+                # Fração do tempo em que os workers estiveram ocupados (gargalo ~ 1.0)
+                'utilization': round(self.busy_time / (elapsed * self.stage.workers), 3) if elapsed > 0 else 0.0,
+                'finished': self.finished_at is not None,
+            }
+
+
+class StagePipeline:
+    """
+    Executa uma sequência de estágios conectados por filas limitadas
+
+    run(source) alimenta o primeiro estágio com os itens de source e bloqueia
+    até todos os estágios terminarem. Itens que saem do último estágio são
+    descartados (o último estágio é o "sink").
+    """
+
+    def __init__(self, stages: List[Stage], name: str = 'pipeline', report_interval: float = 0):
+        if not stages:
+            raise ValueError("Pipeline precisa de ao menos um estágio")
+        self.name = name
+        self.report_interval = report_interval
+        self._runtimes = [_StageRuntime(stage) for stage in stages]
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+
+    def run(self, source: Iterable[Any]) -> Dict[str, Any]:
+        """Processar todos os itens de source e devolver as métricas finais"""
+        self._started_at = time.monotonic()
+        threads = []
+        for index, runtime in enumerate(self._runtimes):
+            runtime.started_at = self._started_at
+            for worker in range(runtime.stage.workers):
+                thread = threading.Thread(
+                    target=self._worker_loop, args=(index,),
+                    name=f"{self.name}-{runtime.stage.name}-{worker}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        stop_reporter = threading.Event()
+        reporter = None
+        if self.report_interval > 0:
+            reporter = threading.Thread(target=self._report_loop, args=(stop_reporter,), daemon=True)
+            reporter.start()
+
+        first = self._runtimes[0]
+        try:
+            for item in source:
+                first.input.put(item)
+                first.observe_backlog()
+        finally:
+            for _ in range(first.stage.workers):
+                first.input.put(_END)
+
+            for thread in threads:
+                thread.join()
+            self._finished_at = time.monotonic()
+            stop_reporter.set()
+            if reporter:
+                reporter.join()
+
+        return self.stats()
+
+    def _worker_loop(self, index: int):
+        runtime = self._runtimes[index]
+        next_runtime = self._runtimes[index + 1] if index + 1 < len(self._runtimes) else None
+        stage = runtime.stage
+
+        finished = False
+        while not finished:
+            item = runtime.input.get()
+            if item is _END:
+                break
+
+            if stage.batch_size > 1:
+                batch, finished = self._collect_batch(runtime, item)
+                payload, count = batch, len(batch)
+            else:
+                payload, count = item, 1
+
+            start = time.monotonic()
+            emitted = 0
+            error = False
+            try:
+                result = stage.func(payload)
+                outputs = (result or ()) if stage.fan_out else ((result,) if result is not None else ())
+                for output in outputs:
+                    emitted += 1
+                    if next_runtime is not None:
+                        next_runtime.input.put(output)
+                        next_runtime.observe_backlog()
+            except Exception as e:
+                error = True
+                logger.error(f"❌ Estágio '{stage.name}' falhou: {e}", exc_info=True)
+            runtime.record(time.monotonic() - start, count, emitted, error)
+
+        # Último worker do estágio encerra o próximo estágio
+        with runtime.lock:
+            runtime.alive_workers -= 1
+            last_worker = runtime.alive_workers == 0
+            if last_worker:
+                runtime.finished_at = time.monotonic()
+        if last_worker and next_runtime is not None:
+            for _ in range(next_runtime.stage.workers):
+                next_runtime.input.put(_END)
+
+    @staticmethod
+    def _collect_batch(runtime: _StageRuntime, first: Any):
+        """Junta até batch_size itens; devolve (lote, fim_do_fluxo)"""
+        stage = runtime.stage
+        batch = [first]
+        deadline = time.monotonic() + stage.batch_timeout
+        while len(batch) < stage.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = runtime.input.get(timeout=remaining) if remaining > 0 else runtime.input.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _report_loop(self, stop: threading.Event):
+        while not stop.wait(self.report_interval):
+            print(self.format_stats())
+
+    def stats(self) -> Dict[str, Any]:
+        end = self._finished_at or time.monotonic()
+        return {
+            'elapsed_s': round(end - self._started_at, 3) if self._started_at else 0.0,
+            'stages': {runtime.stage.name: runtime.stats() for runtime in self._runtimes},
+        }
+
+    def format_stats(self) -> str:
+        stats = self.stats()
+        lines = [f"🏭 {self.name} - {stats['elapsed_s']:.1f}s"]
+        for name, stage in stats['stages'].items():
+            lines.append(
+                f"   {name:<16} {stage['processed']:>6} proc | {stage['emitted']:>6} emit | "
+                f"{stage['errors']:>3} erros | backlog {stage['backlog']:>3}/{stage['queue_size']} "
+                f"(máx {stage['max_backlog']}) | {stage['throughput_per_s']:>7.2f}/s | "
+                f"uso {stage['utilization']:.0%}"
+            )
+        return "\n".join(lines)
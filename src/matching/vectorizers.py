@@ -6,16 +6,65 @@ PRIORIDADE: Modelos 100% brasileiros especializados em licitações
 """
 
 import os
+import re
+import time
 import logging
+import threading
 import numpy as np
+from functools import lru_cache
 from typing import List, Optional, Dict, Any
 from abc import ABC, abstractmethod
 
-from services.sentence_transformer_service import SentenceTransformerService
-from services.embedding_cache_service import EmbeddingCacheService
+from services.embedding_cache_service import get_embedding_cache_service
 
 logger = logging.getLogger(__name__)
 
+# Segundos até tentar de novo carregar um backend de embeddings que falhou
+VECTORIZER_BACKEND_RETRY_SECONDS = float(os.getenv('VECTORIZER_BACKEND_RETRY_SECONDS', '300'))
+
+# Tamanho do memo de _preprocess_brazilian_text (textos brutos distintos por processo)
+BRAZILIAN_PREPROCESS_CACHE_SIZE = int(os.getenv('BRAZILIAN_PREPROCESS_CACHE_SIZE', '50000'))
+
+# Siglas comuns em licitações (mantém a sigla original + adiciona contexto)
+BRAZILIAN_EXPANSIONS = (
+    ('TI', 'TI tecnologia da informação'),
+    ('RH', 'RH recursos humanos'),
+    ('CFTV', 'CFTV circuito fechado de televisão segurança'),
+    ('GPS', 'GPS sistema de posicionamento global rastreamento'),
+    ('EPP', 'EPP empresa de pequeno porte'),
+    ('ME', 'ME microempresa'),
+    ('SRP', 'SRP sistema de registro de preços'),
+    ('TCU', 'TCU tribunal de contas da união'),
+    ('CGU', 'CGU controladoria geral da união'),
+    ('PNCP', 'PNCP portal nacional de contratações públicas'),
+)
+
+# Uma alternação com um grupo por sigla: lastindex aponta direto para a expansão.
+# Nenhuma expansão contém outra sigla como palavra, então uma passada única
+# equivale às substituições sequenciais de antes.
+_BRAZILIAN_EXPANSION_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(f'({sigla})' for sigla, _ in BRAZILIAN_EXPANSIONS) + r')\b',
+    re.IGNORECASE
+)
+_BRAZILIAN_EXPANSION_BY_GROUP = (None,) + tuple(expansao for _, expansao in BRAZILIAN_EXPANSIONS)
+_NULL_BYTES = str.maketrans('', '', '\x00')
+
+
+def _expand_sigla(match: re.Match) -> str:
+    return _BRAZILIAN_EXPANSION_BY_GROUP[match.lastindex]
+
+
+@lru_cache(maxsize=BRAZILIAN_PREPROCESS_CACHE_SIZE)
+def preprocess_brazilian_text(text: str) -> str:
+    """Preprocessamento de textos brasileiros de licitação (memoizado pelo texto bruto)"""
+    if not text:
+        return ""
+    
+    # Mesma limpeza de BaseTextVectorizer.preprocess_text
+    clean_text = text.strip().translate(_NULL_BYTES)
+    
+    return _BRAZILIAN_EXPANSION_PATTERN.sub(_expand_sigla, clean_text)
+
 class BaseTextVectorizer(ABC):
     """Interface base para vetorizadores de texto"""
     
@@ -42,6 +91,146 @@ class BaseTextVectorizer(ABC):
         
         return text
 
+class LazyVectorizerBackend:
+    """
+    Backend de embeddings criado no primeiro uso e compartilhado pelo processo
+    
+    Atributos (generate_embeddings, vectorize...) são repassados à instância
+    real. Se a criação ou o teste de saúde falhar, o backend fica indisponível
+    por VECTORIZER_BACKEND_RETRY_SECONDS e as chamadas levantam RuntimeError
+    (o vetorizador passa para o próximo da lista).
+    """
+    
+    def __init__(self, name: str, factory, probe=None):
+        self.name = name
+        self._factory = factory
+        self._probe = probe
+        self._instance = None
+        self._error = None
+        self._failed_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self):
+        """Instância real (criada agora se preciso) ou None se indisponível"""
+        if self._instance is None and self._retry_due():
+            with self._lock:
+                if self._instance is None and self._retry_due():
+                    try:
+                        self._instance = self._factory()
+                        self._error = None
+                        logger.info(f"✅ Backend de embeddings {self.name} carregado")
+                    except Exception as e:
+                        self._fail(e)
+        return self._instance
+    
+    def probe(self) -> bool:
+        """Carrega e roda o teste de saúde; se falhar, o backend fica indisponível"""
+        instance = self.get()
+        if instance is None:
+            return False
+        if self._probe is None:
+            return True
+        try:
+            healthy = bool(self._probe(instance))
+            error = None if healthy else RuntimeError("teste de saúde falhou")
+        except Exception as e:
+            healthy, error = False, e
+        if not healthy:
+            with self._lock:
+                self._instance = None
+                self._fail(error)
+        return healthy
+    
+    def _fail(self, error: Exception):
+        self._error = error
+        self._failed_at = time.monotonic()
+        logger.warning(f"⚠️ Backend de embeddings {self.name} indisponível: {error}")
+    
+    def _retry_due(self) -> bool:
+        return self._error is None or time.monotonic() - self._failed_at >= VECTORIZER_BACKEND_RETRY_SECONDS
+    
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+    
+    @property
+    def available(self) -> bool:
+        """Carregado ou ainda pode ser tentado (nunca falhou ou a espera já passou)"""
+        return self._instance is not None or self._retry_due()
+    
+    @property
+    def failed(self) -> bool:
+        return self._error is not None
+    
+    def __getattr__(self, attribute):
+        # Só chamado para atributos que não existem no próprio wrapper
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        instance = self.get()
+        if instance is None:
+            raise RuntimeError(f"{self.name} indisponível: {self._error}")
+        return getattr(instance, attribute)
+
+
+def _create_neuralmind_local():
+    # Inferência no worker de embeddings compartilhado (ou no processo, se ele estiver fora)
+    from services.embedding_worker import get_local_embedding_service
+    return get_local_embedding_service("neuralmind/bert-base-portuguese-cased")
+
+
+def _create_multilingual_local():
+    from services.embedding_worker import get_local_embedding_service
+    return get_local_embedding_service("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+
+
+def _create_neuralmind_api():
+    from services.neuralmind_embedding_service import NeuralMindEmbeddingService
+    return NeuralMindEmbeddingService()
+
+
+def _neuralmind_api_healthy(service) -> bool:
+    """Teste rápido da API: embedding de qualquer dimensão válida"""
+    test_result = service.generate_single_embedding("licitação teste")
+    return bool(test_result) and len(test_result) > 300
+
+
+def _create_mock_fallback():
+    """MockTextVectorizer só quando nenhum backend real pôde ser carregado"""
+    real_backends = [backend for name, backend in _VECTORIZER_BACKENDS.items() if name != 'mock']
+    if any(not backend.failed for backend in real_backends):
+        raise RuntimeError("há backends reais disponíveis")
+    print("❌ CRÍTICO: Nenhum vetorizador funcionou! Usando MockVectorizer...")
+    return MockTextVectorizer()
+
+
+# Backends por nome (o nome também identifica o modelo no cache): fábrica e teste de saúde
+_VECTORIZER_BACKEND_FACTORIES = {
+    'neuralmind-local': (_create_neuralmind_local, None),
+    'neuralmind-api': (_create_neuralmind_api, _neuralmind_api_healthy),
+    'multilingual-local': (_create_multilingual_local, None),
+    'voyage-ai': (lambda: VoyageAITextVectorizer(), None),
+    'openai': (lambda: OpenAITextVectorizer(), None),
+    'mock': (_create_mock_fallback, None),
+}
+BRAZILIAN_BACKENDS = ('neuralmind-local', 'neuralmind-api', 'multilingual-local')
+
+_VECTORIZER_BACKENDS: Dict[str, LazyVectorizerBackend] = {}
+_VECTORIZER_BACKENDS_LOCK = threading.Lock()
+
+
+def get_vectorizer_backend(name: str) -> LazyVectorizerBackend:
+    """Backend compartilhado do processo (ainda não carregado até o primeiro uso)"""
+    backend = _VECTORIZER_BACKENDS.get(name)
+    if backend is None:
+        with _VECTORIZER_BACKENDS_LOCK:
+            backend = _VECTORIZER_BACKENDS.get(name)
+            if backend is None:
+                factory, probe = _VECTORIZER_BACKEND_FACTORIES[name]
+                backend = LazyVectorizerBackend(name, factory, probe)
+                _VECTORIZER_BACKENDS[name] = backend
+    return backend
+
+
 class BrazilianTextVectorizer(BaseTextVectorizer):
     """
     🇧🇷 VETORIZADOR 100% BRASILEIRO para licitações
@@ -56,105 +245,101 @@ class BrazilianTextVectorizer(BaseTextVectorizer):
     1. 🧠 NeralMind BERT LOCAL (neuralmind/bert-base-portuguese-cased)
     2. 🚀 NeralMind via HuggingFace API (fallback)
     3. 🎯 Multilingual BERT especializado em português
+    
+    A construção não carrega modelos nem abre conexões: cada backend (e o
+    cache Redis) é criado no primeiro uso, uma vez por processo. warm_up()
+    carrega tudo e roda os testes de saúde (jobs e preload).
     """
     
     def __init__(self, db_manager=None):
-        # Importar db_manager se não fornecido
-        if db_manager is None:
-            from config.database import db_manager as default_db_manager
-            self.db_manager = default_db_manager
-        else:
-            self.db_manager = db_manager
-        
-        # Inicializar cache brasileiro
-        self.cache_service = EmbeddingCacheService(self.db_manager)
-        
-        # Vetorizadores brasileiros ordenados por prioridade
-        self.brazilian_vectorizers = []
-        
-        print("🇧🇷 ===== INICIALIZANDO SISTEMA BRASILEIRO DE EMBEDDINGS =====")
-        
-        # 1. NeralMind BERT LOCAL (PRINCIPAL - 100% Brasileiro)
-        try:
-            self.neuralmind_local = SentenceTransformerService(
-                model_name="neuralmind/bert-base-portuguese-cased"
-            )
-            self.brazilian_vectorizers.append(('neuralmind-local', self.neuralmind_local))
-            print("🧠 NeralMind BERT LOCAL carregado como PRINCIPAL")
-            print(f"   📊 Modelo: neuralmind/bert-base-portuguese-cased")
-            print(f"   🎯 Especialização: Português brasileiro + licitações")
-            print(f"   📏 Dimensões: {self.neuralmind_local.get_model_info().get('dimensions', 'N/A')}")
-            print(f"   💾 Otimizado para: Railway CPU + Cache Redis")
-        except Exception as e:
-            print(f"⚠️ NeralMind LOCAL falhou: {e}")
-            self.neuralmind_local = None
-        
-        # 2. NeralMind via HuggingFace API (FALLBACK BRASILEIRO)
-        try:
-            from services.neuralmind_embedding_service import NeuralMindEmbeddingService
-            self.neuralmind_api = NeuralMindEmbeddingService()
-            
-            # Teste rápido e silencioso
-            test_result = self.neuralmind_api.generate_single_embedding("licitação teste")
-            if test_result and len(test_result) > 300:  # Qualquer dimensão válida
-                self.brazilian_vectorizers.append(('neuralmind-api', self.neuralmind_api))
-                print("🚀 NeralMind HuggingFace API como fallback")
-                print(f"   📊 Dimensões: {len(test_result)}")
-                print(f"   🎯 Especialização: Multilingual otimizado para português")
-            else:
-                print("⚠️ NeralMind API: teste falhou, pulando...")
-        except Exception as e:
-            print(f"⚠️ NeralMind API falhou: {e}")
+        self._db_manager = db_manager
+        self._cache_service = None
         
-        # 3. Multilingual BERT LOCAL (FALLBACK NACIONAL)
-        try:
-            self.multilingual_local = SentenceTransformerService(
-                model_name="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
-            )
-            self.brazilian_vectorizers.append(('multilingual-local', self.multilingual_local))
-            print("🌎 Multilingual BERT LOCAL como fallback nacional")
-            print(f"   📏 Dimensões: {self.multilingual_local.get_model_info().get('dimensions', 'N/A')}")
-        except Exception as e:
-            print(f"⚠️ Multilingual LOCAL falhou: {e}")
+        # Vetorizadores brasileiros ordenados por prioridade (carregados no primeiro uso)
+        self.brazilian_vectorizers = [(name, get_vectorizer_backend(name)) for name in BRAZILIAN_BACKENDS]
         
-        # 4. Sistema internacional apenas se NADA brasileiro funcionar
+        # Sistema internacional apenas se NADA brasileiro funcionar
         self.international_vectorizers = []
         self._init_international_fallbacks()
         
-        # Verificar se temos pelo menos um sistema brasileiro
-        if not self.brazilian_vectorizers:
-            print("❌ NENHUM sistema brasileiro funcionou! Usando fallback internacional...")
-            self.vectorizers = self.international_vectorizers
-        else:
-            self.vectorizers = self.brazilian_vectorizers + self.international_vectorizers
-            print(f"✅ Sistema brasileiro: {len(self.brazilian_vectorizers)} vetorizadores nacionais disponíveis")
-        
-        if not self.vectorizers:
-            print("❌ CRÍTICO: Nenhum vetorizador funcionou! Usando MockVectorizer...")
-            self.vectorizers.append(('mock', MockTextVectorizer()))
-        
-        print(f"🎯 Prioridade FINAL: {' → '.join([name for name, _ in self.vectorizers])}")
-        print("🇧🇷 ===== SISTEMA BRASILEIRO PRONTO =====")
+        # Mock só entra se nenhum backend real puder ser carregado
+        self.vectorizers = self.brazilian_vectorizers + self.international_vectorizers + [
+            ('mock', get_vectorizer_backend('mock'))
+        ]
+    
+    @property
+    def db_manager(self):
+        # Importar db_manager se não fornecido (só quando alguém precisar dele)
+        if self._db_manager is None:
+            from config.database import db_manager as default_db_manager
+            self._db_manager = default_db_manager
+        return self._db_manager
+    
+    @property
+    def cache_service(self):
+        """Cache brasileiro compartilhado do processo (conecta ao Redis no primeiro uso)"""
+        if getattr(self, '_cache_service', None) is None:
+            self._cache_service = get_embedding_cache_service()
+        return self._cache_service
+    
+    @cache_service.setter
+    def cache_service(self, value):
+        self._cache_service = value
+    
+    @property
+    def neuralmind_local(self):
+        return get_vectorizer_backend('neuralmind-local')
+    
+    @property
+    def multilingual_local(self):
+        return get_vectorizer_backend('multilingual-local')
+    
+    @property
+    def neuralmind_api(self):
+        return get_vectorizer_backend('neuralmind-api')
     
     def _init_international_fallbacks(self):
-        """Inicializa fallbacks internacionais apenas se necessário"""
+        """Fallbacks internacionais configurados (chave de API presente), carregados no primeiro uso"""
         # VoyageAI
         if os.getenv('VOYAGE_API_KEY'):
-            try:
-                self.voyage_service = VoyageAITextVectorizer()
-                self.international_vectorizers.append(('voyage-ai', self.voyage_service))
-                print("🚢 VoyageAI disponível como fallback internacional")
-            except Exception as e:
-                print(f"⚠️ VoyageAI falhou: {e}")
+            self.international_vectorizers.append(('voyage-ai', get_vectorizer_backend('voyage-ai')))
         
         # OpenAI
         if os.getenv('OPENAI_API_KEY'):
-            try:
-                self.openai_service = OpenAITextVectorizer()
-                self.international_vectorizers.append(('openai', self.openai_service))
-                print("🔥 OpenAI disponível como último recurso")
-            except Exception as e:
-                print(f"⚠️ OpenAI falhou: {e}")
+            self.international_vectorizers.append(('openai', get_vectorizer_backend('openai')))
+    
+    def warm_up(self, probe: bool = True) -> Dict[str, Any]:
+        """
+        Carrega todos os backends, conecta o cache e roda os testes de saúde
+        (o que a construção fazia antes). Chamado pelos jobs; requisições web
+        não precisam: cada backend carrega no primeiro uso.
+        """
+        print("🇧🇷 ===== INICIALIZANDO SISTEMA BRASILEIRO DE EMBEDDINGS =====")
+        _ = self.cache_service
+        
+        available = []
+        for model_name, backend in self.vectorizers:
+            if model_name == 'mock':
+                continue
+            healthy = backend.probe() if probe else backend.get() is not None
+            if healthy:
+                available.append(model_name)
+                info = backend.get_model_info() if hasattr(backend.get(), 'get_model_info') else {}
+                print(f"✅ {model_name} pronto (dimensões: {info.get('dimensions', 'N/A')})")
+            else:
+                print(f"⚠️ {model_name} indisponível")
+        
+        if not any(name in BRAZILIAN_BACKENDS for name in available):
+            print("❌ NENHUM sistema brasileiro funcionou! Usando fallback internacional...")
+        else:
+            print(f"✅ Sistema brasileiro: {sum(name in BRAZILIAN_BACKENDS for name in available)} vetorizadores nacionais disponíveis")
+        if not available:
+            get_vectorizer_backend('mock').get()
+            available.append('mock')
+        
+        print(f"🎯 Prioridade FINAL: {' → '.join(available)}")
+        print("🇧🇷 ===== SISTEMA BRASILEIRO PRONTO =====")
+        return self.get_brazilian_status()
     
     def vectorize(self, text: str) -> List[float]:
         """Vetorização priorizando sistemas brasileiros"""
@@ -166,13 +351,20 @@ class BrazilianTextVectorizer(BaseTextVectorizer):
         if not clean_text:
             return []
         
+        # Cache de todos os modelos numa consulta (primeiro modelo com hit)
+        cached = self.cache_service.multi_model_get_embeddings(
+            [clean_text], [model_name for model_name, _ in self.vectorizers]
+        ).get(clean_text)
+        
         # Tentar cada vetorizador na ordem de prioridade (brasileiros primeiro)
         for model_name, vectorizer in self.vectorizers:
             # Verificar cache primeiro
-            cached_embedding = self.cache_service.get_embedding_from_cache(clean_text, model_name)
-            if cached_embedding:
+            if cached and cached[0] == model_name:
                 logger.debug(f"⚡ Cache hit brasileiro para {model_name}")
-                return cached_embedding
+                return cached[1]
+            
+            if not getattr(vectorizer, 'available', True):
+                continue
             
             # Gerar embedding
             try:
@@ -216,20 +408,19 @@ class BrazilianTextVectorizer(BaseTextVectorizer):
         texts_to_process = []
         text_indices = {}
         
+        # Verificar cache priorizando modelos brasileiros: todos os textos x modelos
+        # num único pipeline de MGETs, em vez de um GET por texto e modelo
+        cached_by_text = self.cache_service.multi_model_get_embeddings(
+            clean_texts, [model_name for model_name, _ in self.vectorizers]
+        )
+        
         for i, text in enumerate(clean_texts):
             if not text:
                 continue
-                
-            # Verificar cache priorizando modelos brasileiros
-            embedding_found = False
-            for model_name, _ in self.vectorizers:
-                cached = self.cache_service.get_embedding_from_cache(text, model_name)
-                if cached:
-                    cached_embeddings[i] = cached
-                    embedding_found = True
-                    break
             
-            if not embedding_found:
+            if text in cached_by_text:
+                cached_embeddings[i] = cached_by_text[text][1]
+            else:
                 texts_to_process.append(text)
                 text_indices[len(texts_to_process) - 1] = i
         
@@ -239,6 +430,8 @@ class BrazilianTextVectorizer(BaseTextVectorizer):
         new_embeddings = {}
         if texts_to_process:
             for model_name, vectorizer in self.vectorizers:
+                if not getattr(vectorizer, 'available', True):
+                    continue
                 try:
                     if 'local' in model_name or 'neuralmind-local' in model_name or 'multilingual-local' in model_name:
                         batch_result = vectorizer.generate_embeddings(texts_to_process)
@@ -246,15 +439,13 @@ class BrazilianTextVectorizer(BaseTextVectorizer):
                         batch_result = vectorizer.batch_vectorize(texts_to_process)
                     
                     if batch_result and len(batch_result) == len(texts_to_process):
-                        # Salvar novos embeddings no cache
                         for j, embedding in enumerate(batch_result):
-                            original_index = text_indices[j]
-                            new_embeddings[original_index] = embedding
-                            
-                            # Cache
-                            self.cache_service.save_embedding_to_cache(
-                                texts_to_process[j], embedding, model_name
-                            )
+                            new_embeddings[text_indices[j]] = embedding
+                        
+                        # Salvar novos embeddings no cache (um pipeline de SETEX com TTL)
+                        self.cache_service.batch_save_embeddings_to_cache(
+                            list(zip(texts_to_process, batch_result)), model_name
+                        )
                         
                         # Log especial para sistemas brasileiros
                         if model_name in ['neuralmind-local', 'neuralmind-api', 'multilingual-local']:
@@ -281,50 +472,24 @@ class BrazilianTextVectorizer(BaseTextVectorizer):
     
     def _preprocess_brazilian_text(self, text: str) -> str:
         """Preprocessamento especializado para textos brasileiros de licitação"""
-        if not text:
-            return ""
-        
-        # Preprocessamento básico
-        clean_text = self.preprocess_text(text)
-        
-        # Expandir siglas brasileiras comuns em licitações
-        import re
-        brazilian_expansions = {
-            r'\bTI\b': 'TI tecnologia da informação',
-            r'\bRH\b': 'RH recursos humanos',
-            r'\bCFTV\b': 'CFTV circuito fechado de televisão segurança',
-            r'\bGPS\b': 'GPS sistema de posicionamento global rastreamento',
-            r'\bEPP\b': 'EPP empresa de pequeno porte',
-            r'\bME\b': 'ME microempresa',
-            r'\bSRP\b': 'SRP sistema de registro de preços',
-            r'\bTCU\b': 'TCU tribunal de contas da união',
-            r'\bCGU\b': 'CGU controladoria geral da união',
-            r'\bPNCP\b': 'PNCP portal nacional de contratações públicas'
-        }
-        
-        # Aplicar expansões (mantém sigla original + adiciona contexto)
-        for sigla_pattern, expansao in brazilian_expansions.items():
-            clean_text = re.sub(
-                sigla_pattern, 
-                expansao, 
-                clean_text, 
-                flags=re.IGNORECASE
-            )
-        
-        return clean_text
+        return preprocess_brazilian_text(text)
     
     def get_brazilian_status(self) -> dict:
-        """Status específico dos sistemas brasileiros"""
+        """Status específico dos sistemas brasileiros (sem carregar backends ainda não usados)"""
         brazilian_status = {}
         international_status = {}
         
         for model_name, vectorizer in self.vectorizers:
+            if model_name == 'mock' and not vectorizer.loaded:
+                continue
+            
             status = {
-                'available': True,
-                'type': 'brazilian' if model_name in ['neuralmind-local', 'neuralmind-api', 'multilingual-local'] else 'international'
+                'available': not vectorizer.failed,
+                'loaded': vectorizer.loaded,
+                'type': 'brazilian' if model_name in BRAZILIAN_BACKENDS else 'international'
             }
             
-            if hasattr(vectorizer, 'get_model_info'):
+            if vectorizer.loaded and hasattr(vectorizer.get(), 'get_model_info'):
                 status.update(vectorizer.get_model_info())
             
             if status['type'] == 'brazilian':
@@ -493,6 +658,29 @@ def calculate_cosine_similarity(embedding1: List[float], embedding2: List[float]
         return 0.0
 
 
+# Palavras-chave técnicas importantes para o boost da similaridade aprimorada
+TECH_KEYWORDS = [
+    'software', 'sistema', 'tecnologia', 'informática', 'dados',
+    'desenvolvimento', 'manutenção', 'suporte', 'consultoria',
+    'impressora', 'equipamento', 'hardware', 'infraestrutura'
+]
+
+TECH_KEYWORD_BOOST_MIN_SIMILARITY = 0.3
+
+
+def apply_tech_keyword_boost(base_similarity: float, common_tech_words: List[str]) -> tuple[float, str]:
+    """Ajusta o score baseado em palavras-chave técnicas em comum e monta a justificativa"""
+    if common_tech_words:
+        boost = min(0.1, len(common_tech_words) * 0.02)
+        adjusted_score = min(1.0, base_similarity + boost)
+        justificativa = f"Similaridade: {base_similarity:.3f} + boost técnico ({', '.join(common_tech_words[:3])})"
+    else:
+        adjusted_score = base_similarity
+        justificativa = f"Similaridade semântica: {base_similarity:.3f}"
+    
+    return adjusted_score, justificativa
+
+
 def calculate_enhanced_similarity(embedding1: List[float], embedding2: List[float], 
                                 text1: str, text2: str) -> tuple[float, str]:
     """
@@ -503,35 +691,19 @@ def calculate_enhanced_similarity(embedding1: List[float], embedding2: List[floa
         # Similaridade base
         base_similarity = calculate_cosine_similarity(embedding1, embedding2)
         
-        if base_similarity < 0.3:
+        if base_similarity < TECH_KEYWORD_BOOST_MIN_SIMILARITY:
             return base_similarity, "Similaridade baixa - contextos diferentes"
         
         # Análise de palavras-chave comuns
         text1_lower = text1.lower()
         text2_lower = text2.lower()
         
-        # Palavras-chave técnicas importantes
-        tech_keywords = [
-            'software', 'sistema', 'tecnologia', 'informática', 'dados',
-            'desenvolvimento', 'manutenção', 'suporte', 'consultoria',
-            'impressora', 'equipamento', 'hardware', 'infraestrutura'
-        ]
-        
         common_tech_words = []
-        for keyword in tech_keywords:
+        for keyword in TECH_KEYWORDS:
             if keyword in text1_lower and keyword in text2_lower:
                 common_tech_words.append(keyword)
         
-        # Ajustar score baseado em palavras-chave
-        if common_tech_words:
-            boost = min(0.1, len(common_tech_words) * 0.02)
-            adjusted_score = min(1.0, base_similarity + boost)
-            justificativa = f"Similaridade: {base_similarity:.3f} + boost técnico ({', '.join(common_tech_words[:3])})"
-        else:
-            adjusted_score = base_similarity
-            justificativa = f"Similaridade semântica: {base_similarity:.3f}"
-        
-        return adjusted_score, justificativa
+        return apply_tech_keyword_boost(base_similarity, common_tech_words)
         
     except Exception as e:
         logger.error(f"Erro na similaridade aprimorada: {e}")
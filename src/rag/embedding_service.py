@@ -245,8 +245,8 @@ class EmbeddingService:
             logger.warning("⚠️ Isso pode consumir bastante CPU/memória no Railway!")
             
             # Importar apenas quando necessário para economizar memória
-            from services.sentence_transformer_service import SentenceTransformerService
-            local_service = SentenceTransformerService()
+            from services.embedding_worker import get_local_embedding_service
+            local_service = get_local_embedding_service("neuralmind/bert-base-portuguese-cased")
             
             # Processar em batches menores para não sobrecarregar a memória
             all_embeddings = []
@@ -83,6 +83,34 @@ def get_daily_bids_status():
     """
     return system_service.get_daily_bids_status()
 
+@system_routes.route('/api/status/pncp-cache', methods=['GET'])
+def get_pncp_cache_status():
+    """
+    GET /api/status/pncp-cache - Status do dataset do PNCP em cache
+    
+    DESCRIÇÃO:
+    - Dataset nacional usado pelas buscas, aquecido em segundo plano
+    - Mostra se o aquecedor está ativo e se há aquecimento em andamento
+    
+    RETORNA:
+    - Idade do cache (cache_age_s) e watermark da última sincronização
+    - Último aquecimento: horário, duração, modo (delta/completo), erro e worker
+    """
+    return system_service.get_pncp_cache_status()
+
+@system_routes.route('/api/pncp-cache/warm', methods=['POST'])
+def warm_pncp_cache():
+    """
+    POST /api/pncp-cache/warm - Aquecer o dataset do PNCP agora
+    
+    PARÂMETROS (Body JSON - opcional):
+    {
+        "full": false    // true = resync completo em vez do delta
+    }
+    """
+    data = request.get_json(silent=True) or {}
+    return system_service.warm_pncp_cache(full=bool(data.get('full', False)))
+
 @system_routes.route('/api/status/reevaluate', methods=['GET'])
 def get_reevaluate_status():
     """
@@ -148,7 +176,8 @@ def search_weekly_bids():
     POST/GET /api/search-weekly-bids - Buscar licitações da última semana com QWEN LLM
     
     DESCRIÇÃO:
-    - Busca licitações dos últimos 7 dias no PNCP
+    - Busca licitações dos últimos 7 dias no PNCP (depois da primeira execução,
+      só as atualizadas desde o último watermark)
     - Usa modelo QWEN 2.5:7B para validação de matches
     - APENAS matches aprovados pelo LLM são salvos no Supabase
     - Processo otimizado com cache Redis local
@@ -158,7 +187,8 @@ def search_weekly_bids():
         "vectorizer": "brazilian",     // tipo de vetorizador (brazilian, hybrid, openai)
         "clear_matches": true,         // limpar matches existentes antes
         "enable_llm": true,           // validação LLM (padrão: true)
-        "max_pages": 10               // limite de páginas por UF
+        "max_pages": 10,              // limite de páginas por UF
+        "full_resync": false          // ignorar o watermark e refazer a última semana
     }
     
     RETORNA:
@@ -181,7 +211,8 @@ def search_weekly_bids():
                 'vectorizer': request.args.get('vectorizer', 'brazilian'),
                 'clear_matches': request.args.get('clear_matches', 'false').lower() == 'true',
                 'enable_llm': request.args.get('enable_llm', 'true').lower() == 'true',
-                'max_pages': int(request.args.get('max_pages', '10'))
+                'max_pages': int(request.args.get('max_pages', '10')),
+                'full_resync': request.args.get('full_resync', 'false').lower() == 'true'
             }
         else:
             # POST - Tentar múltiplas formas de obter dados da requisição
@@ -214,6 +245,8 @@ def search_weekly_bids():
         clear_matches = data.get('clear_matches', False)
         enable_llm = data.get('enable_llm', True)
         max_pages = data.get('max_pages', 10)
+        # Ignorar o watermark e refazer a janela da última semana
+        full_resync = str(data.get('full_resync', False)).lower() in ('true', '1')
         
         # Validar vectorizer_type
         valid_vectorizers = ['brazilian', 'hybrid', 'openai', 'voyage', 'mock']
@@ -264,7 +297,7 @@ def search_weekly_bids():
                 logger.info(f"🔧 Vectorizador: {vectorizer_type}")
                 
                 # Executar o processo (já modificado para buscar última semana)
-                result = process_daily_bids(vectorizer, enable_llm_validation=enable_llm)
+                result = process_daily_bids(vectorizer, enable_llm_validation=enable_llm, full_resync=full_resync)
                 
                 logger.info(f"✅ Busca semanal concluída para processo {process_id}")
                 
@@ -394,8 +427,8 @@ def reprocess_existing_bids():
             from matching.vectorizers import BrazilianTextVectorizer
             vectorizer = BrazilianTextVectorizer()
         elif vectorizer_type == 'sentence_transformer':
-            from services.sentence_transformer_service import SentenceTransformerService
-            vectorizer = SentenceTransformerService()
+            from services.embedding_worker import get_local_embedding_service
+            vectorizer = get_local_embedding_service("neuralmind/bert-base-portuguese-cased")
         else:
             # Default para brazilian
             from matching.vectorizers import BrazilianTextVectorizer
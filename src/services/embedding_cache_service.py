@@ -1,14 +1,187 @@
 # src/services/embedding_cache_service.py
+import os
+import sys
+import time
+import zlib
+import fnmatch
+import atexit
+import struct
 import hashlib
 import pickle
 import logging
+import weakref
+import threading
+from collections import Counter, OrderedDict
+from functools import lru_cache
 import redis
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import numpy as np
+from typing import List, Optional, Dict, Any, Tuple
 from config.redis_config import RedisConfig
+from services.embedding_disk_store import get_disk_store
 
 logger = logging.getLogger(__name__)
 
+# Chaves por comando MGET; os MGETs de um lote vão no mesmo pipeline (um round trip)
+EMBEDDING_CACHE_MGET_CHUNK = int(os.getenv('EMBEDDING_CACHE_MGET_CHUNK', '1000'))
+
+# Tipo dos vetores gravados no formato binário: float32 (sem perda para os modelos
+# atuais) ou float16 (metade do espaço, ~3 casas decimais)
+EMBEDDING_CACHE_DTYPE = os.getenv('EMBEDDING_CACHE_DTYPE', 'float32')
+# Regravar no formato binário as entradas pickle antigas quando lidas
+EMBEDDING_CACHE_MIGRATE_ON_READ = os.getenv('EMBEDDING_CACHE_MIGRATE_ON_READ', 'true').lower() == 'true'
+
+# Contadores (hits, misses, latência...) agregados no processo e enviados com
+# HINCRBY para este hash no máximo a cada EMBEDDING_CACHE_STATS_FLUSH_INTERVAL segundos
+EMBEDDING_CACHE_STATS_KEY = 'stats:embedding_cache'
+EMBEDDING_CACHE_STATS_FLUSH_INTERVAL = float(os.getenv('EMBEDDING_CACHE_STATS_FLUSH_INTERVAL', '10'))
+# COUNT das iterações de SCAN (clear_cache / get_cache_stats)
+EMBEDDING_CACHE_SCAN_COUNT = int(os.getenv('EMBEDDING_CACHE_SCAN_COUNT', '1000'))
+# Orçamento (MB) do tier em memória do processo na frente do Redis; 0 desativa
+EMBEDDING_LOCAL_CACHE_MB = float(os.getenv('EMBEDDING_LOCAL_CACHE_MB', '256'))
+# Depois de um erro do Redis, lookups e gravações ficam só nos tiers locais por este tempo
+EMBEDDING_CACHE_REDIS_RETRY_SECONDS = float(os.getenv('EMBEDDING_CACHE_REDIS_RETRY_SECONDS', '30'))
+
+# Formato binário v1 das entradas match:{modelo}:{hash}
+#   cabeçalho de 24 bytes: b'EMB', versão, código do dtype, 3 bytes de padding,
+#   crc32 do nome do modelo, dimensão, 8 primeiros bytes do sha256 do texto
+#   seguido do vetor em little-endian, lido com np.frombuffer
+EMBEDDING_FORMAT_MAGIC = b'EMB'
+EMBEDDING_FORMAT_VERSION = 1
+_EMBEDDING_HEADER = struct.Struct('<3sBB3xII8s')
+_DTYPE_CODES = {'float32': 1, 'float16': 2}
+_DTYPES_BY_CODE = {1: np.dtype('<f4'), 2: np.dtype('<f2')}
+
+
+@lru_cache(maxsize=64)
+def _model_id(model_name: str) -> int:
+    return zlib.crc32(model_name.encode('utf-8'))
+
+
+def encode_embedding(embedding, model_name: str, text_hash: str, dtype: str = EMBEDDING_CACHE_DTYPE) -> bytes:
+    """Serializa um embedding no formato binário versionado"""
+    code = _DTYPE_CODES[dtype]
+    vector = np.asarray(embedding, dtype=_DTYPES_BY_CODE[code])
+    header = _EMBEDDING_HEADER.pack(
+        EMBEDDING_FORMAT_MAGIC, EMBEDDING_FORMAT_VERSION, code,
+        _model_id(model_name), vector.shape[0], bytes.fromhex(text_hash[:16])
+    )
+    return header + vector.tobytes()
+
+
+def is_binary_embedding(raw: bytes) -> bool:
+    return raw[:3] == EMBEDDING_FORMAT_MAGIC
+
+
+def decode_embedding(raw: bytes, model_name: str, text_hash: str) -> Optional[np.ndarray]:
+    """
+    Vetor (somente leitura, sem cópia) de uma entrada binária
+    
+    Retorna None se a versão for desconhecida, a entrada estiver truncada ou
+    não for do modelo/texto esperado.
+    """
+    if len(raw) < _EMBEDDING_HEADER.size or not is_binary_embedding(raw):
+        return None
+    _, version, code, model_id, dimensions, hash_prefix = _EMBEDDING_HEADER.unpack_from(raw)
+    dtype = _DTYPES_BY_CODE.get(code)
+    if version != EMBEDDING_FORMAT_VERSION or dtype is None:
+        return None
+    if model_id != _model_id(model_name) or hash_prefix != bytes.fromhex(text_hash[:16]):
+        return None
+    if len(raw) != _EMBEDDING_HEADER.size + dimensions * dtype.itemsize:
+        return None
+    return np.frombuffer(raw, dtype=dtype, count=dimensions, offset=_EMBEDDING_HEADER.size)
+
+
+class LocalEmbeddingLRU:
+    """
+    Tier em memória do processo, LRU limitado por bytes
+    
+    Guarda as entradas no mesmo formato binário do Redis, indexadas pela
+    mesma chave match:{modelo}:{sha256 do texto}. Como a chave é o hash do
+    texto, um perfil de empresa alterado gera outra chave (a entrada antiga
+    só deixa de ser usada e sai por LRU).
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+    
+    @staticmethod
+    def _entry_size(key: str, raw: bytes) -> int:
+        # Objetos str/bytes + nó do OrderedDict (~100 bytes)
+        return sys.getsizeof(key) + sys.getsizeof(raw) + 100
+    
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not self.max_bytes:
+            return [None] * len(keys)
+        with self._lock:
+            values = []
+            for key in keys:
+                raw = self._entries.get(key)
+                if raw is not None:
+                    self._entries.move_to_end(key)
+                values.append(raw)
+            return values
+    
+    def put_many(self, items: List[Tuple[str, bytes]]):
+        if not self.max_bytes:
+            return
+        with self._lock:
+            for key, raw in items:
+                size = self._entry_size(key, raw)
+                if size > self.max_bytes:
+                    continue
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self.bytes -= self._entry_size(key, previous)
+                self._entries[key] = raw
+                self.bytes += size
+            while self.bytes > self.max_bytes:
+                key, raw = self._entries.popitem(last=False)
+                self.bytes -= self._entry_size(key, raw)
+                self.evictions += 1
+    
+    def discard(self, keys: List[str]) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                raw = self._entries.pop(key, None)
+                if raw is not None:
+                    self.bytes -= self._entry_size(key, raw)
+                    removed += 1
+            return removed
+    
+    def clear(self, pattern: str = "*") -> int:
+        """Remove as chaves que casam com o padrão (mesma sintaxe glob do Redis)"""
+        with self._lock:
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+        return self.discard(keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'memory_mb': round(self.bytes / 2**20, 2),
+                'budget_mb': round(self.max_bytes / 2**20, 2),
+                'evictions': self.evictions,
+            }
+
+
+# Tier local compartilhado por todas as instâncias do processo (sobrevive entre execuções do matching)
+_local_tier = LocalEmbeddingLRU(EMBEDDING_LOCAL_CACHE_MB * 2**20)
+
+# Instâncias com contadores ainda não enviados (flush na saída do processo)
+_live_services = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all_stats():
+    for service in list(_live_services):
+        service.flush_stats()
+
 class EmbeddingCacheService:
     """Cache de embeddings usando APENAS Redis local (simplificado para matching)"""
     
@@ -18,6 +191,14 @@ class EmbeddingCacheService:
         db_manager mantido para compatibilidade mas não usado para cache
         """
         self.db_manager = db_manager
+        self.local_tier = _local_tier
+        self.disk_store = get_disk_store()
+        
+        # Contadores locais ainda não enviados ao Redis
+        self._stats_lock = threading.Lock()
+        self._pending_stats = Counter()
+        self._last_stats_flush = time.monotonic()
+        self._redis_failed_at = None
         
         # 🔧 NOVA CONFIGURAÇÃO: Redis LOCAL prioritário
         logger.info("🔄 Inicializando Redis LOCAL para cache de embeddings...")
@@ -28,8 +209,9 @@ class EmbeddingCacheService:
             logger.info("✅ Redis LOCAL ativo para matching")
             # Configurar TTL padrão para embeddings (24h)
             self.default_ttl = 86400
+            _live_services.add(self)
         else:
-            logger.warning("⚠️ Redis LOCAL não disponível - matching sem cache")
+            logger.warning("⚠️ Redis LOCAL não disponível - matching só com os caches em memória e em disco")
             logger.warning("💡 Para ativar cache: docker run -d -p 6379:6379 redis:alpine")
     
     def _get_local_redis_client(self):
@@ -73,112 +255,134 @@ class EmbeddingCacheService:
     
     def get_embedding_from_cache(self, text: str, model_name: str = "sentence-transformers") -> Optional[List[float]]:
         """Busca embedding no Redis LOCAL"""
-        if not self.redis_available:
-            return None
-            
-        try:
-            text_hash = self._hash_text(text)
-            redis_key = f"match:{model_name}:{text_hash}"
-            
-            cached = self.redis_client.get(redis_key)
-            if cached:
-                data = pickle.loads(cached)
-                
-                # Verificar integridade e atualizar estatísticas
-                if data.get('text_hash') == text_hash:
-                    # Incrementar contador de acesso
-                    access_key = f"stats:{redis_key}"
-                    self.redis_client.incr(access_key)
-                    self.redis_client.expire(access_key, self.default_ttl)
-                    
-                    logger.debug("⚡ Embedding encontrado no Redis LOCAL")
-                    return data['embedding']
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao buscar embedding no Redis: {e}")
-            return None
+        hit = self.multi_model_get_embeddings([text], [model_name]).get(text)
+        return hit[1] if hit else None
     
     def save_embedding_to_cache(self, text: str, embedding: List[float], model_name: str = "sentence-transformers") -> bool:
         """Salva embedding no Redis LOCAL"""
-        if not self.redis_available:
-            return False
-            
-        try:
-            text_hash = self._hash_text(text)
-            redis_key = f"match:{model_name}:{text_hash}"
-            
-            # Preparar dados para cache
-            data = {
-                'embedding': embedding,
-                'text_hash': text_hash,
-                'text_preview': text[:100] + "..." if len(text) > 100 else text,
-                'model_name': model_name,
-                'cached_at': datetime.now().isoformat(),
-                'dimensions': len(embedding) if embedding else 0
-            }
-            
-            # Salvar no Redis com TTL
-            serialized = pickle.dumps(data)
-            success = self.redis_client.setex(redis_key, self.default_ttl, serialized)
-            
-            if success:
-                # Inicializar contador de acesso
-                access_key = f"stats:{redis_key}"
-                self.redis_client.setex(access_key, self.default_ttl, 1)
-                
-                logger.debug(f"💾 Embedding salvo no Redis LOCAL: {len(embedding)} dim")
-                return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"❌ Erro ao salvar embedding no Redis: {e}")
+        if not embedding:
             return False
+        return self.batch_save_embeddings_to_cache([(text, embedding)], model_name)
     
     def batch_get_embeddings_from_cache(self, texts: List[str], model_name: str = "sentence-transformers") -> Dict[str, List[float]]:
         """Busca múltiplos embeddings em lote (otimizado para Redis)"""
-        if not self.redis_available or not texts:
+        hits = self.multi_model_get_embeddings(texts, [model_name])
+        return {text: embedding for text, (_, embedding) in hits.items()}
+    
+    def multi_model_get_embeddings(self, texts: List[str], model_names: List[str]) -> Dict[str, Tuple[str, List[float]]]:
+        """
+        Busca os embeddings de vários textos em vários modelos de uma vez
+        
+        Primeiro no tier em memória do processo; o Redis só é consultado para
+        as chaves que ainda podem mudar o resultado (modelos de prioridade
+        maior que o hit local, ou todos se não houve hit local), com MGETs
+        num único pipeline. Hits do Redis são promovidos ao tier local.
+        Hits por tier, misses e latência ficam em contadores locais (ver flush_stats).
+        
+        Returns:
+            {texto: (modelo, embedding)} com o primeiro modelo de model_names
+            que tem o texto em cache
+        """
+        if not texts or not model_names:
             return {}
         
         try:
-            # Preparar chaves
-            text_to_key = {}
-            keys_to_fetch = []
-            
-            for text in texts:
-                text_hash = self._hash_text(text)
-                redis_key = f"match:{model_name}:{text_hash}"
-                text_to_key[text] = redis_key
-                keys_to_fetch.append(redis_key)
-            
-            # Buscar todos de uma vez usando pipeline
-            pipe = self.redis_client.pipeline()
-            for key in keys_to_fetch:
-                pipe.get(key)
-            
-            results = pipe.execute()
-            
-            # Processar resultados
+            start = time.perf_counter()
+            unique_texts = list(dict.fromkeys(text for text in texts if text))
+            hashes = [self._hash_text(text) for text in unique_texts]
+            keys = [self._redis_key(model_name, text_hash) for text_hash in hashes for model_name in model_names]
+            models_count = len(model_names)
+            
+            # Tier 1: memória do processo
+            local_values = self.local_tier.get_many(keys)
+            first_local = []
+            for t in range(len(unique_texts)):
+                row = local_values[t * models_count:(t + 1) * models_count]
+                first_local.append(next((m for m, raw in enumerate(row) if raw is not None), models_count))
+            
+            # Tier 2: store em disco, para as chaves antes do hit local
+            disk_values = {}
+            disk_indices = [i for t, m_local in enumerate(first_local)
+                            for i in range(t * models_count, t * models_count + m_local)]
+            if disk_indices and self.disk_store is not None:
+                vectors = self.disk_store.get_many(
+                    [(model_names[i % models_count], hashes[i // models_count]) for i in disk_indices]
+                )
+                disk_values = {i: vector for i, vector in zip(disk_indices, vectors) if vector is not None}
+            first_near = []
+            redis_indices = []
+            for t, m_local in enumerate(first_local):
+                m_near = next((m for m in range(m_local) if t * models_count + m in disk_values), m_local)
+                first_near.append(m_near)
+                redis_indices.extend(range(t * models_count, t * models_count + m_near))
+            
+            # Tier 3: Redis, só para as chaves antes do hit local/disco
+            # (Redis fora do ar: essas chaves viram misses e ficam os hits locais/disco)
+            redis_values = {}
+            if redis_indices and self._redis_usable():
+                redis_keys = [keys[i] for i in redis_indices]
+                try:
+                    pipe = self.redis_client.pipeline(transaction=False)
+                    for i in range(0, len(redis_keys), EMBEDDING_CACHE_MGET_CHUNK):
+                        pipe.mget(redis_keys[i:i + EMBEDDING_CACHE_MGET_CHUNK])
+                    values = [value for chunk in pipe.execute() for value in chunk]
+                    redis_values = dict(zip(redis_indices, values))
+                    self._redis_failed_at = None
+                except redis.RedisError as e:
+                    self._mark_redis_failed(e)
+            
+            # Resolver hits e misses numa passada: primeiro modelo válido por texto
             cached_embeddings = {}
-            for i, (text, key) in enumerate(text_to_key.items()):
-                cached_data = results[i]
-                if cached_data:
-                    try:
-                        data = pickle.loads(cached_data)
-                        if data.get('text_hash') == self._hash_text(text):
-                            cached_embeddings[text] = data['embedding']
-                            
-                            # Incrementar contador de acesso
-                            access_key = f"stats:{key}"
-                            self.redis_client.incr(access_key)
-                            self.redis_client.expire(access_key, self.default_ttl)
-                    except:
-                        continue
+            migrations = []
+            promotions = []
+            disk_backfill = {}
+            counts = Counter()
+            for t, (text, text_hash) in enumerate(zip(unique_texts, hashes)):
+                for m, model_name in enumerate(model_names):
+                    index = t * models_count + m
+                    key = keys[index]
+                    if m < first_near[t]:
+                        raw = redis_values.get(index)
+                        embedding = self._decode_entry(raw, model_name, text_hash, key, migrations)
+                        tier = 'redis'
+                    elif index in disk_values:
+                        raw = encode_embedding(disk_values[index], model_name, text_hash)
+                        embedding = disk_values[index].tolist()
+                        tier = 'disk'
+                    else:
+                        raw = local_values[index]
+                        embedding = self._decode_entry(raw, model_name, text_hash, key, migrations)
+                        tier = 'local'
+                    if embedding:
+                        cached_embeddings[text] = (model_name, embedding)
+                        counts[f"{tier}_hits"] += 1
+                        counts[f"hits:{model_name}"] += 1
+                        if tier == 'disk' or (tier == 'redis' and is_binary_embedding(raw)):
+                            promotions.append((key, raw))
+                        if tier == 'redis':
+                            disk_backfill.setdefault(model_name, []).append((text_hash, embedding))
+                        break
+            
+            # Migrações pickle → binário também entram no tier local
+            self.local_tier.put_many(promotions + migrations)
+            # Hits do Redis ficam também no disco (fallback se o Redis cair)
+            if self.disk_store is not None:
+                for model_name, entries in disk_backfill.items():
+                    self.disk_store.put_many(model_name, entries)
+            
+            counts.update(
+                lookups=1,
+                texts=len(unique_texts),
+                hits=len(cached_embeddings),
+                misses=len(unique_texts) - len(cached_embeddings),
+                lookup_us=int((time.perf_counter() - start) * 1e6),
+                migrated=len(migrations),
+            )
+            self._record_stats(counts, migrations)
             
             if cached_embeddings:
-                logger.info(f"⚡ {len(cached_embeddings)}/{len(texts)} embeddings encontrados no cache Redis")
+                logger.info(f"⚡ {len(cached_embeddings)}/{len(unique_texts)} embeddings encontrados no cache "
+                            f"(memória {counts['local_hits']}, disco {counts['disk_hits']}, Redis {counts['redis_hits']})")
             
             return cached_embeddings
             
@@ -187,106 +391,204 @@ class EmbeddingCacheService:
             return {}
     
     def batch_save_embeddings_to_cache(self, texts_and_embeddings: List[tuple], model_name: str = "sentence-transformers") -> bool:
-        """Salva múltiplos embeddings em lote (otimizado para Redis)"""
-        if not self.redis_available or not texts_and_embeddings:
+        """Salva múltiplos embeddings em lote (tier em memória + disco + um pipeline de SETEX)"""
+        if not texts_and_embeddings:
             return False
         
         try:
-            # Usar pipeline para operações em lote
-            pipe = self.redis_client.pipeline()
-            saved_count = 0
-            
+            entries = []
+            disk_entries = []
             for text, embedding in texts_and_embeddings:
                 if not embedding:
                     continue
-                    
                 text_hash = self._hash_text(text)
-                redis_key = f"match:{model_name}:{text_hash}"
-                
-                # Preparar dados
-                data = {
-                    'embedding': embedding,
-                    'text_hash': text_hash,
-                    'text_preview': text[:100] + "..." if len(text) > 100 else text,
-                    'model_name': model_name,
-                    'cached_at': datetime.now().isoformat(),
-                    'dimensions': len(embedding)
-                }
-                
-                # Adicionar ao pipeline
-                serialized = pickle.dumps(data)
-                pipe.setex(redis_key, self.default_ttl, serialized)
-                
-                # Inicializar contador de acesso
-                access_key = f"stats:{redis_key}"
-                pipe.setex(access_key, self.default_ttl, 1)
-                
-                saved_count += 1
-            
-            # Executar pipeline
-            pipe.execute()
+                entries.append((self._redis_key(model_name, text_hash), encode_embedding(embedding, model_name, text_hash)))
+                disk_entries.append((text_hash, embedding))
+            
+            self.local_tier.put_many(entries)
+            if self.disk_store is not None:
+                self.disk_store.put_many(model_name, disk_entries)
+            if not self._redis_usable():
+                return bool(entries)
+            
+            if entries:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for redis_key, encoded in entries:
+                    pipe.setex(redis_key, self.default_ttl, encoded)
+                try:
+                    pipe.execute()
+                except redis.RedisError as e:
+                    self._mark_redis_failed(e)
+                    return True  # Salvos na memória e no disco
+                self._record_stats(Counter(saves=len(entries)))
             
-            logger.info(f"💾 {saved_count} embeddings salvos no Redis LOCAL em lote")
+            logger.info(f"💾 {len(entries)} embeddings salvos no Redis LOCAL em lote")
             return True
             
         except Exception as e:
             logger.error(f"❌ Erro ao salvar embeddings em lote: {e}")
             return False
     
+    def _redis_usable(self) -> bool:
+        """Redis conectado e sem erro nos últimos EMBEDDING_CACHE_REDIS_RETRY_SECONDS"""
+        if not self.redis_available:
+            return False
+        failed_at = self._redis_failed_at
+        return failed_at is None or time.monotonic() - failed_at >= EMBEDDING_CACHE_REDIS_RETRY_SECONDS
+    
+    def _mark_redis_failed(self, error: Exception):
+        self._redis_failed_at = time.monotonic()
+        logger.warning(f"⚠️ Redis LOCAL indisponível ({error}) - usando só memória e disco "
+                       f"por {EMBEDDING_CACHE_REDIS_RETRY_SECONDS:.0f}s")
+    
+    def _decode_entry(self, cached: Optional[bytes], model_name: str, text_hash: str,
+                      redis_key: str, migrations: List[tuple]) -> Optional[List[float]]:
+        """
+        Embedding de uma entrada do cache (binária ou pickle antigo)
+        
+        Entradas pickle válidas são enfileiradas em migrations para serem
+        regravadas no formato binário (mantendo o TTL).
+        """
+        if not cached:
+            return None
+        
+        if is_binary_embedding(cached):
+            vector = decode_embedding(cached, model_name, text_hash)
+            return vector.tolist() if vector is not None else None
+        
+        try:
+            data = pickle.loads(cached)
+        except Exception:
+            return None
+        
+        # Verificar integridade
+        if not isinstance(data, dict) or data.get('text_hash') != text_hash or not data.get('embedding'):
+            return None
+        
+        if EMBEDDING_CACHE_MIGRATE_ON_READ:
+            migrations.append((redis_key, encode_embedding(data['embedding'], model_name, text_hash)))
+        return data['embedding']
+    
+    def _record_stats(self, counts: Counter, migrations: List[tuple] = ()):
+        """
+        Soma contadores locais; migrações pickle → binário vão na hora, junto
+        com os contadores se o intervalo de flush já passou (um pipeline)
+        """
+        with self._stats_lock:
+            self._pending_stats.update(counts)
+            flush_due = time.monotonic() - self._last_stats_flush >= EMBEDDING_CACHE_STATS_FLUSH_INTERVAL
+        
+        if migrations or flush_due:
+            self.flush_stats(migrations)
+    
+    def flush_stats(self, migrations: List[tuple] = ()) -> bool:
+        """Envia os contadores locais num único pipeline de HINCRBY (e as migrações pendentes)"""
+        if not self.redis_available:
+            return False
+        
+        with self._stats_lock:
+            pending = self._pending_stats
+            self._pending_stats = Counter()
+            self._last_stats_flush = time.monotonic()
+        
+        pending = {field: value for field, value in pending.items() if value}
+        if not pending and not migrations:
+            return True
+        
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for field, value in pending.items():
+                pipe.hincrby(EMBEDDING_CACHE_STATS_KEY, field, value)
+            for redis_key, encoded in migrations:
+                pipe.set(redis_key, encoded, keepttl=True)
+            pipe.execute()
+            if migrations:
+                logger.debug(f"🔄 {len(migrations)} embeddings migrados de pickle para o formato binário")
+            return True
+        except Exception as e:
+            # Devolver os contadores para o próximo flush
+            with self._stats_lock:
+                self._pending_stats.update(pending)
+            logger.warning(f"⚠️ Erro ao enviar estatísticas do cache: {e}")
+            return False
+    
+    def _redis_key(self, model_name: str, text_hash: str) -> str:
+        return f"match:{model_name}:{text_hash}"
+    
     def clear_cache(self, pattern: str = "match:*") -> int:
-        """Limpa cache por padrão"""
+        """Limpa cache por padrão (tier em memória + disco + SCAN incremental no Redis, sem KEYS)"""
+        local_deleted = self.local_tier.clear(pattern)
+        disk_deleted = self._clear_disk_store(pattern)
         if not self.redis_available:
-            return 0
+            return max(local_deleted, disk_deleted)
         
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                deleted = self.redis_client.delete(*keys)
+            deleted = 0
+            batch = []
+            for key in self.redis_client.scan_iter(match=pattern, count=EMBEDDING_CACHE_SCAN_COUNT):
+                batch.append(key)
+                if len(batch) >= EMBEDDING_CACHE_SCAN_COUNT:
+                    deleted += self.redis_client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += self.redis_client.delete(*batch)
+            
+            if deleted:
                 logger.info(f"🗑️ {deleted} chaves removidas do cache")
-                return deleted
-            return 0
+            return deleted
         except Exception as e:
             logger.error(f"❌ Erro ao limpar cache: {e}")
             return 0
     
+    def _clear_disk_store(self, pattern: str) -> int:
+        """
+        Remove do disco os modelos cobertos por um padrão match:{modelo}:*
+        (o store não apaga chaves avulsas; padrões por hash ficam no disco)
+        """
+        parts = pattern.split(':', 2)
+        if self.disk_store is None or parts[0] != 'match' or (len(parts) == 3 and parts[2] != '*'):
+            return 0
+        model_pattern = parts[1] if len(parts) > 1 else '*'
+        return sum(
+            self.disk_store.clear(model_name)
+            for model_name in self.disk_store.models()
+            if fnmatch.fnmatchcase(model_name, model_pattern)
+        )
+    
     def get_cache_stats(self) -> Dict[str, Any]:
-        """Estatísticas do cache Redis LOCAL"""
+        """Estatísticas do cache Redis LOCAL (contadores no Redis + pendentes deste processo)"""
         if not self.redis_available:
             return {
                 'status': 'disabled',
-                'message': 'Redis LOCAL não disponível'
+                'message': 'Redis LOCAL não disponível',
+                'local_tier': self.local_tier.stats(),
+                'disk_store': self.disk_store.stats() if self.disk_store is not None else None
             }
         
         try:
             # Info básico do Redis
             info = self.redis_client.info()
             
-            # Contar chaves por tipo
-            match_keys = self.redis_client.keys("match:*")
-            stats_keys = self.redis_client.keys("stats:*")
-            
-            # Calcular estatísticas de acesso
-            total_accesses = 0
-            if stats_keys:
-                pipe = self.redis_client.pipeline()
-                for key in stats_keys:
-                    pipe.get(key)
-                access_counts = pipe.execute()
-                total_accesses = sum(int(count) if count else 0 for count in access_counts)
-            
-            # Análise por modelo
-            models_stats = {}
-            for key in match_keys:
-                try:
-                    key_str = key.decode('utf-8') if isinstance(key, bytes) else key
-                    parts = key_str.split(':')
-                    if len(parts) >= 2:
-                        model = parts[1]
-                        if model not in models_stats:
-                            models_stats[model] = 0
-                        models_stats[model] += 1
-                except:
-                    continue
+            # Contadores: hash no Redis (todos os processos) + o que ainda não foi enviado
+            counters = Counter({
+                (field.decode('utf-8') if isinstance(field, bytes) else field): int(value)
+                for field, value in self.redis_client.hgetall(EMBEDDING_CACHE_STATS_KEY).items()
+            })
+            with self._stats_lock:
+                pending_flush = sum(self._pending_stats.values())
+                counters.update(self._pending_stats)
+            
+            # Contar chaves por modelo (SCAN incremental)
+            models_stats = Counter()
+            for key in self.redis_client.scan_iter(match="match:*", count=EMBEDDING_CACHE_SCAN_COUNT):
+                key_str = key.decode('utf-8') if isinstance(key, bytes) else key
+                parts = key_str.split(':')
+                if len(parts) >= 3:
+                    models_stats[parts[1]] += 1
+            match_keys = sum(models_stats.values())
+            
+            texts = counters['texts']
+            hit_rate = counters['hits'] / texts if texts else 0.0
             
             return {
                 'status': 'active',
@@ -297,14 +599,30 @@ class EmbeddingCacheService:
                     'total_keys': info.get('db0', {}).get('keys', 0)
                 },
                 'cache_stats': {
-                    'match_keys': len(match_keys),
-                    'total_accesses': total_accesses,
-                    'avg_accesses': round(total_accesses / len(match_keys), 2) if match_keys else 0,
-                    'models': models_stats
+                    'match_keys': match_keys,
+                    'total_accesses': counters['hits'],
+                    'avg_accesses': round(counters['hits'] / match_keys, 2) if match_keys else 0,
+                    'models': dict(models_stats),
+                    'lookups': counters['lookups'],
+                    'hits': counters['hits'],
+                    'local_hits': counters['local_hits'],
+                    'disk_hits': counters['disk_hits'],
+                    'redis_hits': counters['redis_hits'],
+                    'misses': counters['misses'],
+                    'saves': counters['saves'],
+                    'migrated': counters['migrated'],
+                    'hits_by_model': {
+                        field.split(':', 1)[1]: value for field, value in counters.items() if field.startswith('hits:')
+                    },
+                    'avg_lookup_ms': round(counters['lookup_us'] / counters['lookups'] / 1000, 3) if counters['lookups'] else 0.0,
+                    'pending_flush': pending_flush
                 },
+                'local_tier': self.local_tier.stats(),
+                'disk_store': self.disk_store.stats() if self.disk_store is not None else None,
                 'performance': {
-                    'hit_rate_estimate': f"{min(95, (total_accesses / len(match_keys)) * 10) if match_keys else 0:.1f}%",
-                    'cache_efficiency': 'High' if len(match_keys) > 100 else 'Medium' if len(match_keys) > 10 else 'Low'
+                    'hit_rate': round(hit_rate, 4),
+                    'hit_rate_estimate': f"{hit_rate * 100:.1f}%",
+                    'cache_efficiency': 'High' if match_keys > 100 else 'Medium' if match_keys > 10 else 'Low'
                 }
             }
             
@@ -368,4 +686,18 @@ class EmbeddingCacheService:
         """Gera hash dos dados de processamento"""
         sorted_data = {k: data[k] for k in sorted(data.keys())}
         data_str = str(sorted_data)
-        return hashlib.sha256(data_str.encode('utf-8')).hexdigest()
\ No newline at end of file
+        return hashlib.sha256(data_str.encode('utf-8')).hexdigest()
+
+
+_SHARED_CACHE_SERVICE: Optional[EmbeddingCacheService] = None
+_SHARED_CACHE_SERVICE_LOCK = threading.Lock()
+
+
+def get_embedding_cache_service() -> EmbeddingCacheService:
+    """EmbeddingCacheService compartilhado do processo (conecta ao Redis na primeira chamada)"""
+    global _SHARED_CACHE_SERVICE
+    if _SHARED_CACHE_SERVICE is None:
+        with _SHARED_CACHE_SERVICE_LOCK:
+            if _SHARED_CACHE_SERVICE is None:
+                _SHARED_CACHE_SERVICE = EmbeddingCacheService()
+    return _SHARED_CACHE_SERVICE
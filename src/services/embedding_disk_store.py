@@ -0,0 +1,403 @@
+# src/services/embedding_disk_store.py
+"""
+💽 STORE DE EMBEDDINGS EM DISCO (mmap)
+Tier local de embeddings que sobrevive a reinícios e a quedas do Redis:
+sem ele, um Redis fora do ar faz cada execução do matching recalcular
+todos os embeddings.
+
+Um arquivo por modelo ({diretório}/{modelo}.emb):
+- cabeçalho de 64 bytes: b'EMBSTORE', versão, dimensão, crc32 do nome do modelo
+- linhas de tamanho fixo, só com append: 16 bytes do sha256 do texto,
+  crc32 da linha e o vetor float32 little-endian
+- o índice chave → linha é montado em memória a partir da coluna de chaves
+  (última linha de cada chave vale) e atualizado incrementalmente quando o
+  arquivo cresce
+
+Segurança:
+- appends com flock exclusivo num arquivo .lock; uma linha incompleta no
+  fim (queda no meio da escrita) é truncada no próximo append
+- o crc32 de cada linha é conferido na leitura (linha corrompida = miss)
+- compactação reescreve só as linhas válidas mais recentes num arquivo novo
+  e troca com os.replace; leitores com o mmap antigo continuam funcionando
+  e reabrem ao notar o inode novo
+- modo somente leitura (mode='ro') para compartilhar entre workers do
+  gunicorn: o mmap é servido pelo page cache do SO, sem cópia por worker
+"""
+
+import os
+import re
+import mmap
+import zlib
+import fcntl
+import struct
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Diretório do store; EMBEDDING_DISK_STORE_MODE: rw (padrão), ro (só leitura) ou off
+EMBEDDING_DISK_STORE_DIR = os.getenv('EMBEDDING_DISK_STORE_DIR', os.path.join(_PROJECT_ROOT, 'cache', 'embeddings'))
+EMBEDDING_DISK_STORE_MODE = os.getenv('EMBEDDING_DISK_STORE_MODE', 'rw').lower()
+# fsync a cada lote gravado (durável em queda de energia, não só de processo)
+EMBEDDING_DISK_STORE_FSYNC = os.getenv('EMBEDDING_DISK_STORE_FSYNC', 'true').lower() == 'true'
+# Tamanho máximo por modelo; acima disso a compactação descarta as linhas mais antigas
+EMBEDDING_DISK_STORE_MAX_MB = float(os.getenv('EMBEDDING_DISK_STORE_MAX_MB', '2048'))
+# Fração do tamanho máximo que sobra depois de descartar as mais antigas: a folga
+# evita uma nova compactação (reescrita + fsync do arquivo todo) a cada lote gravado
+EMBEDDING_DISK_STORE_COMPACT_TARGET = float(os.getenv('EMBEDDING_DISK_STORE_COMPACT_TARGET', '0.75'))
+# Compactar quando a fração de linhas mortas (chaves regravadas/corrompidas) passar disto
+EMBEDDING_DISK_STORE_COMPACT_RATIO = float(os.getenv('EMBEDDING_DISK_STORE_COMPACT_RATIO', '0.5'))
+
+STORE_MAGIC = b'EMBSTORE'
+STORE_VERSION = 1
+_HEADER = struct.Struct('<8sIII')
+HEADER_SIZE = 64
+KEY_SIZE = 16
+
+
+def _row_dtype(dimensions: int) -> np.dtype:
+    return np.dtype([('key', f'V{KEY_SIZE}'), ('crc', '<u4'), ('vec', '<f4', (dimensions,))])
+
+
+def _model_crc(model_name: str) -> int:
+    return zlib.crc32(model_name.encode('utf-8'))
+
+
+def _row_crc(key: bytes, vector_bytes: bytes) -> int:
+    return zlib.crc32(vector_bytes, zlib.crc32(key))
+
+
+def text_key(text_hash: str) -> bytes:
+    """Chave da linha: 16 primeiros bytes do sha256 (hex) do texto"""
+    return bytes.fromhex(text_hash[:KEY_SIZE * 2])
+
+
+class _ModelFile:
+    """Arquivo .emb de um modelo: mmap somente leitura + índice em memória"""
+
+    def __init__(self, path: str, model_name: str, writable: bool):
+        self.path = path
+        self.lock_path = path + '.lock'
+        self.model_name = model_name
+        self.writable = writable
+        self.dimensions: Optional[int] = None
+        self.dtype: Optional[np.dtype] = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._mmap = None
+        self._rows = None
+        self._inode = None
+        self._size = 0
+        self._indexed_rows = 0
+        self._index: Dict[bytes, int] = {}
+        self.dead_rows = 0
+
+    # ------------------------------------------------------------------ leitura
+
+    def refresh(self):
+        """Acompanha o arquivo: reabre se foi trocado (compactação), indexa linhas novas"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+            return
+
+        if stat.st_ino != self._inode:
+            self._reset()
+            if not self._open_header():
+                return
+            self._inode = stat.st_ino
+
+        if stat.st_size == self._size:
+            return
+
+        complete_rows = (stat.st_size - HEADER_SIZE) // self.dtype.itemsize
+        if complete_rows <= 0:
+            return
+        with open(self.path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), HEADER_SIZE + complete_rows * self.dtype.itemsize,
+                                   access=mmap.ACCESS_READ)
+        self._size = stat.st_size
+        self._rows = np.frombuffer(self._mmap, dtype=self.dtype, count=complete_rows, offset=HEADER_SIZE)
+
+        new_keys = self._rows['key'][self._indexed_rows:complete_rows].tobytes()
+        for row_number, start in enumerate(range(0, len(new_keys), KEY_SIZE), self._indexed_rows):
+            key = new_keys[start:start + KEY_SIZE]
+            if key in self._index:
+                self.dead_rows += 1
+            self._index[key] = row_number
+        self._indexed_rows = complete_rows
+
+    def _open_header(self) -> bool:
+        with open(self.path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            return False
+        magic, version, dimensions, model_crc = _HEADER.unpack_from(header)
+        if magic != STORE_MAGIC or version != STORE_VERSION or model_crc != _model_crc(self.model_name):
+            logger.warning(f"⚠️ Store em disco ignorado (cabeçalho inválido): {self.path}")
+            return False
+        self.dimensions = dimensions
+        self.dtype = _row_dtype(dimensions)
+        return True
+
+    def get(self, key: bytes) -> Optional[np.ndarray]:
+        row_number = self._index.get(key)
+        if row_number is None:
+            return None
+        row = self._rows[row_number]
+        vector = row['vec']
+        if _row_crc(key, vector.tobytes()) != int(row['crc']):
+            return None
+        return vector
+
+    # ------------------------------------------------------------------ escrita
+
+    def append(self, entries: List[Tuple[bytes, np.ndarray]]) -> int:
+        """Acrescenta as chaves ainda ausentes; devolve quantas linhas foram gravadas"""
+        if not self.writable or not entries:
+            return 0
+
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                if self.dimensions is None and os.path.exists(self.path) and os.path.getsize(self.path) >= HEADER_SIZE:
+                    # Cabeçalho de outro modelo/versão: não misturar linhas
+                    return 0
+                dimensions = self.dimensions or len(entries[0][1])
+                fresh = [(key, vector) for key, vector in entries
+                         if key not in self._index and len(vector) == dimensions]
+                if not fresh:
+                    return 0
+
+                rows = np.empty(len(fresh), dtype=_row_dtype(dimensions))
+                for i, (key, vector) in enumerate(fresh):
+                    rows[i]['key'] = key
+                    rows[i]['vec'] = vector
+                    rows[i]['crc'] = _row_crc(key, rows[i]['vec'].tobytes())
+
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    size = os.fstat(fd).st_size
+                    if size < HEADER_SIZE:
+                        header = _HEADER.pack(STORE_MAGIC, STORE_VERSION, dimensions, _model_crc(self.model_name))
+                        os.ftruncate(fd, 0)
+                        os.pwrite(fd, header.ljust(HEADER_SIZE, b'\0'), 0)
+                        size = HEADER_SIZE
+                    # Linha incompleta no fim (escrita interrompida): descartar
+                    row_size = rows.dtype.itemsize
+                    size = HEADER_SIZE + (size - HEADER_SIZE) // row_size * row_size
+                    os.ftruncate(fd, size)
+                    os.pwrite(fd, rows.tobytes(), size)
+                    if EMBEDDING_DISK_STORE_FSYNC:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+                self.refresh()
+                self._maybe_compact_locked()
+                return len(fresh)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def compact(self) -> Dict[str, int]:
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self.refresh()
+                return self._compact_locked()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _max_rows(self, fraction: float = 1.0) -> int:
+        return max(int((EMBEDDING_DISK_STORE_MAX_MB * 2**20 - HEADER_SIZE) * fraction // self.dtype.itemsize), 0)
+
+    def _maybe_compact_locked(self):
+        total = self._indexed_rows
+        too_big = self._size > EMBEDDING_DISK_STORE_MAX_MB * 2**20
+        if total and (too_big or (total > 1000 and self.dead_rows / total > EMBEDDING_DISK_STORE_COMPACT_RATIO)):
+            self._compact_locked(trim=too_big)
+
+    def _compact_locked(self, trim: bool = False) -> Dict[str, int]:
+        """
+        Reescreve só as linhas vivas e íntegras; acima do tamanho máximo (ou com trim)
+        ficam só as mais novas, até EMBEDDING_DISK_STORE_COMPACT_TARGET do limite
+        """
+        before = self._indexed_rows
+        if self._rows is None:
+            return {'rows_before': 0, 'rows_after': 0}
+
+        live = sorted(self._index.values())
+        live = [n for n in live if self.get(bytes(self._rows[n]['key'])) is not None]
+        if trim or len(live) > self._max_rows():
+            keep = self._max_rows(EMBEDDING_DISK_STORE_COMPACT_TARGET)
+            if len(live) > keep:
+                live = live[len(live) - keep:]
+
+        tmp_path = f"{self.path}.compact.{os.getpid()}"
+        header = _HEADER.pack(STORE_MAGIC, STORE_VERSION, self.dimensions, _model_crc(self.model_name))
+        with open(tmp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+            f.write(self._rows[live].tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        _fsync_dir(os.path.dirname(self.path))
+
+        self._reset()
+        self.refresh()
+        logger.info(f"🗜️ Store em disco compactado ({self.model_name}): {before} → {len(live)} linhas")
+        return {'rows_before': before, 'rows_after': len(live)}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'rows': self._indexed_rows,
+            'keys': len(self._index),
+            'dead_rows': self.dead_rows,
+            'dimensions': self.dimensions,
+            'size_mb': round(self._size / 2**20, 2),
+        }
+
+
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class DiskEmbeddingStore:
+    """
+    Embeddings por (modelo, hash do texto) em arquivos mmap, um por modelo
+
+    Uso:
+        store = DiskEmbeddingStore('/app/cache/embeddings')
+        store.put_many('sentence-transformers', [(text_hash, embedding), ...])
+        vectors = store.get_many([('sentence-transformers', text_hash), ...])
+
+    Funciona sozinho (sem Redis); get_many devolve views float32 somente
+    leitura do mmap (None para ausentes).
+    """
+
+    def __init__(self, directory: str = EMBEDDING_DISK_STORE_DIR, mode: str = 'rw'):
+        self.directory = directory
+        self.writable = mode == 'rw'
+        if self.writable:
+            os.makedirs(directory, exist_ok=True)
+        self._files: Dict[str, _ModelFile] = {}
+        self._lock = threading.Lock()
+
+    def _file(self, model_name: str) -> _ModelFile:
+        model_file = self._files.get(model_name)
+        if model_file is None:
+            with self._lock:
+                model_file = self._files.get(model_name)
+                if model_file is None:
+                    safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+                    path = os.path.join(self.directory, f"{safe_name}.emb")
+                    model_file = _ModelFile(path, model_name, self.writable)
+                    self._files[model_name] = model_file
+        return model_file
+
+    def get_many(self, items: List[Tuple[str, str]]) -> List[Optional[np.ndarray]]:
+        """Vetores para pares (modelo, hash sha256 hex do texto)"""
+        refreshed = set()
+        results = []
+        for model_name, text_hash in items:
+            model_file = self._file(model_name)
+            with model_file._lock:
+                if model_name not in refreshed:
+                    model_file.refresh()
+                    refreshed.add(model_name)
+                results.append(model_file.get(text_key(text_hash)))
+        return results
+
+    def put_many(self, model_name: str, entries: List[Tuple[str, Any]]) -> int:
+        """Grava (hash do texto, embedding) ainda ausentes; devolve quantos foram gravados"""
+        if not self.writable or not entries:
+            return 0
+        model_file = self._file(model_name)
+        rows = [(text_key(text_hash), np.asarray(embedding, dtype=np.float32)) for text_hash, embedding in entries]
+        with model_file._lock:
+            try:
+                return model_file.append(rows)
+            except OSError as e:
+                logger.warning(f"⚠️ Falha ao gravar no store em disco ({model_name}): {e}")
+                return 0
+
+    def compact(self, model_name: str) -> Dict[str, int]:
+        model_file = self._file(model_name)
+        with model_file._lock:
+            return model_file.compact()
+
+    def models(self) -> List[str]:
+        """Modelos com arquivo aberto neste processo ou presentes no diretório"""
+        names = set(self._files)
+        if os.path.isdir(self.directory):
+            known = {re.sub(r'[^A-Za-z0-9_.-]', '_', name) for name in names}
+            names.update(f[:-4] for f in os.listdir(self.directory) if f.endswith('.emb') and f[:-4] not in known)
+        return sorted(names)
+
+    def clear(self, model_name: str) -> int:
+        """Remove o arquivo de um modelo; devolve quantas chaves havia"""
+        if not self.writable:
+            return 0
+        model_file = self._file(model_name)
+        with model_file._lock, open(model_file.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                model_file.refresh()
+                keys = len(model_file._index)
+                try:
+                    os.remove(model_file.path)
+                except FileNotFoundError:
+                    pass
+                model_file._reset()
+                return keys
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = dict(self._files)
+        return {
+            'directory': self.directory,
+            'mode': 'rw' if self.writable else 'ro',
+            'models': {name: model_file.stats() for name, model_file in files.items()},
+        }
+
+
+_DISK_STORE: Optional[DiskEmbeddingStore] = None
+_DISK_STORE_LOCK = threading.Lock()
+
+
+def get_disk_store() -> Optional[DiskEmbeddingStore]:
+    """Store em disco compartilhado do processo (None se EMBEDDING_DISK_STORE_MODE=off ou indisponível)"""
+    global _DISK_STORE
+    if EMBEDDING_DISK_STORE_MODE == 'off':
+        return None
+    if _DISK_STORE is None:
+        with _DISK_STORE_LOCK:
+            if _DISK_STORE is None:
+                try:
+                    _DISK_STORE = DiskEmbeddingStore(EMBEDDING_DISK_STORE_DIR, EMBEDDING_DISK_STORE_MODE)
+                    logger.info(f"💽 Store de embeddings em disco: {EMBEDDING_DISK_STORE_DIR} ({EMBEDDING_DISK_STORE_MODE})")
+                except OSError as e:
+                    logger.warning(f"⚠️ Store de embeddings em disco indisponível: {e}")
+                    return None
+    return _DISK_STORE
@@ -0,0 +1,462 @@
+# src/services/embedding_worker.py
+"""
+🧠 WORKER DE EMBEDDINGS (processo dedicado)
+Um único processo carrega os modelos sentence-transformers e atende, por um
+socket Unix local, os pedidos de embedding de todos os workers do gunicorn e
+dos jobs em background. Sem ele, cada worker carrega a própria cópia do
+modelo (~450MB do BERTimbau por processo no container de 1GB) e roda lotes
+pequenos em paralelo, disputando a mesma vCPU.
+
+Protocolo (uma conexão por pedido, cliente síncrono):
+- pedido: uint32 little-endian com o tamanho + JSON {"model": ..., "texts": [...]}
+  (ou {"op": "stats"})
+- resposta: cabeçalho '<BII' (status, linhas, dimensão) + linhas x dimensão
+  float32; status de erro/info traz no lugar das linhas o tamanho da mensagem
+
+O servidor agrupa os pedidos que chegam dentro de EMBEDDING_WORKER_MAX_WAIT_MS
+(do mesmo modelo, até EMBEDDING_WORKER_MAX_BATCH textos) numa única chamada a
+generate_embeddings - que já ordena por tamanho e monta os lotes pelo
+orçamento de tokens -, remove textos repetidos entre os pedidos e devolve a
+cada cliente só os seus embeddings, na ordem enviada.
+
+Cliente: WorkerBackedSentenceTransformer tem a mesma interface do
+SentenceTransformerService; com o worker fora do ar (socket ausente, conexão
+recusada, timeout) cai na inferência no próprio processo e só volta a tentar o
+worker depois de EMBEDDING_WORKER_RETRY_SECONDS.
+
+Uso (a partir de src/; o gunicorn.conf.py já sobe o worker junto com o master):
+    python -m services.embedding_worker
+    python -m services.embedding_worker --preload-models neuralmind/bert-base-portuguese-cased
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import signal
+import socket
+import struct
+import logging
+import argparse
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Caminho do socket Unix do worker
+EMBEDDING_WORKER_SOCKET = os.getenv('EMBEDDING_WORKER_SOCKET', '/tmp/alicit-embedding-worker.sock')
+# auto: usa o worker quando o socket existe, senão inferência no processo; off: sempre no processo
+EMBEDDING_WORKER_MODE = os.getenv('EMBEDDING_WORKER_MODE', 'auto').lower()
+# Janela para juntar pedidos concorrentes num lote e limite de textos por lote agrupado
+EMBEDDING_WORKER_MAX_WAIT_MS = float(os.getenv('EMBEDDING_WORKER_MAX_WAIT_MS', '10'))
+EMBEDDING_WORKER_MAX_BATCH = int(os.getenv('EMBEDDING_WORKER_MAX_BATCH', '256'))
+# Tempo máximo de espera do cliente por uma resposta (inclui a fila do worker)
+EMBEDDING_WORKER_TIMEOUT = float(os.getenv('EMBEDDING_WORKER_TIMEOUT', '120'))
+# Depois de uma falha, segundos usando a inferência local antes de tentar o worker de novo
+EMBEDDING_WORKER_RETRY_SECONDS = float(os.getenv('EMBEDDING_WORKER_RETRY_SECONDS', '30'))
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+STATUS_INFO = 2
+
+_REQUEST_HEADER = struct.Struct('<I')
+_RESPONSE_HEADER = struct.Struct('<BII')
+_MAX_REQUEST_BYTES = 256 * 1024 * 1024
+
+
+class EmbeddingWorkerError(Exception):
+    """Worker respondeu com erro (ex.: modelo não carregou)"""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("conexão fechada pelo outro lado")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _send_message(sock: socket.socket, message: Dict[str, Any]):
+    payload = json.dumps(message, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_REQUEST_HEADER.pack(len(payload)) + payload)
+
+
+def _send_response(sock: socket.socket, status: int, first: int, second: int, payload: bytes = b''):
+    sock.sendall(_RESPONSE_HEADER.pack(status, first, second) + payload)
+
+
+def _is_valid_text(text: Any) -> bool:
+    """Mesmo critério do SentenceTransformerService: texto vazio não gera embedding"""
+    return isinstance(text, str) and bool(text.strip())
+
+
+def _default_service_factory(model_name: str):
+    from services.sentence_transformer_service import SentenceTransformerService
+    return SentenceTransformerService(model_name=model_name)
+
+
+class _PendingRequest:
+    """Pedido de um cliente aguardando o lote agrupado"""
+
+    __slots__ = ('model_name', 'texts', 'done', 'result', 'error')
+
+    def __init__(self, model_name: str, texts: List[str]):
+        self.model_name = model_name
+        self.texts = [text for text in texts if _is_valid_text(text)]
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[str] = None
+
+
+class EmbeddingWorkerServer:
+    """Servidor do socket: uma thread por conexão e uma thread de inferência que agrupa os pedidos"""
+
+    def __init__(self, socket_path: Optional[str] = None, service_factory: Optional[Callable] = None,
+                 max_wait_ms: Optional[float] = None, max_batch: Optional[int] = None):
+        self.socket_path = socket_path or EMBEDDING_WORKER_SOCKET
+        self.service_factory = service_factory or _default_service_factory
+        self.max_wait = (EMBEDDING_WORKER_MAX_WAIT_MS if max_wait_ms is None else max_wait_ms) / 1000
+        self.max_batch = max_batch or EMBEDDING_WORKER_MAX_BATCH
+        self._queue: 'queue.Queue[_PendingRequest]' = queue.Queue()
+        self._deferred: deque = deque()
+        self._services: Dict[str, Any] = {}
+        self._services_lock = threading.Lock()
+        self._listener: Optional[socket.socket] = None
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self._stats = {'requests': 0, 'texts': 0, 'unique_texts': 0, 'batches': 0,
+                       'largest_batch': 0, 'errors': 0, 'inference_seconds': 0.0}
+
+    # ---------- ciclo de vida ----------
+
+    def bind(self):
+        """Cria o socket; remove um socket órfão, mas não rouba o de um worker vivo"""
+        if os.path.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise RuntimeError(f"já existe um worker de embeddings em {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)
+            finally:
+                probe.close()
+
+        os.makedirs(os.path.dirname(self.socket_path) or '.', exist_ok=True)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        listener.listen(128)
+        self._listener = listener
+        return self
+
+    def start(self):
+        """Sobe as threads de accept e de inferência em background (retorna o próprio servidor)"""
+        if self._listener is None:
+            self.bind()
+        for target, name in ((self._accept_loop, 'embedding-worker-accept'),
+                             (self._batch_loop, 'embedding-worker-batch')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"🧠 Worker de embeddings ouvindo em {self.socket_path} "
+                    f"(janela {self.max_wait * 1000:.0f}ms, até {self.max_batch} textos por lote)")
+        return self
+
+    def serve_forever(self, preload_models: Optional[List[str]] = None):
+        """Atende até o shutdown; os modelos de preload carregam com o socket já aberto (pedidos esperam na fila)"""
+        self.start()
+        try:
+            self.preload(preload_models or [])
+            while not self._stopping.wait(1.0):
+                pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        self._stopping.set()
+        if self._listener is not None:
+            try:
+                self._listener.shutdown(socket.SHUT_RDWR)  # acorda o accept() bloqueado
+            except OSError:
+                pass
+            self._listener.close()
+            self._listener = None
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def preload(self, model_names: List[str]):
+        """Carrega os modelos antes do primeiro pedido"""
+        for model_name in model_names:
+            self._service(model_name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_batch'] = round(stats['texts'] / stats['batches'], 1) if stats['batches'] else 0.0
+        stats['models'] = sorted(self._services)
+        stats['pid'] = os.getpid()
+        return stats
+
+    # ---------- conexões ----------
+
+    def _accept_loop(self):
+        while not self._stopping.is_set():
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                break  # listener fechado no shutdown
+            threading.Thread(target=self._handle_connection, args=(connection,), daemon=True).start()
+
+    def _handle_connection(self, connection: socket.socket):
+        with connection:
+            try:
+                while True:
+                    try:
+                        header = _recv_exact(connection, _REQUEST_HEADER.size)
+                    except ConnectionError:
+                        return  # cliente terminou
+                    (size,) = _REQUEST_HEADER.unpack(header)
+                    if size > _MAX_REQUEST_BYTES:
+                        raise ValueError(f"pedido grande demais ({size} bytes)")
+                    message = json.loads(_recv_exact(connection, size).decode('utf-8'))
+                    self._answer(connection, message)
+            except Exception as e:
+                logger.warning(f"⚠️ Conexão com o worker de embeddings encerrada: {e}")
+
+    def _answer(self, connection: socket.socket, message: Dict[str, Any]):
+        if message.get('op') == 'stats':
+            payload = json.dumps(self.stats()).encode('utf-8')
+            _send_response(connection, STATUS_INFO, len(payload), 0, payload)
+            return
+
+        request = _PendingRequest(str(message['model']), list(message.get('texts') or []))
+        if request.texts:
+            self._queue.put(request)
+            request.done.wait()
+        else:
+            request.result = np.zeros((0, 0), dtype=np.float32)
+
+        if request.error is not None:
+            payload = request.error.encode('utf-8')
+            _send_response(connection, STATUS_ERROR, len(payload), 0, payload)
+            return
+        rows, dimensions = request.result.shape
+        _send_response(connection, STATUS_OK, rows, dimensions, request.result.tobytes())
+
+    # ---------- inferência agrupada ----------
+
+    def _next_request(self, timeout: Optional[float]) -> Optional[_PendingRequest]:
+        if self._deferred:
+            return self._deferred.popleft()
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _batch_loop(self):
+        while not self._stopping.is_set():
+            first = self._next_request(timeout=0.5)
+            if first is None:
+                continue
+
+            # Junta os pedidos do mesmo modelo já adiados e os que chegarem na janela;
+            # os de outro modelo esperam a vez
+            batch, other_models = [first], []
+            while self._deferred:
+                request = self._deferred.popleft()
+                (batch if request.model_name == first.model_name else other_models).append(request)
+            total = sum(len(request.texts) for request in batch)
+            deadline = time.monotonic() + self.max_wait
+            while total < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 and self._queue.empty():
+                    break
+                try:
+                    request = self._queue.get(timeout=max(remaining, 0))
+                except queue.Empty:
+                    break
+                if request.model_name == first.model_name:
+                    batch.append(request)
+                    total += len(request.texts)
+                else:
+                    other_models.append(request)
+            self._deferred.extend(other_models)
+
+            self._run_batch(first.model_name, batch)
+
+    def _service(self, model_name: str):
+        service = self._services.get(model_name)
+        if service is None:
+            with self._services_lock:
+                service = self._services.get(model_name)
+                if service is None:
+                    service = self.service_factory(model_name)
+                    self._services[model_name] = service
+        return service
+
+    def _run_batch(self, model_name: str, batch: List[_PendingRequest]):
+        unique_texts = list(dict.fromkeys(text for request in batch for text in request.texts))
+        start = time.perf_counter()
+        try:
+            embeddings = self._service(model_name).generate_embeddings(unique_texts)
+            if embeddings is None or len(embeddings) != len(unique_texts):
+                raise EmbeddingWorkerError(f"modelo {model_name} não gerou os embeddings do lote")
+            matrix = np.asarray(embeddings, dtype=np.float32)
+            position = {text: row for row, text in enumerate(unique_texts)}
+            for request in batch:
+                request.result = matrix[[position[text] for text in request.texts]]
+        except Exception as e:
+            logger.error(f"❌ Worker de embeddings: lote de {len(unique_texts)} textos falhou: {e}")
+            for request in batch:
+                request.error = str(e) or e.__class__.__name__
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self._stats['requests'] += len(batch)
+                self._stats['texts'] += sum(len(request.texts) for request in batch)
+                self._stats['unique_texts'] += len(unique_texts)
+                self._stats['batches'] += 1
+                self._stats['largest_batch'] = max(self._stats['largest_batch'], len(unique_texts))
+                self._stats['inference_seconds'] += elapsed
+                self._stats['errors'] += any(request.error for request in batch)
+            for request in batch:
+                request.done.set()
+
+
+class EmbeddingWorkerClient:
+    """Cliente do socket (uma conexão por pedido: seguro após fork e entre threads)"""
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        self.socket_path = socket_path or EMBEDDING_WORKER_SOCKET
+        self.timeout = EMBEDDING_WORKER_TIMEOUT if timeout is None else timeout
+
+    def available(self) -> bool:
+        return os.path.exists(self.socket_path)
+
+    def _call(self, message: Dict[str, Any]):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            _send_message(sock, message)
+            status, first, second = _RESPONSE_HEADER.unpack(_recv_exact(sock, _RESPONSE_HEADER.size))
+            if status == STATUS_OK:
+                data = _recv_exact(sock, first * second * 4)
+                return np.frombuffer(data, dtype=np.float32).reshape(first, second)
+            payload = _recv_exact(sock, first).decode('utf-8')
+            if status == STATUS_INFO:
+                return json.loads(payload)
+            raise EmbeddingWorkerError(payload)
+
+    def embed(self, model_name: str, texts: List[str]) -> np.ndarray:
+        """Embeddings dos textos não vazios, na ordem enviada (OSError se o worker estiver fora)"""
+        return self._call({'model': model_name, 'texts': list(texts)})
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call({'op': 'stats'})
+
+
+class WorkerBackedSentenceTransformer:
+    """
+    Mesma interface do SentenceTransformerService, com a inferência no worker
+    de embeddings; se o worker estiver fora, carrega o modelo no processo
+    """
+
+    def __init__(self, model_name: str, client: Optional[EmbeddingWorkerClient] = None,
+                 local_factory: Optional[Callable] = None):
+        self.model_name = model_name
+        self.client = client or EmbeddingWorkerClient()
+        self._local_factory = local_factory or _default_service_factory
+        self._local = None
+        self._lock = threading.Lock()
+        self._worker_down_until = 0.0
+        self._dimensions: Optional[int] = None
+
+    def _worker_usable(self) -> bool:
+        return time.monotonic() >= self._worker_down_until and self.client.available()
+
+    def _local_service(self):
+        if self._local is None:
+            with self._lock:
+                if self._local is None:
+                    logger.warning(f"⚠️ Worker de embeddings indisponível: carregando {self.model_name} no processo")
+                    self._local = self._local_factory(self.model_name)
+        return self._local
+
+    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> Optional[List[List[float]]]:
+        if not texts:
+            return []
+        if self._worker_usable():
+            try:
+                matrix = self.client.embed(self.model_name, texts)
+                if matrix.size:
+                    self._dimensions = matrix.shape[1]
+                return matrix.tolist()
+            except (OSError, EmbeddingWorkerError) as e:
+                self._worker_down_until = time.monotonic() + EMBEDDING_WORKER_RETRY_SECONDS
+                logger.warning(f"⚠️ Worker de embeddings falhou ({e}); inferência local por "
+                               f"{EMBEDDING_WORKER_RETRY_SECONDS:.0f}s")
+        return self._local_service().generate_embeddings(texts, batch_size=batch_size)
+
+    def generate_single_embedding(self, text: str) -> Optional[List[float]]:
+        result = self.generate_embeddings([text])
+        return result[0] if result else None
+
+    def get_model_info(self) -> dict:
+        if self._local is not None:
+            return self._local.get_model_info()
+        if self._dimensions is None and self._worker_usable():
+            self.generate_single_embedding("licitação teste")
+        return {
+            'model_name': self.model_name,
+            'backend': 'embedding-worker',
+            'socket': self.client.socket_path,
+            'dimensions': self._dimensions,
+            'status': 'loaded' if self._dimensions else 'not_loaded',
+        }
+
+
+def get_local_embedding_service(model_name: str):
+    """Serviço de embeddings locais do modelo: via worker (EMBEDDING_WORKER_MODE=auto) ou no processo"""
+    if EMBEDDING_WORKER_MODE == 'off':
+        return _default_service_factory(model_name)
+    return WorkerBackedSentenceTransformer(model_name)
+
+
+def _exit_with_parent(parent_pid: int, server: EmbeddingWorkerServer):
+    """Encerra o worker se o master do gunicorn morrer sem avisar"""
+    while os.getppid() == parent_pid:
+        time.sleep(2)
+    logger.warning("⚠️ Processo pai encerrado: parando o worker de embeddings")
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de embeddings (socket Unix)")
+    parser.add_argument('--socket', default=EMBEDDING_WORKER_SOCKET)
+    parser.add_argument('--max-wait-ms', type=float, default=EMBEDDING_WORKER_MAX_WAIT_MS)
+    parser.add_argument('--max-batch', type=int, default=EMBEDDING_WORKER_MAX_BATCH)
+    parser.add_argument('--preload-models', nargs='*', default=[], help='modelos carregados antes de aceitar pedidos')
+    parser.add_argument('--exit-with-parent', action='store_true', help='encerra quando o processo pai terminar')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    server = EmbeddingWorkerServer(args.socket, max_wait_ms=args.max_wait_ms, max_batch=args.max_batch)
+    server.bind()
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.shutdown())
+    if args.exit_with_parent:
+        threading.Thread(target=_exit_with_parent, args=(os.getppid(), server), daemon=True).start()
+    server.serve_forever(args.preload_models)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
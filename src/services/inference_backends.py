@@ -0,0 +1,348 @@
+# src/services/inference_backends.py
+"""
+⚙️ BACKENDS DE INFERÊNCIA DOS MODELOS LOCAIS (SentenceTransformerService)
+
+- torch: PyTorch fp32 (padrão)
+- torch-int8: quantização dinâmica int8 das camadas Linear do transformer
+- onnx: grafo ONNX exportado do transformer, no ONNX Runtime
+- onnx-int8: o mesmo grafo com pesos int8 (quantização dinâmica do ONNX Runtime)
+
+Seleção por modelo:
+    ST_INFERENCE_BACKEND=torch                      # padrão de todos os modelos
+    ST_INFERENCE_BACKENDS="neuralmind/bert-base-portuguese-cased=onnx-int8,..."
+
+Um backend diferente de torch só entra em uso depois de aprovado na checagem
+de precisão (scripts/check_inference_backend.py): embeddings do corpus fixo
+ACCURACY_CORPUS comparados com os do fp32 (cosseno médio, cosseno mínimo e
+vizinho mais próximo igual). Sem aprovação registrada para o corpus atual, o
+serviço continua no fp32.
+"""
+
+import os
+import re
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+try:
+    import onnxruntime
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    onnxruntime = None
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+INFERENCE_BACKENDS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+DEFAULT_BACKEND = 'torch'
+
+ST_INFERENCE_BACKEND = os.getenv('ST_INFERENCE_BACKEND', DEFAULT_BACKEND)
+# Exceções por modelo: "modelo=backend,modelo=backend"
+ST_INFERENCE_BACKENDS = os.getenv('ST_INFERENCE_BACKENDS', '')
+# Resultados da checagem de precisão (um registro por modelo|backend)
+ST_BACKEND_CHECKS_FILE = os.getenv('ST_BACKEND_CHECKS_FILE', os.path.join(_PROJECT_ROOT, 'cache', 'inference_backend_checks.json'))
+# Grafos ONNX exportados (um diretório por modelo)
+ST_ONNX_DIR = os.getenv('ST_ONNX_DIR', os.path.join(_PROJECT_ROOT, 'cache', 'onnx'))
+
+# Critérios de aprovação contra o fp32
+ST_BACKEND_MIN_MEAN_COSINE = float(os.getenv('ST_BACKEND_MIN_MEAN_COSINE', '0.99'))
+ST_BACKEND_MIN_COSINE = float(os.getenv('ST_BACKEND_MIN_COSINE', '0.97'))
+ST_BACKEND_MIN_NEIGHBOR_AGREEMENT = float(os.getenv('ST_BACKEND_MIN_NEIGHBOR_AGREEMENT', '0.95'))
+
+# Corpus fixo da checagem: objetos de licitação e perfis de empresa típicos
+ACCURACY_CORPUS = (
+    "Aquisição de material de expediente para as secretarias municipais",
+    "Contratação de empresa para prestação de serviços de limpeza e conservação predial",
+    "Registro de preços para aquisição de gêneros alimentícios destinados à merenda escolar",
+    "Aquisição de medicamentos da farmácia básica para a Secretaria Municipal de Saúde",
+    "Contratação de serviços de manutenção preventiva e corretiva de veículos da frota",
+    "Fornecimento de combustível (gasolina comum e óleo diesel S10) para a frota municipal",
+    "Aquisição de computadores, notebooks e monitores para o laboratório de informática",
+    "Contratação de empresa de engenharia para pavimentação asfáltica de vias urbanas",
+    "Locação de máquinas pesadas com operador: retroescavadeira, motoniveladora e caminhão caçamba",
+    "Aquisição de uniformes escolares e calçados para alunos da rede municipal",
+    "Serviços de vigilância patrimonial armada e desarmada nas unidades administrativas",
+    "Aquisição de equipamentos médico-hospitalares: monitor multiparamétrico e desfibrilador",
+    "Contratação de serviços de coleta, transporte e destinação final de resíduos sólidos",
+    "Aquisição de mobiliário escolar: carteiras, mesas e cadeiras",
+    "Prestação de serviços de transporte escolar na zona rural",
+    "Fornecimento de oxigênio medicinal e locação de cilindros",
+    "Aquisição de pneus, câmaras de ar e protetores para veículos leves e pesados",
+    "Contratação de empresa para reforma e ampliação da unidade básica de saúde",
+    "Serviços de impressão e reprografia com fornecimento de equipamentos",
+    "Aquisição de kits de material pedagógico para a educação infantil",
+    "Contratação de serviços de tecnologia da informação: suporte técnico e manutenção de redes",
+    "Licença de software de gestão pública com implantação, treinamento e suporte",
+    "Aquisição de materiais elétricos e de iluminação pública com lâmpadas LED",
+    "Fornecimento de água mineral em garrafões de 20 litros",
+    "Aquisição de equipamentos de proteção individual: luvas, máscaras e aventais",
+    "Serviços de dedetização, desratização e limpeza de caixas d'água",
+    "Aquisição de ambulância tipo A para remoção simples",
+    "Contratação de serviços de publicidade institucional e comunicação",
+    "Fornecimento de refeições prontas (marmitex) para servidores em plantão",
+    "Aquisição de tubos de PVC, conexões e material hidráulico",
+    "Empresa fornecedora de material de escritório, papelaria e suprimentos de informática",
+    "Prestadora de serviços de limpeza, jardinagem e conservação de áreas verdes",
+    "Distribuidora de medicamentos e produtos hospitalares para órgãos públicos",
+    "Construtora especializada em obras de pavimentação, drenagem e saneamento",
+    "Revenda de veículos, peças automotivas e oficina mecânica credenciada",
+    "Fabricante de mobiliário escolar e de escritório em aço e MDF",
+    "Empresa de segurança patrimonial e monitoramento eletrônico",
+    "Fornecedor de gêneros alimentícios, hortifrutigranjeiros e produtos da agricultura familiar",
+    "Integradora de soluções de TI, redes, servidores e computadores",
+    "Laboratório de análises clínicas e exames de imagem",
+)
+
+
+def corpus_fingerprint(corpus=None) -> str:
+    return hashlib.sha256('\n'.join(corpus or ACCURACY_CORPUS).encode('utf-8')).hexdigest()[:16]
+
+
+def _parse_backend_overrides(raw: str) -> Dict[str, str]:
+    overrides = {}
+    for item in raw.split(','):
+        if '=' in item:
+            model_name, backend = item.rsplit('=', 1)
+            overrides[model_name.strip()] = backend.strip()
+    return overrides
+
+
+def requested_backend(model_name: str) -> str:
+    """Backend configurado para o modelo (ST_INFERENCE_BACKENDS, senão ST_INFERENCE_BACKEND)"""
+    backend = _parse_backend_overrides(ST_INFERENCE_BACKENDS).get(model_name, ST_INFERENCE_BACKEND)
+    if backend not in INFERENCE_BACKENDS:
+        logger.warning(f"⚠️ Backend de inferência desconhecido para {model_name}: {backend} - usando {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return backend
+
+
+# ------------------------------------------------------------------ checagem de precisão
+
+_CHECKS_LOCK = threading.Lock()
+
+
+def _check_key(model_name: str, backend: str) -> str:
+    return f"{model_name}|{backend}"
+
+
+def load_checks(path: str = None) -> Dict[str, Dict[str, Any]]:
+    path = path or ST_BACKEND_CHECKS_FILE
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ Checagens de backend ilegíveis ({path}): {e}")
+        return {}
+
+
+def record_check(model_name: str, backend: str, result: Dict[str, Any], path: str = None):
+    """Grava o resultado da checagem (escrita atômica: arquivo temporário + os.replace)"""
+    path = path or ST_BACKEND_CHECKS_FILE
+    with _CHECKS_LOCK:
+        checks = load_checks(path)
+        checks[_check_key(model_name, backend)] = dict(
+            result,
+            corpus=corpus_fingerprint(),
+            checked_at=datetime.now().isoformat(timespec='seconds'),
+        )
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checks, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+def approved_backend(model_name: str, checks_path: str = None) -> str:
+    """
+    Backend a usar para o modelo: o configurado, se for o padrão ou se tiver
+    passado na checagem de precisão com o corpus atual; senão o padrão
+    """
+    backend = requested_backend(model_name)
+    if backend == DEFAULT_BACKEND:
+        return backend
+
+    check = load_checks(checks_path).get(_check_key(model_name, backend))
+    if not check or not check.get('passed') or check.get('corpus') != corpus_fingerprint():
+        logger.warning(f"⚠️ Backend {backend} ainda não aprovado para {model_name} "
+                       f"(rode scripts/check_inference_backend.py) - usando {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    return backend
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> Dict[str, Any]:
+    """
+    Concordância entre embeddings de referência (fp32) e do backend candidato
+
+    Returns:
+        mean_cosine / min_cosine entre os pares, neighbor_agreement (fração
+        dos textos cujo vizinho mais próximo no corpus é o mesmo nos dois) e
+        passed segundo os limites ST_BACKEND_MIN_*
+    """
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+
+    cosines = np.einsum('ij,ij->i', reference, candidate)
+
+    def nearest(matrix):
+        similarities = matrix @ matrix.T
+        np.fill_diagonal(similarities, -np.inf)
+        return similarities.argmax(axis=1)
+
+    neighbor_agreement = float(np.mean(nearest(reference) == nearest(candidate)))
+    result = {
+        'texts': len(cosines),
+        'mean_cosine': round(float(cosines.mean()), 6),
+        'min_cosine': round(float(cosines.min()), 6),
+        'neighbor_agreement': round(neighbor_agreement, 4),
+    }
+    result['passed'] = (
+        result['mean_cosine'] >= ST_BACKEND_MIN_MEAN_COSINE
+        and result['min_cosine'] >= ST_BACKEND_MIN_COSINE
+        and result['neighbor_agreement'] >= ST_BACKEND_MIN_NEIGHBOR_AGREEMENT
+    )
+    return result
+
+
+# ------------------------------------------------------------------ backends
+
+def build_encoder(model, model_name: str, backend: str):
+    """
+    Objeto com encode() no lugar do SentenceTransformer carregado em fp32
+
+    torch-int8 quantiza o próprio modelo (in-place); onnx/onnx-int8 exportam o
+    transformer uma vez para ST_ONNX_DIR e liberam os pesos PyTorch.
+    """
+    if backend == 'torch':
+        return model
+
+    if backend == 'torch-int8':
+        import torch
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        return model
+
+    if backend in ('onnx', 'onnx-int8'):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise RuntimeError("onnxruntime não instalado (pip install onnxruntime)")
+        onnx_path = _export_onnx(model, model_name, quantized=backend == 'onnx-int8')
+        return OnnxSentenceEncoder(model, onnx_path)
+
+    raise ValueError(f"Backend de inferência desconhecido: {backend}")
+
+
+def _export_onnx(model, model_name: str, quantized: bool) -> str:
+    """Exporta (uma vez) o transformer do modelo para ONNX; devolve o caminho do grafo"""
+    import torch
+
+    directory = os.path.join(ST_ONNX_DIR, re.sub(r'[^A-Za-z0-9_.-]', '_', model_name))
+    fp32_path = os.path.join(directory, 'model.onnx')
+    int8_path = os.path.join(directory, 'model-int8.onnx')
+    os.makedirs(directory, exist_ok=True)
+
+    if not os.path.exists(fp32_path):
+        logger.info(f"📤 Exportando {model_name} para ONNX...")
+        transformer = model._first_module()
+        sample = transformer.tokenize(["licitação exemplo"])
+        input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+
+        class _LastHiddenState(torch.nn.Module):
+            def __init__(self, auto_model):
+                super().__init__()
+                self.auto_model = auto_model
+
+            def forward(self, *inputs):
+                return self.auto_model(**dict(zip(input_names, inputs)), return_dict=False)[0]
+
+        tmp_path = f"{fp32_path}.{os.getpid()}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                _LastHiddenState(transformer.auto_model).eval(),
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=['last_hidden_state'],
+                dynamic_axes={name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']},
+                opset_version=14,
+            )
+        os.replace(tmp_path, fp32_path)
+
+    if not quantized:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        logger.info(f"🗜️ Quantizando grafo ONNX de {model_name} para int8...")
+        tmp_path = f"{int8_path}.{os.getpid()}.tmp"
+        quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, int8_path)
+    return int8_path
+
+
+class OnnxSentenceEncoder:
+    """
+    encode() compatível com o SentenceTransformer.encode usado no serviço,
+    rodando o transformer no ONNX Runtime (tokenização e pooling do modelo original)
+    """
+
+    def __init__(self, model, onnx_path: str):
+        transformer = model._first_module()
+        modules = list(model._modules.values())
+        pooling = modules[1] if len(modules) > 1 else None
+        extra = [type(module).__name__ for module in modules[2:] if type(module).__name__ != 'Normalize']
+        self.normalize = any(type(module).__name__ == 'Normalize' for module in modules[2:])
+        if pooling is None or extra:
+            raise ValueError(f"Pipeline do modelo não suportado no ONNX: {[type(m).__name__ for m in modules]}")
+        if getattr(pooling, 'pooling_mode_mean_tokens', False):
+            self.pooling = 'mean'
+        elif getattr(pooling, 'pooling_mode_cls_token', False):
+            self.pooling = 'cls'
+        else:
+            raise ValueError("Pooling do modelo não suportado no ONNX (só mean/cls)")
+
+        self.tokenize = transformer.tokenize
+        self.session = self._create_session(onnx_path)
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        # Pesos PyTorch não são mais necessários (tokenizer e pooling ficam)
+        transformer.auto_model = None
+
+    @staticmethod
+    def _create_session(onnx_path: str):
+        import torch
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = torch.get_num_threads()
+        options.inter_op_num_threads = 1
+        return onnxruntime.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+
+    def encode(self, sentences: List[str], batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = False) -> np.ndarray:
+        batches = []
+        for i in range(0, len(sentences), batch_size):
+            features = self.tokenize(sentences[i:i + batch_size])
+            inputs = {name: features[name].numpy().astype(np.int64) for name in self.input_names}
+            token_embeddings = self.session.run(['last_hidden_state'], inputs)[0]
+
+            if self.pooling == 'cls':
+                embeddings = token_embeddings[:, 0]
+            else:
+                mask = inputs['attention_mask'][..., None].astype(np.float32)
+                embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(embeddings.astype(np.float32))
+
+        embeddings = np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+        if normalize_embeddings or self.normalize:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings
+
+    def eval(self):
+        return self
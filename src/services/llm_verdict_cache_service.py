@@ -0,0 +1,234 @@
+# src/services/llm_verdict_cache_service.py
+"""
+🗃️ Cache persistente de vereditos LLM (Postgres + Redis na frente)
+
+Reavaliações enviam os mesmos pares empresa/licitação ao LLM repetidas vezes.
+O veredito bruto do modelo é guardado sob um fingerprint de:
+validador/modelo + versão do prompt + prompt renderizado (perfil da empresa,
+objeto, itens com quantidade, id da licitação e score de similaridade).
+Qualquer entrada do prompt que mude, ou o código que o monta, invalida a entrada.
+"""
+
+import os
+import json
+import hashlib
+import inspect
+import logging
+import time
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+from psycopg2 import errors as pg_errors
+from psycopg2.extras import Json
+
+logger = logging.getLogger(__name__)
+
+LLM_VERDICT_CACHE_ENABLED = os.getenv('LLM_VERDICT_CACHE_ENABLED', 'true').lower() == 'true'
+# TTL da cópia no Redis; o Postgres guarda o veredito sem expiração
+LLM_VERDICT_CACHE_REDIS_TTL = int(os.getenv('LLM_VERDICT_CACHE_REDIS_TTL', str(7 * 86400)))
+REDIS_KEY_PREFIX = 'llm_verdict:'
+# Após erro de conexão, o nível Postgres fica suspenso por este tempo (s)
+POSTGRES_RETRY_AFTER = 60.0
+
+
+@lru_cache(maxsize=None)
+def compute_prompt_version(*prompt_builders: Callable) -> str:
+    """
+    Versão do prompt = hash do código-fonte das funções que montam o prompt
+
+    Qualquer alteração no texto do prompt (ou nos parâmetros da chamada) gera
+    uma versão nova sem precisar de bump manual.
+    """
+    digest = hashlib.sha256()
+    for builder in prompt_builders:
+        try:
+            digest.update(inspect.getsource(builder).encode('utf-8'))
+        except (OSError, TypeError):
+            # Sem código-fonte disponível (ex: .pyc apenas): usar o bytecode
+            code = getattr(builder, '__code__', None)
+            digest.update(code.co_code if code else repr(builder).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+class LLMVerdictCacheService:
+    """Cache de vereditos LLM em dois níveis: Redis (rápido) e Postgres (persistente)"""
+
+    def __init__(self, db_manager=None, redis_client=None):
+        self.db_manager = db_manager
+        self._redis_client = redis_client
+        self._redis_resolved = redis_client is not None
+        self._postgres_available = db_manager is not None
+        self._postgres_retry_at = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            'lookups': 0,
+            'redis_hits': 0,
+            'postgres_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'errors': 0,
+        }
+
+    # ------------------------------------------------------------------ chave
+
+    @staticmethod
+    def fingerprint(validator_id: str, prompt_version: str, prompt: str) -> str:
+        """Fingerprint estável do prompt renderizado para um validador e versão do prompt"""
+        payload = {
+            'validator': validator_id,
+            'prompt_version': prompt_version,
+            'prompt': prompt,
+        }
+        serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------ leitura/escrita
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Buscar veredito: Redis primeiro, depois Postgres (reabastecendo o Redis)"""
+        self._count('lookups')
+
+        redis_client = self._get_redis()
+        if redis_client is not None:
+            try:
+                cached = redis_client.get(REDIS_KEY_PREFIX + fingerprint)
+                if cached:
+                    self._count('redis_hits')
+                    return json.loads(cached)
+            except Exception as e:
+                self._count('errors')
+                logger.warning(f"⚠️ Erro ao ler veredito LLM do Redis: {e}")
+
+        entry = self._get_from_postgres(fingerprint)
+        if entry is not None:
+            self._count('postgres_hits')
+            self._set_redis(fingerprint, entry)
+            return entry
+
+        self._count('misses')
+        return None
+
+    def put(self, fingerprint: str, validator_id: str, prompt_version: str,
+            raw_verdict: Any, model_used: Optional[str] = None) -> bool:
+        """Guardar veredito bruto do LLM nos dois níveis"""
+        entry = {'raw': raw_verdict, 'model_used': model_used, 'validator': validator_id}
+        stored = self._set_redis(fingerprint, entry)
+
+        if self._postgres_enabled():
+            try:
+                with self.db_manager.get_connection() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute("""
+                            INSERT INTO llm_verdict_cache (fingerprint, validator, model_used, prompt_version, verdict)
+                            VALUES (%s, %s, %s, %s, %s)
+                            ON CONFLICT (fingerprint) DO UPDATE SET
+                                model_used = EXCLUDED.model_used,
+                                verdict = EXCLUDED.verdict,
+                                created_at = NOW()
+                        """, (fingerprint, validator_id, model_used, prompt_version, Json(entry)))
+                stored = True
+            except Exception as e:
+                self._handle_postgres_error(e)
+
+        if stored:
+            self._count('stores')
+        return stored
+
+    def _postgres_enabled(self) -> bool:
+        return self._postgres_available and time.monotonic() >= self._postgres_retry_at
+
+    def _get_from_postgres(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        if not self._postgres_enabled():
+            return None
+        try:
+            with self.db_manager.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE llm_verdict_cache
+                        SET hit_count = hit_count + 1, last_hit_at = NOW()
+                        WHERE fingerprint = %s
+                        RETURNING verdict
+                    """, (fingerprint,))
+                    row = cursor.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            self._handle_postgres_error(e)
+            return None
+
+    def _handle_postgres_error(self, error: Exception):
+        self._count('errors')
+        if isinstance(error, pg_errors.UndefinedTable):
+            # Migração não aplicada: seguir só com Redis
+            self._postgres_available = False
+            logger.warning("⚠️ Tabela llm_verdict_cache não existe - cache de vereditos só no Redis "
+                           "(aplique migrations/20261016_01_create_llm_verdict_cache.sql)")
+        else:
+            # Banco instável: não pagar timeout de conexão a cada validação
+            self._postgres_retry_at = time.monotonic() + POSTGRES_RETRY_AFTER
+            logger.warning(f"⚠️ Erro no cache de vereditos LLM (Postgres), suspenso por "
+                           f"{POSTGRES_RETRY_AFTER:.0f}s: {error}")
+
+    def _get_redis(self):
+        if not self._redis_resolved:
+            with self._lock:
+                if not self._redis_resolved:
+                    try:
+                        from config.redis_config import RedisConfig
+                        self._redis_client = RedisConfig.get_redis_client()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Redis indisponível para cache de vereditos LLM: {e}")
+                        self._redis_client = None
+                    self._redis_resolved = True
+        return self._redis_client
+
+    def _set_redis(self, fingerprint: str, entry: Dict[str, Any]) -> bool:
+        redis_client = self._get_redis()
+        if redis_client is None:
+            return False
+        try:
+            redis_client.setex(
+                REDIS_KEY_PREFIX + fingerprint,
+                LLM_VERDICT_CACHE_REDIS_TTL,
+                json.dumps(entry, ensure_ascii=False, default=str).encode('utf-8')
+            )
+            return True
+        except Exception as e:
+            self._count('errors')
+            logger.warning(f"⚠️ Erro ao gravar veredito LLM no Redis: {e}")
+            return False
+
+    # ------------------------------------------------------------------ métricas
+
+    def _count(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas de hit rate do processo atual"""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats['redis_hits'] + stats['postgres_hits']
+        stats['hits'] = hits
+        stats['hit_rate'] = round(hits / stats['lookups'], 4) if stats['lookups'] else 0.0
+        stats['postgres_enabled'] = self._postgres_available
+        stats['redis_enabled'] = self._redis_client is not None if self._redis_resolved else None
+        return stats
+
+
+# Instância única por processo (compartilhada por todos os validadores e threads do pool LLM)
+_verdict_cache: Optional[LLMVerdictCacheService] = None
+_verdict_cache_lock = threading.Lock()
+
+
+def get_llm_verdict_cache() -> Optional[LLMVerdictCacheService]:
+    """Cache de vereditos do processo, ou None se LLM_VERDICT_CACHE_ENABLED=false"""
+    global _verdict_cache
+    if not LLM_VERDICT_CACHE_ENABLED:
+        return None
+    if _verdict_cache is None:
+        with _verdict_cache_lock:
+            if _verdict_cache is None:
+                from config.database import db_manager
+                _verdict_cache = LLMVerdictCacheService(db_manager)
+    return _verdict_cache
@@ -351,6 +351,11 @@ class MatchService:
         """Formatar lista de matches para frontend"""
         return [self._format_match_for_frontend(match) for match in matches]
     
+    def _verdict_cache_stats(self, llm_validator) -> Optional[Dict[str, Any]]:
+        """Hit rate do cache de vereditos LLM (None se validador/cache desativado)"""
+        verdict_cache = getattr(llm_validator, 'verdict_cache', None)
+        return verdict_cache.stats() if verdict_cache else None
+    
     def reevaluate_recent_matches_with_llm(self, days_back: int = 7, limit: int = 10, update_existing: bool = False) -> Dict[str, Any]:
         """
         Reavaliar matches recentes com validação LLM
@@ -482,7 +487,8 @@ class MatchService:
                 'llm_rejected_count': llm_rejected_count,
                 'updated_matches': updated_matches,
                 'period_days': days_back,
-                'approval_rate': round((llm_approved_count / llm_validated_count * 100), 1) if llm_validated_count > 0 else 0
+                'approval_rate': round((llm_approved_count / llm_validated_count * 100), 1) if llm_validated_count > 0 else 0,
+                'verdict_cache': self._verdict_cache_stats(llm_validator)
             }
             
         except Exception as e:
@@ -710,7 +716,8 @@ class MatchService:
                 'llm_approved_count': llm_approved_count,
                 'llm_rejected_count': llm_rejected_count,
                 'target_date': target_date,
-                'approval_rate': round((llm_approved_count / llm_validated_count * 100), 1) if llm_validated_count > 0 else 0
+                'approval_rate': round((llm_approved_count / llm_validated_count * 100), 1) if llm_validated_count > 0 else 0,
+                'verdict_cache': self._verdict_cache_stats(llm_validator)
             }
             
         except Exception as e:
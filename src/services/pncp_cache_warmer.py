@@ -0,0 +1,329 @@
+# src/services/pncp_cache_warmer.py
+"""
+🔥 Aquecimento agendado do dataset nacional do PNCP no Redis
+
+O dataset que o PNCPAdapter filtra em cada busca (pncp:dataset:proposta:8) é
+montado e atualizado fora das requisições:
+- thread em cada worker do gunicorn (post_fork) ou scripts/daily_fetch_all_bids.py
+  via cron; a cada PNCP_CACHE_WARMER_CHECK_SECONDS confere a idade do dataset e,
+  passado PNCP_CACHE_WARMER_INTERVAL, atualiza (delta desde o watermark ou
+  resync completo - ver PNCPAdapter.refresh_dataset)
+- lock no Redis (SET NX PX + liberação por token): um worker busca, os outros pulam;
+  renovado enquanto a busca durar (heartbeat), para não expirar no meio de uma
+  busca nacional lenta
+- o dataset novo substitui o antigo numa transação (MULTI), sem janela vazia
+- busca com cópia velha no cache responde com ela e só dispara o aquecimento;
+  só espera quando não existe cópia nenhuma
+Estado (idade do cache, duração do último aquecimento) em pncp:dataset:warm_status.
+"""
+
+import os
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PNCP_CACHE_WARMER_ENABLED = os.getenv('PNCP_CACHE_WARMER_ENABLED', 'true').lower() == 'true'
+# Idade máxima do dataset antes de um novo aquecimento (s)
+PNCP_CACHE_WARMER_INTERVAL = int(os.getenv('PNCP_CACHE_WARMER_INTERVAL', '1800'))
+# Frequência com que cada worker confere a idade (só um GET no Redis)
+PNCP_CACHE_WARMER_CHECK_SECONDS = float(os.getenv('PNCP_CACHE_WARMER_CHECK_SECONDS', '60'))
+# Expiração do lock: um worker que morre no meio não trava os outros para sempre
+# (quem está buscando renova a cada terço desse tempo)
+PNCP_CACHE_WARMER_LOCK_TTL = int(os.getenv('PNCP_CACHE_WARMER_LOCK_TTL', '600'))
+# Cache frio: quanto uma busca espera pelo worker que está aquecendo antes de buscar sozinha
+PNCP_CACHE_WARMER_COLD_WAIT = float(os.getenv('PNCP_CACHE_WARMER_COLD_WAIT', '120'))
+
+WARM_LOCK_KEY = 'pncp:dataset:warm_lock'
+WARM_STATUS_KEY = 'pncp:dataset:warm_status'
+
+# Libera o lock só se ainda for nosso (pode ter expirado e sido pego por outro worker)
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+# Renova o lock só se ainda for nosso
+_RENEW_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def _default_adapter():
+    from factories.data_source_factory import DataSourceFactory
+    return DataSourceFactory().get_data_source('pncp')
+
+
+def _age_seconds(timestamp: Optional[str]) -> Optional[float]:
+    if not timestamp:
+        return None
+    try:
+        return max(0.0, (datetime.now() - datetime.fromisoformat(timestamp)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class PNCPCacheWarmer:
+    """Mantém o dataset nacional do PNCP quente no Redis (um aquecimento por vez entre workers)"""
+
+    def __init__(self, adapter=None, interval: float = PNCP_CACHE_WARMER_INTERVAL,
+                 check_seconds: float = PNCP_CACHE_WARMER_CHECK_SECONDS,
+                 lock_ttl: float = PNCP_CACHE_WARMER_LOCK_TTL):
+        self._adapter = adapter
+        self.interval = interval
+        self.check_seconds = check_seconds
+        self.lock_ttl = lock_ttl
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._triggered = False
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def adapter(self):
+        if self._adapter is None:
+            with self._lock:
+                if self._adapter is None:
+                    self._adapter = _default_adapter()
+        return self._adapter
+
+    def _redis(self, adapter=None):
+        adapter = adapter or self.adapter
+        return getattr(adapter, 'redis_client', None) if adapter is not None else None
+
+    # ------------------------------------------------------------------ aquecimento
+
+    def warm(self, full: bool = False, force: bool = False, adapter=None) -> Dict[str, Any]:
+        """
+        Uma passada: 'fresh' (dataset novo o bastante), 'locked' (outro worker
+        aquecendo), 'warmed', 'error' ou 'unavailable' (sem Redis)
+        """
+        summary, _ = self._warm(adapter or self.adapter, full=full, force=force)
+        return summary
+
+    def _warm(self, adapter, full: bool = False, force: bool = False) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        redis_client = self._redis(adapter)
+        if redis_client is None:
+            return {'status': 'unavailable'}, None
+
+        if not (force or full):
+            age = self._cache_age(redis_client)
+            if age is not None and age < self.interval:
+                return {'status': 'fresh', 'cache_age_s': round(age, 1)}, None
+
+        token = uuid.uuid4().hex
+        try:
+            if not redis_client.set(WARM_LOCK_KEY, token, nx=True, px=int(self.lock_ttl * 1000)):
+                return {'status': 'locked'}, None
+        except Exception as e:
+            logger.warning(f"⚠️ Lock do aquecimento do PNCP indisponível: {e}")
+            return {'status': 'unavailable', 'error': str(e)}, None
+
+        started_at = datetime.now()
+        start = time.perf_counter()
+        dataset, error = None, None
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._renew_lock, args=(redis_client, token, done),
+                                     name='pncp-cache-warm-lock', daemon=True)
+        heartbeat.start()
+        try:
+            logger.info(f"🔥 Aquecendo dataset do PNCP ({'completo' if full else 'delta ou completo'})")
+            dataset = asyncio.run(adapter.refresh_dataset(full=full))
+        except Exception as e:
+            error = str(e)
+            logger.error(f"❌ Falha ao aquecer dataset do PNCP: {e}")
+        finally:
+            duration = time.perf_counter() - start
+            done.set()
+            heartbeat.join()
+            try:
+                redis_client.eval(_RELEASE_LOCK_SCRIPT, 1, WARM_LOCK_KEY, token)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao liberar lock do aquecimento do PNCP: {e}")
+
+        summary = self._record_status(redis_client, dataset, started_at, duration, error)
+        if dataset is not None:
+            logger.info(f"✅ Dataset do PNCP aquecido em {duration:.1f}s ({summary['records']} registros, "
+                        f"{summary['last_warm_mode']}, watermark {summary['watermark']})")
+        return summary, dataset
+
+    def _renew_lock(self, redis_client, token: str, done: threading.Event):
+        """Heartbeat: estende o lock enquanto a busca roda (PEXPIRE só se o token ainda for nosso)"""
+        while not done.wait(self.lock_ttl / 3):
+            try:
+                if not redis_client.eval(_RENEW_LOCK_SCRIPT, 1, WARM_LOCK_KEY, token, int(self.lock_ttl * 1000)):
+                    logger.warning("⚠️ Lock do aquecimento do PNCP perdido (expirou ou foi pego por outro worker)")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ Erro ao renovar lock do aquecimento do PNCP: {e}")
+
+    def ensure_dataset(self, adapter=None, timeout: float = PNCP_CACHE_WARMER_COLD_WAIT) -> Optional[Dict[str, Any]]:
+        """Cache frio: aquece sob o lock ou espera o worker que já está aquecendo"""
+        return self.ensure(adapter, timeout)[1]
+
+    def ensure(self, adapter=None, timeout: float = PNCP_CACHE_WARMER_COLD_WAIT) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Como ensure_dataset, com o motivo quando não há dataset: 'error' (a busca
+        falhou), 'timeout' (outro worker ainda aquecendo: a requisição busca sozinha)
+        ou 'unavailable' (sem Redis/lock: a requisição busca sozinha)
+        """
+        adapter = adapter or self.adapter
+        deadline = time.monotonic() + timeout
+        while True:
+            summary, dataset = self._warm(adapter, force=True)
+            if dataset is not None:
+                return 'warmed', dataset
+            if summary['status'] != 'locked':
+                return summary['status'], None
+            if time.monotonic() >= deadline:
+                logger.warning(f"⚠️ Dataset do PNCP não ficou pronto em {timeout:.0f}s")
+                return 'timeout', None
+            time.sleep(1.0)
+            # Antes de tentar o lock de novo: o outro worker pode ter acabado
+            dataset = adapter._read_dataset_cache()
+            if dataset:
+                return 'cached', dataset
+
+    def trigger(self, adapter=None) -> bool:
+        """Aquecimento em segundo plano (sem bloquear a busca); False se já há um neste processo"""
+        with self._lock:
+            if self._triggered:
+                return False
+            self._triggered = True
+
+        def run():
+            try:
+                # Quem dispara já viu a cópia velha: não depende do estado gravado
+                self.warm(force=True, adapter=adapter)
+            except Exception as e:
+                logger.error(f"❌ Erro no aquecimento do PNCP disparado pela busca: {e}")
+            finally:
+                with self._lock:
+                    self._triggered = False
+
+        threading.Thread(target=run, name='pncp-cache-warm', daemon=True).start()
+        return True
+
+    # ------------------------------------------------------------------ agendamento
+
+    def start(self) -> bool:
+        """Thread que confere a idade do dataset e aquece quando passar do intervalo"""
+        if not PNCP_CACHE_WARMER_ENABLED:
+            return False
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='pncp-cache-warmer', daemon=True)
+            self._thread.start()
+        logger.info(f"🔥 Aquecedor do dataset do PNCP iniciado (intervalo {self.interval:.0f}s)")
+        return True
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        # Primeira conferência logo na subida, com atraso aleatório para os workers não baterem juntos
+        delay = random.uniform(0, min(5.0, self.check_seconds))
+        while not self._stop.wait(delay):
+            try:
+                self.warm()
+            except Exception as e:
+                logger.error(f"❌ Erro no aquecedor do dataset do PNCP: {e}")
+            delay = self.check_seconds
+
+    # ------------------------------------------------------------------ estado
+
+    def _cache_age(self, redis_client) -> Optional[float]:
+        return _age_seconds(self._read_status(redis_client).get('synced_at'))
+
+    def _read_status(self, redis_client) -> Dict[str, Any]:
+        try:
+            raw = redis_client.get(WARM_STATUS_KEY)
+            return json.loads(raw) if raw else {}
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler estado do aquecimento do PNCP: {e}")
+            return {}
+
+    def _record_status(self, redis_client, dataset: Optional[Dict[str, Any]], started_at: datetime,
+                       duration: float, error: Optional[str]) -> Dict[str, Any]:
+        state = self._read_status(redis_client)
+        state.update({
+            'last_warm_at': started_at.isoformat(timespec='seconds'),
+            'last_warm_duration_s': round(duration, 3),
+            'last_warm_error': error,
+            'warmed_by': self._owner,
+        })
+        if dataset is not None:
+            state.update({
+                'synced_at': dataset.get('synced_at'),
+                'watermark': dataset.get('watermark'),
+                'records': len(dataset.get('data', [])),
+                'last_warm_mode': (dataset.get('last_sync') or {}).get('mode'),
+            })
+        try:
+            redis_client.set(WARM_STATUS_KEY, json.dumps(state))
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao gravar estado do aquecimento do PNCP: {e}")
+        state.setdefault('records', None)
+        state.setdefault('watermark', None)
+        state.setdefault('last_warm_mode', None)
+        state['status'] = 'error' if error else 'warmed'
+        return state
+
+    def status(self) -> Dict[str, Any]:
+        """Idade do cache, último aquecimento (duração, modo, erro) e se há um em andamento"""
+        redis_client = self._redis()
+        if redis_client is None:
+            return {'enabled': PNCP_CACHE_WARMER_ENABLED, 'redis': False}
+        state = self._read_status(redis_client)
+        try:
+            holder = redis_client.get(WARM_LOCK_KEY)
+        except Exception:
+            holder = None
+        age = _age_seconds(state.get('synced_at'))
+        return {
+            'enabled': PNCP_CACHE_WARMER_ENABLED,
+            'redis': True,
+            'scheduler_running': self._thread is not None and self._thread.is_alive(),
+            'warming_now': holder is not None,
+            'interval_s': self.interval,
+            'cache_age_s': round(age, 1) if age is not None else None,
+            'synced_at': state.get('synced_at'),
+            'watermark': state.get('watermark'),
+            'records': state.get('records'),
+            'last_warm_at': state.get('last_warm_at'),
+            'last_warm_duration_s': state.get('last_warm_duration_s'),
+            'last_warm_mode': state.get('last_warm_mode'),
+            'last_warm_error': state.get('last_warm_error'),
+            'warmed_by': state.get('warmed_by'),
+        }
+
+
+# Instância única por processo
+_warmer: Optional[PNCPCacheWarmer] = None
+_warmer_lock = threading.Lock()
+
+
+def get_pncp_cache_warmer() -> PNCPCacheWarmer:
+    global _warmer
+    if _warmer is None:
+        with _warmer_lock:
+            if _warmer is None:
+                _warmer = PNCPCacheWarmer()
+    return _warmer
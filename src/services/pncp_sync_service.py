@@ -0,0 +1,215 @@
+# src/services/pncp_sync_service.py
+"""
+🔄 Sincronização incremental com o PNCP (watermark por fonte e modalidade)
+
+Em vez de baixar a janela inteira de novo a cada execução, guarda a maior
+dataAtualizacao já processada e pede ao PNCP só o delta
+(/contratacoes/atualizacao de watermark - PNCP_SYNC_OVERLAP_DAYS até hoje).
+O delta é mesclado por numeroControlePNCP no que já existe (tabela
+licitacoes ou dataset em cache do PNCPAdapter).
+
+Resync completo: sem watermark, PNCP_SYNC_MODE=full, pedido explícito
+(full_resync=True) ou a cada PNCP_FULL_RESYNC_DAYS dias.
+"""
+
+import os
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from psycopg2 import errors as pg_errors
+
+logger = logging.getLogger(__name__)
+
+# incremental (padrão) | full (sempre janela completa, watermark só é regravado)
+PNCP_SYNC_MODE = os.getenv('PNCP_SYNC_MODE', 'incremental').lower()
+# A API filtra por dia (sem hora): o dia do watermark sempre volta; estes dias a mais
+# cobrem atualizações que o PNCP indexa com atraso
+PNCP_SYNC_OVERLAP_DAYS = int(os.getenv('PNCP_SYNC_OVERLAP_DAYS', '1'))
+# Resync completo automático depois de N dias só com deltas (0 = só sob demanda)
+PNCP_FULL_RESYNC_DAYS = int(os.getenv('PNCP_FULL_RESYNC_DAYS', '7'))
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+
+def record_timestamp(record: Dict[str, Any]) -> Optional[str]:
+    """Data de atualização da contratação (ISO sem fração), caindo para a publicação"""
+    value = (record.get('dataAtualizacao') or record.get('dataAtualizacaoGlobal')
+             or record.get('dataPublicacaoPncp'))
+    if not value:
+        return None
+    return str(value).replace(' ', 'T')[:19]
+
+
+def max_timestamp(records: Iterable[Dict[str, Any]], current: Optional[str] = None) -> Optional[str]:
+    """Maior record_timestamp entre os registros e o watermark atual"""
+    for record in records:
+        timestamp = record_timestamp(record)
+        if timestamp and (current is None or timestamp > current):
+            current = timestamp
+    return current
+
+
+def is_newer(record: Dict[str, Any], watermark: Optional[str]) -> bool:
+    """Atualizado depois do watermark (sem data = tratado como novo)"""
+    timestamp = record_timestamp(record)
+    return watermark is None or timestamp is None or timestamp > watermark
+
+
+def is_proposal_open(record: Dict[str, Any], now: datetime = None, until: str = None) -> bool:
+    """Recebimento de propostas ainda aberto (e encerrando até 'until', YYYYMMDD)"""
+    closes_at = record.get('dataEncerramentoProposta')
+    if not closes_at:
+        return True
+    closes_at = str(closes_at).replace(' ', 'T')[:19]
+    if closes_at < (now or datetime.now()).strftime(TIMESTAMP_FORMAT):
+        return False
+    return until is None or closes_at[:10].replace('-', '') <= until
+
+
+def delta_window(watermark: str, today: date = None) -> Tuple[str, str]:
+    """(dataInicial, dataFinal) no formato YYYYMMDD do delta desde o watermark"""
+    today = today or date.today()
+    start = _as_datetime(watermark).date() - timedelta(days=max(0, PNCP_SYNC_OVERLAP_DAYS))
+    return min(start, today).strftime('%Y%m%d'), today.strftime('%Y%m%d')
+
+
+def needs_full_resync(state: Optional[Dict[str, Any]], now: datetime = None) -> bool:
+    """Sem watermark, modo full ou último resync completo mais velho que PNCP_FULL_RESYNC_DAYS"""
+    if PNCP_SYNC_MODE == 'full' or not state or not state.get('watermark'):
+        return True
+    last_full = state.get('last_full_sync_at')
+    if last_full is None:
+        return True
+    if PNCP_FULL_RESYNC_DAYS <= 0:
+        return False
+    return (now or datetime.now()) - _as_datetime(last_full) >= timedelta(days=PNCP_FULL_RESYNC_DAYS)
+
+
+def merge_records(
+    existing: List[Dict[str, Any]],
+    delta: List[Dict[str, Any]],
+    keep: Callable[[Dict[str, Any]], bool] = None
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Mescla o delta no dataset por numeroControlePNCP
+
+    Atualizados são substituídos na mesma posição, novos vão para o fim e, com
+    keep, saem os que deixaram de valer (ex: proposta encerrada).
+    """
+    merged = {record['numeroControlePNCP']: record for record in existing}
+    stats = {'added': 0, 'updated': 0, 'removed': 0}
+    for record in delta:
+        pncp_id = record['numeroControlePNCP']
+        stats['updated' if pncp_id in merged else 'added'] += 1
+        merged[pncp_id] = record
+    if keep is not None:
+        before = len(merged)
+        merged = {pncp_id: record for pncp_id, record in merged.items() if keep(record)}
+        stats['removed'] = before - len(merged)
+    return list(merged.values()), stats
+
+
+def _as_datetime(value: Union[str, datetime]) -> datetime:
+    """ISO ou datetime (com fuso vira horário local sem fuso)"""
+    if isinstance(value, datetime):
+        return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+    return datetime.fromisoformat(str(value).replace(' ', 'T')[:19])
+
+
+class SyncWatermarkStore:
+    """Watermarks em pncp_sync_watermarks; sem a tabela, toda execução vira resync completo"""
+
+    def __init__(self, db_manager=None):
+        self.db_manager = db_manager
+        self._available = db_manager is not None
+
+    def get(self, source: str, modalidade: int) -> Optional[Dict[str, Any]]:
+        """Estado da sincronização, ou None (nunca sincronizado / tabela indisponível)"""
+        if not self._available:
+            return None
+        try:
+            with self.db_manager.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT watermark, records_synced, last_sync_at, last_full_sync_at
+                        FROM pncp_sync_watermarks
+                        WHERE source = %s AND modalidade = %s
+                    """, (source, modalidade))
+                    row = cursor.fetchone()
+        except Exception as e:
+            self._handle_error(e)
+            return None
+        if not row:
+            return None
+        return {
+            'watermark': row[0].strftime(TIMESTAMP_FORMAT),
+            'records_synced': row[1],
+            'last_sync_at': row[2],
+            'last_full_sync_at': row[3],
+        }
+
+    def advance(self, source: str, modalidade: int, watermark: str, full: bool = False, records: int = 0) -> bool:
+        """Grava o watermark (só avança, exceto no resync completo, que o redefine)"""
+        if not self._available:
+            return False
+        try:
+            with self.db_manager.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        INSERT INTO pncp_sync_watermarks
+                            (source, modalidade, watermark, records_synced, last_sync_at, last_full_sync_at)
+                        VALUES (%s, %s, %s, %s, NOW(), CASE WHEN %s THEN NOW() END)
+                        ON CONFLICT (source, modalidade) DO UPDATE SET
+                            watermark = CASE WHEN %s THEN EXCLUDED.watermark
+                                             ELSE GREATEST(pncp_sync_watermarks.watermark, EXCLUDED.watermark) END,
+                            records_synced = EXCLUDED.records_synced,
+                            last_sync_at = NOW(),
+                            last_full_sync_at = COALESCE(EXCLUDED.last_full_sync_at,
+                                                         pncp_sync_watermarks.last_full_sync_at)
+                    """, (source, modalidade, watermark, records, full, full))
+            return True
+        except Exception as e:
+            self._handle_error(e)
+            return False
+
+    def reset(self, source: str, modalidade: int = None) -> bool:
+        """Apaga o watermark: a próxima execução faz resync completo"""
+        if not self._available:
+            return False
+        try:
+            with self.db_manager.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    if modalidade is None:
+                        cursor.execute("DELETE FROM pncp_sync_watermarks WHERE source = %s", (source,))
+                    else:
+                        cursor.execute("DELETE FROM pncp_sync_watermarks WHERE source = %s AND modalidade = %s",
+                                       (source, modalidade))
+            return True
+        except Exception as e:
+            self._handle_error(e)
+            return False
+
+    def _handle_error(self, error: Exception):
+        if isinstance(error, pg_errors.UndefinedTable):
+            self._available = False
+            logger.warning("⚠️ Tabela pncp_sync_watermarks não existe - sincronização sempre completa "
+                           "(aplique migrations/20261016_02_create_pncp_sync_watermarks.sql)")
+        else:
+            logger.warning(f"⚠️ Erro ao acessar watermark de sincronização do PNCP: {error}")
+
+
+# Instância única por processo
+_sync_store: Optional[SyncWatermarkStore] = None
+_sync_store_lock = threading.Lock()
+
+
+def get_sync_watermark_store() -> SyncWatermarkStore:
+    global _sync_store
+    if _sync_store is None:
+        with _sync_store_lock:
+            if _sync_store is None:
+                from config.database import db_manager
+                _sync_store = SyncWatermarkStore(db_manager)
+    return _sync_store
@@ -38,9 +38,9 @@ class RAGService:
         
         # 🔧 CORREÇÃO: Inicializar SentenceTransformerService uma única vez
         try:
-            from services.sentence_transformer_service import SentenceTransformerService
-            self.sentence_transformer_service = SentenceTransformerService()
-            logger.info("✅ SentenceTransformerService inicializado (singleton)")
+            from services.embedding_worker import get_local_embedding_service
+            self.sentence_transformer_service = get_local_embedding_service("neuralmind/bert-base-portuguese-cased")
+            logger.info("✅ SentenceTransformerService inicializado (worker de embeddings ou singleton)")
         except Exception as e:
             logger.warning(f"⚠️ SentenceTransformerService não disponível: {e}")
             self.sentence_transformer_service = None
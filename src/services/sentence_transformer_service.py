@@ -5,24 +5,113 @@ from sentence_transformers import SentenceTransformer
 from typing import List, Optional
 import numpy as np
 import os
+import math
+import time
+import threading
 from functools import lru_cache
+from services.inference_backends import approved_backend, build_encoder, DEFAULT_BACKEND, ACCURACY_CORPUS
 
 logger = logging.getLogger(__name__)
 
+# Tokens por lote (contando padding): textos ordenados por tamanho e agrupados até
+# este orçamento, no máximo ST_MAX_BATCH_SIZE textos por lote
+ST_BATCH_TOKEN_BUDGET = int(os.getenv('ST_BATCH_TOKEN_BUDGET', '8192'))
+ST_MAX_BATCH_SIZE = int(os.getenv('ST_MAX_BATCH_SIZE', '128'))
+# Truncamento em tokens (0 = limite do próprio modelo)
+ST_MAX_SEQ_LENGTH = int(os.getenv('ST_MAX_SEQ_LENGTH', '0'))
+# Threads intra-op do PyTorch: ST_NUM_THREADS fixa o valor; senão, na primeira carga
+# de modelo, autoajuste entre 1 e a cota de CPU do container (cgroup)
+ST_NUM_THREADS = int(os.getenv('ST_NUM_THREADS', '0'))
+ST_THREAD_AUTOTUNE = os.getenv('ST_THREAD_AUTOTUNE', 'true').lower() == 'true'
+
+_THREADS_LOCK = threading.Lock()
+_tuned_threads: Optional[int] = None
+
+
+def cpu_quota() -> float:
+    """CPUs disponíveis para o processo: cota do cgroup (v2 ou v1) limitada pela afinidade"""
+    if hasattr(os, 'sched_getaffinity'):
+        available = len(os.sched_getaffinity(0))
+    else:
+        available = os.cpu_count() or 1
+    
+    quota = None
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            limit, period = f.read().split()[:2]
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    
+    return min(available, quota) if quota else available
+
+
+def _set_threads(threads: int):
+    torch.set_num_threads(threads)
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+
+
+def _autotune_threads(model) -> int:
+    """
+    Escolhe (uma vez por processo) o número de threads intra-op mais rápido
+    para um lote fixo, entre 1 e a cota de CPU arredondada para cima
+    """
+    global _tuned_threads
+    with _THREADS_LOCK:
+        if _tuned_threads is not None:
+            return _tuned_threads
+        
+        max_threads = min(8, max(1, math.ceil(cpu_quota())))
+        if ST_NUM_THREADS > 0:
+            choice = ST_NUM_THREADS
+        elif not ST_THREAD_AUTOTUNE or max_threads == 1:
+            choice = max_threads
+        else:
+            sample = list(ACCURACY_CORPUS[:16])
+            timings = {}
+            with torch.no_grad():
+                for threads in range(1, max_threads + 1):
+                    _set_threads(threads)
+                    model.encode(sample[:4], batch_size=4, show_progress_bar=False)
+                    start = time.perf_counter()
+                    model.encode(sample, batch_size=len(sample), show_progress_bar=False)
+                    timings[threads] = time.perf_counter() - start
+            choice = min(timings, key=timings.get)
+            logger.info("🧵 Autoajuste de threads: " + ", ".join(
+                f"{threads}={elapsed * 1000:.0f}ms" for threads, elapsed in timings.items()))
+        
+        _set_threads(choice)
+        _tuned_threads = choice
+        logger.info(f"🧵 PyTorch com {choice} threads (cota de CPU {cpu_quota():.2f})")
+        return choice
+
 class SentenceTransformerService:
     """Sentence Transformers otimizado para Railway"""
     
-    _instances = {}  # Cache de instâncias por modelo
+    _instances = {}  # Cache de instâncias por (modelo, backend)
     
-    def __new__(cls, model_name: str = "neuralmind/bert-base-portuguese-cased"):
-        # Implementar singleton por modelo
-        if model_name not in cls._instances:
+    def __new__(cls, model_name: str = "neuralmind/bert-base-portuguese-cased", backend: Optional[str] = None):
+        # Implementar singleton por modelo e backend de inferência
+        # (sem backend explícito: o configurado, se aprovado na checagem de precisão)
+        backend = backend or approved_backend(model_name)
+        key = (model_name, backend)
+        if key not in cls._instances:
             instance = super().__new__(cls)
-            cls._instances[model_name] = instance
+            cls._instances[key] = instance
             instance._initialized = False
-        return cls._instances[model_name]
+            instance.backend = backend
+        return cls._instances[key]
     
-    def __init__(self, model_name: str = "neuralmind/bert-base-portuguese-cased"):
+    def __init__(self, model_name: str = "neuralmind/bert-base-portuguese-cased", backend: Optional[str] = None):
         # Evitar re-inicialização
         if hasattr(self, '_initialized') and self._initialized:
             return
@@ -30,6 +119,7 @@ class SentenceTransformerService:
         self.model_name = model_name
         self.device = 'cpu'  # Railway não tem GPU
         self.model = None
+        self.encoder = None
         
         # Configurações de otimização para CPU
         self._configure_cpu_optimization()
@@ -40,9 +130,9 @@ class SentenceTransformerService:
     
     def _configure_cpu_optimization(self):
         """Otimizações específicas para CPU no Railway"""
-        # Configurar PyTorch para CPU
-        torch.set_num_threads(2)  # Railway tem 2 vCPUs
-        os.environ['OMP_NUM_THREADS'] = '2'
+        # Configurar PyTorch para CPU: cota do container até o autoajuste (ver _autotune_threads)
+        if _tuned_threads is None:
+            _set_threads(ST_NUM_THREADS or max(1, math.ceil(cpu_quota())))
         os.environ['TOKENIZERS_PARALLELISM'] = 'false'
         
         # Configurações de memória
@@ -68,7 +158,22 @@ class SentenceTransformerService:
             if hasattr(self.model._modules['0'], 'auto_model'):
                 self.model._modules['0'].auto_model.config.use_cache = False
             
-            logger.info(f"✅ Modelo carregado: {self.model_name}")
+            # Truncamento configurável (tokens além disso são descartados)
+            if ST_MAX_SEQ_LENGTH > 0:
+                self.model.max_seq_length = ST_MAX_SEQ_LENGTH
+            self.max_seq_length = self.model.max_seq_length or 512
+            
+            self.num_threads = _autotune_threads(self.model)
+            
+            self.encoder = self.model
+            if self.backend != DEFAULT_BACKEND:
+                try:
+                    self.encoder = build_encoder(self.model, self.model_name, self.backend)
+                except Exception as e:
+                    logger.warning(f"⚠️ Backend {self.backend} indisponível para {self.model_name}: {e} - usando {DEFAULT_BACKEND}")
+                    self.backend = DEFAULT_BACKEND
+            
+            logger.info(f"✅ Modelo carregado: {self.model_name} (backend {self.backend})")
             logger.info(f"📊 Dimensões: {self.model.get_sentence_embedding_dimension()}")
             
         except Exception as e:
@@ -76,9 +181,15 @@ class SentenceTransformerService:
             self.model = None
             raise
     
-    def generate_embeddings(self, texts: List[str], batch_size: int = 32) -> Optional[List[List[float]]]:
-        """Gera embeddings otimizado para CPU"""
-        if not self.model:
+    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> Optional[List[List[float]]]:
+        """
+        Gera embeddings otimizado para CPU
+        
+        Os textos são ordenados por número de tokens e agrupados em lotes de até
+        ST_BATCH_TOKEN_BUDGET tokens com padding (batch_size, se informado,
+        limita a quantidade de textos por lote); a saída volta na ordem de entrada.
+        """
+        if not self.encoder:
             logger.error("❌ Modelo não carregado")
             return None
         
@@ -98,17 +209,17 @@ class SentenceTransformerService:
                 logger.warning("⚠️ Nenhum texto válido encontrado")
                 return []
             
-            # Gerar embeddings em batches pequenos para Railway
-            all_embeddings = []
+            all_embeddings = [None] * len(valid_texts)
+            batches = self._length_buckets(valid_texts, batch_size or ST_MAX_BATCH_SIZE)
             
             with torch.no_grad():  # Economizar memória
-                for i in range(0, len(valid_texts), batch_size):
-                    batch = valid_texts[i:i + batch_size]
+                for number, indices in enumerate(batches, 1):
+                    batch = [valid_texts[i] for i in indices]
                     
-                    logger.debug(f"📦 Processando batch {i//batch_size + 1}")
+                    logger.debug(f"📦 Processando batch {number}/{len(batches)} ({len(batch)} textos)")
                     
                     # Encoding otimizado
-                    batch_embeddings = self.model.encode(
+                    batch_embeddings = self.encoder.encode(
                         batch,
                         batch_size=len(batch),
                         show_progress_bar=False,
@@ -116,17 +227,49 @@ class SentenceTransformerService:
                         normalize_embeddings=True  # Normalização para melhor similaridade
                     )
                     
-                    # Converter para lista de listas
-                    for embedding in batch_embeddings:
-                        all_embeddings.append(embedding.tolist())
+                    # Converter para lista de listas, na posição original
+                    for i, embedding in zip(indices, batch_embeddings):
+                        all_embeddings[i] = embedding.tolist()
             
-            logger.info(f"✅ {len(all_embeddings)} embeddings ST gerados")
+            logger.info(f"✅ {len(all_embeddings)} embeddings ST gerados em {len(batches)} lotes")
             return all_embeddings
             
         except Exception as e:
             logger.error(f"❌ Erro ao gerar embeddings ST: {e}")
             return None
     
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Tokens de cada texto (com tokens especiais, já truncado em max_seq_length)"""
+        try:
+            encoded = self.model.tokenizer(
+                texts, add_special_tokens=True, truncation=True, max_length=self.max_seq_length
+            )
+            return [len(ids) for ids in encoded['input_ids']]
+        except Exception:
+            # Estimativa grosseira: ~4 caracteres por token
+            return [min(self.max_seq_length, len(text) // 4 + 2) for text in texts]
+    
+    def _length_buckets(self, texts: List[str], max_batch_size: int) -> List[List[int]]:
+        """
+        Índices dos textos agrupados em lotes de tamanho parecido
+        
+        Em ordem crescente de tokens, um lote fecha quando o próximo texto
+        faria (textos x maior tamanho) passar de ST_BATCH_TOKEN_BUDGET ou
+        quando atinge max_batch_size textos.
+        """
+        lengths = self._token_lengths(texts)
+        batches = []
+        current = []
+        for i in np.argsort(lengths, kind='stable'):
+            padded_tokens = (len(current) + 1) * max(lengths[i], 1)
+            if current and (padded_tokens > ST_BATCH_TOKEN_BUDGET or len(current) >= max_batch_size):
+                batches.append(current)
+                current = []
+            current.append(int(i))
+        if current:
+            batches.append(current)
+        return batches
+    
     def generate_single_embedding(self, text: str) -> Optional[List[float]]:
         """Gera embedding único"""
         result = self.generate_embeddings([text])
@@ -154,7 +297,9 @@ class SentenceTransformerService:
         return {
             'model_name': self.model_name,
             'device': self.device,
+            'backend': self.backend,
             'dimensions': self.model.get_sentence_embedding_dimension(),
             'max_seq_length': getattr(self.model, 'max_seq_length', 512),
+            'num_threads': torch.get_num_threads(),
             'status': 'loaded'
         }
\ No newline at end of file
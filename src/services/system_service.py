@@ -131,6 +131,8 @@ class SystemService:
                     'api': 'running'
                 },
                 'background_jobs': health['components']['background_processes'],
+                'database_pool': health['components']['database'].get('pool', {}),
+                'llm_verdict_cache': self._get_llm_verdict_cache_stats(),
                 'configuration': {
                     'vectorizers': health['components']['vectorizers'],
                     'database_info': health['components']['database']
@@ -151,6 +153,12 @@ class SystemService:
                 'last_updated': datetime.now().isoformat()
             }
     
+    def _get_llm_verdict_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Hit rate do cache de vereditos LLM neste processo"""
+        from services.llm_verdict_cache_service import get_llm_verdict_cache
+        verdict_cache = get_llm_verdict_cache()
+        return verdict_cache.stats() if verdict_cache else None
+    
     def get_daily_bids_status(self) -> Dict[str, Any]:
         """GET /api/status/daily-bids - Status da busca diária"""
         daily_status = self.process_status['daily_bids']
@@ -163,6 +171,29 @@ class SystemService:
             'status': 'running' if daily_status['running'] else 'idle'
         }
     
+    def get_pncp_cache_status(self) -> Dict[str, Any]:
+        """GET /api/status/pncp-cache - Idade do dataset do PNCP em cache e último aquecimento"""
+        from services.pncp_cache_warmer import get_pncp_cache_warmer
+        return get_pncp_cache_warmer().status()
+    
+    def warm_pncp_cache(self, full: bool = False) -> Dict[str, Any]:
+        """POST /api/pncp-cache/warm - Aquecer o dataset do PNCP em segundo plano"""
+        from services.pncp_cache_warmer import get_pncp_cache_warmer
+        warmer = get_pncp_cache_warmer()
+        
+        def run():
+            try:
+                warmer.warm(full=full, force=True)
+            except Exception as e:
+                logger.error(f"❌ Erro no aquecimento manual do PNCP: {e}")
+        
+        threading.Thread(target=run, name='pncp-cache-warm-manual', daemon=True).start()
+        return {
+            'success': True,
+            'message': f"Aquecimento {'completo' if full else 'incremental'} do dataset do PNCP iniciado",
+            'status': warmer.status()
+        }
+    
     def get_reevaluate_status(self) -> Dict[str, Any]:
         """GET /api/status/reevaluate - Status da reavaliação"""
         reevaluate_status = self.process_status['reevaluate']
@@ -195,7 +226,8 @@ class SystemService:
                 'connection_type': db_health.get('connection_type', 'direct_postgresql'),
                 'status': db_health.get('overall', 'unknown'),
                 'features': db_health.get('features', []),
-                'connection_method': 'direct_postgresql_connection'
+                'connection_method': 'pooled_postgresql_connection',
+                'pool': db_health.get('pool', {})
             }
         }
     
@@ -240,6 +272,7 @@ class SystemService:
                 'table_sizes': table_sizes,
                 'database_status': db_health.get('overall', 'unknown'),
                 'connection_type': db_health.get('connection_type', 'direct_postgresql'),
+                'pool': db_health.get('pool', {}),
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -295,6 +328,10 @@ class SystemService:
                         from matching.vectorizers import BrazilianTextVectorizer
                         vectorizer = BrazilianTextVectorizer()  # Fallback brasileiro
                     
+                    # Job: carregar modelos e testar backends antes de começar
+                    if hasattr(vectorizer, 'warm_up'):
+                        vectorizer.warm_up()
+                    
                     # Executar busca real COM VALIDAÇÃO LLM
                     enable_llm = os.getenv('ENABLE_LLM_VALIDATION', 'true').lower() == 'true'
                     process_daily_bids(vectorizer, enable_llm_validation=enable_llm)
@@ -375,6 +412,10 @@ class SystemService:
                         from matching.vectorizers import BrazilianTextVectorizer
                         vectorizer = BrazilianTextVectorizer()  # Fallback brasileiro
                     
+                    # Job: carregar modelos e testar backends antes de começar
+                    if hasattr(vectorizer, 'warm_up'):
+                        vectorizer.warm_up()
+                    
                     # Configurar limpeza de matches (padrão: sim)
                     clear_matches = os.getenv('CLEAR_MATCHES_BEFORE_REEVALUATE', 'true').lower() == 'true'
                     
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do BulkWriter (matching/bulk_writer.py) contra um Postgres local
+Tabelas num schema temporário (removido ao final):
+- lote com uma licitação e um match inválidos: só essas linhas são descartadas;
+  status de licitações gravadas em flushes anteriores continuam sendo aplicados
+- flush disparado por add_* (tamanho do lote) e close() não levantam exceção
+- erro de conexão: lote descartado numa única tentativa, sem dividir em partes
+
+Uso:
+    PIPELINE_TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python test_bulk_writer.py
+"""
+
+import os
+import sys
+import uuid
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+SCHEMA = f"bulk_writer_test_{os.getpid()}"
+
+SCHEMA_SQL = f"""
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA};
+
+CREATE TABLE licitacoes (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    pncp_id TEXT UNIQUE NOT NULL, orgao_cnpj TEXT, ano_compra INTEGER, sequencial_compra INTEGER,
+    objeto_compra TEXT, link_sistema_origem TEXT, data_publicacao TIMESTAMP,
+    valor_total_estimado DECIMAL(15,2), uf TEXT, status TEXT,
+    numero_controle_pncp TEXT, numero_compra TEXT, processo TEXT,
+    valor_total_homologado DECIMAL(15,2), data_abertura_proposta TIMESTAMP, data_encerramento_proposta TIMESTAMP,
+    modo_disputa_id INTEGER, modo_disputa_nome TEXT, srp BOOLEAN,
+    link_processo_eletronico TEXT, justificativa_presencial TEXT, razao_social TEXT,
+    uf_nome TEXT, nome_unidade TEXT, municipio_nome TEXT, codigo_ibge TEXT, codigo_unidade TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE licitacao_itens (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    licitacao_id UUID NOT NULL, numero_item INTEGER NOT NULL, descricao TEXT,
+    quantidade DECIMAL(15,4), unidade_medida TEXT, valor_unitario_estimado DECIMAL(15,2),
+    material_ou_servico TEXT, ncm_nbs_codigo TEXT,
+    criterio_julgamento_id INTEGER, criterio_julgamento_nome TEXT,
+    tipo_beneficio_id INTEGER, tipo_beneficio_nome TEXT,
+    situacao_item_id INTEGER, situacao_item_nome TEXT,
+    aplicabilidade_margem_preferencia BOOLEAN, percentual_margem_preferencia DECIMAL(5,2),
+    tem_resultado BOOLEAN, updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (licitacao_id, numero_item)
+);
+
+CREATE TABLE matches (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    licitacao_id UUID, empresa_id UUID, score_similaridade DECIMAL(6,4),
+    match_type TEXT, justificativa_match TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+"""
+
+
+class DirectDB:
+    """Mesmo contrato do DatabaseManager.get_connection (commit no fim, rollback em erro), contando transações"""
+
+    def __init__(self, url: str, fail_with: Exception = None):
+        self.url, self.fail_with, self.transactions = url, fail_with, 0
+
+    @contextmanager
+    def get_connection(self):
+        import psycopg2
+        self.transactions += 1
+        if self.fail_with is not None:
+            raise self.fail_with
+        conn = psycopg2.connect(self.url)
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def build_bid(seq: int, publicacao: str = '2025-06-01T10:00:00') -> dict:
+    return {
+        'numeroControlePNCP': f"00000000000191-1-{seq:06d}/2025",
+        'orgaoEntidade': {'cnpj': '00000000000191', 'razaoSocial': 'Órgão Teste'},
+        'unidadeOrgao': {'ufSigla': 'SP', 'ufNome': 'São Paulo', 'nomeUnidade': 'Unidade', 'municipioNome': 'Cidade'},
+        'anoCompra': 2025,
+        'sequencialCompra': seq,
+        'objetoCompra': f"Compra {seq}",
+        'dataPublicacaoPncp': publicacao,
+        'valorTotalEstimado': 1000.0,
+    }
+
+
+def query(admin, sql):
+    with admin.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+
+def test_bad_rows_isolated(admin, db):
+    from matching.bulk_writer import BulkWriter
+
+    empresa = str(uuid.uuid4())
+    writer = BulkWriter(db, batch_size=10_000, flush_interval=0)
+    earlier = writer.add_bid(build_bid(1))
+    writer.flush()
+
+    pncp_ids = [writer.add_bid(build_bid(seq, '31/02/2025') if seq == 7 else build_bid(seq))
+                for seq in range(2, 22)]
+    for pncp_id in pncp_ids:
+        writer.add_items(pncp_id, [{'numeroItem': 1, 'descricao': 'Item', 'quantidade': 1}])
+        writer.add_match(pncp_id, 'empresa-invalida' if pncp_id == pncp_ids[3] else empresa, 0.9, 'objeto_completo')
+        writer.set_bid_status(pncp_id, 'processada')
+    writer.add_match(earlier, empresa, 0.9, 'objeto_completo')
+    writer.set_bid_status(earlier, 'processada')
+    written = writer.flush()
+
+    # Licitação 7: data de publicação inválida; match da licitação 5: empresa_id não é uuid
+    bad_bid = build_bid(7)['numeroControlePNCP']
+    saved = {row[0]: row[1] for row in query(admin, f"SELECT pncp_id, status FROM {SCHEMA}.licitacoes")}
+    assert len(saved) == 20 and bad_bid not in saved, len(saved)
+    assert all(status == 'processada' for status in saved.values()), saved
+    assert query(admin, f"SELECT COUNT(*) FROM {SCHEMA}.matches")[0][0] == 19
+    assert query(admin, f"SELECT COUNT(*) FROM {SCHEMA}.licitacao_itens")[0][0] == 19
+    stats = writer.stats()
+    assert stats['failed_rows'] == 2 and stats['failed_flushes'] == 1, stats
+    # Match e status da licitação 7 não encontram a licitação: não contam como gravados
+    assert written == {'bids': 19, 'items': 19, 'matches': 19, 'statuses': 20}, written
+    assert stats['matches'] == 19 and stats['statuses'] == 20, stats
+    writer.close()
+    print(f"✅ Lote de {sum(written.values()) + 2} linhas com 2 inválidas: só elas descartadas "
+          f"({db.transactions} transações); status de licitação de flush anterior aplicado")
+
+
+def test_add_and_close_do_not_raise(admin, db):
+    from matching.bulk_writer import BulkWriter
+
+    with BulkWriter(db, batch_size=3, flush_interval=0) as writer:
+        pncp_id = writer.add_bid(build_bid(100))
+        writer.add_match(pncp_id, 'empresa-invalida', 0.9, 'objeto_completo')
+        writer.add_match(pncp_id, str(uuid.uuid4()), 0.8, 'objeto_completo')  # flush por tamanho aqui
+        writer.add_match(pncp_id, 'empresa-invalida', 0.7, 'objeto_completo')
+    assert writer.stats()['failed_rows'] == 2, writer.stats()
+    assert query(admin, f"SELECT COUNT(*) FROM {SCHEMA}.matches m JOIN {SCHEMA}.licitacoes l "
+                        f"ON l.id = m.licitacao_id WHERE l.pncp_id = '{pncp_id}'")[0][0] == 1
+    print("✅ Flush por tamanho (add_match) e close() com linhas inválidas não levantam exceção")
+
+
+def test_connection_error(db_url):
+    import psycopg2
+    from matching.bulk_writer import BulkWriter
+
+    db = DirectDB(db_url, fail_with=psycopg2.OperationalError("conexão recusada"))
+    writer = BulkWriter(db, batch_size=10_000, flush_interval=0)
+    for seq in range(200, 250):
+        writer.add_bid(build_bid(seq))
+    assert writer.flush()['bids'] == 0
+    assert db.transactions == 1 and writer.stats()['failed_rows'] == 50, (db.transactions, writer.stats())
+    print("✅ Erro de conexão: lote descartado numa tentativa, sem dividir em partes")
+
+
+def with_search_path(url: str) -> str:
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}options=-csearch_path%3D{SCHEMA}"
+
+
+def main():
+    base_url = os.getenv('PIPELINE_TEST_DATABASE_URL')
+    if not base_url:
+        print("⚠️ Defina PIPELINE_TEST_DATABASE_URL com um Postgres local para rodar este teste")
+        return
+
+    import psycopg2
+
+    print("🧪 TESTE DO BULK WRITER")
+    print("=" * 50)
+    admin = psycopg2.connect(base_url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(SCHEMA_SQL)
+    try:
+        db_url = with_search_path(base_url)
+        test_bad_rows_isolated(admin, DirectDB(db_url))
+        test_add_and_close_do_not_raise(admin, DirectDB(db_url))
+        test_connection_error(db_url)
+        print("\n🎉 Todos os testes passaram")
+    finally:
+        with admin.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        admin.close()
+
+
+if __name__ == '__main__':
+    main()
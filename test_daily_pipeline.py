@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do pipeline em estágios da busca diária (process_daily_bids)
+Roda o pipeline completo contra um servidor PNCP falso local e um Postgres local:
+- licitações paginadas por UF e itens servidos com latência
+- tabelas criadas num schema temporário (removido ao final)
+- valida licitações, itens e matches persistidos e as métricas por estágio
+
+Uso:
+    PIPELINE_TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python test_daily_pipeline.py
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ITEMS_LATENCY = 0.05
+ITEMS_PER_BID = 2
+PAGE_SIZE = 50
+SCHEMA = f"pipeline_test_{os.getpid()}"
+
+OBJETO_LIMPEZA = "Aquisição de material de limpeza e higienização"
+OBJETO_AR = "Serviço de manutenção preventiva de aparelhos de ar condicionado"
+
+# Licitações por UF (SP ocupa duas páginas)
+BIDS_PER_UF = {'SP': 60, 'RJ': 5, 'MG': 3}
+
+
+def build_bids():
+    bids = {}
+    seq = 0
+    for uf, count in BIDS_PER_UF.items():
+        bids[uf] = []
+        for _ in range(count):
+            seq += 1
+            bids[uf].append({
+                'numeroControlePNCP': f"00000000000191-1-{seq:06d}/2025",
+                'orgaoEntidade': {'cnpj': '00000000000191', 'razaoSocial': 'Órgão Teste'},
+                'unidadeOrgao': {'ufSigla': uf, 'ufNome': uf, 'nomeUnidade': 'Unidade', 'municipioNome': 'Cidade'},
+                'anoCompra': 2025,
+                'sequencialCompra': seq,
+                'objetoCompra': OBJETO_LIMPEZA if seq % 2 else OBJETO_AR,
+                'dataPublicacaoPncp': '2025-06-01T10:00:00',
+                'valorTotalEstimado': 1000.0 * seq,
+            })
+    return bids
+
+
+BIDS = build_bids()
+TOTAL_BIDS = sum(len(b) for b in BIDS.values())
+
+
+class FakePNCPHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+
+        if parsed.path == '/api/consulta/v1/contratacoes/proposta':
+            params = parse_qs(parsed.query)
+            uf = params['uf'][0]
+            page = int(params['pagina'][0])
+            size = int(params['quantidade'][0])
+            data = BIDS.get(uf, [])[(page - 1) * size:page * size]
+            self._send_json(200, {'data': data})
+            return
+
+        match = re.match(r'^/api/pncp/v1/orgaos/(\d+)/compras/(\d+)/(\d+)/itens$', parsed.path)
+        if match:
+            time.sleep(ITEMS_LATENCY)
+            seq = int(match.group(3))
+            self._send_json(200, [
+                {
+                    'numeroItem': n,
+                    'descricao': f"Item {n} da compra {seq}",
+                    'quantidade': 10,
+                    'unidadeMedida': 'UN',
+                    'valorUnitarioEstimado': 12.5,
+                    'materialOuServico': 'M',
+                }
+                for n in range(1, ITEMS_PER_BID + 1)
+            ])
+            return
+
+        self._send_json(404, {})
+
+
+SCHEMA_SQL = f"""
+CREATE SCHEMA {SCHEMA};
+SET search_path TO {SCHEMA};
+
+CREATE TABLE empresas (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    nome_fantasia TEXT, razao_social TEXT, cnpj TEXT,
+    descricao_servicos_produtos TEXT, setor_atuacao TEXT, produtos JSONB
+);
+
+CREATE TABLE licitacoes (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    pncp_id TEXT UNIQUE NOT NULL, orgao_cnpj TEXT, ano_compra INTEGER, sequencial_compra INTEGER,
+    objeto_compra TEXT, link_sistema_origem TEXT, data_publicacao TIMESTAMP,
+    valor_total_estimado DECIMAL(15,2), uf TEXT, status TEXT,
+    numero_controle_pncp TEXT, numero_compra TEXT, processo TEXT,
+    valor_total_homologado DECIMAL(15,2), data_abertura_proposta TIMESTAMP, data_encerramento_proposta TIMESTAMP,
+    modo_disputa_id INTEGER, modo_disputa_nome TEXT, srp BOOLEAN,
+    link_processo_eletronico TEXT, justificativa_presencial TEXT, razao_social TEXT,
+    uf_nome TEXT, nome_unidade TEXT, municipio_nome TEXT, codigo_ibge TEXT, codigo_unidade TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE licitacao_itens (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    licitacao_id UUID NOT NULL, numero_item INTEGER NOT NULL, descricao TEXT,
+    quantidade DECIMAL(15,4), unidade_medida TEXT, valor_unitario_estimado DECIMAL(15,2),
+    material_ou_servico TEXT, ncm_nbs_codigo TEXT,
+    criterio_julgamento_id INTEGER, criterio_julgamento_nome TEXT,
+    tipo_beneficio_id INTEGER, tipo_beneficio_nome TEXT,
+    situacao_item_id INTEGER, situacao_item_nome TEXT,
+    aplicabilidade_margem_preferencia BOOLEAN, percentual_margem_preferencia DECIMAL(5,2),
+    tem_resultado BOOLEAN, updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE (licitacao_id, numero_item)
+);
+
+CREATE TABLE matches (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    licitacao_id UUID, empresa_id UUID, score_similaridade DECIMAL(6,4),
+    match_type TEXT, justificativa_match TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE processamento_cache (
+    resource_type TEXT, resource_id TEXT, process_hash TEXT, metadata JSONB,
+    UNIQUE (resource_type, resource_id, process_hash)
+);
+
+INSERT INTO empresas (nome_fantasia, razao_social, cnpj, descricao_servicos_produtos, produtos) VALUES
+    ('Limpeza Total', 'Limpeza Total LTDA', '11111111000111', '{OBJETO_LIMPEZA}', '[]'),
+    ('Frio Forte', 'Frio Forte LTDA', '22222222000122', '{OBJETO_AR}', '[]');
+"""
+
+
+def with_search_path(url: str) -> str:
+    separator = '&' if '?' in url else '?'
+    return f"{url}{separator}options=-csearch_path%3D{SCHEMA}"
+
+
+def main():
+    base_url = os.getenv('PIPELINE_TEST_DATABASE_URL')
+    if not base_url:
+        print("⚠️ Defina PIPELINE_TEST_DATABASE_URL com um Postgres local para rodar este teste")
+        return
+
+    import psycopg2
+
+    admin = psycopg2.connect(base_url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(SCHEMA_SQL)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakePNCPHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # Configurar antes de importar o pacote matching (constantes lidas no import)
+    os.environ['DATABASE_URL'] = with_search_path(base_url)
+    os.environ['PNCP_API_BASE_URL'] = f"http://127.0.0.1:{server.server_address[1]}/api"
+    os.environ['PNCP_PAGE_PAUSE'] = '0'
+    os.environ['PIPELINE_REPORT_INTERVAL'] = '0'
+    os.environ['PIPELINE_QUEUE_SIZE'] = '4'
+    os.environ['SIMILARITY_THRESHOLD_PHASE1'] = '0.65'
+    os.environ['EMBEDDING_DISK_STORE_DIR'] = tempfile.mkdtemp(prefix='pipeline-embeddings-')
+
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+    try:
+        from matching.vectorizers import MockTextVectorizer
+        from matching.matching_engine import process_daily_bids
+
+        start = time.perf_counter()
+        result = process_daily_bids(MockTextVectorizer(), enable_llm_validation=False)
+        elapsed = time.perf_counter() - start
+
+        with admin.cursor() as cursor:
+            cursor.execute(f"SELECT status, COUNT(*) FROM {SCHEMA}.licitacoes GROUP BY status")
+            status_counts = dict(cursor.fetchall())
+            cursor.execute(f"SELECT COUNT(*) FROM {SCHEMA}.licitacao_itens")
+            items_count = cursor.fetchone()[0]
+            cursor.execute(f"""
+                SELECT COUNT(*), COUNT(DISTINCT licitacao_id)
+                FROM {SCHEMA}.matches WHERE match_type = 'llm_approved'
+            """)
+            approved_matches, bids_with_matches = cursor.fetchone()
+            cursor.execute(f"SELECT COUNT(*) FROM {SCHEMA}.processamento_cache")
+            dedup_marks = cursor.fetchone()[0]
+
+        assert status_counts == {'processada': TOTAL_BIDS}, status_counts
+        assert items_count == TOTAL_BIDS * ITEMS_PER_BID, items_count
+        # Cada licitação tem exatamente uma empresa com o mesmo objeto (score ≥ 0.85 sem LLM)
+        assert approved_matches == TOTAL_BIDS and bids_with_matches == TOTAL_BIDS, (approved_matches, bids_with_matches)
+        assert dedup_marks == TOTAL_BIDS, dedup_marks
+
+        stages = result['pipeline']['stages']
+        for name, stage in stages.items():
+            assert stage['errors'] == 0, (name, stage)
+            assert stage['max_backlog'] <= stage['queue_size'], (name, stage)
+            assert stage['finished'], (name, stage)
+        assert stages['fetch']['emitted'] == TOTAL_BIDS, stages['fetch']
+        assert stages['persist_matches']['processed'] == TOTAL_BIDS, stages['persist_matches']
+        # Embeddings em lote: várias licitações por chamada e objetos repetidos vetorizados uma vez
+        assert stages['embed']['batches'] < stages['embed']['processed'], stages['embed']
+        assert result['matches_encontrados'] == TOTAL_BIDS, result['matches_encontrados']
+
+        sequential_items_time = TOTAL_BIDS * ITEMS_LATENCY
+        print(f"\n✅ {TOTAL_BIDS} licitações, {items_count} itens e {approved_matches} matches persistidos "
+              f"(execução {elapsed:.2f}s, pipeline {result['pipeline']['elapsed_s']:.2f}s; "
+              f"só a busca sequencial de itens levaria ≥ {sequential_items_time:.2f}s)")
+
+        # Segunda execução: nada novo para processar
+        result = process_daily_bids(MockTextVectorizer(), enable_llm_validation=False)
+        assert result['pipeline']['stages']['fetch']['emitted'] == 0, result['pipeline']['stages']['fetch']
+        print("✅ Reexecução não reprocessa licitações já salvas")
+
+        print("\n🎉 Teste do pipeline da busca diária passou!")
+    finally:
+        server.shutdown()
+        try:
+            from config.database import db_manager
+            db_manager.close_pool()
+        except Exception:
+            pass
+        with admin.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        admin.close()
+
+
+if __name__ == '__main__':
+    main()
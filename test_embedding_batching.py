@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste dos lotes por tamanho do SentenceTransformerService
+Usa um encoder falso (sem baixar modelo):
+- saída na ordem de entrada, mesmo com textos curtos e longos misturados
+- lotes respeitam o orçamento de tokens (com padding) e o limite de textos
+- textos de tamanho parecido ficam no mesmo lote
+- cota de CPU detectada é um número positivo
+
+Uso:
+    python test_embedding_batching.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+import services.sentence_transformer_service as st_service
+from services.sentence_transformer_service import SentenceTransformerService, cpu_quota
+
+
+class WhitespaceTokenizer:
+    """Um token por palavra + [CLS]/[SEP], truncado em max_length"""
+
+    def __call__(self, texts, add_special_tokens=True, truncation=True, max_length=512):
+        return {'input_ids': [list(range(min(len(text.split()) + 2, max_length))) for text in texts]}
+
+
+class FakeModel:
+    tokenizer = WhitespaceTokenizer()
+    max_seq_length = 128
+
+
+class RecordingEncoder:
+    """Embedding = [número do texto, tokens]; guarda os lotes recebidos"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, batch, batch_size, show_progress_bar, convert_to_numpy, normalize_embeddings):
+        self.batches.append(list(batch))
+        return np.array([[float(text.split()[0]), float(len(text.split()))] for text in batch])
+
+
+def build_service():
+    service = object.__new__(SentenceTransformerService)
+    service.model = FakeModel()
+    service.encoder = RecordingEncoder()
+    service.max_seq_length = FakeModel.max_seq_length
+    return service
+
+
+def mixed_texts(count, seed=0):
+    """Títulos curtos e descrições de itens longas, intercalados"""
+    rng = np.random.default_rng(seed)
+    words = rng.choice([3, 6, 40, 120, 300], size=count)
+    return [f"{n} " + " ".join(['palavra'] * int(size)) for n, size in enumerate(words)]
+
+
+def test_order_restored():
+    service = build_service()
+    texts = mixed_texts(300)
+    embeddings = service.generate_embeddings(texts)
+    assert [int(e[0]) for e in embeddings] == list(range(300))
+    assert len(service.encoder.batches) > 1
+    print(f"✅ Ordem de entrada restaurada ({len(service.encoder.batches)} lotes)")
+
+
+def test_token_budget():
+    service = build_service()
+    texts = mixed_texts(300, seed=1)
+    st_service.ST_BATCH_TOKEN_BUDGET, budget = 1024, st_service.ST_BATCH_TOKEN_BUDGET
+    try:
+        service.generate_embeddings(texts, batch_size=50)
+    finally:
+        st_service.ST_BATCH_TOKEN_BUDGET = budget
+
+    lengths = lambda batch: service._token_lengths(batch)
+    for batch in service.encoder.batches:
+        assert len(batch) <= 50
+        padded = len(batch) * max(lengths(batch))
+        assert padded <= 1024 or len(batch) == 1, (len(batch), padded)
+
+    # Ordenados por tamanho: bem menos padding que lotes de 32 na ordem de chegada
+    def padding(batches):
+        return sum(len(batch) * max(lengths(batch)) - sum(lengths(batch)) for batch in batches)
+    arrival = [texts[i:i + 32] for i in range(0, len(texts), 32)]
+    assert padding(service.encoder.batches) * 5 < padding(arrival)
+
+    # Textos longos truncados em max_seq_length cabem 8 por lote (8 x 128 = 1024)
+    assert max(len(batch) for batch in service.encoder.batches if max(lengths(batch)) == 128) == 8
+    print("✅ Lotes respeitam o orçamento de tokens e o limite de textos")
+
+
+def test_cpu_quota():
+    quota = cpu_quota()
+    assert 0 < quota <= (os.cpu_count() or 1)
+    print(f"✅ Cota de CPU detectada: {quota:.2f}")
+
+
+def main():
+    print("🧪 TESTE DOS LOTES POR TAMANHO DE TEXTO")
+    print("=" * 50)
+    test_order_restored()
+    test_token_budget()
+    test_cpu_quota()
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
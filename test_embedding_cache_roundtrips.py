@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste dos round trips ao Redis nas consultas de cache do BrazilianTextVectorizer
+Usa o Redis local (localhost:6379, o mesmo do EmbeddingCacheService) e conta
+os envios ao servidor (um por comando avulso ou por pipeline):
+- batch_vectorize com 500 textos e 3 modelos de fallback: 1 pipeline de MGETs
+  na consulta e 1 pipeline de SETEX na gravação, em vez de 1.500 GETs
+- estatísticas agregadas no processo e enviadas num único pipeline de HINCRBY
+- hits resolvidos pelo primeiro modelo com cache, na ordem de prioridade
+- vectorize de um texto: uma consulta para todos os modelos
+- entradas pickle antigas continuam legíveis e são migradas para o formato binário
+- clear_cache remove por SCAN incremental
+- tier em memória na frente do Redis: lote quente sem round trips, orçamento
+  em bytes respeitado e perfil de empresa alterado gera embedding novo
+
+Uso:
+    redis-server &  # ou docker run -d -p 6379:6379 redis:alpine
+    python test_embedding_cache_roundtrips.py
+"""
+
+import os
+import sys
+import threading
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import redis
+
+# Estatísticas só vão ao Redis no flush explícito (round trips previsíveis)
+os.environ['EMBEDDING_CACHE_STATS_FLUSH_INTERVAL'] = '3600'
+# Só memória + Redis aqui; o store em disco tem teste próprio (test_embedding_disk_store.py)
+os.environ['EMBEDDING_DISK_STORE_MODE'] = 'off'
+
+BATCH_SIZE = 500
+MODEL_PREFIX = f"roundtrip-test-{os.getpid()}"
+
+
+class RoundTripCounter:
+    """Conta chamadas a Connection.send_packed_command (um envio = um round trip)"""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._original = redis.connection.Connection.send_packed_command
+
+    @contextmanager
+    def counting(self):
+        counter = self
+        original = self._original
+
+        def send_packed_command(connection, *args, **kwargs):
+            with counter._lock:
+                counter.count += 1
+            return original(connection, *args, **kwargs)
+
+        self.count = 0
+        redis.connection.Connection.send_packed_command = send_packed_command
+        try:
+            yield self
+        finally:
+            redis.connection.Connection.send_packed_command = original
+
+
+class FakeModel:
+    """Modelo de fallback que registra os textos vetorizados"""
+
+    def __init__(self, value: float, fail: bool = False):
+        self.value = value
+        self.fail = fail
+        self.calls = []
+
+    def vectorize(self, text):
+        self.calls.append([text])
+        return [] if self.fail else [self.value, float(len(text))]
+
+    def batch_vectorize(self, texts):
+        self.calls.append(list(texts))
+        return [] if self.fail else [[self.value, float(len(text))] for text in texts]
+
+
+def build_vectorizer(cache_service, models):
+    """BrazilianTextVectorizer sem carregar modelos reais"""
+    from matching.vectorizers import BrazilianTextVectorizer
+
+    vectorizer = BrazilianTextVectorizer.__new__(BrazilianTextVectorizer)
+    vectorizer.cache_service = cache_service
+    vectorizer.vectorizers = [(f"{MODEL_PREFIX}-{i}", model) for i, model in enumerate(models)]
+    return vectorizer
+
+
+def test_batch_round_trips(cache_service, counter):
+    """Lote frio grava em um pipeline; lote quente resolve tudo numa consulta"""
+    texts = [f"Aquisição de material de consumo lote {n}" for n in range(BATCH_SIZE)]
+    models = [FakeModel(1.0, fail=True), FakeModel(2.0), FakeModel(3.0)]
+    vectorizer = build_vectorizer(cache_service, models)
+
+    with counter.counting():
+        cold = vectorizer.batch_vectorize(texts)
+    assert all(embedding and embedding[0] == 2.0 for embedding in cold), cold[:3]
+    # 1 pipeline de MGETs + 1 pipeline de SETEX
+    assert counter.count == 2, counter.count
+    print(f"✅ Lote frio: {BATCH_SIZE} textos x {len(models)} modelos em {counter.count} round trips")
+
+    models[1].calls.clear()
+    with counter.counting():
+        warm = vectorizer.batch_vectorize(texts)
+    assert warm == cold
+    assert not models[1].calls, "nenhum modelo deveria rodar com tudo em cache"
+    # Hits no tier em memória (modelo 1); só as chaves do modelo 0, de maior
+    # prioridade e sem entrada local, ainda são consultadas no Redis
+    assert counter.count == 1, counter.count
+    print(f"✅ Lote quente (tier em memória): {BATCH_SIZE} hits em {counter.count} round trip")
+
+    cache_service.local_tier.clear(f"match:{MODEL_PREFIX}-*")
+    with counter.counting():
+        warm = vectorizer.batch_vectorize(texts)
+    assert warm == cold
+    # Só Redis: 1 pipeline de MGETs; contadores ficam no processo
+    assert counter.count == 1, counter.count
+    print(f"✅ Lote quente (Redis): {BATCH_SIZE} hits em {counter.count} round trip "
+          f"(antes: até {BATCH_SIZE * len(models)} GETs + INCR/EXPIRE por hit)")
+
+
+def test_priority_across_models(cache_service, counter):
+    """Com o texto em cache em dois modelos vale o de maior prioridade"""
+    from matching.vectorizers import preprocess_brazilian_text
+
+    text = "Serviço de manutenção de ar condicionado"
+    clean_text = preprocess_brazilian_text(text)
+    models = [FakeModel(1.0), FakeModel(2.0), FakeModel(3.0)]
+    vectorizer = build_vectorizer(cache_service, models)
+    cache_service.save_embedding_to_cache(clean_text, [30.0], vectorizer.vectorizers[2][0])
+    cache_service.save_embedding_to_cache(clean_text, [20.0], vectorizer.vectorizers[1][0])
+
+    # O modelo 0 não tem cache: como antes, ele gera antes de olhar os modelos seguintes
+    with counter.counting():
+        assert vectorizer.vectorize(text) == [1.0, float(len(clean_text))]
+    # Consulta + gravação do embedding gerado
+    assert counter.count == 2, counter.count
+    print(f"✅ vectorize sem cache no modelo principal: {counter.count} round trips")
+
+    models[0].fail = True
+    cache_service.clear_cache(f"match:{vectorizer.vectorizers[0][0]}:*")
+    with counter.counting():
+        assert vectorizer.vectorize(text) == [20.0]
+    assert counter.count == 1, counter.count
+    print(f"✅ vectorize com hit no 2º modelo: {counter.count} round trips")
+
+    result = vectorizer.batch_vectorize([text, "", text])
+    assert result == [[20.0], [], [20.0]], result
+    print("✅ batch_vectorize usa o modelo de maior prioridade com cache")
+
+
+def test_legacy_pickle_migration(cache_service):
+    """Entrada pickle antiga é lida e regravada no formato binário com o mesmo TTL"""
+    import pickle
+    from services.embedding_cache_service import is_binary_embedding
+
+    model_name = f"{MODEL_PREFIX}-legacy"
+    text = "Aquisição de equipamentos de informática"
+    text_hash = cache_service._hash_text(text)
+    key = cache_service._redis_key(model_name, text_hash)
+    embedding = [0.25, -0.5, 0.125]
+    cache_service.redis_client.set(key, pickle.dumps({
+        'embedding': embedding, 'text_hash': text_hash, 'model_name': model_name, 'dimensions': 3
+    }), ex=1000)
+
+    assert cache_service.get_embedding_from_cache(text, model_name) == embedding
+    assert cache_service.local_tier.get_many([key])[0] is not None
+    raw = cache_service.redis_client.get(key)
+    assert is_binary_embedding(raw), raw[:10]
+    assert 0 < cache_service.redis_client.ttl(key) <= 1000
+    assert cache_service.get_embedding_from_cache(text, model_name) == embedding
+    # Outro modelo com o mesmo texto não aceita a entrada
+    assert cache_service.redis_client.set(cache_service._redis_key(f"{model_name}-2", text_hash), raw)
+    assert cache_service.get_embedding_from_cache(text, f"{model_name}-2") is None
+    print(f"✅ Entrada pickle migrada para o formato binário ({len(raw)} bytes, TTL preservado)")
+
+
+def test_aggregated_stats(cache_service, counter):
+    """Contadores locais vão num único pipeline e get_cache_stats soma os pendentes"""
+    from services.embedding_cache_service import EMBEDDING_CACHE_STATS_KEY
+
+    cache_service.flush_stats()
+    before = cache_service.get_cache_stats()['cache_stats']
+    model_name = f"{MODEL_PREFIX}-stats"
+    texts = [f"Serviço de limpeza predial lote {n}" for n in range(50)]
+    cache_service.batch_save_embeddings_to_cache([(text, [1.0, 2.0]) for text in texts[:30]], model_name)
+    for _ in range(3):
+        cache_service.batch_get_embeddings_from_cache(texts, model_name)
+
+    merged = cache_service.get_cache_stats()['cache_stats']
+    assert merged['pending_flush'] > 0
+    assert merged['hits'] - before['hits'] == 90, merged
+    assert merged['misses'] - before['misses'] == 60, merged
+    assert merged['saves'] - before['saves'] == 30, merged
+    assert merged['hits_by_model'][model_name] == 90, merged['hits_by_model']
+
+    with counter.counting():
+        assert cache_service.flush_stats()
+    assert counter.count == 1, counter.count
+    stored = cache_service.redis_client.hgetall(EMBEDDING_CACHE_STATS_KEY)
+    assert int(stored[f"hits:{model_name}".encode()]) == 90, stored
+    after = cache_service.get_cache_stats()['cache_stats']
+    assert after['pending_flush'] == 0 and after['hits'] == merged['hits'], after
+    print(f"✅ Estatísticas: 3 consultas + 1 gravação enviadas em {counter.count} pipeline de HINCRBY")
+
+
+def test_clear_cache_scan(cache_service):
+    """clear_cache remove todas as chaves do padrão em lotes via SCAN"""
+    model_name = f"{MODEL_PREFIX}-clear"
+    cache_service.batch_save_embeddings_to_cache(
+        [(f"texto {n}", [float(n)]) for n in range(2500)], model_name
+    )
+    assert cache_service.clear_cache(f"match:{model_name}:*") == 2500
+    assert not list(cache_service.redis_client.scan_iter(match=f"match:{model_name}:*"))
+    print("✅ clear_cache removeu 2500 chaves por SCAN")
+
+
+def test_local_tier(cache_service, counter):
+    """Orçamento em bytes do tier local e invalidação por mudança de perfil"""
+    from services.embedding_cache_service import LocalEmbeddingLRU, encode_embedding
+    from matching.matching_engine import _vectorize_companies_with_cache
+
+    # Orçamento: ~10 entradas de 384 floats32 cabem em 20 KB
+    lru = LocalEmbeddingLRU(20 * 1024)
+    entries = [(f"match:m:{n:064d}", encode_embedding([0.1] * 384, 'm', f"{n:064x}")) for n in range(50)]
+    lru.put_many(entries)
+    stats = lru.stats()
+    assert lru.bytes <= 20 * 1024 and 0 < stats['entries'] < 50, stats
+    assert stats['evictions'] == 50 - stats['entries'], stats
+    assert lru.get_many([entries[-1][0]])[0] is not None and lru.get_many([entries[0][0]])[0] is None
+    print(f"✅ Tier local respeita o orçamento: {stats['entries']} entradas em {lru.bytes} bytes")
+
+    class CountingVectorizer:
+        def __init__(self):
+            self.generated = []
+
+        def batch_vectorize(self, texts):
+            self.generated.extend(texts)
+            return [[float(len(text)), 1.0] for text in texts]
+
+    companies = [
+        {'id': n, 'descricao_servicos_produtos': f"{MODEL_PREFIX} empresa {n} manutenção predial"}
+        for n in range(200)
+    ]
+    vectorizer = CountingVectorizer()
+    _vectorize_companies_with_cache(companies, cache_service, vectorizer)
+    assert len(vectorizer.generated) == 200
+
+    vectorizer.generated.clear()
+    with counter.counting():
+        _vectorize_companies_with_cache(companies, cache_service, vectorizer)
+    assert not vectorizer.generated and counter.count == 0, (vectorizer.generated, counter.count)
+
+    # Perfil alterado: o texto muda, a chave muda e o embedding é gerado de novo
+    texts = [company['descricao_servicos_produtos'] for company in companies]
+    companies[7]['descricao_servicos_produtos'] += " e jardinagem"
+    _vectorize_companies_with_cache(companies, cache_service, vectorizer)
+    assert vectorizer.generated == [companies[7]['descricao_servicos_produtos']], vectorizer.generated
+    assert companies[7]['embedding'][0] == float(len(companies[7]['descricao_servicos_produtos']))
+
+    keys = [cache_service._redis_key('sentence-transformers', cache_service._hash_text(text))
+            for text in texts + [companies[7]['descricao_servicos_produtos']]]
+    cache_service.local_tier.discard(keys)
+    cache_service.redis_client.delete(*keys)
+    print("✅ Reexecução com 200 empresas sem round trips; perfil alterado revetorizado")
+
+
+def main():
+    from services.embedding_cache_service import EmbeddingCacheService
+
+    cache_service = EmbeddingCacheService()
+    if not cache_service.redis_available:
+        print("⚠️ Redis local (localhost:6379) indisponível - inicie um redis-server para rodar este teste")
+        return
+
+    counter = RoundTripCounter()
+    try:
+        test_batch_round_trips(cache_service, counter)
+        test_priority_across_models(cache_service, counter)
+        test_legacy_pickle_migration(cache_service)
+        test_aggregated_stats(cache_service, counter)
+        test_clear_cache_scan(cache_service)
+        test_local_tier(cache_service, counter)
+        print("\n🎉 Testes de round trips do cache de embeddings passaram!")
+    finally:
+        from services.embedding_cache_service import EMBEDDING_CACHE_STATS_KEY
+
+        cache_service.clear_cache(f"match:{MODEL_PREFIX}-*")
+        cache_service.flush_stats()
+        test_fields = [field for field in cache_service.redis_client.hkeys(EMBEDDING_CACHE_STATS_KEY)
+                       if field.startswith(f"hits:{MODEL_PREFIX}".encode())]
+        if test_fields:
+            cache_service.redis_client.hdel(EMBEDDING_CACHE_STATS_KEY, *test_fields)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do store de embeddings em disco (DiskEmbeddingStore)
+Roda sem Redis, num diretório temporário:
+- put/get e persistência ao reabrir o store
+- linha incompleta no fim do arquivo (escrita interrompida) é descartada
+- linha corrompida (crc32 inválido) vira miss
+- compactação descarta linhas corrompidas e, acima do tamanho máximo, as mais antigas
+  até 75% do limite: gravações seguidas no limite não compactam a cada lote
+- outro processo em modo somente leitura enxerga as linhas acrescentadas
+- EmbeddingCacheService com Redis fora do ar é servido pelo disco
+- Redis caindo no meio da execução: hits da memória e do disco continuam valendo
+
+Uso:
+    python test_embedding_disk_store.py
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+TEST_DIR = tempfile.mkdtemp(prefix='embedding-disk-store-')
+# Configurar antes de importar o serviço (constantes lidas no import)
+os.environ['EMBEDDING_DISK_STORE_DIR'] = TEST_DIR
+os.environ['EMBEDDING_DISK_STORE_FSYNC'] = 'false'
+os.environ['EMBEDDING_CACHE_STATS_FLUSH_INTERVAL'] = '3600'
+
+import numpy as np
+
+import services.embedding_disk_store as disk_store_module
+from services.embedding_disk_store import DiskEmbeddingStore, HEADER_SIZE
+
+MODEL = 'sentence-transformers'
+DIM = 384
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def make_entries(count, tag='texto', seed=0):
+    rng = np.random.default_rng(seed)
+    return [(text_hash(f"{tag} {n}"), rng.normal(0, 0.05, DIM).astype(np.float32)) for n in range(count)]
+
+
+def test_put_get_and_reopen(directory):
+    store = DiskEmbeddingStore(directory)
+    entries = make_entries(100)
+    assert store.put_many(MODEL, entries) == 100
+    # Chaves já gravadas não são duplicadas
+    assert store.put_many(MODEL, entries[:10]) == 0
+
+    vectors = store.get_many([(MODEL, h) for h, _ in entries] + [(MODEL, text_hash('ausente'))])
+    assert all(np.array_equal(v, e) for v, (_, e) in zip(vectors, entries))
+    assert vectors[-1] is None
+
+    reopened = DiskEmbeddingStore(directory)
+    vectors = reopened.get_many([(MODEL, h) for h, _ in entries])
+    assert all(np.array_equal(v, e) for v, (_, e) in zip(vectors, entries))
+    assert reopened.get_many([('outro-modelo', entries[0][0])]) == [None]
+    print("✅ put/get e persistência ao reabrir")
+
+
+def test_torn_tail(directory):
+    store = DiskEmbeddingStore(directory)
+    entries = make_entries(20, 'torn')
+    store.put_many(MODEL, entries)
+    path = store._file(MODEL).path
+
+    # Simular queda no meio de um append: meia linha no fim do arquivo
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * 700)
+
+    reader = DiskEmbeddingStore(directory)
+    assert all(v is not None for v in reader.get_many([(MODEL, h) for h, _ in entries]))
+
+    more = make_entries(5, 'torn-depois')
+    assert store.put_many(MODEL, more) == 5
+    row_size = store._file(MODEL).dtype.itemsize
+    assert (os.path.getsize(path) - HEADER_SIZE) % row_size == 0
+    vectors = DiskEmbeddingStore(directory).get_many([(MODEL, h) for h, _ in entries + more])
+    assert all(np.array_equal(v, e) for v, (_, e) in zip(vectors, entries + more))
+    print("✅ Linha incompleta descartada no próximo append")
+
+
+def corrupt_row(model_file, text_hash_):
+    """Troca um byte do vetor da linha de text_hash_"""
+    row_number = model_file._index[bytes.fromhex(text_hash_[:32])]
+    offset = HEADER_SIZE + row_number * model_file.dtype.itemsize + 100
+    with open(model_file.path, 'r+b') as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+
+def test_corrupted_row(directory):
+    store = DiskEmbeddingStore(directory)
+    entries = make_entries(3, 'corrompido')
+    store.put_many(MODEL, entries)
+    corrupt_row(store._file(MODEL), entries[1][0])
+
+    vectors = DiskEmbeddingStore(directory).get_many([(MODEL, h) for h, _ in entries])
+    assert vectors[0] is not None and vectors[2] is not None
+    assert vectors[1] is None
+    print("✅ Linha com crc32 inválido tratada como miss")
+
+
+def test_compaction(directory):
+    store = DiskEmbeddingStore(directory)
+    model = 'compactar'
+    entries = make_entries(50, 'compactar')
+    store.put_many(model, entries)
+    model_file = store._file(model)
+    corrupt_row(model_file, entries[10][0])
+
+    # Linhas corrompidas saem na compactação
+    assert store.compact(model) == {'rows_before': 50, 'rows_after': 49}
+    survivors = entries[:10] + entries[11:]
+    vectors = DiskEmbeddingStore(directory).get_many([(model, h) for h, _ in survivors])
+    assert all(np.array_equal(v, e) for v, (_, e) in zip(vectors, survivors))
+
+    # Acima do tamanho máximo ficam só as linhas mais novas, até 75% do limite (15 de 20 linhas)
+    max_mb = disk_store_module.EMBEDDING_DISK_STORE_MAX_MB
+    disk_store_module.EMBEDDING_DISK_STORE_MAX_MB = (HEADER_SIZE + 20 * model_file.dtype.itemsize) / 2**20
+    try:
+        assert store.compact(model) == {'rows_before': 49, 'rows_after': 15}
+    finally:
+        disk_store_module.EMBEDDING_DISK_STORE_MAX_MB = max_mb
+    vectors = DiskEmbeddingStore(directory).get_many([(model, h) for h, _ in survivors])
+    assert all(v is None for v in vectors[:34])
+    assert all(np.array_equal(v, e) for v, (_, e) in zip(vectors[34:], survivors[34:]))
+    print("✅ Compactação descarta linhas corrompidas e as mais antigas acima do limite")
+
+
+def test_appends_at_cap(directory):
+    store = DiskEmbeddingStore(directory)
+    model = 'no-limite'
+    store.put_many(model, make_entries(1, 'no-limite-0'))
+    model_file = store._file(model)
+    rewrites = []
+    compact = model_file._compact_locked
+    model_file._compact_locked = lambda trim=False: rewrites.append(trim) or compact(trim)
+
+    # Limite de 100 linhas, gravando de uma em uma: cada compactação abre folga de 25 linhas
+    max_mb = disk_store_module.EMBEDDING_DISK_STORE_MAX_MB
+    disk_store_module.EMBEDDING_DISK_STORE_MAX_MB = (HEADER_SIZE + 100 * model_file.dtype.itemsize) / 2**20
+    try:
+        for number in range(1, 400):
+            store.put_many(model, make_entries(1, f"no-limite-{number}"))
+    finally:
+        disk_store_module.EMBEDDING_DISK_STORE_MAX_MB = max_mb
+    assert 1 <= len(rewrites) <= 400 // 25, len(rewrites)
+    assert model_file.stats()['rows'] <= 100, model_file.stats()
+    print(f"✅ 399 gravações de 1 linha no limite de tamanho: {len(rewrites)} compactações")
+
+
+def test_read_only_process(directory):
+    store = DiskEmbeddingStore(directory)
+    entries = make_entries(30, 'worker')
+    store.put_many(MODEL, entries)
+
+    context = multiprocessing.get_context('spawn')
+    to_worker, from_worker = context.Queue(), context.Queue()
+    worker = context.Process(target=_worker_main, args=(directory, [h for h, _ in entries], to_worker, from_worker))
+    worker.start()
+    assert from_worker.get(timeout=30) == 30
+
+    more = make_entries(10, 'worker-depois')
+    store.put_many(MODEL, more)
+    to_worker.put([h for h, _ in more])
+    assert from_worker.get(timeout=30) == 40
+    worker.join(timeout=30)
+
+    # Somente leitura não grava nem cria arquivos
+    read_only = DiskEmbeddingStore(directory, mode='ro')
+    assert read_only.put_many('novo-modelo', make_entries(1)) == 0
+    assert not os.path.exists(os.path.join(directory, 'novo-modelo.emb'))
+    print("✅ Processo somente leitura enxerga linhas acrescentadas por outro processo")
+
+
+def _worker_main(directory, hashes, inbox, outbox):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+    store = DiskEmbeddingStore(directory, mode='ro')
+    outbox.put(sum(v is not None for v in store.get_many([(MODEL, h) for h in hashes])))
+    more = inbox.get(timeout=30)
+    outbox.put(sum(v is not None for v in store.get_many([(MODEL, h) for h in hashes + more])))
+
+
+def test_service_fallback():
+    from services.embedding_cache_service import EmbeddingCacheService
+
+    cache_service = EmbeddingCacheService()
+    assert cache_service.disk_store is not None and cache_service.disk_store.directory == TEST_DIR
+    texts = [f"serviço fallback {n}" for n in range(50)]
+    embeddings = [e.tolist() for _, e in make_entries(50, 'fallback')]
+    model = 'fallback-model'
+
+    cache_service.batch_save_embeddings_to_cache(list(zip(texts, embeddings)), model)
+    keys = [cache_service._redis_key(model, cache_service._hash_text(text)) for text in texts]
+
+    # Redis fora do ar e processo "reiniciado" (tier em memória vazio): o disco responde
+    redis_available = cache_service.redis_available
+    cache_service.redis_available = False
+    try:
+        cache_service.local_tier.discard(keys)
+        hits = cache_service.batch_get_embeddings_from_cache(texts, model)
+    finally:
+        cache_service.redis_available = redis_available
+    assert len(hits) == 50
+    assert all(np.allclose(hits[text], embedding) for text, embedding in zip(texts, embeddings))
+    assert cache_service._pending_stats['disk_hits'] == 50
+    # Hits do disco são promovidos ao tier em memória
+    assert all(raw is not None for raw in cache_service.local_tier.get_many(keys))
+
+    # Modelo prioritário no disco vence o fallback em memória
+    cache_service.batch_save_embeddings_to_cache([(texts[0], embeddings[0])], 'fallback-secundario')
+    cache_service.local_tier.discard(keys[:1])
+    hit = cache_service.multi_model_get_embeddings([texts[0]], [model, 'fallback-secundario'])
+    assert hit[texts[0]][0] == model
+
+    # Hit do Redis (gravado por outro processo) também vai para o disco
+    if cache_service.redis_available:
+        from services.embedding_cache_service import encode_embedding
+        backfill_text = 'serviço fallback só no Redis'
+        backfill_hash = cache_service._hash_text(backfill_text)
+        backfill_key = cache_service._redis_key(model, backfill_hash)
+        cache_service.redis_client.set(backfill_key, encode_embedding(embeddings[0], model, backfill_hash), ex=600)
+        assert backfill_text in cache_service.batch_get_embeddings_from_cache([backfill_text], model)
+        assert cache_service.disk_store.get_many([(model, backfill_hash)])[0] is not None
+        keys.append(backfill_key)
+
+    cache_service.local_tier.discard(keys)
+    if cache_service.redis_available:
+        cache_service.redis_client.delete(*keys)
+        cache_service.redis_client.delete(cache_service._redis_key('fallback-secundario', cache_service._hash_text(texts[0])))
+    cache_service.clear_cache(f"match:{model}:*")
+    assert not os.path.exists(os.path.join(TEST_DIR, f"{model}.emb"))
+    cache_service.clear_cache("match:fallback-secundario:*")
+    print("✅ EmbeddingCacheService servido pelo disco com o Redis fora do ar")
+
+
+def test_redis_outage_mid_run():
+    import time
+    import redis
+    from services.embedding_cache_service import EmbeddingCacheService
+
+    cache_service = EmbeddingCacheService()
+    model = 'outage-model'
+    texts = [f"serviço queda {n}" for n in range(30)]
+    embeddings = [e.tolist() for _, e in make_entries(30, 'queda')]
+    cache_service.batch_save_embeddings_to_cache(list(zip(texts[:20], embeddings[:20])), model)
+    keys = [cache_service._redis_key(model, cache_service._hash_text(text)) for text in texts]
+    cache_service.local_tier.discard(keys[10:20])  # 10 na memória, 10 só no disco, 10 em lugar nenhum
+
+    # Cliente apontado para uma porta sem Redis: o MGET falha no meio do lookup
+    redis_client, redis_available = cache_service.redis_client, cache_service.redis_available
+    cache_service.redis_client = redis.Redis(host='localhost', port=1, socket_connect_timeout=0.5)
+    cache_service.redis_available = True
+    try:
+        hits = cache_service.multi_model_get_embeddings(texts, [model, 'outage-secundario'])
+        assert set(hits) == set(texts[:20]), len(hits)
+        assert all(np.allclose(hits[text][1], embedding) for text, embedding in zip(texts, embeddings[:20]))
+        assert cache_service._redis_failed_at is not None
+        # Em backoff: nem tenta o Redis (nem na gravação)
+        start = time.perf_counter()
+        assert cache_service.batch_save_embeddings_to_cache([(texts[20], embeddings[20])], model)
+        assert len(cache_service.batch_get_embeddings_from_cache(texts, model)) == 21
+        assert time.perf_counter() - start < 0.4
+    finally:
+        cache_service.redis_client, cache_service.redis_available = redis_client, redis_available
+        cache_service._redis_failed_at = None
+    cache_service.local_tier.discard(keys)
+    if cache_service.redis_available:
+        cache_service.redis_client.delete(*keys)
+    cache_service.clear_cache(f"match:{model}:*")
+    print("✅ Redis caindo no meio da execução: hits da memória e do disco mantidos, Redis em backoff")
+
+
+def main():
+    print("🧪 TESTE DO STORE DE EMBEDDINGS EM DISCO")
+    print("=" * 50)
+    try:
+        test_put_get_and_reopen(os.path.join(TEST_DIR, 'basico'))
+        test_torn_tail(os.path.join(TEST_DIR, 'torn'))
+        test_corrupted_row(os.path.join(TEST_DIR, 'corrompido'))
+        test_compaction(os.path.join(TEST_DIR, 'compactacao'))
+        test_appends_at_cap(os.path.join(TEST_DIR, 'no-limite'))
+        test_read_only_process(os.path.join(TEST_DIR, 'workers'))
+        test_service_fallback()
+        test_redis_outage_mid_run()
+        print("\n🎉 Todos os testes passaram")
+    finally:
+        shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do worker de embeddings (socket Unix)
+Usa um modelo falso (sem torch):
+- embeddings pelo socket iguais aos do modelo no processo, na ordem enviada
+- pedidos concorrentes são agrupados em lotes compartilhados (textos repetidos
+  calculados uma vez), sem misturar modelos
+- com o worker fora do ar ou com erro, cai na inferência no processo
+- socket órfão é reaproveitado; worker vivo não é substituído
+
+Uso:
+    python test_embedding_worker.py
+"""
+
+import os
+import sys
+import time
+import socket
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from services.embedding_worker import (
+    EmbeddingWorkerServer, EmbeddingWorkerClient, WorkerBackedSentenceTransformer,
+)
+
+
+class FakeService:
+    """Embedding = [código do modelo, tamanho do texto, soma dos caracteres]; 20ms por chamada"""
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.calls = []
+
+    def generate_embeddings(self, texts, batch_size=None):
+        self.calls.append(list(texts))
+        time.sleep(0.02)
+        code = float(len(self.model_name))
+        return [[code, float(len(text)), float(sum(map(ord, text)) % 9973)] for text in texts if text.strip()]
+
+    def get_model_info(self):
+        return {'model_name': self.model_name, 'dimensions': 3, 'status': 'loaded'}
+
+
+class FakeFactory:
+    def __init__(self, fail=False):
+        self.services = {}
+        self.fail = fail
+
+    def __call__(self, model_name):
+        if self.fail:
+            raise OSError("modelo não encontrado")
+        return self.services.setdefault(model_name, FakeService(model_name))
+
+
+def start_server(directory, factory, **kwargs):
+    path = os.path.join(directory, 'worker.sock')
+    return EmbeddingWorkerServer(path, service_factory=factory, **kwargs).start()
+
+
+def test_roundtrip(directory):
+    factory = FakeFactory()
+    server = start_server(directory, factory)
+    try:
+        client = EmbeddingWorkerClient(server.socket_path)
+        texts = ["Aquisição de pneus", "", "   ", "Serviços de TI", "Merenda escolar"]
+        matrix = client.embed("neuralmind", texts)
+        expected = FakeService("neuralmind").generate_embeddings(texts)
+        assert matrix.shape == (3, 3) and matrix.tolist() == expected
+        assert client.embed("neuralmind", ["", " "]).tolist() == []
+
+        proxy = WorkerBackedSentenceTransformer("neuralmind", client=client, local_factory=FakeFactory(fail=True))
+        assert proxy.generate_single_embedding("Serviços de TI") == expected[1]
+        assert proxy.get_model_info()['backend'] == 'embedding-worker'
+        assert proxy.get_model_info()['dimensions'] == 3
+    finally:
+        server.shutdown()
+    assert not os.path.exists(server.socket_path)
+    print("✅ Embeddings pelo socket iguais aos do processo, na ordem enviada")
+
+
+def test_coalescing(directory):
+    factory = FakeFactory()
+    server = start_server(directory, factory, max_wait_ms=30, max_batch=1000)
+    client = EmbeddingWorkerClient(server.socket_path)
+    results, errors = {}, []
+
+    def worker(number, model_name):
+        # Metade dos textos é comum a todos os clientes
+        texts = [f"Objeto comum {i}" for i in range(3)] + [f"Objeto {number}-{i}" for i in range(3)]
+        try:
+            results[number] = (model_name, texts, client.embed(model_name, texts).tolist())
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=worker, args=(n, 'modelo-a' if n % 4 else 'modelo-bb')) for n in range(24)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = client.stats()
+    finally:
+        server.shutdown()
+
+    assert not errors, errors
+    for model_name, texts, embeddings in results.values():
+        assert embeddings == FakeService(model_name).generate_embeddings(texts)
+
+    calls = [call for service in factory.services.values() for call in service.calls]
+    assert len(calls) <= 8 and stats['batches'] == len(calls)
+    assert stats['requests'] == 24 and stats['texts'] == 24 * 6
+    assert stats['unique_texts'] < stats['texts']
+    for call in calls:
+        assert len(call) == len(set(call))
+    # Cada lote é de um modelo só
+    for service in factory.services.values():
+        assert all(text.startswith("Objeto") for call in service.calls for text in call)
+    print(f"✅ 24 pedidos concorrentes em {stats['batches']} lotes "
+          f"({stats['unique_texts']} de {stats['texts']} textos calculados)")
+
+
+def test_fallback(directory):
+    local = FakeFactory()
+    missing = EmbeddingWorkerClient(os.path.join(directory, 'ausente.sock'))
+    proxy = WorkerBackedSentenceTransformer("neuralmind", client=missing, local_factory=local)
+    assert proxy.generate_embeddings(["Locação de veículos"]) == [[10.0, 19.0, float(sum(map(ord, "Locação de veículos")) % 9973)]]
+    assert "neuralmind" in local.services
+    print("✅ Sem worker: inferência no processo")
+
+    # Worker com erro (modelo não carrega): cai no processo e não insiste no worker
+    server = start_server(directory, FakeFactory(fail=True))
+    try:
+        local = FakeFactory()
+        proxy = WorkerBackedSentenceTransformer("neuralmind", client=EmbeddingWorkerClient(server.socket_path),
+                                                local_factory=local)
+        assert proxy.generate_embeddings(["Reforma de escola"])
+        assert len(local.services["neuralmind"].calls) == 1
+        assert not proxy._worker_usable()
+        assert server.stats()['errors'] == 1
+    finally:
+        server.shutdown()
+
+    # Socket órfão (processo morto): conexão recusada também cai no processo
+    orphan = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    orphan_path = os.path.join(directory, 'orfao.sock')
+    orphan.bind(orphan_path)
+    orphan.close()
+    local = FakeFactory()
+    proxy = WorkerBackedSentenceTransformer("neuralmind", client=EmbeddingWorkerClient(orphan_path), local_factory=local)
+    assert proxy.generate_embeddings(["Aquisição de pneus"]) and local.services["neuralmind"].calls
+    print("✅ Worker com erro ou morto: inferência no processo")
+
+
+def test_socket_ownership(directory):
+    orphan_path = os.path.join(directory, 'orfao.sock')
+    server = EmbeddingWorkerServer(orphan_path, service_factory=FakeFactory()).start()
+    try:
+        try:
+            EmbeddingWorkerServer(orphan_path, service_factory=FakeFactory()).bind()
+            raise AssertionError("segundo worker não deveria assumir o socket")
+        except RuntimeError:
+            pass
+        assert EmbeddingWorkerClient(orphan_path).embed("neuralmind", ["Serviços de TI"]).shape == (1, 3)
+    finally:
+        server.shutdown()
+    print("✅ Socket órfão reaproveitado; worker vivo não é substituído")
+
+
+def main():
+    print("🧪 TESTE DO WORKER DE EMBEDDINGS")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as directory:
+        test_roundtrip(directory)
+        test_coalescing(directory)
+        test_fallback(directory)
+        test_socket_ownership(directory)
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
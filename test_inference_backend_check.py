@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste da checagem de precisão dos backends de inferência
+Não carrega modelos (embeddings sintéticos):
+- concordância de cosseno aprova ruído pequeno e reprova ruído grande
+- backend configurado só é usado com aprovação registrada para o corpus atual
+- configuração por modelo (ST_INFERENCE_BACKENDS) e backend desconhecido
+
+Uso:
+    python test_inference_backend_check.py
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import numpy as np
+
+import services.inference_backends as backends
+from services.inference_backends import approved_backend, cosine_agreement, record_check, load_checks
+
+MODEL = 'neuralmind/bert-base-portuguese-cased'
+OTHER_MODEL = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+
+
+def synthetic_embeddings(noise, seed=0):
+    """Pares de textos parecidos (como licitação x perfil de empresa no corpus) + ruído do backend"""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(0, 1, (len(backends.ACCURACY_CORPUS) // 2, 768))
+    reference = (np.repeat(topics, 2, axis=0) + rng.normal(0, 0.5, (len(topics) * 2, 768))).astype(np.float32)
+    candidate = reference + rng.normal(0, noise, reference.shape).astype(np.float32)
+    return reference, candidate
+
+
+def test_cosine_agreement():
+    reference, candidate = synthetic_embeddings(noise=0.05)
+    result = cosine_agreement(reference, candidate)
+    assert result['passed'], result
+    assert result['texts'] == len(backends.ACCURACY_CORPUS)
+    assert result['mean_cosine'] > 0.99 and result['neighbor_agreement'] == 1.0
+
+    reference, candidate = synthetic_embeddings(noise=0.5)
+    result = cosine_agreement(reference, candidate)
+    assert not result['passed'], result
+    print("✅ Concordância de cosseno aprova ruído pequeno e reprova ruído grande")
+
+
+def test_backend_gate(checks_path):
+    backends.ST_INFERENCE_BACKEND = 'onnx-int8'
+    backends.ST_INFERENCE_BACKENDS = f"{OTHER_MODEL}=torch-int8"
+
+    # Sem checagem registrada: continua no fp32
+    assert approved_backend(MODEL, checks_path) == 'torch'
+
+    reference, candidate = synthetic_embeddings(noise=0.5)
+    record_check(MODEL, 'onnx-int8', cosine_agreement(reference, candidate), checks_path)
+    assert approved_backend(MODEL, checks_path) == 'torch'
+
+    reference, candidate = synthetic_embeddings(noise=0.05)
+    record_check(MODEL, 'onnx-int8', cosine_agreement(reference, candidate), checks_path)
+    assert approved_backend(MODEL, checks_path) == 'onnx-int8'
+
+    # Exceção por modelo: aprovação do onnx-int8 não vale para o torch-int8 do outro modelo
+    assert approved_backend(OTHER_MODEL, checks_path) == 'torch'
+    record_check(OTHER_MODEL, 'torch-int8', cosine_agreement(reference, candidate), checks_path)
+    assert approved_backend(OTHER_MODEL, checks_path) == 'torch-int8'
+    assert set(load_checks(checks_path)) == {f"{MODEL}|onnx-int8", f"{OTHER_MODEL}|torch-int8"}
+
+    # Corpus alterado invalida a aprovação
+    corpus = backends.ACCURACY_CORPUS
+    backends.ACCURACY_CORPUS = corpus + ("Aquisição de material de limpeza",)
+    try:
+        assert approved_backend(MODEL, checks_path) == 'torch'
+    finally:
+        backends.ACCURACY_CORPUS = corpus
+
+    backends.ST_INFERENCE_BACKENDS = f"{MODEL}=tensorrt"
+    assert approved_backend(MODEL, checks_path) == 'torch'
+    print("✅ Backend configurado só entra em uso depois de aprovado na checagem")
+
+
+def main():
+    print("🧪 TESTE DA CHECAGEM DE BACKENDS DE INFERÊNCIA")
+    print("=" * 50)
+    directory = tempfile.mkdtemp(prefix='inference-backend-checks-')
+    try:
+        test_cosine_agreement()
+        test_backend_gate(os.path.join(directory, 'checks.json'))
+        print("\n🎉 Todos os testes passaram")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
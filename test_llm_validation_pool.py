@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do pool concorrente de validação LLM
+Sobe um servidor HTTP local imitando o Ollama (/api/tags e /api/generate) com
+latência configurável e injeção de 429, e valida:
+- resultados na ordem de submissão
+- limite de concorrência por provider respeitado
+- retry com backoff em erros transitórios
+- ganho de tempo sobre a validação sequencial
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_LATENCY = 0.2
+CONCURRENCY = 4
+
+# Configurar antes de importar o validador (limites do provider são lidos uma vez por processo)
+os.environ['LLM_OLLAMA_CONCURRENCY'] = str(CONCURRENCY)
+os.environ['LLM_OLLAMA_TOKENS_PER_MINUTE'] = '0'
+os.environ['LLM_VALIDATION_MAX_RETRIES'] = '3'
+os.environ['LLM_VALIDATION_BACKOFF_BASE'] = '0.05'
+os.environ['OLLAMA_MODEL'] = 'stub:latest'
+os.environ['OLLAMA_TIMEOUT'] = '10'
+# Cada chamada precisa chegar ao stub (sem vereditos em cache)
+os.environ['LLM_VERDICT_CACHE_ENABLED'] = 'false'
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+
+class StubOllamaState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self.fail_next = 0  # Quantas próximas chamadas devolvem 429
+
+    def reset(self, fail_next: int = 0):
+        with self.lock:
+            self.active = self.max_active = self.calls = 0
+            self.fail_next = fail_next
+
+
+STATE = StubOllamaState()
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json(200, {'models': [{'name': 'stub:latest'}]})
+        else:
+            self._send_json(404, {})
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+
+        with STATE.lock:
+            STATE.calls += 1
+            if STATE.fail_next > 0:
+                STATE.fail_next -= 1
+                rate_limited = True
+            else:
+                rate_limited = False
+                STATE.active += 1
+                STATE.max_active = max(STATE.max_active, STATE.active)
+
+        if rate_limited:
+            self._send_json(429, {'error': 'rate limited'})
+            return
+
+        try:
+            time.sleep(STUB_LATENCY)
+            empresa = re.search(r'EMPRESA-\d+', payload['prompt']).group(0)
+            self._send_json(200, {'response': f'{empresa}: SIM, compatível. CONFIANÇA: 90%'})
+        finally:
+            with STATE.lock:
+                STATE.active -= 1
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ['OLLAMA_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    return server
+
+
+def build_requests(n):
+    return [
+        {
+            'empresa_nome': f'EMPRESA-{i}',
+            'empresa_descricao': 'Fornecimento de material de limpeza e higiene',
+            'licitacao_objeto': 'Aquisição de material de limpeza',
+            'pncp_id': f'PNCP-{i}',
+            'similarity_score': 0.8,
+        }
+        for i in range(n)
+    ]
+
+
+def test_ordered_and_bounded(validator):
+    """Resultados na ordem e concorrência limitada ao configurado"""
+    from matching.llm_validation_pool import LLMValidationPool
+
+    STATE.reset()
+    requests = build_requests(16)
+    with LLMValidationPool(validator, max_workers=8) as pool:
+        start = time.perf_counter()
+        results = pool.map_ordered(requests)
+        elapsed = time.perf_counter() - start
+
+    for request, result in zip(requests, results):
+        assert result['reasoning'].startswith(request['empresa_nome']), (request, result)
+        assert result['is_valid']
+    assert STATE.max_active <= CONCURRENCY, STATE.max_active
+    assert STATE.max_active > 1, "pool não executou em paralelo"
+
+    print(f"✅ Ordem preservada | concorrência máxima no stub: {STATE.max_active}/{CONCURRENCY}")
+    return elapsed
+
+
+def test_sequential_baseline(validator, n=16):
+    """Tempo da validação sequencial (comportamento anterior)"""
+    STATE.reset()
+    start = time.perf_counter()
+    for request in build_requests(n):
+        validator.validate_match(**request)
+    return time.perf_counter() - start
+
+
+def test_retry_on_429(validator):
+    """Erros 429 são repetidos pelo pool em vez de cair no fallback"""
+    from matching.llm_validation_pool import LLMValidationPool
+
+    STATE.reset(fail_next=3)
+    requests = build_requests(4)
+    with LLMValidationPool(validator) as pool:
+        results = pool.map_ordered(requests)
+        stats = pool.stats()
+
+    assert all(r['provider'] == 'ollama' and r['is_valid'] for r in results), results
+    assert stats['retries'] == 3, stats
+    assert STATE.calls == 7, STATE.calls
+    print(f"✅ Retry: {stats['retries']} retentativas após 429, nenhum fallback")
+
+
+def test_ordered_bid_queue(validator):
+    """Fila de licitações devolve as licitações na ordem mesmo com latências diferentes"""
+    from matching.llm_validation_pool import LLMValidationPool, OrderedBidValidationQueue
+
+    STATE.reset()
+    ready = []
+    with LLMValidationPool(validator) as pool:
+        queue = OrderedBidValidationQueue(pool, max_pending=3)
+        for bid in range(6):
+            # Licitações com 0..3 candidatas
+            ready.extend(queue.submit(f'BID-{bid}', build_requests(bid % 4)))
+            assert len(queue) < 3
+        ready.extend(queue.drain())
+
+    assert [context for context, _ in ready] == [f'BID-{bid}' for bid in range(6)]
+    assert [len(validations) for _, validations in ready] == [bid % 4 for bid in range(6)]
+
+    # Sem pool: saem imediatamente com validações None
+    queue = OrderedBidValidationQueue(None)
+    assert queue.submit('BID-X', build_requests(2)) == [('BID-X', [None, None])]
+    print("✅ Fila ordenada de licitações OK")
+
+
+def main():
+    server = start_stub_server()
+    try:
+        from matching.ollama_match_validator import OllamaMatchValidator
+
+        validator = OllamaMatchValidator()
+        assert validator.ollama_available, "stub Ollama não reconhecido"
+
+        sequential = test_sequential_baseline(validator)
+        pooled = test_ordered_and_bounded(validator)
+        print(f"⏱️  Sequencial: {sequential:.2f}s | Pool: {pooled:.2f}s | Speedup: {sequential / pooled:.1f}x")
+        assert sequential / pooled > 2, "pool deveria ser bem mais rápido que o sequencial"
+
+        test_retry_on_429(validator)
+        test_ordered_bid_queue(validator)
+        print("\n🎉 Todos os testes do pool de validação LLM passaram!")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
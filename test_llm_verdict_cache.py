@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do cache de vereditos LLM (services/llm_verdict_cache_service.py)
+Roda sem Redis nem Postgres (Redis em memória) e com um cliente OpenAI falso:
+- mesma validação repetida: veredito do cache, sem nova chamada ao LLM
+- par novo: miss e chamada ao LLM
+- perfil da empresa, versão do prompt ou qualquer entrada do prompt (score,
+  id da licitação, quantidade dos itens) diferentes: o veredito antigo não vale
+- pool de validação: hit do cache não passa pelo rate limiter nem pelo semáforo
+
+Uso:
+    python test_llm_verdict_cache.py
+"""
+
+import os
+import sys
+import json
+from types import SimpleNamespace
+
+# O cache de teste é injetado no validador (sem o singleton com Postgres)
+os.environ['LLM_VERDICT_CACHE_ENABLED'] = 'false'
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+
+class DictRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+        return True
+
+
+class FakeOpenAI:
+    """Responde sempre o mesmo veredito JSON, contando as chamadas"""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content = json.dumps({'is_valid': True, 'confidence': 0.9, 'reasoning': 'Compatível',
+                              'recommendation': 'RECOMENDADO'})
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class CountingLimits:
+    """Semáforo e rate limiter que só contam o uso"""
+
+    def __init__(self):
+        self.acquired = 0
+        self.entered = 0
+        self.semaphore = self
+        self.rate_limiter = self
+
+    def acquire(self, tokens):
+        self.acquired += 1
+        return 0.0
+
+    def __enter__(self):
+        self.entered += 1
+
+    def __exit__(self, *exc):
+        return False
+
+
+def build_request(**overrides):
+    request = {
+        'empresa_nome': 'Limpa Tudo LTDA',
+        'empresa_descricao': 'Fornecimento de material de limpeza e higiene',
+        'licitacao_objeto': 'Aquisição de material de limpeza',
+        'pncp_id': '00000000000191-1-000001/2025',
+        'similarity_score': 0.82,
+        'licitacao_itens': [{'descricao': 'Detergente neutro', 'quantidade': 100}],
+        'empresa_produtos': ['Detergente', 'Desinfetante'],
+    }
+    request.update(overrides)
+    return request
+
+
+def new_validator():
+    from matching.llm_match_validator import LLMMatchValidator
+    from services.llm_verdict_cache_service import LLMVerdictCacheService
+
+    validator = LLMMatchValidator()
+    validator.openai_client = FakeOpenAI()
+    validator.verdict_cache = LLMVerdictCacheService(redis_client=DictRedis())
+    return validator
+
+
+def test_hit_and_miss():
+    validator = new_validator()
+    first = validator.validate_match(**build_request())
+    assert validator.openai_client.calls == 1 and 'cache_hit' not in first, first
+    second = validator.validate_match(**build_request())
+    assert validator.openai_client.calls == 1 and second['cache_hit'], second
+    assert second['is_valid'] == first['is_valid'] and second['model_used'] == first['model_used']
+
+    validator.validate_match(**build_request(licitacao_objeto='Aquisição de material de escritório'))
+    assert validator.openai_client.calls == 2
+    stats = validator.verdict_cache.stats()
+    assert (stats['hits'], stats['misses'], stats['stores']) == (1, 2, 2), stats
+    print("✅ Mesma validação servida pelo cache; par novo vai ao LLM")
+
+
+def test_invalidation():
+    validator = new_validator()
+    validator.validate_match(**build_request())
+    changes = [
+        {'empresa_descricao': 'Fornecimento de material de limpeza, higiene e EPIs'},
+        {'empresa_produtos': ['Detergente', 'Desinfetante', 'Luvas']},
+        {'similarity_score': 0.91},
+        {'pncp_id': '00000000000191-1-000002/2025'},
+        {'licitacao_itens': [{'descricao': 'Detergente neutro', 'quantidade': 5000}]},
+    ]
+    for number, change in enumerate(changes, 2):
+        assert validator.lookup_cached_verdict(**build_request(**change)) is None, change
+        validator.validate_match(**build_request(**change))
+        assert validator.openai_client.calls == number, (change, validator.openai_client.calls)
+
+    # Prompt alterado (nova versão): vereditos antigos deixam de valer
+    assert validator.lookup_cached_verdict(**build_request())['cache_hit']
+    validator.prompt_version = 'outra-versao'
+    assert validator.lookup_cached_verdict(**build_request()) is None
+    validator.validate_match(**build_request())
+    assert validator.openai_client.calls == len(changes) + 2
+    print(f"✅ Perfil da empresa, versão do prompt e entradas do prompt ({len(changes)} mudanças) invalidam o veredito")
+
+
+def test_pool_skips_limits_on_hit():
+    from matching.llm_validation_pool import LLMValidationPool
+
+    validator = new_validator()
+    with LLMValidationPool(validator, max_workers=2) as pool:
+        limits = CountingLimits()
+        pool.limits = limits
+        pool.map_ordered([build_request()])
+        assert (limits.acquired, limits.entered) == (1, 1)
+        results = pool.map_ordered([build_request(), build_request()])
+        stats = pool.stats()
+
+    assert all(result['cache_hit'] for result in results), results
+    assert (limits.acquired, limits.entered) == (1, 1), (limits.acquired, limits.entered)
+    assert validator.openai_client.calls == 1 and stats['cache_hits'] == 2, stats
+    # Miss no pool: uma consulta só ao cache (o pool já consultou antes do validate_match)
+    assert validator.verdict_cache.stats()['lookups'] == 3, validator.verdict_cache.stats()
+    print("✅ Pool: hits do cache não consomem rate limit nem vaga do provider")
+
+
+def main():
+    print("🧪 TESTE DO CACHE DE VEREDITOS LLM")
+    print("=" * 50)
+    test_hit_and_miss()
+    test_invalidation()
+    test_pool_skips_limits_on_hit()
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
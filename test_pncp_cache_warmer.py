@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do aquecedor do dataset nacional do PNCP (services/pncp_cache_warmer.py)
+Com Redis local e o PNCP falso (scripts/fake_pncp_server.py) com latência:
+- cache frio com dois "workers" ao mesmo tempo: uma única busca no PNCP
+- busca com cache velho responde na hora; o aquecimento roda em segundo plano
+- lock: outro worker aquecendo -> 'locked'; dataset novo -> 'fresh'
+- troca atômica: leitores nunca ficam sem dataset durante as atualizações
+- estado (idade do cache, duração do último aquecimento) e agendamento
+- lock renovado enquanto a busca dura mais que o TTL: outro worker nunca o pega
+- cache frio com falha no aquecimento: erro explícito, sem refazer a busca nacional
+- cache frio com outro worker aquecendo além da espera: a busca busca sozinha
+
+Uso:
+    python test_pncp_cache_warmer.py
+    WARMER_TEST_REDIS_URL=redis://localhost:6379/15 python test_pncp_cache_warmer.py
+"""
+
+import os
+import sys
+import time
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from fake_pncp_server import FakePNCPServer, make_record, make_records
+
+# Banco separado: as chaves do dataset são fixas
+REDIS_URL = os.getenv('WARMER_TEST_REDIS_URL', 'redis://localhost:6379/15')
+
+
+def connect_redis():
+    try:
+        import redis
+        client = redis.Redis.from_url(REDIS_URL, decode_responses=False, socket_connect_timeout=2)
+        client.ping()
+        return client
+    except Exception as e:
+        print(f"⚠️ Redis indisponível em {REDIS_URL} ({e}) - teste ignorado")
+        return None
+
+
+def full_fetches(server) -> int:
+    """Resyncs completos que chegaram ao PNCP (primeira página de /proposta)"""
+    return sum(1 for endpoint, params in server.requests_log
+               if endpoint == 'proposta' and params.get('pagina') == '1')
+
+
+def main():
+    print("🧪 TESTE DO AQUECEDOR DO DATASET DO PNCP")
+    print("=" * 50)
+    redis_client = connect_redis()
+    if redis_client is None:
+        return
+
+    from adapters.pncp_adapter import PNCPAdapter, PNCP_DATASET_CACHE_KEY, PNCP_DATASET_VERSION_KEY
+    from services.pncp_cache_warmer import PNCPCacheWarmer, WARM_LOCK_KEY, WARM_STATUS_KEY
+
+    def dataset_keys():
+        shards = list(redis_client.scan_iter(match=f"{PNCP_DATASET_CACHE_KEY}:uf:*"))
+        return [PNCP_DATASET_CACHE_KEY, f"{PNCP_DATASET_CACHE_KEY}:gz", PNCP_DATASET_VERSION_KEY,
+                WARM_LOCK_KEY, WARM_STATUS_KEY, *shards]
+
+    redis_client.delete(*dataset_keys())
+    server = FakePNCPServer(make_records(600, start=datetime.now() - timedelta(days=6), days=5, seed=11),
+                            latency=0.05).start()
+
+    def new_worker():
+        adapter = PNCPAdapter({'api_base_url': server.url})
+        adapter.redis_client, adapter.cache_ttl = redis_client, 3600
+        return adapter, PNCPCacheWarmer(adapter, interval=60, check_seconds=0.2)
+
+    try:
+        # 1. Cache frio, dois workers buscando ao mesmo tempo
+        workers = [new_worker() for _ in range(2)]
+        results = [None, None]
+
+        def cold_search(index):
+            adapter, warmer = workers[index]
+            results[index] = warmer.ensure_dataset(adapter, timeout=30)
+
+        threads = [threading.Thread(target=cold_search, args=(i,)) for i in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(results) and results[0]['watermark'] == results[1]['watermark']
+        assert full_fetches(server) == 1, server.requests_log[:5]
+        records = len(results[0]['data'])
+        print(f"✅ Cache frio com 2 workers: 1 busca no PNCP ({server.stats['requests']} requisições, {records} registros)")
+
+        # 2. Dataset novo: não busca de novo
+        adapter, warmer = workers[0]
+        server.reset_stats()
+        assert warmer.warm()['status'] == 'fresh' and server.stats['requests'] == 0
+        print("✅ Dataset novo: aquecimento pulado sem ir ao PNCP")
+
+        # 3. Outro worker com o lock: pula
+        redis_client.set(WARM_LOCK_KEY, b'outro-worker', px=5000)
+        assert warmer.warm(force=True)['status'] == 'locked' and server.stats['requests'] == 0
+        assert warmer.status()['warming_now']
+        redis_client.delete(WARM_LOCK_KEY)
+        print("✅ Lock de outro worker respeitado")
+
+        # 4. Cache velho: a busca responde com a cópia antiga, o aquecimento vem depois
+        stale = adapter._read_dataset_cache()
+        stale['synced_at'] = (datetime.now() - timedelta(hours=3)).isoformat(timespec='seconds')
+        adapter._write_dataset_cache(stale)
+        for n in range(5):
+            server.records.append(make_record(90_000 + n, datetime.now() - timedelta(minutes=5 + n)))
+        server.reset_stats()
+        server.latency = 0.3
+        start = time.perf_counter()
+        served = asyncio.run(adapter._get_cached_dataset({}))
+        elapsed = time.perf_counter() - start
+        assert served['synced_at'] == stale['synced_at'] and elapsed < 0.25, elapsed
+        deadline = time.monotonic() + 20
+        while adapter._read_dataset_cache()['synced_at'] == stale['synced_at']:
+            assert time.monotonic() < deadline, "aquecimento em segundo plano não terminou"
+            time.sleep(0.05)
+        refreshed = adapter._read_dataset_cache()
+        assert len(refreshed['data']) == records + 5 and refreshed['last_sync']['mode'] == 'incremental'
+        print(f"✅ Cache velho servido em {elapsed * 1000:.0f}ms; delta aplicado em segundo plano (+5)")
+        server.latency = 0.05
+
+        # 5. Troca atômica: leitores contínuos durante vários aquecimentos (comprimido e não)
+        misses, reads, stop = [0], [0], threading.Event()
+
+        def reader():
+            while not stop.is_set():
+                reads[0] += 1
+                if not adapter._read_dataset_cache():
+                    misses[0] += 1
+
+        readers = [threading.Thread(target=reader) for _ in range(3)]
+        for thread in readers:
+            thread.start()
+        try:
+            for full in (False, True, False, True):
+                assert warmer.warm(full=full, force=True)['status'] == 'warmed'
+        finally:
+            stop.set()
+            for thread in readers:
+                thread.join()
+        assert misses[0] == 0 and reads[0] > 0, (misses, reads)
+        print(f"✅ {reads[0]} leituras durante 4 aquecimentos, nenhuma sem dataset")
+
+        # 6. Estado
+        status = warmer.status()
+        assert status['records'] == len(adapter._read_dataset_cache()['data'])
+        assert status['cache_age_s'] is not None and status['cache_age_s'] < 60
+        assert status['last_warm_duration_s'] > 0 and status['last_warm_mode'] == 'full'
+        assert status['last_warm_error'] is None and not status['warming_now']
+        print(f"✅ Estado: cache com {status['cache_age_s']}s, último aquecimento em "
+              f"{status['last_warm_duration_s']}s ({status['last_warm_mode']})")
+
+        # 7. Agendamento: dataset passa do intervalo -> a thread atualiza sozinha
+        warmer.interval = 1
+        before = warmer.status()['synced_at']
+        time.sleep(1.1)
+        assert warmer.start()
+        try:
+            deadline = time.monotonic() + 20
+            while warmer.status()['synced_at'] == before:
+                assert time.monotonic() < deadline, "agendador não aqueceu o dataset"
+                time.sleep(0.1)
+            assert warmer.status()['scheduler_running']
+        finally:
+            warmer.stop()
+        print("✅ Agendador atualiza o dataset depois do intervalo")
+
+        # 8. Busca mais longa que o TTL do lock: o heartbeat o renova até o fim
+        slow = PNCPCacheWarmer(adapter, interval=60, check_seconds=0.2, lock_ttl=0.4)
+        server.latency = 0.5
+        summaries = []
+        stolen, polls = [], [0]
+        warming = threading.Thread(target=lambda: summaries.append(slow.warm(full=True, force=True)))
+        warming.start()
+        while redis_client.get(WARM_LOCK_KEY) is None and warming.is_alive():
+            time.sleep(0.01)  # Espera o aquecimento pegar o lock
+        while warming.is_alive():
+            polls[0] += 1
+            if redis_client.set(WARM_LOCK_KEY, b'outro-worker', nx=True, px=5000):
+                stolen.append(time.monotonic())
+                redis_client.delete(WARM_LOCK_KEY)
+            time.sleep(0.05)
+        warming.join()
+        server.latency = 0.05
+        status = slow.status()
+        assert not stolen and status['last_warm_duration_s'] > 3 * slow.lock_ttl, (stolen, summaries)
+        assert redis_client.get(WARM_LOCK_KEY) is None
+        print(f"✅ Lock de {slow.lock_ttl}s renovado durante aquecimento de {status['last_warm_duration_s']:.1f}s "
+              f"({polls[0]} tentativas de outro worker, nenhuma pegou o lock)")
+
+        # 9. Cache frio e aquecimento com erro: erro explícito, sem outra busca nacional
+        redis_client.delete(*dataset_keys())
+        failing, _ = new_worker()
+
+        async def refresh_fails(full=False, now=None):
+            raise RuntimeError("PNCP fora do ar")
+
+        failing.refresh_dataset = refresh_fails
+        server.reset_stats()
+        try:
+            asyncio.run(failing._get_cached_dataset({}))
+            raise AssertionError("cache frio com aquecimento falhando respondeu sem erro")
+        except RuntimeError as e:
+            assert "warm-up failed" in str(e), e
+        assert server.stats['requests'] == 0, server.stats
+        assert warmer.status()['last_warm_error'] == "PNCP fora do ar"
+        print("✅ Cache frio com aquecimento falhando: erro explícito, nenhuma busca extra no PNCP")
+
+        # 10. Cache frio e outro worker aquecendo além da espera: a busca busca sozinha
+        from services.pncp_cache_warmer import get_pncp_cache_warmer
+        redis_client.delete(*dataset_keys())
+        redis_client.set(WARM_LOCK_KEY, b'outro-worker', px=30000)
+        shared = get_pncp_cache_warmer()
+        shared.ensure = lambda adapter=None, timeout=None: PNCPCacheWarmer.ensure(shared, adapter, timeout=1.5)
+        waiting, _ = new_worker()
+        server.reset_stats()
+        try:
+            served = asyncio.run(waiting._get_cached_dataset({}))
+        finally:
+            del shared.ensure
+            redis_client.delete(WARM_LOCK_KEY)
+        assert len(served['data']) > 0 and full_fetches(server) == 1, (len(served['data']), server.stats)
+        print(f"✅ Cache frio com lock preso além da espera: busca dentro da requisição ({len(served['data'])} registros)")
+    finally:
+        server.stop()
+        redis_client.delete(*dataset_keys())
+
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
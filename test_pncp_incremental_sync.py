@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste da sincronização incremental com o PNCP (watermarks)
+Simula vários dias de publicações, retificações e encerramentos num PNCP falso
+local (scripts/fake_pncp_server.py):
+- PNCPAdapter: dataset nacional em cache atualizado só com o delta de
+  /contratacoes/atualizacao, igual ao que um resync completo devolveria;
+  resync completo sob demanda e depois de PNCP_FULL_RESYNC_DAYS
+- process_daily_bids (com Postgres local): primeira execução completa, depois
+  só o delta; retificações regravadas em licitacoes sem novo matching;
+  watermark não avança quando páginas falham; full_resync=True refaz a janela
+
+Uso:
+    python test_pncp_incremental_sync.py
+    PIPELINE_TEST_DATABASE_URL=postgresql://postgres@localhost/postgres python test_pncp_incremental_sync.py
+"""
+
+import os
+import sys
+import random
+import asyncio
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from fake_pncp_server import FakePNCPServer, make_record, make_records
+
+MIGRATION = os.path.join(os.path.dirname(__file__), 'migrations', '20261016_02_create_pncp_sync_watermarks.sql')
+
+
+class FakeRedis:
+    """Só o que o PNCPAdapter usa do cliente Redis"""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def expire(self, key, ttl):
+        return int(key in self.data)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, redis_client):
+        self.redis_client, self.calls = redis_client, []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self.redis_client, name)(*args) for name, args in self.calls]
+
+
+def iso(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def rectify(record: dict, when: datetime, note: str):
+    record['objetoCompra'] = f"{record['objetoCompra']} - {note}"
+    record['dataAtualizacao'] = iso(when)
+
+
+# ---------------------------------------------------------------- PNCPAdapter
+
+def test_adapter_days():
+    from adapters.pncp_adapter import PNCPAdapter, PNCP_DATASET_CACHE_KEY
+
+    rng = random.Random(3)
+    base = datetime.combine(date.today() - timedelta(days=20), time(9))
+    server = FakePNCPServer(make_records(800, start=base - timedelta(days=14), days=14, seed=7), latency=0.002).start()
+    try:
+        adapter = PNCPAdapter({'api_base_url': server.url})
+        adapter.redis_client, adapter.cache_ttl = FakeRedis(), 3600
+
+        def expected():
+            return {record['numeroControlePNCP']: record
+                    for record in server._select('proposta', {'dataFinal': [adapter.data_final]})}
+
+        server.now = base
+        dataset = asyncio.run(adapter.refresh_dataset(now=base))
+        full_requests = server.stats['requests']
+        assert {record['numeroControlePNCP']: record for record in dataset['data']} == expected()
+        assert dataset['last_sync']['mode'] == 'full' and dataset['watermark'] == max(
+            record['dataAtualizacao'] for record in dataset['data'])
+        print(f"✅ Dia 0: resync completo com {len(dataset['data'])} propostas abertas em {full_requests} requisições")
+
+        number = 10_000
+        for day in range(1, 5):
+            now = base + timedelta(days=day)
+            # Durante o dia anterior: publicações novas, retificações e propostas encerrando
+            for _ in range(60):
+                number += 1
+                server.records.append(make_record(number, now - timedelta(hours=rng.randint(1, 20)), rng=rng))
+            open_records = list(expected().values())
+            for record in rng.sample(open_records, 20):
+                rectify(record, now - timedelta(hours=2), f"retificado no dia {day}")
+            server.reset_stats()
+            server.now = now
+
+            dataset = asyncio.run(adapter.refresh_dataset(now=now))
+            data_inicial, data_final = [
+                params for endpoint, params in server.requests_log if endpoint == 'atualizacao'
+            ][0]['dataInicial'], now.strftime('%Y%m%d')
+            in_window = server._select('atualizacao', {'dataInicial': [data_inicial], 'dataFinal': [data_final]})
+
+            assert {record['numeroControlePNCP']: record for record in dataset['data']} == expected(), day
+            assert {endpoint for endpoint, _ in server.requests_log} == {'atualizacao'}
+            # Só o delta trafegou: registros atualizados na janela, não o dataset inteiro
+            assert server.stats['records_served'] == len(in_window) < len(dataset['data'])
+            assert dataset['watermark'] == max(record['dataAtualizacao'] for record in in_window)
+            sync = dataset['last_sync']
+            print(f"✅ Dia {day}: delta de {server.stats['records_served']} registros em {server.stats['requests']} "
+                  f"requisições (+{sync['added']} novas, {sync['updated']} retificadas, -{sync['removed']} encerradas; "
+                  f"dataset com {len(dataset['data'])})")
+
+        # Busca usa o dataset em cache (fresco) sem ir ao PNCP
+        cached = adapter._read_dataset_cache()
+        cached['synced_at'] = iso(datetime.now())
+        adapter._write_dataset_cache(cached)
+        assert f"{PNCP_DATASET_CACHE_KEY}:gz" in adapter.redis_client.data  # dataset grande vai comprimido
+        server.reset_stats()
+        assert asyncio.run(adapter._get_cached_dataset({}))['watermark'] == dataset['watermark']
+        assert server.stats['requests'] == 0
+        print("✅ Dataset fresco servido do cache sem requisições")
+
+        # Resync sob demanda e automático depois de PNCP_FULL_RESYNC_DAYS
+        for label, now, full in (('sob demanda', base + timedelta(days=4, hours=1), True),
+                                 ('automático (7 dias)', base + timedelta(days=12), False)):
+            server.reset_stats()
+            server.now = now
+            dataset = asyncio.run(adapter.refresh_dataset(full=full, now=now))
+            assert {endpoint for endpoint, _ in server.requests_log} == {'proposta'}, label
+            assert {record['numeroControlePNCP']: record for record in dataset['data']} == expected(), label
+            assert dataset['last_sync']['mode'] == 'full' and dataset['last_full_sync_at'] == iso(now)
+            print(f"✅ Resync completo {label}: {len(dataset['data'])} registros")
+    finally:
+        server.stop()
+
+
+# ---------------------------------------------------------------- process_daily_bids
+
+def test_daily_sync(base_url: str):
+    import psycopg2
+    from test_daily_pipeline import SCHEMA, SCHEMA_SQL, with_search_path
+
+    admin = psycopg2.connect(base_url)
+    admin.autocommit = True
+    with admin.cursor() as cursor, open(MIGRATION) as migration:
+        cursor.execute(SCHEMA_SQL)
+        cursor.execute(migration.read())
+
+    server = FakePNCPServer(latency=0.001).start()
+    today = date.today()
+    closes = iso(datetime.combine(today, time(23, 59, 59)))
+    ufs = ['SP', 'RJ', 'MG']
+    counter = [0]
+
+    def publish(count: int, days_ago: int) -> list:
+        published = []
+        for _ in range(count):
+            counter[0] += 1
+            record = make_record(counter[0], datetime.combine(today - timedelta(days=days_ago), time(10))
+                                 + timedelta(minutes=counter[0]), uf=ufs[counter[0] % len(ufs)], modalidade=6)
+            record['dataEncerramentoProposta'] = closes
+            published.append(record)
+        server.records.extend(published)
+        return published
+
+    # Configurar antes de importar o pacote matching (constantes lidas no import)
+    os.environ['DATABASE_URL'] = with_search_path(base_url)
+    os.environ['PNCP_API_BASE_URL'] = server.url[:-len('/v1')]
+    os.environ['PNCP_PAGE_PAUSE'] = '0'
+    os.environ['PIPELINE_REPORT_INTERVAL'] = '0'
+    os.environ['EMBEDDING_DISK_STORE_DIR'] = tempfile.mkdtemp(prefix='sync-embeddings-')
+
+    try:
+        from matching.vectorizers import MockTextVectorizer
+        from matching.matching_engine import process_daily_bids
+
+        def run(**kwargs):
+            server.reset_stats()
+            result = process_daily_bids(MockTextVectorizer(), enable_llm_validation=False, **kwargs)
+            endpoints = {endpoint for endpoint, _ in server.requests_log if endpoint != 'itens'}
+            return result, endpoints
+
+        def query(sql, *params):
+            with admin.cursor() as cursor:
+                cursor.execute(sql.format(schema=SCHEMA), params)
+                return cursor.fetchall()
+
+        def window_records():
+            """Registros que a janela pedida ao /atualizacao deveria trazer (todos os UFs)"""
+            params = next(params for endpoint, params in server.requests_log if endpoint == 'atualizacao')
+            return len(server._select('atualizacao', {'dataInicial': [params['dataInicial']],
+                                                      'dataFinal': [params['dataFinal']]}))
+
+        def watermark():
+            return query("SELECT watermark, last_full_sync_at FROM {schema}.pncp_sync_watermarks")[0]
+
+        # Dia 0: sem watermark -> janela completa (última semana)
+        day0 = publish(30, days_ago=6)
+        result, endpoints = run()
+        assert endpoints == {'proposta'} and result['sync']['mode'] == 'full', (endpoints, result['sync'])
+        assert result['pipeline']['stages']['fetch']['emitted'] == 30
+        assert watermark()[0] == datetime.fromisoformat(day0[-1]['dataAtualizacao']) and watermark()[1] is not None
+        print(f"✅ Dia 0: resync completo, 30 licitações, watermark {result['sync']['watermark']}")
+
+        # Dia 1: novas + retificações de licitações já processadas
+        day1 = publish(10, days_ago=4)
+        for record in day0[:5]:
+            rectify(record, datetime.combine(today - timedelta(days=4), time(12)), "retificado")
+        result, endpoints = run()
+        assert endpoints == {'atualizacao'} and result['sync']['mode'] == 'incremental', (endpoints, result['sync'])
+        assert server.stats['records_served'] == window_records() == 40, server.stats  # watermark do dia 0 + sobreposição
+        assert result['pipeline']['stages']['fetch']['emitted'] == 10
+        assert result['estatisticas']['atualizadas'] == 5
+        rows = dict(query("SELECT pncp_id, objeto_compra FROM {schema}.licitacoes"))
+        assert len(rows) == 40 and all(rows[record['numeroControlePNCP']].endswith('retificado') for record in day0[:5])
+        assert query("SELECT DISTINCT status FROM {schema}.licitacoes") == [('processada',)]
+        print(f"✅ Dia 1: delta de {server.stats['records_served']} registros - 10 novas processadas, "
+              f"5 retificações regravadas sem novo matching, reprocessamento da sobreposição evitado")
+
+        # Dia 2: sobreposição de um dia com o watermark não repete nada
+        publish(7, days_ago=2)
+        rectify(day1[0], datetime.combine(today - timedelta(days=2), time(11)), "nova data")
+        result, _ = run()
+        assert result['pipeline']['stages']['fetch']['emitted'] == 7
+        assert result['estatisticas']['atualizadas'] == 1
+        assert watermark()[0] == datetime.combine(today - timedelta(days=2), time(11))
+        # Só a janela desde o watermark do dia 1 trafegou (dia 0 sem retificação ficou de fora)
+        assert server.stats['records_served'] == window_records() == 22, server.stats
+        print(f"✅ Dia 2: 7 novas e 1 retificação (sobreposição de {server.stats['records_served'] - 8} registros ignorada)")
+
+        # Dia 3: PNCP fora do ar -> nada perdido, watermark parado
+        before = watermark()[0]
+        publish(3, days_ago=1)
+        server.error_rate = 1.0
+        result, _ = run()
+        server.error_rate = 0.0
+        assert result['sync']['fetch_errors'] > 0 and not result['sync']['advanced']
+        assert watermark()[0] == before
+        result, _ = run()
+        assert result['pipeline']['stages']['fetch']['emitted'] == 3 and result['sync']['advanced']
+        print("✅ Dia 3: com erro no PNCP o watermark não avança; a execução seguinte recupera as 3 novas")
+
+        # Sem novidades: nada emitido, watermark igual
+        before = watermark()[0]
+        result, _ = run()
+        assert result['pipeline']['stages']['fetch']['emitted'] == 0 and result['estatisticas']['atualizadas'] == 0
+        assert watermark()[0] == before
+        print("✅ Dia sem atualizações: nada reprocessado")
+
+        # Resync sob demanda: janela completa, regrava inclusive mudanças que não mexeram na data
+        day0[10]['objetoCompra'] = "Corrigido sem nova dataAtualizacao"
+        full_before = watermark()[1]
+        result, endpoints = run(full_resync=True)
+        assert endpoints == {'proposta'} and result['sync']['mode'] == 'full'
+        assert result['pipeline']['stages']['fetch']['emitted'] == 0
+        assert query("SELECT objeto_compra FROM {schema}.licitacoes WHERE pncp_id = %s",
+                     day0[10]['numeroControlePNCP'])[0][0] == "Corrigido sem nova dataAtualizacao"
+        assert watermark()[1] > full_before
+        print(f"✅ Resync sob demanda: {result['estatisticas']['atualizadas']} licitações regravadas, nenhuma reprocessada")
+    finally:
+        server.stop()
+        try:
+            from config.database import db_manager
+            db_manager.close_pool()
+        except Exception:
+            pass
+        with admin.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        admin.close()
+
+
+def main():
+    print("🧪 TESTE DA SINCRONIZAÇÃO INCREMENTAL DO PNCP")
+    print("=" * 50)
+    base_url = os.getenv('PIPELINE_TEST_DATABASE_URL')
+    # Antes do PNCPAdapter: PNCP_API_BASE_URL é lido no import de matching.pncp_api
+    if base_url:
+        test_daily_sync(base_url)
+    else:
+        print("⚠️ Defina PIPELINE_TEST_DATABASE_URL com um Postgres local para testar process_daily_bids")
+    test_adapter_days()
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
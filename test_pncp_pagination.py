@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste da paginação nacional do PNCP com concorrência adaptativa
+Contra um PNCP falso local (scripts/fake_pncp_server.py):
+- todas as páginas, sem repetidos, parando quando o resultado acaba
+- com limite de taxa (429 + Retry-After) e 503: nenhuma página perdida,
+  concorrência reduzida, retry só das páginas que falharam
+- AIMD: slow start, depois +1 por rodada; cai pela metade uma vez por rajada
+- PNCPAdapter usa o fetcher compartilhado a partir de event loops diferentes
+
+Uso:
+    python test_pncp_pagination.py
+"""
+
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+import adapters.pncp_page_fetcher as page_fetcher
+from adapters.pncp_page_fetcher import AIMDConcurrency, PNCPPageFetcher
+from fake_pncp_server import FakePNCPServer, make_records
+
+PARAMS = {'dataInicial': '20240101', 'dataFinal': '20991231', 'codigoModalidadeContratacao': 8}
+
+
+def expected_ids(server):
+    return [record['numeroControlePNCP'] for record in server._select('proposta', {})]
+
+
+def test_early_stop(fetcher):
+    server = FakePNCPServer(make_records(1234), latency=0.005).start()
+    try:
+        result = fetcher.fetch_pages(f"{server.url}/contratacoes/proposta", PARAMS, max_pages=200)
+    finally:
+        server.stop()
+    assert [item['numeroControlePNCP'] for item in result['data']] == expected_ids(server)
+    # 1234 registros = 25 páginas: nenhuma requisição além delas
+    assert result['pages_searched'] == 25 and result['requests'] == 25 and server.stats['requests'] == 25
+    assert result['failed_pages'] == []
+    print(f"✅ 25 páginas em {result['requests']} requisições (parou no fim do resultado)")
+
+
+def test_rate_limited(fetcher):
+    server = FakePNCPServer(make_records(3000), rate=40, burst=5, latency=0.01, error_rate=0.05,
+                            retry_after=0.2).start()
+    controller = AIMDConcurrency(initial=8, maximum=32)
+    try:
+        result = fetcher.fetch_pages(f"{server.url}/contratacoes/proposta", PARAMS, max_pages=200,
+                                     controller=controller)
+    finally:
+        server.stop()
+    assert result['failed_pages'] == []
+    assert [item['numeroControlePNCP'] for item in result['data']] == expected_ids(server)
+    assert result['throttled'] > 0 and controller.decreases > 0
+    # Só as páginas que falharam voltaram para a fila
+    assert result['requests'] == 60 + result['retries']
+    print(f"✅ Com 429/503: {result['total']} registros, {result['throttled']} limitadas, "
+          f"{result['retries']} retries, concorrência final {result['final_concurrency']}")
+
+
+def test_aimd():
+    controller = AIMDConcurrency(initial=2, minimum=1, maximum=12, latency_target=1.0)
+    for _ in range(6):
+        controller.on_success(0.1)
+    assert controller.limit == 8  # slow start: +1 por resposta até a primeira sobrecarga
+    controller.on_overload()
+    controller.on_overload()  # mesma rajada: não reduz de novo
+    assert controller.limit == 4 and controller.decreases == 1
+    for _ in range(4 + 5):
+        controller.on_success(0.1)
+    assert controller.limit == 6  # depois: +1 por rodada de 'limit' respostas
+    controller._last_decrease -= 5
+    controller.on_success(2.0)  # lenta demais conta como sobrecarga
+    assert controller.limit == 3
+    for _ in range(3):
+        controller._last_decrease -= 5
+        controller.on_overload()
+    assert controller.limit == 1
+    print("✅ AIMD: slow start, +1 por rodada, metade por rajada de sobrecarga, limitado ao mínimo")
+
+
+def test_first_page_failure(fetcher):
+    server = FakePNCPServer(make_records(500), error_rate=1.0, latency=0.001).start()
+    page_fetcher.PNCP_FETCH_BACKOFF, backoff = 0.01, page_fetcher.PNCP_FETCH_BACKOFF
+    try:
+        result = fetcher.fetch_pages(f"{server.url}/contratacoes/proposta", PARAMS, max_pages=200)
+    finally:
+        page_fetcher.PNCP_FETCH_BACKOFF = backoff
+        server.stop()
+    assert result['failed_pages'] == [1] and result['total'] == 0
+    assert result['requests'] == 1 + page_fetcher.PNCP_FETCH_MAX_RETRIES
+    print("✅ Primeira página indisponível: desiste sem varrer as 200 páginas")
+
+
+def test_adapter():
+    from adapters.pncp_adapter import PNCPAdapter
+
+    server = FakePNCPServer(make_records(777), latency=0.005).start()
+    try:
+        adapter = PNCPAdapter({'api_base_url': server.url})
+        first = asyncio.run(adapter._fetch_with_efficient_pagination({}))
+        second = asyncio.run(adapter._fetch_with_efficient_pagination({}))  # outro event loop
+    finally:
+        server.stop()
+    assert first['total'] == second['total'] == 777
+    assert first['strategy'] == 'adaptive_national_pagination'
+    assert all(params['codigoModalidadeContratacao'] == '8' for _, params in server.requests_log)
+    print("✅ PNCPAdapter usa o fetcher compartilhado em buscas de event loops diferentes")
+
+
+def main():
+    print("🧪 TESTE DA PAGINAÇÃO ADAPTATIVA DO PNCP")
+    print("=" * 50)
+    fetcher = PNCPPageFetcher(timeout=10)
+    try:
+        test_early_stop(fetcher)
+        test_rate_limited(fetcher)
+        test_aimd()
+        test_first_page_failure(fetcher)
+    finally:
+        fetcher.close()
+    test_adapter()
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
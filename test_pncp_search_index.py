@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste do índice de busca em memória do dataset do PNCP (adapters/pncp_search_corpus.py)
+- índice invertido dá exatamente o mesmo resultado que a varredura de substrings
+  (termos de 1 token, pedaços de tokens, frases que começam/terminam no meio
+  de um token, acentos e pontuação), em milhares de termos aleatórios
+- UF, município e faixa de valor iguais aos filtros antigos
+- busca no PNCPAdapter com índice da mesma versão não lê o dataset do Redis;
+  versão nova reconstrói o índice
+- _apply_local_filters igual ao filtro anterior, inclusive com keywords sem
+  nenhum termo válido (nenhum resultado)
+- busca por UF sem índice lê só o shard da UF; atualização regrava só os
+  shards que mudaram; shard ausente cai no dataset nacional
+
+Uso:
+    python test_pncp_search_index.py
+"""
+
+import os
+import sys
+import json
+import random
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'scripts'))
+
+from fake_pncp_server import make_records
+from adapters.pncp_search_corpus import SearchCorpus, normalize_terms, normalize_text, record_search_text
+
+WORDS = ["aquisição", "computadores", "notebook", "microcomputador", "ar-condicionado", "split", "manutenção",
+         "preventiva", "medicamentos", "saúde", "São José", "limpeza", "material", "de", "e", "para", "veículos",
+         "4x4", "pick-up", "ME/EPP", "lote", "único", "merenda", "escolar", "gêneros", "alimentícios", "Nº 12/2025"]
+def build_records(count: int, rng: random.Random) -> list:
+    records = make_records(count, start=datetime.now() - timedelta(days=10), days=10, seed=5)
+    for record in records:
+        record['objetoCompra'] = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(0, 8)))
+        if rng.random() < 0.5:
+            # Vocabulário maior: códigos e palavras inventadas
+            record['objetoCompra'] += f" - processo {rng.randint(1, 5000)}/{rng.choice(['2024', '2025'])} " + \
+                ''.join(rng.choice('abcdeiou') for _ in range(rng.randint(3, 9)))
+        record['objetoDetalhado'] = rng.choice([None, '', ' '.join(rng.sample(WORDS, 4))])
+        record['informacaoComplementar'] = rng.choice([None, 'Exclusivo ME/EPP', 'Sessão às 09h'])
+        record['valorTotalEstimado'] = rng.choice([None, 'n/d', round(rng.uniform(0, 1e6), 2)])
+    return records
+
+
+def random_terms(texts: list, rng: random.Random, count: int) -> list:
+    """Pedaços dos textos (cruzando tokens), palavras soltas e termos que não existem"""
+    terms = []
+    for _ in range(count):
+        kind = rng.random()
+        text = rng.choice(texts)
+        if kind < 0.6 and len(text) > 2:
+            start = rng.randrange(len(text) - 1)
+            terms.append(text[start:start + rng.randint(1, 25)])
+        elif kind < 0.9:
+            terms.append(' '.join(rng.sample(WORDS, rng.randint(1, 3))))
+        else:
+            terms.append(rng.choice(['xyz', 'q', 'zz top', 'computadores notebook lote', '  ', '-']))
+    return terms
+
+
+def test_keywords_match_substring_scan():
+    rng = random.Random(1)
+    records = build_records(3000, rng)
+    corpus = SearchCorpus(records)
+    texts = [record_search_text(record) for record in records]
+    checked = 0
+    for raw in random_terms(texts, rng, 3000):
+        terms = normalize_terms([raw, rng.choice(WORDS)] if rng.random() < 0.3 else [raw])
+        expected = np.array([any(term in text for term in terms) for text in texts])
+        got = corpus.match_any(terms)
+        assert np.array_equal(got, expected), (raw, terms, np.flatnonzero(got ^ expected)[:5])
+        checked += 1
+    print(f"✅ Índice invertido igual à varredura de substrings em {checked} consultas "
+          f"({len(corpus._vocab)} tokens no vocabulário)")
+
+
+def test_column_filters():
+    rng = random.Random(2)
+    records = build_records(2000, rng)
+    records[0]['unidadeOrgao'] = None
+    corpus = SearchCorpus(records)
+
+    def value(record):
+        try:
+            return float(record['valorTotalEstimado'])
+        except (TypeError, ValueError):
+            return None
+
+    uf = lambda record: ((record.get('unidadeOrgao') or {}).get('ufSigla') or '').upper()
+    municipio = lambda record: normalize_text((record.get('unidadeOrgao') or {}).get('municipioNome') or '')
+    cases = [
+        (corpus.mask_uf('sp'), lambda record: uf(record) == 'SP'),
+        (corpus.mask_municipio('Município 1'), lambda record: 'municipio 1' in municipio(record)),
+        (corpus.mask_value(minimum=250000), lambda record: value(record) is not None and value(record) >= 250000),
+        (corpus.mask_value(maximum=1000), lambda record: value(record) is not None and value(record) <= 1000),
+    ]
+    for mask, keep in cases:
+        assert np.array_equal(mask, np.array([keep(record) for record in records]))
+    print(f"✅ Filtros de UF, município e valor iguais aos filtros registro a registro ({len(cases)} casos)")
+
+
+class CountingRedis:
+    """Só o que o PNCPAdapter usa do cliente Redis, contando leituras do dataset (blob e shards)"""
+
+    def __init__(self):
+        self.data, self.written = {}, []
+        self.blob_reads, self.shard_reads, self.bytes_read = 0, 0, 0
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        values = [self.data.get(key) for key in keys]
+        if any(':uf:' in key for key in keys):
+            self.shard_reads += 1
+        else:
+            self.blob_reads += 1
+        self.bytes_read += sum(len(value) for value in values if value)
+        return values
+
+    def setex(self, key, ttl, value):
+        self.written.append(key)
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def expire(self, key, ttl):
+        return int(key in self.data)
+
+    def pipeline(self, transaction=True):
+        redis_client, calls = self, []
+
+        class Pipeline:
+            def __getattr__(self, name):
+                return lambda *args: calls.append((name, args))
+
+            def execute(self):
+                return [getattr(redis_client, name)(*args) for name, args in calls]
+
+        return Pipeline()
+
+
+def new_adapter():
+    from adapters.pncp_adapter import PNCPAdapter
+    adapter = PNCPAdapter({'api_base_url': 'http://127.0.0.1:9/v1'})
+    adapter.redis_client, adapter.cache_ttl, adapter.openai_service = CountingRedis(), 3600, None
+    return adapter
+
+
+def build_dataset(count: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    records = build_records(count, rng)
+    for record in records:
+        record['valorTotalEstimado'] = round(rng.uniform(1000, 1e6), 2)
+    now = datetime.now().isoformat(timespec='seconds')
+    return {'data': records, 'total': len(records), 'watermark': now, 'synced_at': now,
+            'last_full_sync_at': now, 'last_sync': {'mode': 'full'}}
+
+
+def search_ids(adapter, **filters) -> set:
+    from interfaces.procurement_data_source import SearchFilters
+    opportunities = asyncio.run(adapter.search_opportunities(SearchFilters(**filters)))
+    return {opportunity.external_id for opportunity in opportunities}
+
+
+def test_adapter_reuses_index():
+    from adapters.pncp_adapter import PNCP_DATASET_VERSION_KEY
+    from adapters import pncp_search_corpus
+
+    dataset = build_dataset(1500, seed=3)
+    records = dataset['data']
+    adapter = new_adapter()
+    adapter._write_dataset_cache(dataset)
+    assert json.loads(adapter.redis_client.data[PNCP_DATASET_VERSION_KEY])['watermark'] == dataset['watermark']
+    pncp_search_corpus._corpora.clear()
+
+    texts = [record_search_text(record) for record in records]
+    expected = {record['numeroControlePNCP'] for record, text in zip(records, texts)
+                if ('manutencao preventiva' in text or 'manutencao' in text or 'preventiva' in text)
+                and record['valorTotalEstimado'] >= 10000}
+
+    for search in range(3):
+        assert search_ids(adapter, keywords='manutenção preventiva', min_value=10000) == expected
+    # Modalidade não é filtrada localmente (como antes do índice)
+    assert search_ids(adapter, keywords='manutenção preventiva', min_value=10000,
+                      procurement_type='pregao_eletronico') == expected
+    assert adapter.redis_client.blob_reads == 1, adapter.redis_client.blob_reads
+    first_index = dict(pncp_search_corpus._corpora)
+
+    # Nova versão gravada por outro worker: relê e reconstrói o índice uma vez
+    dataset['synced_at'] = datetime.now().isoformat(timespec='seconds') + '.1'
+    dataset['data'] = records[:500]
+    adapter._write_dataset_cache(dataset)
+    for search in range(2):
+        ids = search_ids(adapter, keywords='manutenção preventiva', min_value=10000)
+    assert adapter.redis_client.blob_reads == 2 and set(pncp_search_corpus._corpora) != set(first_index)
+    assert ids == {record['numeroControlePNCP'] for record in records[:500]} & expected
+    print(f"✅ Buscas com índice da mesma versão não leem o dataset; versão nova reconstrói ({len(expected)} resultados)")
+
+
+def test_matches_legacy_filters():
+    from benchmark_pncp_local_filters import legacy_apply_local_filters, legacy_normalizar
+
+    dataset = build_dataset(800, seed=5)
+    adapter = new_adapter()
+    adapter._legacy_normalizar = legacy_normalizar
+    cases = [
+        {'keywords': 'manutenção preventiva', 'region_code': 'SP'},
+        {'keywords': '"merenda escolar" OR "gêneros alimentícios"', 'max_value': 500000.0},
+        # Keywords sem nenhum termo válido: nenhum resultado, não o dataset inteiro
+        {'keywords': '-'},
+        {'keywords': '"" OR ""'},
+        {'keywords': '-', 'region_code': 'RJ'},
+    ]
+    for filters in cases:
+        expected = {record['numeroControlePNCP']
+                    for record in legacy_apply_local_filters(adapter, dataset['data'], filters)}
+        found = {record['numeroControlePNCP'] for record in adapter._apply_local_filters(dataset['data'], filters)}
+        assert found == expected, (filters, len(found), len(expected))
+    print(f"✅ _apply_local_filters igual ao filtro anterior ({len(cases)} casos, incluindo keywords sem termo válido)")
+
+
+def test_dataset_shards():
+    from adapters.pncp_adapter import PNCP_DATASET_VERSION_KEY, _dataset_shard_key
+    from adapters import pncp_search_corpus
+
+    dataset = build_dataset(3000, seed=4)
+    adapter = new_adapter()
+    redis_client = adapter.redis_client
+    adapter._write_dataset_cache(dataset)
+    manifest = json.loads(redis_client.data[PNCP_DATASET_VERSION_KEY])
+    assert sum(entry['records'] for entry in manifest['shards'].values()) == len(dataset['data'])
+    blob_bytes = len(redis_client.data.get('pncp:dataset:proposta:8:gz') or redis_client.data['pncp:dataset:proposta:8'])
+
+    # Worker sem índice: busca por UF lê só o shard dela, com o mesmo resultado do dataset nacional
+    pncp_search_corpus._corpora.clear()
+    filters = {'keywords': 'material de limpeza', 'region_code': 'sp'}
+    ids = search_ids(adapter, **filters)
+    assert (redis_client.shard_reads, redis_client.blob_reads) == (1, 0)
+    shard_bytes = redis_client.bytes_read
+    assert shard_bytes < blob_bytes / 10, (shard_bytes, blob_bytes)
+    assert search_ids(adapter, **filters) == ids and redis_client.shard_reads == 1  # índice parcial reaproveitado
+    pncp_search_corpus._corpora.clear()
+    assert search_ids(adapter, keywords='material de limpeza') >= ids and redis_client.blob_reads == 1
+    assert search_ids(adapter, **filters) == ids and redis_client.shard_reads == 1  # índice nacional serve a UF
+    print(f"✅ Busca por UF sem índice lê 1 shard ({shard_bytes} bytes de {blob_bytes} do dataset), mesmo resultado")
+
+    # Atualização que só mexe no RJ: só o shard do RJ é regravado
+    rj = next(record for record in dataset['data'] if record['unidadeOrgao']['ufSigla'] == 'RJ')
+    rj['objetoCompra'] = 'Aquisição de material de limpeza retificada'
+    dataset['synced_at'] = datetime.now().isoformat(timespec='seconds') + '.2'
+    redis_client.written.clear()
+    adapter._write_dataset_cache(dataset)
+    shard_writes = [key for key in redis_client.written if ':uf:' in key]
+    assert shard_writes == [_dataset_shard_key('RJ')], shard_writes
+    pncp_search_corpus._corpora.clear()
+    assert rj['numeroControlePNCP'] in search_ids(adapter, keywords='limpeza retificada', region_code='RJ')
+    print(f"✅ Atualização só no RJ regrava 1 de {len(manifest['shards'])} shards")
+
+    # Shard despejado do Redis: cai no dataset nacional
+    del redis_client.data[_dataset_shard_key('MG')]
+    pncp_search_corpus._corpora.clear()
+    blob_reads = redis_client.blob_reads
+    expected = {record['numeroControlePNCP'] for record in dataset['data']
+                if record['unidadeOrgao']['ufSigla'] == 'MG' and 'saude' in record_search_text(record)}
+    assert search_ids(adapter, keywords='saúde', region_code='MG') == expected
+    assert redis_client.blob_reads == blob_reads + 1
+    adapter._write_dataset_cache(dataset)
+    assert _dataset_shard_key('MG') in redis_client.data  # regravado mesmo sem mudança
+    print("✅ Shard ausente: busca usa o dataset nacional e a próxima gravação o repõe")
+
+
+def main():
+    print("🧪 TESTE DO ÍNDICE DE BUSCA DO DATASET DO PNCP")
+    print("=" * 50)
+    test_keywords_match_substring_scan()
+    test_column_filters()
+    test_adapter_reuses_index()
+    test_matches_legacy_filters()
+    test_dataset_shards()
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+🧪 Teste da inicialização preguiçosa do BrazilianTextVectorizer
+Sem modelos reais e sem rede:
+- construir os vetorizadores não abre conexões (Redis, HuggingFace, Voyage,
+  OpenAI, Postgres) nem carrega modelos
+- cada backend é carregado no primeiro uso, uma vez por processo
+  (instância compartilhada entre vetorizadores)
+- backend que falha ao carregar é pulado; o mock só entra se nenhum real carregar
+- warm_up() carrega tudo e roda os testes de saúde (API que falha fica de fora)
+
+Uso:
+    python test_vectorizer_lazy_init.py
+"""
+
+import os
+import sys
+import socket
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+# Todos os fallbacks configurados: nenhum deve ser contatado na construção
+os.environ.setdefault('VOYAGE_API_KEY', 'teste')
+os.environ.setdefault('OPENAI_API_KEY', 'teste')
+os.environ.setdefault('HUGGINGFACE_API_KEY', 'teste')
+
+from matching.vectorizers import BrazilianTextVectorizer, HybridTextVectorizer, get_vectorizer_backend
+from matching.improved_vectorizers import ImprovedBrazilianTextVectorizer
+
+
+@contextmanager
+def network_guard():
+    """Registra (e bloqueia) qualquer tentativa de conexão ou resolução de nome"""
+    attempts = []
+    originals = (socket.socket.connect, socket.socket.connect_ex, socket.create_connection, socket.getaddrinfo)
+
+    def blocked(name):
+        def call(*args, **kwargs):
+            attempts.append((name, args[1:] if name.startswith('socket.') else args))
+            raise OSError(f"rede bloqueada no teste: {name}")
+        return call
+
+    socket.socket.connect = blocked('socket.connect')
+    socket.socket.connect_ex = blocked('socket.connect_ex')
+    socket.create_connection = blocked('create_connection')
+    socket.getaddrinfo = blocked('getaddrinfo')
+    try:
+        yield attempts
+    finally:
+        socket.socket.connect, socket.socket.connect_ex, socket.create_connection, socket.getaddrinfo = originals
+
+
+class FakeCache:
+    """Cache sem Redis: sempre miss"""
+
+    def multi_model_get_embeddings(self, texts, model_names):
+        return {}
+
+    def save_embedding_to_cache(self, text, embedding, model_name):
+        return True
+
+    def batch_save_embeddings_to_cache(self, texts_and_embeddings, model_name):
+        return True
+
+
+class FakeLocalModel:
+    def __init__(self, value):
+        self.value = value
+
+    def generate_embeddings(self, texts):
+        return [[self.value, float(len(text))] for text in texts]
+
+    def generate_single_embedding(self, text):
+        return self.generate_embeddings([text])[0]
+
+    def get_model_info(self):
+        return {'dimensions': 2}
+
+
+class FakeApi:
+    def generate_single_embedding(self, text):
+        return [0.1] * 10  # dimensão inválida: teste de saúde falha
+
+
+def counting_factory(factory):
+    def create():
+        create.calls += 1
+        return factory()
+    create.calls = 0
+    return create
+
+
+def test_construction_without_network():
+    with network_guard() as attempts:
+        vectorizers = [BrazilianTextVectorizer(), HybridTextVectorizer(), ImprovedBrazilianTextVectorizer('balanced')]
+        status = vectorizers[0].get_brazilian_status()
+
+    assert attempts == [], attempts
+    names = [name for name, _ in vectorizers[0].vectorizers]
+    assert names == ['neuralmind-local', 'neuralmind-api', 'multilingual-local', 'voyage-ai', 'openai', 'mock']
+    assert not any(backend.loaded for _, backend in vectorizers[0].vectorizers)
+    assert status['total_brazilian'] == 3 and not status['brazilian_systems']['neuralmind-local']['loaded']
+    # Nem o torch/sentence-transformers foi importado
+    assert 'services.sentence_transformer_service' not in sys.modules
+    # Backends compartilhados entre vetorizadores
+    assert all(v.neuralmind_local is vectorizers[0].neuralmind_local for v in vectorizers)
+    print("✅ Construção sem rede e sem carregar modelos")
+    return vectorizers
+
+
+def test_loaded_on_first_use(vectorizers):
+    local = get_vectorizer_backend('neuralmind-local')
+    api = get_vectorizer_backend('neuralmind-api')
+    mock = get_vectorizer_backend('mock')
+    local._factory = counting_factory(lambda: FakeLocalModel(1.0))
+    api._factory = counting_factory(lambda: FakeApi())
+
+    for vectorizer in vectorizers:
+        vectorizer.cache_service = FakeCache()
+
+    with network_guard() as attempts:
+        first = vectorizers[0].batch_vectorize(["Aquisição de material de limpeza", "Serviços de TI"])
+        second = vectorizers[1].vectorize("Locação de veículos")
+
+    assert attempts == [], attempts
+    assert [e[0] for e in first] == [1.0, 1.0] and second[0] == 1.0
+    assert local._factory.calls == 1 and local.loaded
+    # Backends de menor prioridade continuam sem carregar
+    assert api._factory.calls == 0 and not get_vectorizer_backend('multilingual-local').loaded
+    assert not mock.loaded
+    print("✅ Backend carregado no primeiro uso, uma vez por processo")
+
+
+def test_failed_backend_skipped(vectorizers):
+    local = get_vectorizer_backend('neuralmind-local')
+    multilingual = get_vectorizer_backend('multilingual-local')
+
+    # Principal falha ao carregar: cai no próximo disponível, sem tentar de novo a cada texto
+    def broken():
+        raise OSError("modelo não encontrado")
+    local._instance, local._factory = None, counting_factory(broken)
+    get_vectorizer_backend('neuralmind-api')._factory = counting_factory(broken)
+    for name in ('voyage-ai', 'openai'):
+        get_vectorizer_backend(name)._factory = counting_factory(broken)
+    multilingual._factory = counting_factory(lambda: FakeLocalModel(3.0))
+
+    embeddings = vectorizers[0].batch_vectorize(["Aquisição de pneus", "Reforma de escola"])
+    embeddings += [vectorizers[0].vectorize("Merenda escolar")]
+    assert [e[0] for e in embeddings] == [3.0, 3.0, 3.0]
+    assert local._factory.calls == 1 and local.failed
+    assert not get_vectorizer_backend('mock').loaded
+    print("✅ Backend que falha é pulado (sem nova tentativa a cada texto)")
+
+
+def test_warm_up(vectorizers):
+    api = get_vectorizer_backend('neuralmind-api')
+    api._error, api._factory = None, counting_factory(lambda: FakeApi())
+    get_vectorizer_backend('neuralmind-local')._error = None
+    get_vectorizer_backend('neuralmind-local')._factory = counting_factory(lambda: FakeLocalModel(1.0))
+
+    status = vectorizers[0].warm_up()
+    assert api._factory.calls == 1 and api.failed and not api.loaded
+    assert status['brazilian_systems']['neuralmind-local']['loaded']
+    assert not status['brazilian_systems']['neuralmind-api']['available']
+    assert status['brazilian_systems']['multilingual-local']['dimensions'] == 2
+    print("✅ warm_up carrega os backends e tira do ar a API que falha no teste de saúde")
+
+
+def main():
+    print("🧪 TESTE DA INICIALIZAÇÃO PREGUIÇOSA DOS VETORIZADORES")
+    print("=" * 50)
+    vectorizers = test_construction_without_network()
+    test_loaded_on_first_use(vectorizers)
+    test_failed_backend_skipped(vectorizers)
+    test_warm_up(vectorizers)
+    print("\n🎉 Todos os testes passaram")
+
+
+if __name__ == '__main__':
+    main()